@@ -0,0 +1,115 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Stress benchmark of the Consul locks
+
+Worker processes do lock protected read-modify-write of Consul keys,
+either all with the global lock or each with the lock of its own
+record, and the write throughput and the lock contention are reported
+for each number of workers.
+
+Usage(requires a running Consul agent):
+$ python -m benchmarks.bench_consul_lock --workers 1 2 4 8 --writes 50
+"""
+
+import argparse
+from multiprocessing import Pool
+
+from benchmarks.utils import print_table, Timer
+from services.api.storage_plugin.consul_io.consul_io import ConsulIO
+
+LOCK_NAME = 'bench_lock'
+KEY_PREFIX = 'bench_lock/'
+
+
+def write_records(args):
+    """Worker of the benchmark
+
+    Args:
+        args (tuple): lock mode, worker id and number of writes
+
+    Returns:
+        dict: lock metrics of the worker
+    """
+    mode, worker_id, writes = args
+    plugin = ConsulIO()
+    key = KEY_PREFIX + str(worker_id)
+
+    for _ in range(writes):
+        if mode == 'global':
+            session_id = plugin.create_session(LOCK_NAME)
+        else:
+            session_id = plugin.create_session(LOCK_NAME, str(worker_id))
+
+        try:
+            count = plugin.get_kv(key)
+            plugin.put_kv(key, str(int(count or 0) + 1))
+        finally:
+            plugin.destroy_session(session_id)
+
+    return plugin.lock_metrics[LOCK_NAME]
+
+
+def run(mode, workers, writes):
+    """Run the workers and aggregate their lock metrics
+
+    Returns:
+        list: row of the results table
+    """
+    pool = Pool(workers)
+    try:
+        with Timer() as timer:
+            results = pool.map(write_records,
+                               [(mode, i, writes) for i in range(workers)])
+    finally:
+        pool.close()
+        pool.join()
+
+    acquired = sum(result['acquired'] for result in results)
+    contended = sum(result['contended'] for result in results)
+    wait_time = sum(result['wait_time'] for result in results)
+
+    return [mode,
+            workers,
+            '%.1f' % (workers * writes / timer.elapsed),
+            '%.1f' % (100.0 * contended / acquired),
+            '%.2f' % (wait_time * 1000 / acquired),
+            '%.2f' % (max(result['max_wait_time'] for result in results) *
+                      1000),
+            sum(result['timeouts'] for result in results)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help="Number of worker processes to benchmark")
+    parser.add_argument('--writes', type=int, default=50,
+                        help="Number of writes per worker")
+    args = parser.parse_args()
+
+    rows = []
+    try:
+        for mode in ('global', 'per-record'):
+            for workers in args.workers:
+                rows.append(run(mode, workers, args.writes))
+    finally:
+        ConsulIO().delete_kv(KEY_PREFIX, recurse=True)
+
+    print_table(['Lock', 'Workers', 'Writes/s', 'Contended %',
+                 'Avg wait ms', 'Max wait ms', 'Timeouts'], rows)
+
+
+if __name__ == '__main__':
+    main()
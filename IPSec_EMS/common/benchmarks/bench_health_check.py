@@ -0,0 +1,186 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Benchmark of the IPsecEnforcer health check
+
+Measures the time, the storage backend requests and the HTTP connections
+of a health check of a fake IPsecEnforcer fleet, with two workers
+sending heartbeat messages without timeout and storing the heartbeat
+miss count of every IPsecEnforcer, and with IPsecEnforcerHealthCheck.
+
+The fake fleet is a local HTTP server answering the heartbeat messages
+of all the IPsecEnforcers. The 'down' IPsecEnforcers answer with an
+error, and the 'hung' IPsecEnforcers answer after a delay, as a host
+which does not respond in time.
+
+Usage(requires a running Consul agent, unless another storage backend
+is selected e.g. IPSECEMS_STORAGE_BACKEND=Memory):
+$ python -m benchmarks.bench_health_check --enforcers 1000 --hung 5
+"""
+
+import argparse
+import BaseHTTPServer
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+import SocketServer
+import time
+
+import requests
+
+from benchmarks.utils import (
+    print_table, setup_django, StorageCallCounter, Timer
+)
+
+setup_django()
+
+from services.api import storage
+from services.ipsecenforcer import health_check_process, send_notification
+from services.ipsecenforcer.register_deregister import (
+    HeartbeatMissOfIPsecEnforcer
+)
+from services.ipsecenforcer.utils import consul_key_join
+
+
+class FleetHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    # Keep the connections alive
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        with self.server.connections.get_lock():
+            self.server.connections.value += 1
+
+    def do_GET(self):
+        ipsecenforcer_id = self.path.rstrip('/').rsplit('/', 1)[-1]
+
+        if ipsecenforcer_id.startswith('hung'):
+            time.sleep(self.server.hang)
+
+        status = 503 if ipsecenforcer_id.startswith('down') else 200
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeFleet(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """HTTP server answering the heartbeat messages of all the fake
+    IPsecEnforcers, in a separate process"""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, hang):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0),
+                                           FleetHandler)
+        self.hang = hang
+        self.connections = multiprocessing.Value('i', 0)
+        self.process = multiprocessing.Process(target=self.serve_forever)
+
+    def handle_error(self, request, client_address):
+        # The client closes the connection of a late answer
+        pass
+
+    def __enter__(self):
+        self.process.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        self.process.join()
+        self.server_close()
+
+
+def per_enforcer_check(fqdn_enforcer):
+    """Heartbeat message without timeout, followed by the read and the
+    write of the heartbeat miss count of the IPsecEnforcer"""
+    fqdn, ipsecenforcer_id = fqdn_enforcer
+    key = consul_key_join('bench_heartbeat_miss', ipsecenforcer_id)
+
+    try:
+        response = requests.get(send_notification.IPsecEnforcerNotify
+                                .prepare_url(fqdn, ipsecenforcer_id,
+                                             url_endpoint='heartbeat'))
+        success = response.status_code == 200
+    except requests.exceptions.ConnectionError:
+        success = False
+
+    count = int(storage.plugin.get_kv(key) or 0)
+    storage.plugin.put_kv(key, str(0 if success else count + 1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--enforcers', type=int, default=1000,
+                        help="Number of IPsecEnforcer(s)")
+    parser.add_argument('--down', type=int, default=50,
+                        help="Number of IPsecEnforcer(s) answering with "
+                             "an error")
+    parser.add_argument('--hung', type=int, default=5,
+                        help="Number of IPsecEnforcer(s) answering late")
+    parser.add_argument('--hang', type=float, default=3,
+                        help="Delay(seconds) of the late answers")
+    parser.add_argument('--concurrency', type=int, default=100,
+                        help="Concurrency of IPsecEnforcerHealthCheck")
+    parser.add_argument('--timeout', type=float, default=1,
+                        help="Read timeout(seconds) of "
+                             "IPsecEnforcerHealthCheck")
+    args = parser.parse_args()
+
+    fqdn_enforcer_list = (
+        [('127.0.0.1', 'down-%06d' % i) for i in range(args.down)] +
+        [('127.0.0.1', 'hung-%06d' % i) for i in range(args.hung)] +
+        [('127.0.0.1', 'up-%06d' % i)
+         for i in range(args.enforcers - args.down - args.hung)]
+    )
+
+    health_check = health_check_process.IPsecEnforcerHealthCheck(
+            concurrency=args.concurrency, timeout=(1, args.timeout))
+    legacy_pool = ThreadPool(2)
+
+    rows = []
+    with FakeFleet(args.hang) as fleet:
+        send_notification.IPSECENFORCER_PORT = fleet.server_address[1]
+
+        try:
+            # Every mode checks the fleet twice, the second check reuses
+            # the kept alive connections
+            for name, check in (
+                    ('2 workers, per-enforcer counts',
+                     lambda: legacy_pool.map(per_enforcer_check,
+                                             fqdn_enforcer_list)),
+                    ('IPsecEnforcerHealthCheck',
+                     lambda: health_check.check_ipsecenforcers_health(
+                             fqdn_enforcer_list))):
+                for sweep in (1, 2):
+                    connections = fleet.connections.value
+                    with StorageCallCounter(storage.plugin) as counter:
+                        with Timer() as timer:
+                            check()
+                    rows.append([name, sweep, '%.2f' % timer.elapsed,
+                                 counter.total,
+                                 fleet.connections.value - connections])
+        finally:
+            storage.plugin.delete_kv('bench_heartbeat_miss/', recurse=True)
+            storage.plugin.delete_kv(HeartbeatMissOfIPsecEnforcer.key)
+
+    print_table(['Mode', 'Check', 'Seconds', 'Storage calls',
+                 'New connections'], rows)
+
+
+if __name__ == '__main__':
+    main()
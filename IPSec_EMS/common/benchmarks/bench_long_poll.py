@@ -0,0 +1,208 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Load test of the blocking requests of the IPsecEnforcer configuration
+
+Every simulated IPsecEnforcer agent waits for a newer config version in
+a thread, the same way as the blocking GET request of its
+configuration(?index=<config version>&wait=<seconds>s). Then the config
+version of every IPsecEnforcer is incremented. The latency is the time
+from the increment of the config version of an IPsecEnforcer to the end
+of its wait.
+
+With --requests, the agents send the blocking GET requests over HTTP
+to a threaded WSGI server running the IPsec EMS application in the
+benchmark process, or to the IPsec EMS server at --url(sharing the
+storage backend, e.g. Consul). So the latency includes the preparation
+of the configuration, and a waiting request holds a thread of the
+server, as in the deployment. The requests above LONG_POLL_MAX_WAITERS
+are rejected with 503.
+
+The benchmark uses the topology of bench_prepare_config, and deletes
+the created records at the end.
+
+Usage(requires a running Consul agent, unless another storage backend
+is selected e.g. IPSECEMS_STORAGE_BACKEND=Memory):
+$ python -m benchmarks.bench_long_poll --groups 10 --enforcers 200
+$ python -m benchmarks.bench_long_poll --requests --url http://ems:8000
+"""
+
+import argparse
+import SocketServer
+import threading
+import time
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+import requests
+
+from benchmarks.utils import print_table, setup_django, Timer
+
+setup_django()
+
+from django.core.wsgi import get_wsgi_application
+
+from benchmarks.bench_prepare_config import Topology
+from services.ipsecenforcer.register_deregister import IPsecEnforcerInfo
+
+PATH = '/v1/main/ipsecvpn/ipsecenforcerregistrations/%s/'
+
+
+class ThreadingWSGIServer(SocketServer.ThreadingMixIn, WSGIServer):
+    """WSGI server with a thread per request, as 'manage.py
+    runserver'"""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def start_server():
+    """Serve the IPsec EMS application in a thread
+
+    Returns:
+        str: URL of the server
+    """
+    server = ThreadingWSGIServer(('127.0.0.1', 0), QuietHandler)
+    server.set_app(get_wsgi_application())
+
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return 'http://127.0.0.1:%d' % server.server_address[1]
+
+
+class Agent(threading.Thread):
+    """Simulated IPsecEnforcer agent waiting for a newer config
+    version"""
+
+    def __init__(self, ipsecenforcer_id, config_version, wait, waiting,
+                 url):
+        super(Agent, self).__init__()
+        self.daemon = True
+        self.ipsecenforcer_id = ipsecenforcer_id
+        self.config_version = config_version
+        self.wait = wait
+        self.waiting = waiting
+        self.url = url
+        self.published = None
+        self.completed = None
+        self.response_version = None
+        self.status_code = None
+
+    def run(self):
+        self.waiting.release()
+
+        if self.url:
+            response = requests.get(self.url + PATH % self.ipsecenforcer_id,
+                                    params={'index': self.config_version,
+                                            'wait': '%ds' % self.wait},
+                                    timeout=self.wait + 30)
+            self.status_code = response.status_code
+            if response.status_code == requests.codes.ok:
+                self.response_version = response.json().get('version')
+        else:
+            self.response_version = (
+                IPsecEnforcerInfo.wait_ipsecenforcer_config_version(
+                        self.ipsecenforcer_id, self.config_version,
+                        self.wait)
+            )
+        self.completed = time.time()
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100.0))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--groups', type=int, default=10,
+                        help="Number of VPNEndpointGroup(s)")
+    parser.add_argument('--enforcers', type=int, default=200,
+                        help="Number of IPsecEnforcer(s) per group")
+    parser.add_argument('--wait', type=int, default=120,
+                        help="Wait time(seconds) of the blocking requests")
+    parser.add_argument('--requests', action='store_true',
+                        help="Send the blocking GET requests")
+    parser.add_argument('--url',
+                        help="URL of the IPsec EMS server of the requests, "
+                             "by default served by the benchmark")
+    args = parser.parse_args()
+
+    url = None
+    if args.requests:
+        url = args.url or start_server()
+
+    # Thousands of threads with a small stack each
+    threading.stack_size(256 * 1024)
+
+    topology = Topology(args.groups, args.enforcers)
+    topology.create()
+
+    try:
+        # The config version known to the agents
+        agents = []
+        waiting = threading.Semaphore(0)
+        for group, enforcer in topology.enforcers:
+            config_version, _ = (
+                IPsecEnforcerInfo().update_ipsecenforcer_config_version(
+                        enforcer.id, 'bench_hash_1')
+            )
+            agents.append(Agent(enforcer.id, config_version, args.wait,
+                                waiting, url))
+
+        for agent in agents:
+            agent.start()
+        for agent in agents:
+            waiting.acquire()
+
+        # Let the last requests reach the wait
+        time.sleep(1)
+
+        with Timer() as publish_timer:
+            for agent in agents:
+                IPsecEnforcerInfo().update_ipsecenforcer_config_version(
+                        agent.ipsecenforcer_id, 'bench_hash_2')
+                agent.published = time.time()
+
+        for agent in agents:
+            agent.join(args.wait + 10)
+
+        completed = [agent for agent in agents
+                     if agent.response_version > agent.config_version]
+        latencies = [(agent.completed - agent.published) * 1000
+                     for agent in completed]
+
+        rows = [['Waiting agents', len(agents)],
+                ['Updated agents', len(completed)],
+                ['Rejected agents(503)',
+                 len([agent for agent in agents
+                      if agent.status_code == 503])],
+                ['Publish seconds', '%.2f' % publish_timer.elapsed]]
+        if latencies:
+            rows.extend([['Latency p50 ms', '%.1f' % percentile(latencies, 50)],
+                         ['Latency p99 ms', '%.1f' % percentile(latencies, 99)],
+                         ['Latency max ms', '%.1f' % max(latencies)]])
+        print_table(['Metric', 'Value'], rows)
+    finally:
+        topology.delete()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Benchmark of the IPsecEnforcer configuration preparation
+
+Counts the storage backend requests and measures the time taken
+to prepare the VPN configuration of an IPsecEnforcer, with the
+per-record fetches and with the bulk(batched by id) fetches. Also
+compares the size of the complete configuration with the size of the
+configuration changes returned to an up to date IPsecEnforcer.
+
+The benchmark creates a ring of VPNEndpointGroup(s), where every group
+is bound to the next group with a VPNBindGroupToGroup record, and
+registers IPsecEnforcer(s) with every group. All the created records
+are deleted at the end of the benchmark.
+
+Usage(requires a running Consul agent, unless another storage backend
+is selected e.g. IPSECEMS_STORAGE_BACKEND=SQLite):
+$ python -m benchmarks.bench_prepare_config --groups 10 --enforcers 20
+"""
+
+import argparse
+import copy
+import json
+
+from benchmarks.utils import (
+    print_table, setup_django, StorageCallCounter, Timer
+)
+
+setup_django()
+
+from services.api import storage
+from services.api.serializers.serializers_enforcer_registration import (
+    IPsecEnforcerRegistration
+)
+from services.api.serializers.serializers_ikepolicy import IKEPolicy
+from services.api.serializers.serializers_ipsecpolicy import IPsecPolicy
+from services.api.serializers.serializers_vpnbind_group_to_group import (
+    VPNBindGroupToGroup
+)
+from services.api.serializers.serializers_vpnendpointgroup import (
+    VPNEndpointGroup
+)
+from services.api.serializers.utils_serializers import generate_uuid
+from services.ipsecenforcer.config_snapshot import IPsecEnforcerConfigSnapshot
+from services.ipsecenforcer.prepare_vpn_configuration import (
+    IPsecEnforcerConfig
+)
+from services.ipsecenforcer.register_deregister import (
+    IPsecEnforcerInfo, RELATION_IPSECENFORCER
+)
+
+
+class Topology(object):
+    """Benchmark records in the storage backend"""
+
+    def __init__(self, groups, enforcers):
+        self.ikepolicy = IKEPolicy(
+                id=generate_uuid(),
+                name='bench_ikepolicy',
+                description='',
+                ike_version='v2',
+                encryption_algorithm=['aes128'],
+                integrity_algorithm=['sha1'],
+                dh_group=['modp1536'],
+                phase1_negotiation_mode='main',
+                lifetime_value=3600,
+                lifetime_units='seconds',
+                rekey='yes',
+                reauth='yes')
+
+        self.ipsecpolicy = IPsecPolicy(
+                id=generate_uuid(),
+                name='bench_ipsecpolicy',
+                description='',
+                transform_protocol='esp',
+                encryption_algorithm=['aes128'],
+                integrity_algorithm=['sha1'],
+                dh_group=['modp1536'],
+                esn_mode='noesn',
+                encapsulation_mode='tunnel',
+                lifetime_value=3600,
+                lifetime_units='seconds')
+
+        self.groups = [VPNEndpointGroup(id=generate_uuid(),
+                                        name='bench_group_%d' % i,
+                                        description='',
+                                        vpncertificate_id='')
+                       for i in range(groups)]
+
+        self.binds = []
+        for i, group in enumerate(self.groups):
+            peer_group = self.groups[(i + 1) % groups]
+            self.binds.append(VPNBindGroupToGroup(
+                    id=generate_uuid(),
+                    name='bench_bind_%d' % i,
+                    description='',
+                    vpnendpointgroup_id=group.id,
+                    peer_vpnendpointgroup_id=peer_group.id,
+                    admin_state_up=True,
+                    dpd_action='hold',
+                    dpd_interval=30,
+                    dpd_timeout=120,
+                    auth_mode='psk',
+                    psk='',
+                    initiator='bi-directional',
+                    ikepolicy_id=self.ikepolicy.id,
+                    ipsecpolicy_id=self.ipsecpolicy.id))
+
+        self.enforcers = []
+        for i, group in enumerate(self.groups):
+            for j in range(enforcers):
+                self.enforcers.append((group, IPsecEnforcerRegistration(
+                        id=generate_uuid(),
+                        description='',
+                        endpoint_name=[group.name],
+                        endpoint_type=['group'],
+                        instance_id='',
+                        fqdn='10.%d.%d.1' % (i, j),
+                        fqdn_tunnel='10.%d.%d.2' % (i, j),
+                        macaddress='')))
+
+    def create(self):
+        records = [self.ikepolicy, self.ipsecpolicy] + self.groups + self.binds
+        for record in records:
+            record.save()
+
+        for group, enforcer in self.enforcers:
+            IPsecEnforcerInfo.put_ipsecenforcer_to_vpnendpoint_map(
+                    enforcer.id,
+                    {'endpoint_id': group.id, 'endpoint_type': 'group'})
+            IPsecEnforcerInfo.put_vpnendpoint_to_ipsecenforcer_fqdn_map(
+                    group.id,
+                    enforcer.id,
+                    enforcer.fqdn,
+                    enforcer.fqdn_tunnel)
+            storage.plugin.put_record(RELATION_IPSECENFORCER, enforcer)
+
+    def delete(self):
+        for group, enforcer in self.enforcers:
+            IPsecEnforcerInfo.delete_ipsecenforcer_to_vpnendpoint_map(
+                    enforcer.id)
+            IPsecEnforcerInfo.delete_vpnendpoint_to_ipsecenforcer_fqdn_map(
+                    group.id,
+                    enforcer.fqdn)
+            IPsecEnforcerInfo.delete_ipsecenforcer_config_version(enforcer.id)
+            IPsecEnforcerConfigSnapshot.delete_snapshots(enforcer.id)
+            storage.plugin.delete_record(RELATION_IPSECENFORCER, enforcer)
+
+        for bind in self.binds:
+            storage.plugin.delete_kv('fqdn_pair_psk/' + bind.id, recurse=True)
+
+        # Skip the reference check of Resource.delete()
+        records = self.binds + self.groups + [self.ipsecpolicy, self.ikepolicy]
+        for record in records:
+            storage.plugin.delete_record(record.get_relation_name(), record)
+
+
+def prepare_config(ipsecenforcer_id, bulk):
+    """Prepare the configuration and count the storage requests
+
+    Returns:
+        tuple: configuration, number of requests and elapsed time
+    """
+    ipsecenforcer_config = IPsecEnforcerConfig(bulk=bulk)
+
+    with StorageCallCounter(storage.plugin) as counter:
+        with Timer() as timer:
+            config = ipsecenforcer_config.prepare_ipsec_enforcer_config(
+                    ipsecenforcer_id)
+
+    config = copy.deepcopy(config)
+    config.pop('version', None)
+    return config, counter.total, timer.elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--groups', type=int, default=10,
+                        help="Number of VPNEndpointGroup(s)")
+    parser.add_argument('--enforcers', type=int, default=20,
+                        help="Number of IPsecEnforcer(s) per group")
+    parser.add_argument('--iterations', type=int, default=5,
+                        help="Number of configurations prepared per mode")
+    args = parser.parse_args()
+
+    topology = Topology(args.groups, args.enforcers)
+    topology.create()
+
+    try:
+        ipsecenforcer_id = topology.enforcers[0][1].id
+
+        # Warm up, which also generates and stores the PSK(s)
+        prepare_config(ipsecenforcer_id, bulk=False)
+
+        rows = []
+        configs = {}
+        for bulk in (False, True):
+            calls = elapsed = 0
+            for _ in range(args.iterations):
+                config, count, seconds = prepare_config(ipsecenforcer_id, bulk)
+                calls += count
+                elapsed += seconds
+            configs[bulk] = config
+            rows.append(['bulk' if bulk else 'per-record',
+                         calls / args.iterations,
+                         '%.2f' % (elapsed * 1000 / args.iterations)])
+
+        print_table(['Mode', 'Storage calls per config', 'ms per config'],
+                    rows)
+
+        if configs[False] != configs[True]:
+            print("ERROR: per-record and bulk configurations differ")
+
+        config = IPsecEnforcerConfig().prepare_ipsec_enforcer_config(
+                ipsecenforcer_id)
+        full_size = len(json.dumps(config))
+        delta = IPsecEnforcerConfig().prepare_ipsec_enforcer_config_delta(
+                ipsecenforcer_id, config['version'])
+        delta_size = len(json.dumps(delta))
+
+        print_table(['Response', 'Bytes'],
+                    [['complete', full_size], ['changes', delta_size]])
+    finally:
+        topology.delete()
+
+
+if __name__ == '__main__':
+    main()
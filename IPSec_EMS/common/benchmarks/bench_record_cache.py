@@ -0,0 +1,106 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Benchmark of the ConsulIO record cache
+
+Repeatedly reads the records of a relation by primary index, by
+secondary index and as a whole, with the record cache disabled and
+enabled, and reports the Consul requests, the time and the cache
+hit/miss counters.
+
+Usage(requires a running Consul agent):
+$ python -m benchmarks.bench_record_cache --records 100 --rounds 10
+"""
+
+import argparse
+import time
+
+from benchmarks.utils import print_table, StorageCallCounter, Timer
+from services.api.storage_plugin.consul_io.consul_io import ConsulIO
+
+RELATION = 'bench_cache'
+
+
+class BenchRecord(object):
+    def __init__(self, id, name):
+        self.id = id
+        self.name = name
+
+
+def read_records(plugin, records, rounds):
+    for _ in range(rounds):
+        for record in records:
+            plugin.get_record(RELATION, record.id)
+            plugin.get_records_by_secondary_index(RELATION, 'name',
+                                                  record.name)
+        plugin.get_records(RELATION)
+
+
+def run(enabled, records, rounds):
+    """Read the records with a new ConsulIO
+
+    Returns:
+        list: row of the results table
+    """
+    plugin = ConsulIO()
+    plugin.relations = {RELATION: {'primary_key': 'id',
+                                   'secondary_keys': ['name']}}
+    plugin.cache.enabled = enabled
+
+    # Let the cache establish its Consul watch
+    plugin.get_record(RELATION, records[0].id)
+    time.sleep(1)
+
+    with StorageCallCounter(plugin) as counter:
+        with Timer() as timer:
+            read_records(plugin, records, rounds)
+
+    stats = plugin.cache_stats
+    return ['enabled' if enabled else 'disabled',
+            counter.total,
+            '%.2f' % (timer.elapsed * 1000),
+            stats['hits'],
+            stats['misses']]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--records', type=int, default=100,
+                        help="Number of records in the relation")
+    parser.add_argument('--rounds', type=int, default=10,
+                        help="Number of times each record is read")
+    args = parser.parse_args()
+
+    plugin = ConsulIO()
+    plugin.relations = {RELATION: {'primary_key': 'id',
+                                   'secondary_keys': ['name']}}
+    records = [BenchRecord(str(i), 'bench_%d' % i)
+               for i in range(args.records)]
+
+    for record in records:
+        plugin.put_record(RELATION, record)
+
+    try:
+        rows = [run(enabled, records, args.rounds)
+                for enabled in (False, True)]
+    finally:
+        for record in records:
+            plugin.delete_record(RELATION, record)
+
+    print_table(['Cache', 'Consul calls', 'ms', 'Hits', 'Misses'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Benchmark of the lookup of records by secondary index
+
+For each number of matching records, compares the lookup reading every
+matched record with its own request(1+N) against
+ConsulIO.get_records_by_secondary_index(), with the record cache
+disabled.
+
+Usage(requires a running Consul agent):
+$ python -m benchmarks.bench_secondary_index --matches 1 100 10000
+"""
+
+import argparse
+import json
+
+from benchmarks.utils import print_table, StorageCallCounter, Timer
+from services.api.storage_plugin.consul_io import consul_config as cfg
+from services.api.storage_plugin.consul_io.consul_io import ConsulIO
+from services.api.storage_plugin.consul_io.consul_io_utils import (
+    consul_key_join, txn_operation
+)
+from services.api.storage_plugin.utils import str_to_dict
+
+RELATION = 'bench_si'
+MATCH = 'match'
+
+
+def store_records(plugin, count):
+    """Store the records matching the secondary index value, with
+    transactions of CONSUL_TXN_MAX_OPS operations"""
+    operations = []
+    for i in range(count):
+        key = consul_key_join(RELATION, 'id', '%06d' % i)
+        operations.append(txn_operation(
+                'set', key, json.dumps({'id': '%06d' % i, 'name': MATCH})))
+        operations.append(txn_operation(
+                'set',
+                consul_key_join(RELATION, 'name', MATCH, 'id', '%06d' % i),
+                key))
+
+        if len(operations) >= cfg.CONSUL_TXN_MAX_OPS - 1:
+            plugin._txn(operations)
+            operations = []
+
+    if operations:
+        plugin._txn(operations)
+
+
+def lookup_per_record(plugin):
+    """Lookup reading each matched record with a separate request"""
+    key = consul_key_join(RELATION, 'name', MATCH) + '/'
+    index, data = plugin.connection.kv.get(key, recurse=True)
+
+    records = []
+    for record in data or []:
+        index, value = plugin.connection.kv.get(record['Value'])
+        records.append(str_to_dict(value['Value']))
+
+    return records
+
+
+def lookup_batched(plugin):
+    return plugin.get_records_by_secondary_index(RELATION, 'name', MATCH)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--matches', type=int, nargs='+',
+                        default=[1, 100, 10000],
+                        help="Numbers of records matching the lookup")
+    args = parser.parse_args()
+
+    plugin = ConsulIO()
+    plugin.relations = {RELATION: {'primary_key': 'id',
+                                   'secondary_keys': ['name']}}
+    plugin.cache.enabled = False
+
+    rows = []
+    for matches in args.matches:
+        store_records(plugin, matches)
+        try:
+            results = {}
+            for name, lookup in (('per-record', lookup_per_record),
+                                 ('batched', lookup_batched)):
+                with StorageCallCounter(plugin) as counter:
+                    with Timer() as timer:
+                        results[name] = lookup(plugin)
+                rows.append([matches, name, counter.total,
+                             '%.2f' % (timer.elapsed * 1000)])
+
+            if results['per-record'] != results['batched']:
+                print("ERROR: lookups differ for %d matches" % matches)
+        finally:
+            plugin.delete_kv(consul_key_join(RELATION), recurse=True)
+
+    print_table(['Matches', 'Lookup', 'Consul calls', 'ms'], rows)
+
+
+if __name__ == '__main__':
+    main()
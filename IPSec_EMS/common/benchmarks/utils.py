@@ -0,0 +1,114 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Util functions and classes for the benchmarks"""
+
+from collections import Counter
+import os
+import time
+
+
+def setup_django():
+    """Configure Django, so that the IPsec EMS services can be imported
+    outside of manage.py"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'common.settings')
+
+    import django
+    django.setup()
+
+
+class StorageCallCounter(object):
+    """Count the requests sent by a storage plugin to its backend
+
+    The HTTP requests are counted for the Consul plugin, and the calls
+    of the plugin methods for the plugins without a connection, e.g. the
+    Memory and SQLite plugins.
+
+    Usage:
+        with StorageCallCounter(storage.plugin) as counter:
+            ...
+        print counter.total
+    """
+
+    http_methods = ('get', 'put', 'delete')
+    plugin_methods = ('put_record', 'put_records', 'get_record',
+                      'get_records_by_primary_index',
+                      'get_records_by_secondary_index', 'get_records',
+                      'list_records', 'delete_record', 'delete_records',
+                      'check_key', 'put_kv', 'get_kv', 'delete_kv',
+                      'delete_kvs', 'get_key_prefix', 'get_kvs',
+                      'create_session', 'destroy_session')
+
+    def __init__(self, plugin):
+        if hasattr(plugin, 'connection'):
+            self.target = plugin.connection.http
+            self.methods = self.http_methods
+        else:
+            self.target = plugin
+            self.methods = self.plugin_methods
+        self.calls = Counter()
+
+    def _wrap(self, method):
+        original = getattr(self.target, method)
+
+        def wrapper(*args, **kwargs):
+            self.calls[method] += 1
+            return original(*args, **kwargs)
+
+        return wrapper
+
+    def __enter__(self):
+        for method in self.methods:
+            setattr(self.target, method, self._wrap(method))
+        return self
+
+    def __exit__(self, *exc_info):
+        # Remove the instance attributes to expose the class methods
+        for method in self.methods:
+            delattr(self.target, method)
+
+    @property
+    def total(self):
+        return sum(self.calls.itervalues())
+
+
+class Timer(object):
+    """Measure the wall clock time of a block of code"""
+
+    def __init__(self):
+        self.start = None
+        self.elapsed = None
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.elapsed = time.time() - self.start
+
+
+def print_table(column_names, rows):
+    """Print the benchmark results as a table
+
+    Args:
+        column_names (list): names of the columns
+        rows (list): list of rows(list of column values)
+    """
+    from prettytable import PrettyTable
+
+    table = PrettyTable(column_names)
+    for row in rows:
+        table.add_row(row)
+    print(table)
@@ -96,6 +96,22 @@ DATABASES = {
     }
 }
 
+# Storage backend of the IPsec EMS records, the name of a plugin in
+# services/api/storage_plugin: 'Consul', 'SQLite' or 'Memory'(not shared
+# between the processes, only for the unit tests and benchmarks)
+STORAGE_BACKEND = os.environ.get('IPSECEMS_STORAGE_BACKEND', 'Consul')
+
+# Blocking GETs of the IPsecEnforcer configuration. A waiting request holds
+# a thread of the web server for up to LONG_POLL_MAX_WAIT seconds, so the
+# web server runs a thread per request('manage.py runserver') or has
+# LONG_POLL_MAX_WAITERS threads per process on top of the ones serving the
+# API(e.g. gunicorn --threads). Above LONG_POLL_MAX_WAITERS waiting
+# requests in a process, a blocking GET is answered with 503 and a
+# Retry-After header.
+LONG_POLL_MAX_WAIT = int(os.environ.get('IPSECEMS_LONG_POLL_MAX_WAIT', 300))
+LONG_POLL_MAX_WAITERS = int(os.environ.get('IPSECEMS_LONG_POLL_MAX_WAITERS',
+                                           1000))
+
 # Password validation
 # https://docs.djangoproject.com/en/1.9/ref/settings/#auth-password-validators
 
@@ -33,7 +33,7 @@ from django.conf.urls import include, url
 from django.contrib import admin
 
 from services.api import (
-    views_api_resource, views_authentication, views_certificate,
+    views_api_resource, views_authentication, views_bulk, views_certificate,
     views_enforcer_registration
 )
 from services.api.views_mgmt_ui import MgmtUIView
@@ -44,6 +44,9 @@ urlpatterns = [
     url(r'^(?P<version>(v1))/(?P<namespace>(main))/ipsecvpn/',
         include([
 
+            url(r'^ikepolicies/bulk/$',
+                views_bulk.GenericBulkResourceView.as_view(),
+                name='ikepolicies_bulk'),
             url(r'^ikepolicies/(?P<pk>[^/]+)/$',
                 views_api_resource.GenericRetrieveUpdateDestroyResourceView.as_view(),
                 name='ikepolicies_detail'),
@@ -51,6 +54,9 @@ urlpatterns = [
                 views_api_resource.GenericListCreateResourceView.as_view(),
                 name='ikepolicies_list'),
 
+            url(r'^ipsecpolicies/bulk/$',
+                views_bulk.GenericBulkResourceView.as_view(),
+                name='ipsecpolicies_bulk'),
             url(r'^ipsecpolicies/(?P<pk>[^/]+)/$',
                 views_api_resource.GenericRetrieveUpdateDestroyResourceView.as_view(),
                 name='ipsecpolicies_detail'),
@@ -58,6 +64,9 @@ urlpatterns = [
                 views_api_resource.GenericListCreateResourceView.as_view(),
                 name='ipsecpolicies_list'),
 
+            url(r'^vpnbindgrouptogroup/bulk/$',
+                views_bulk.GenericBulkResourceView.as_view(),
+                name='vpnbindgrouptogroup_bulk'),
             url(r'^vpnbindgrouptogroup/(?P<pk>[^/]+)/$',
                 views_api_resource.GenericRetrieveUpdateDestroyResourceView.as_view(),
                 name='vpnbindgrouptogroup_detail'),
@@ -65,6 +74,9 @@ urlpatterns = [
                 views_api_resource.GenericListCreateResourceView.as_view(),
                 name='vpnbindgrouptogroup_list'),
 
+            url(r'^vpnbindgrouptolocalsite/bulk/$',
+                views_bulk.GenericBulkResourceView.as_view(),
+                name='vpnbindgrouptolocalsite_bulk'),
             url(r'^vpnbindgrouptolocalsite/(?P<pk>[^/]+)/$',
                 views_api_resource.GenericRetrieveUpdateDestroyResourceView.as_view(),
                 name='vpnbindgrouptolocalsite_detail'),
@@ -72,6 +84,9 @@ urlpatterns = [
                 views_api_resource.GenericListCreateResourceView.as_view(),
                 name='vpnbindgrouptolocalsite_list'),
 
+            url(r'^vpnbindgrouptoremotesite/bulk/$',
+                views_bulk.GenericBulkResourceView.as_view(),
+                name='vpnbindgrouptoremotesite_bulk'),
             url(r'^vpnbindgrouptoremotesite/(?P<pk>[^/]+)/$',
                 views_api_resource.GenericRetrieveUpdateDestroyResourceView.as_view(),
                 name='vpnbindgrouptoremotesite_detail'),
@@ -79,6 +94,9 @@ urlpatterns = [
                 views_api_resource.GenericListCreateResourceView.as_view(),
                 name='vpnbindgrouptoremotesite_list'),
 
+            url(r'^vpnbindlocalsitetolocalsite/bulk/$',
+                views_bulk.GenericBulkResourceView.as_view(),
+                name='vpnbindlocalsitetolocalsite_bulk'),
             url(r'^vpnbindlocalsitetolocalsite/(?P<pk>[^/]+)/$',
                 views_api_resource.GenericRetrieveUpdateDestroyResourceView.as_view(),
                 name='vpnbindlocalsitetolocalsite_detail'),
@@ -86,6 +104,9 @@ urlpatterns = [
                 views_api_resource.GenericListCreateResourceView.as_view(),
                 name='vpnbindlocalsitetolocalsite_list'),
 
+            url(r'^vpnbindlocalsitetoremotesite/bulk/$',
+                views_bulk.GenericBulkResourceView.as_view(),
+                name='vpnbindlocalsitetoremotesite_bulk'),
             url(r'^vpnbindlocalsitetoremotesite/(?P<pk>[^/]+)/$',
                 views_api_resource.GenericRetrieveUpdateDestroyResourceView.as_view(),
                 name='vpnbindlocalsitetoremotesite_detail'),
@@ -93,6 +114,9 @@ urlpatterns = [
                 views_api_resource.GenericListCreateResourceView.as_view(),
                 name='vpnbindlocalsitetoremotesite_list'),
 
+            url(r'^vpnendpointgroups/bulk/$',
+                views_bulk.GenericBulkResourceView.as_view(),
+                name='vpnendpointgroups_bulk'),
             url(r'^vpnendpointgroups/(?P<pk>[^/]+)/$',
                 views_api_resource.GenericRetrieveUpdateDestroyResourceView.as_view(),
                 name='vpnendpointgroups_detail'),
@@ -100,6 +124,9 @@ urlpatterns = [
                 views_api_resource.GenericListCreateResourceView.as_view(),
                 name='vpnendpointgroups_list'),
 
+            url(r'^vpnendpointlocalsites/bulk/$',
+                views_bulk.GenericBulkResourceView.as_view(),
+                name='vpnendpointlocalsites_bulk'),
             url(r'^vpnendpointlocalsites/(?P<pk>[^/]+)/$',
                 views_api_resource.GenericRetrieveUpdateDestroyResourceView.as_view(),
                 name='vpnendpointlocalsites_detail'),
@@ -107,6 +134,9 @@ urlpatterns = [
                 views_api_resource.GenericListCreateResourceView.as_view(),
                 name='vpnendpointlocalsites_list'),
 
+            url(r'^vpnendpointremotesites/bulk/$',
+                views_bulk.GenericBulkResourceView.as_view(),
+                name='vpnendpointremotesites_bulk'),
             url(r'^vpnendpointremotesites/(?P<pk>[^/]+)/$',
                 views_api_resource.GenericRetrieveUpdateDestroyResourceView.as_view(),
                 name='vpnendpointremotesites_detail'),
@@ -114,6 +144,13 @@ urlpatterns = [
                 views_api_resource.GenericListCreateResourceView.as_view(),
                 name='vpnendpointremotesites_list'),
 
+            url(r'^batch/$',
+                views_bulk.BatchResourceView.as_view(),
+                name='batch'),
+
+            url(r'^ipsecenforcerregistrations/(?P<pk>[^/]+)/heartbeat/$',
+                views_enforcer_registration.ipsec_enforcer_heartbeat,
+                name='ipsecenforcerregistrations_heartbeat'),
             url(r'^ipsecenforcerregistrations/(?P<pk>[^/]+)/$',
                 views_enforcer_registration.ipsec_enforcer_registration,
                 name='ipsecenforcerregistrations_detail'),
@@ -49,6 +49,11 @@ def custom_exception_handler(exc, context):
         elif response.status_code >= status.HTTP_400_BAD_REQUEST:
             level = LOG.warning
 
+    # e.g. a ValidationError raised with a message, out of a serializer
+    # field
+    if not isinstance(response.data, dict):
+        response.data = {'detail': response.data}
+
     request = context['request']
     response.data['status_code'] = response.status_code
 
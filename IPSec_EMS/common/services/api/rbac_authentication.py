@@ -14,17 +14,25 @@
 #    under the License.
 
 from __future__ import unicode_literals
+from collections import Counter, OrderedDict
 import logging
+import os
+import threading
+import time
 import urlparse
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from django.utils.translation import ugettext as _
 from rest_framework.authentication import BasicAuthentication
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.status import HTTP_200_OK
 
-from services.api.rbac_settings import RBAC_PROJECT, RBAC_URI
+from services.api.rbac_settings import (
+    RBAC_CACHE_DENIAL_TTL, RBAC_CACHE_ENABLED, RBAC_CACHE_SIZE, RBAC_CACHE_TTL,
+    RBAC_POOL_SIZE, RBAC_PROJECT, RBAC_TIMEOUT, RBAC_URI
+)
 
 LOG = logging.getLogger(__name__)
 
@@ -36,32 +44,235 @@ RBAC_RULE_TO_HTTP_VERB_MAP = {
     'DELETE': 'DELETE',
 }
 
+# Path suffixes of the bulk and batch endpoints, see views_bulk
+BULK_SUFFIX = 'bulk/'
+BATCH_SUFFIX = '/batch/'
+
+# Returned by AuthorizationCache.get() when the decision is not cached
+MISS = object()
+
+_session = None
+_session_pid = None
+
+
+def get_rbac_session():
+    """HTTP session of the requests to the RBAC Webservice, created once
+    per process
+
+    The session keeps the connections to the RBAC Webservice alive, up
+    to RBAC_POOL_SIZE connections.
+
+    Returns:
+        requests.Session
+    """
+    global _session, _session_pid
+
+    # A forked process does not share the connections of its parent
+    if _session_pid != os.getpid():
+        adapter = HTTPAdapter(pool_connections=1,
+                              pool_maxsize=RBAC_POOL_SIZE)
+        _session = requests.Session()
+        _session.mount('http://', adapter)
+        _session_pid = os.getpid()
+    return _session
+
+
+class AuthorizationCache(object):
+    """LRU cache of the RBAC authorization decisions
+
+    A decision is the list of the permissions of a principal(auth token
+    and client certificate DN) on an endpoint path, or None if the RBAC
+    Webservice denied the access. The permissions of the path cover all
+    the HTTP methods. A decision expires after RBAC_CACHE_TTL seconds,
+    or RBAC_CACHE_DENIAL_TTL seconds for a denial, and the least
+    recently used decision is evicted beyond max_size decisions.
+
+    The cache is per process: a change of the RBAC tokens or roles
+    through this process invalidates the cache immediately, the other
+    processes see it after the TTL.
+    """
+
+    def __init__(self, max_size=RBAC_CACHE_SIZE, ttl=RBAC_CACHE_TTL,
+                 denial_ttl=RBAC_CACHE_DENIAL_TTL,
+                 enabled=RBAC_CACHE_ENABLED):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.denial_ttl = denial_ttl
+        self.enabled = enabled
+        self.counters = Counter()
+
+        self._mutex = threading.Lock()
+        # (auth token, client DN, path) -> (expiry time, permissions)
+        self._entries = OrderedDict()
+        self._generation = 0
+
+    def get(self, key, now=None):
+        """Fetch a cached decision
+
+        Args:
+            key (tuple): auth token, client certificate DN and endpoint
+                path
+            now (float): current time, defaults to time.time()
+
+        Returns:
+            list of permissions, None for a denial, or MISS
+        """
+        if not self.enabled:
+            return MISS
+
+        now = time.time() if now is None else now
+        with self._mutex:
+            entry = self._entries.pop(key, None)
+            if entry is None or entry[0] <= now:
+                self.counters['misses'] += 1
+                return MISS
+
+            # Move the key to the most recently used end
+            self._entries[key] = entry
+            self.counters['hits'] += 1
+            return entry[1]
+
+    def generation(self):
+        """Fetch the generation of the cache, to be passed to put()
+
+        Returns:
+            int: generation of the cache
+        """
+        with self._mutex:
+            return self._generation
+
+    def put(self, key, permissions, generation, now=None):
+        """Cache a decision of the RBAC Webservice
+
+        Args:
+            key (tuple): auth token, client certificate DN and endpoint
+                path
+            permissions (list): permissions, None for a denial
+            generation (int): generation of the cache, from generation()
+                before requesting the decision
+            now (float): current time, defaults to time.time()
+        """
+        if not self.enabled:
+            return
+
+        now = time.time() if now is None else now
+        ttl = self.ttl if permissions is not None else self.denial_ttl
+        with self._mutex:
+            # The decision may be older than an invalidation
+            if generation != self._generation:
+                return
+
+            self._entries.pop(key, None)
+            self._entries[key] = (now + ttl, permissions)
+
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.counters['evictions'] += 1
+
+    def invalidate(self, auth_token=None):
+        """Drop the cached decisions
+
+        Args:
+            auth_token (unicode): drop only the decisions of this auth
+                token, defaults to all the decisions
+        """
+        with self._mutex:
+            if auth_token is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries
+                            if key[0] == auth_token]:
+                    del self._entries[key]
+            self._generation += 1
+            self.counters['invalidations'] += 1
+
+    def stats(self):
+        """Fetch the cache counters
+
+        Returns:
+            dict: hits, misses, evictions, invalidations and the number
+                of cached decisions
+        """
+        with self._mutex:
+            stats = dict.fromkeys(
+                    ('hits', 'misses', 'evictions', 'invalidations'), 0)
+            stats.update(self.counters)
+            stats['entries'] = len(self._entries)
+            return stats
+
+
+authorization_cache = AuthorizationCache()
+
 
 class RBACAuthorization(BasicAuthentication):
-    """Authorize the request with RBAC Webservice"""
+    """Authorize the request with RBAC Webservice
+
+    The decisions of the RBAC Webservice are cached in
+    authorization_cache.
+    """
 
     def authenticate(self, request, *args, **kwargs):
+        endpoint = urlparse.urlparse(request.build_absolute_uri()).path
+
+        # The operations of a batch request are authorized by the batch
+        # view, and a bulk request on the list of the resource
+        if endpoint.endswith(BATCH_SUFFIX):
+            return None
+        if endpoint.endswith(BULK_SUFFIX):
+            endpoint = endpoint[:-len(BULK_SUFFIX)]
+
+        self.authorize(request, endpoint, request.method)
+
+    @staticmethod
+    def authorize(request, endpoint, method):
+        """Authorize an HTTP method on an endpoint with the RBAC
+        Webservice, for the credentials of the request
+
+        Args:
+            request (Request): HTTP request with the credentials
+            endpoint (str): Endpoint path e.g.
+                /v1/main/ipsecvpn/ikepolicies/
+            method (str): HTTP method e.g. 'POST'
+
+        Raises:
+            PermissionDenied: If the access is denied
+        """
+        auth_token = request.META.get('HTTP_X_AUTH_TOKEN', '')
+        client_dn = request.META.get('HTTP_SSL_CLIENT_S_DN', '')
+        key = (auth_token, client_dn, endpoint)
+
         try:
-            url = (RBAC_URI + '/' + 'v1/main/auth/projects/' + RBAC_PROJECT +
-                   '/' + 'permissions' + '/')
-            response = requests.request(
-                method='GET',
-                url=url,
-                headers={
-                    'X-Auth-Token': request.META.get('HTTP_X_AUTH_TOKEN', ''),
-                    'X-SSL-Client-S-DN': request.META.get(
-                            'HTTP_SSL_CLIENT_S_DN', ''),
-                    'X-Authorization-Endpoint': urlparse.urlparse(
-                            request.build_absolute_uri()).path,
-                    'Content-Type': request.META.get('CONTENT_TYPE', '')})
-
-            if response.status_code == HTTP_200_OK:
-                permissions = response.json()['permissions']
-            else:
+            permissions = authorization_cache.get(key)
+
+            if permissions is MISS:
+                generation = authorization_cache.generation()
+                url = (RBAC_URI + '/' + 'v1/main/auth/projects/' +
+                       RBAC_PROJECT + '/' + 'permissions' + '/')
+                response = get_rbac_session().request(
+                    method='GET',
+                    url=url,
+                    headers={
+                        'X-Auth-Token': auth_token,
+                        'X-SSL-Client-S-DN': client_dn,
+                        'X-Authorization-Endpoint': endpoint,
+                        'Content-Type': request.META.get('CONTENT_TYPE',
+                                                         '')},
+                    timeout=RBAC_TIMEOUT)
+
+                if response.status_code == HTTP_200_OK:
+                    permissions = response.json()['permissions']
+                else:
+                    permissions = None
+                authorization_cache.put(key, permissions, generation)
+
+            if permissions is None:
                 raise PermissionDenied(_("Unauthorized access"))
 
-            if not RBAC_RULE_TO_HTTP_VERB_MAP[request.method] in permissions:
+            if not RBAC_RULE_TO_HTTP_VERB_MAP[method] in permissions:
                 raise PermissionDenied(_("Unauthorized access"))
 
         except requests.exceptions.RequestException as e:
             LOG.error('%s %s' % (e.__doc__, e.message))
+            # Deny the access when the RBAC Webservice doesn't answer,
+            # without caching the decision
+            raise PermissionDenied(_("Authorization service unavailable"))
@@ -21,3 +21,15 @@
 # - RBAC Webservice Port is 8051
 RBAC_PROJECT = 'ipsecems'
 RBAC_URI = 'http://localhost:8051'
+
+# Connect and read timeouts(in seconds) of the requests to the RBAC
+# Webservice, and maximum number of kept-alive connections to it
+RBAC_TIMEOUT = (2, 10)
+RBAC_POOL_SIZE = 10
+
+# Authorization decision cache options. A granted decision is cached for
+# RBAC_CACHE_TTL seconds, a denied one for RBAC_CACHE_DENIAL_TTL seconds
+RBAC_CACHE_ENABLED = True
+RBAC_CACHE_SIZE = 10000
+RBAC_CACHE_TTL = 30
+RBAC_CACHE_DENIAL_TTL = 5
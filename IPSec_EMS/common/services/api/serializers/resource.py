@@ -29,6 +29,9 @@ LOG = logging.getLogger(__name__)
 # Backend Storage Plugin Instance
 CONSUL_CONNECTION = storage.plugin
 
+# Records read per storage request when iterating over a relation
+LIST_PAGE_SIZE = 100
+
 
 class ResourceMeta(type):
     def __init__(cls, name, bases, attrs):
@@ -129,6 +132,45 @@ class Resource(object):
                         (self.resource_name, self.id)))
             raise
 
+    @classmethod
+    def save_all(cls, resources, new=False):
+        """Write the records in the storage backend, with a few writes
+        instead of one per record
+
+        Args:
+            resources (list): Resource objects
+            new (bool): True if the records are not stored yet
+
+        Raises:
+            TypeError: When error storing the records in backend
+        """
+        try:
+            cls.conn.put_records(cls.get_relation_name(), resources, new=new)
+        except (TypeError, RuntimeError):
+            LOG.error(_("Error in storing data for %d %s records" %
+                        (len(resources), cls.resource_name)))
+            raise
+
+    @classmethod
+    def delete_all(cls, resources):
+        """Delete the records from the storage backend, with a few
+        writes instead of one per record
+
+        The references to the records must be checked before, see
+        check_reference().
+
+        Args:
+            resources (list): Resource objects
+        """
+        try:
+            cls.conn.delete_records(cls.get_relation_name(), resources)
+            LOG.info(_("%d %s records deleted" %
+                       (len(resources), cls.resource_name)))
+        except (TypeError, RuntimeError):
+            LOG.error(_("Error in deleting data for %d %s records" %
+                        (len(resources), cls.resource_name)))
+            raise
+
     @classmethod
     def get(cls, **kwargs):
         """Retrieve the record with key(Primary or Secondary) value
@@ -196,12 +238,79 @@ class Resource(object):
 
         return instance_list
 
+    @classmethod
+    def select(cls, filters=None, sort_key=None, sort_dir='asc', marker=None,
+               limit=None):
+        """Retrieve a page of the records from storage backend
+
+        The records are filtered, sorted and paginated by the storage
+        backend, so only the records of the page are read.
+
+        Args:
+            filters (dict): Secondary key values of the records
+            sort_key (str): Primary or secondary key to sort by, the
+                primary key by default
+            sort_dir (str): 'asc' or 'desc'
+            marker (str): Primary key value of the last record of the
+                previous page, None for the first page
+            limit (int): Maximum number of records, None for all
+
+        Returns:
+            list of Resource objects
+
+        Raises:
+            ValueError: If an option is invalid or the marker record
+                does not exist
+        """
+        records = cls.conn.list_records(cls.get_relation_name(),
+                                        filters=filters,
+                                        sort_key=sort_key,
+                                        sort_dir=sort_dir,
+                                        marker=marker,
+                                        limit=limit)
+
+        return [cls(**record) for record in records]
+
+    @classmethod
+    def select_pages(cls, page_size=LIST_PAGE_SIZE, marker=None, **kwargs):
+        """Iterate over the pages of the records from storage backend
+
+        The ordered primary key values of the records are listed once,
+        then only the records of a page are read at a time, so the
+        memory used by the records doesn't depend on the size of the
+        relation. A record deleted meanwhile is left out of its page,
+        and a record created meanwhile is not listed.
+
+        Args:
+            page_size (int): Maximum number of records of a page
+            marker (str): Primary key value of the record before the
+                first page, None to start from the first record
+            kwargs (dict): filters, sort_key and sort_dir of select()
+
+        Yields:
+            list of Resource objects, the first page even if empty
+
+        Raises:
+            ValueError: If an option is invalid or the marker record
+                does not exist, when reading the first page
+        """
+        relation_name = cls.get_relation_name()
+        pk_values = cls.conn.list_records(relation_name, marker=marker,
+                                          keys_only=True, **kwargs)
+
+        for start in range(0, max(len(pk_values), 1), page_size):
+            page = pk_values[start:start + page_size]
+            records = cls.conn.get_records_by_primary_index(relation_name,
+                                                            page)
+            yield [cls(**records[pk_value]) for pk_value in page
+                   if pk_value in records]
+
     @classmethod
     def get_relation_name(cls):
         return RESOURCE_TO_RELATION_MAP[cls.resource_name]
 
     @staticmethod
-    def resource_validation(resource_name, attrs):
+    def resource_validation(resource_name, attrs, lookup=None):
         pass
 
 
@@ -215,17 +324,50 @@ class ConsulSerializer(serializers.Serializer):
         Returns:
             Newly created Resource object
         """
+        resource = self.build_resource(validated_data)
+
+        resource.save()
+        return resource
+
+    def build_resource(self, validated_data):
+        """Prepare and validate a new Resource object, not stored yet
+
+        Args:
+            validated_data (dict) : New Resource object values
+
+        Returns:
+            New Resource object
+        """
         resource = self.consul_model(**validated_data)
 
         self.consul_model.resource_validation(self.consul_model.resource_name,
-                                              resource.__dict__)
+                                              resource.__dict__,
+                                              self.context.get('lookup'))
 
-        resource.save()
         return resource
 
     def update(self, resource, validated_data):
         """Overwrite Serializer .update() method
 
+        Args:
+            resource (Resource) : Already existing resource
+            validated_data (dict): New Resource object values
+
+        Returns:
+            Updated resource object
+
+        Raises:
+            IDUpdateNotPermitted: When updating the 'id' of resource
+        """
+        resource = self.build_updated_resource(resource, validated_data)
+
+        resource.update()
+        return resource
+
+    def build_updated_resource(self, resource, validated_data):
+        """Apply and validate the new values of a Resource object, not
+        stored yet
+
         Args:
             resource (Resource) : Already existing resource
             validated_data (dict): New Resource object values
@@ -253,9 +395,9 @@ class ConsulSerializer(serializers.Serializer):
             setattr(resource, key, value)
 
         self.consul_model.resource_validation(self.consul_model.resource_name,
-                                              resource.__dict__)
+                                              resource.__dict__,
+                                              self.context.get('lookup'))
 
-        resource.update()
         return resource
 
     def log_invalid(self):
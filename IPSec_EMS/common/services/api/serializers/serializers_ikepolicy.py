@@ -37,7 +37,7 @@ class IKEPolicy(Resource):
     secondary_keys = ('name',)
 
     @staticmethod
-    def resource_validation(resource_name, attrs):
+    def resource_validation(resource_name, attrs, lookup=None):
         """Validate the request"""
 
         ike_version = attrs['ike_version']
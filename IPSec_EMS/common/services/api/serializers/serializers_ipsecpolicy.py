@@ -33,7 +33,7 @@ class IPsecPolicy(Resource):
     secondary_keys = ('name',)
 
     @staticmethod
-    def resource_validation(resource_name, attrs):
+    def resource_validation(resource_name, attrs, lookup=None):
         pass
 
 
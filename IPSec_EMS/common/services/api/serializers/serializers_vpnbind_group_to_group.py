@@ -30,10 +30,14 @@ class VPNBindGroupToGroup(Resource):
     """Represents a VPNBindGroupToGroup object"""
     resource_name = 'VPNBindGroupToGroup'
     primary_key = 'id'
-    secondary_keys = ('name',)
+    secondary_keys = ('name',
+                      'vpnendpointgroup_id',
+                      'peer_vpnendpointgroup_id',
+                      'ikepolicy_id',
+                      'ipsecpolicy_id')
 
     @staticmethod
-    def resource_validation(resource_name, attrs):
+    def resource_validation(resource_name, attrs, lookup=None):
         """Additional validation of the request
 
         Args:
@@ -41,7 +45,8 @@ class VPNBindGroupToGroup(Resource):
         """
         if attrs.get('auth_mode', None) == 'cert':
             check_vpncertificate_exists(resource_name,
-                                        attrs)
+                                        attrs,
+                                        lookup)
 
 
 class VPNBindGroupToGroupSerializer(ConsulSerializer):
@@ -34,15 +34,20 @@ class VPNBindGroupToRemoteSite(Resource):
     """
     resource_name = 'VPNBindGroupToRemoteSite'
     primary_key = 'id'
-    secondary_keys = ('name',)
+    secondary_keys = ('name',
+                      'vpnendpointgroup_id',
+                      'peer_vpnendpointremotesite_id',
+                      'ikepolicy_id',
+                      'ipsecpolicy_id')
 
     @staticmethod
-    def resource_validation(resource_name, attrs):
+    def resource_validation(resource_name, attrs, lookup=None):
         """Validate the request"""
 
         if attrs['auth_mode'] == 'cert':
             check_vpncertificate_exists(resource_name,
-                                        attrs['id'])
+                                        attrs,
+                                        lookup)
 
 
 class VPNBindGroupToRemoteSiteSerializer(ConsulSerializer):
@@ -64,7 +69,7 @@ class VPNBindGroupToRemoteSiteSerializer(ConsulSerializer):
         format='hex_verbose',
         validators=[check_vpnendpointgroup_id])
 
-    peer_vpnremotesite_id = CustomUUIDField(
+    peer_vpnendpointremotesite_id = CustomUUIDField(
         format='hex_verbose',
         validators=[check_peer_vpnendpointremotesite_id])
 
@@ -30,15 +30,20 @@ class VPNBindLocalSiteToRemoteSite(Resource):
     """Represents a VPNBindLocalSiteToRemoteSite object."""
     resource_name = 'VPNBindLocalSiteToRemoteSite'
     primary_key = 'id'
-    secondary_keys = ('name',)
+    secondary_keys = ('name',
+                      'vpnendpointlocalsite_id',
+                      'peer_vpnendpointremotesite_id',
+                      'ikepolicy_id',
+                      'ipsecpolicy_id')
 
     @staticmethod
-    def resource_validation(resource_name, attrs):
+    def resource_validation(resource_name, attrs, lookup=None):
         """Validate the request"""
 
         if attrs['auth_mode'] == 'cert':
             check_vpncertificate_exists(resource_name,
-                                        attrs['id'])
+                                        attrs,
+                                        lookup)
 
 
 class VPNBindLocalSiteToRemoteSiteSerializer(ConsulSerializer):
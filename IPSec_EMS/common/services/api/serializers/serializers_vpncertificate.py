@@ -25,7 +25,7 @@ class VPNCertificate(Resource):
     """Represents a VPNCertificate object"""
     resource_name = 'VPNCertificate'
     primary_key = 'id'
-    secondary_keys = ('name',)
+    secondary_keys = ('name', 'vpncacertificate_id')
 
     def __init__(self, **kwargs):
         # Resource.__init__(self)
@@ -25,7 +25,7 @@ class VPNEndpointGroup(Resource):
     """Represents an VPNEndpointGroup object"""
     resource_name = 'VPNEndpointGroup'
     primary_key = 'id'
-    secondary_keys = ('name',)
+    secondary_keys = ('name', 'vpncertificate_id')
 
 
 class VPNEndpointGroupSerializer(ConsulSerializer):
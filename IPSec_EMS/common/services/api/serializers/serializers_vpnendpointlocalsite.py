@@ -26,7 +26,7 @@ class VPNEndpointLocalSite(Resource):
     """Represents an VPNEndpointLocalSite object"""
     resource_name = 'VPNEndpointLocalSite'
     primary_key = 'id'
-    secondary_keys = ('name',)
+    secondary_keys = ('name', 'vpncertificate_id')
 
 
 class VPNEndpointLocalSiteSerializer(ConsulSerializer):
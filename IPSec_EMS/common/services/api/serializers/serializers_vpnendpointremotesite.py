@@ -26,7 +26,7 @@ class VPNEndpointRemoteSite(Resource):
     """Represents an VPNEndpointRemoteSite object"""
     resource_name = 'VPNEndpointRemoteSite'
     primary_key = 'id'
-    secondary_keys = ('name',)
+    secondary_keys = ('name', 'vpncertificate_id')
 
 
 class VPNEndpointRemoteSiteSerializer(ConsulSerializer):
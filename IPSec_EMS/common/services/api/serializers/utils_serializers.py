@@ -14,12 +14,12 @@
 #    under the License.
 
 from collections import OrderedDict
-import itertools
 import re
 
 import ast
 import ipaddress
 import json
+import threading
 import uuid
 
 from rest_framework import serializers
@@ -286,41 +286,134 @@ def check_reference(resource, attrs):
     if dependencies is None:
         return
 
-    resources = dependencies[0]
-    relations = [RESOURCE_TO_RELATION_MAP[relation] for relation in resources]
+    value = attrs.get('id', None)
+    if value is None:
+        return
 
-    fields = RESOURCE_DEPENDENCY_MAP[resource][1:]
+    # The first referencing record is enough
+    for reference in find_references(dependencies, str(value)):
+        raise serializers.ValidationError("Resource can not be deleted. "
+                                          "{0} with id {1} is in "
+                                          "use".format(resource, str(value))
+                                          )
 
-    reference_exists = False
-    for relation, field in itertools.product(relations, fields):
-        value = attrs.get('id', None)
-        if value is not None:
-            records = storage.plugin.get_records(relation)
-            for record in records:
-                if record[field] == str(attrs['id']):
-                    reference_exists = True
-                    break
 
-        if reference_exists:
-            raise serializers.ValidationError("Resource can not be deleted. "
-                                              "{0} with id {1} is in "
-                                              "use".format(resource, str(value))
-                                              )
+def find_references(dependencies, record_id):
+    """Find the records referencing a record, with the secondary
+    index(es) of the referencing fields
 
+    Args:
+        dependencies (list): (resource name, field name) of the
+            referencing fields, from RESOURCE_DEPENDENCY_MAP or
+            CERTIFICATE_DEPENDENCY_MAP
+        record_id (str): id of the referenced record
+
+    Yields:
+        tuple: resource name and referencing record(dict). A record
+            referencing with more than one field is yielded once.
+    """
+    found = set()
+    for resource, field in dependencies:
+        relation = RESOURCE_TO_RELATION_MAP[resource]
+        records = storage.plugin.get_records_by_secondary_index(relation,
+                                                                field,
+                                                                record_id)
+        for record in records:
+            if (resource, record['id']) in found:
+                continue
+            found.add((resource, record['id']))
+            yield resource, record
+
+
+class LookupContext(object):
+    """Request scoped lookup of the records referenced by a request
+
+    The referenced records are prefetched with a single storage request
+    per resource, and every record read is memoized, so the validators
+    of a request(or of all the items of a bulk request) read a record
+    at most once. The lookup context is passed to the serializers in
+    their context, as 'lookup'.
+    """
 
-def check_vpncertificate_exists(vpnbind_resource, vpnbind):
+    def __init__(self):
+        # Record(dict), or None if missing, per (relation, id)
+        self._records = {}
+
+    def prefetch(self, resource_name, ids):
+        """Read the records not read yet, with a single storage request
+
+        Args:
+            resource_name (str): Resource name of the records
+            ids (iterable): ids of the records
+        """
+        relation = RESOURCE_TO_RELATION_MAP[resource_name]
+        ids = [value for value in set(str(value) for value in ids if value)
+               if (relation, value) not in self._records]
+        if not ids:
+            return
+
+        records = storage.plugin.get_records_by_primary_index(relation, ids)
+        for value in ids:
+            self._records[(relation, value)] = records.get(value)
+
+    def prefetch_references(self, serializer_class, items):
+        """Prefetch the records referenced by the fields of some items
+
+        Args:
+            serializer_class (ConsulSerializer): Serializer of the items
+            items (list): Records(dict) to validate
+        """
+        references = {}
+        for field in serializer_class().fields.values():
+            for validator in field.validators:
+                if isinstance(validator, ReferenceValidator):
+                    references.setdefault(validator.resource_name, set())
+                    references[validator.resource_name].update(
+                            item.get(field.field_name) for item in items
+                            if isinstance(item, dict) and
+                            isinstance(item.get(field.field_name),
+                                       basestring))
+
+        for resource_name, ids in references.items():
+            self.prefetch(resource_name, ids)
+
+    def get_record(self, resource_name, value):
+        """Record of a resource, read once
+
+        Args:
+            resource_name (str): Resource name of the record
+            value (str): id of the record
+
+        Returns:
+            dict: Record, or None if it doesn't exist
+        """
+        key = (RESOURCE_TO_RELATION_MAP[resource_name], str(value))
+        if key not in self._records:
+            self._records[key] = storage.plugin.get_record(*key) or None
+
+        return self._records[key]
+
+    def exists(self, resource_name, value):
+        return self.get_record(resource_name, value) is not None
+
+
+def check_vpncertificate_exists(vpnbind_resource, vpnbind, lookup=None):
     """Check if the VPNEndpoint and Peer-VPNEndpoint has an associated
      VPNCertificate
 
     Args:
         vpnbind_resource (str): VPNBind Resource Name
         vpnbind (dict): VPNBind record
+        lookup (LookupContext): Lookup context of the request, if any
 
     Raises:
         serializers.ValidationError: If the VPNEndpoint or
             Peer-VPNEndpoint doesn't has an associated VPNCertificate
 
     """
+    if lookup is None:
+        lookup = LookupContext()
+
     relation = RESOURCE_TO_RELATION_MAP[vpnbind_resource]
     # Find the VPNEndpoint/Peer-VPNEndpoint resource names
     vpnendpoint_resource, peer_vpnendpoint_resource = get_vpnendpoints_resource(
@@ -328,144 +421,101 @@ def check_vpncertificate_exists(vpnbind_resource, vpnbind):
     # Find the VPNEndpoint/Peer-VPNEndpoint field names
     endpoint_field, peer_endpoint_field = get_vpnendpoints_field(relation)
 
-    # Check whether VPNEndpoint has an associated VPNCertificate
-    vpnendpoint_relation = RESOURCE_TO_RELATION_MAP[vpnendpoint_resource]
-    vpnendpoint_record = storage.plugin.get_record(vpnendpoint_relation,
-                                                   vpnbind[endpoint_field])
-    vpncertificate_id = vpnendpoint_record.get('vpncertificate_id', None)
-    if vpncertificate_id is None:
-        serializers.ValidationError(
-                "VPNEndpoint with id {0} does not have an associated "
-                "vpncertificate".format(vpnendpoint_record['id']))
-
-    # Check whether Peer-VPNEndpoint has an associated VPNCertificate
-    peer_vpnendpoint_relation = RESOURCE_TO_RELATION_MAP[
-        peer_vpnendpoint_resource]
-    peer_vpnendpoint_record = storage.plugin.get_record(
-            peer_vpnendpoint_relation,
-            vpnbind[peer_endpoint_field])
-    vpncertificate_id = peer_vpnendpoint_record.get('vpncertificate_id', None)
-    if vpncertificate_id is None:
-        serializers.ValidationError(
-                "VPNEndpoint with id {0} does not have an associated "
-                "vpncertificate".format(peer_vpnendpoint_record['id']))
+    # Check whether VPNEndpoint and Peer-VPNEndpoint have an associated
+    # VPNCertificate
+    for resource_name, field_name in ((vpnendpoint_resource, endpoint_field),
+                                      (peer_vpnendpoint_resource,
+                                       peer_endpoint_field)):
+        record = lookup.get_record(resource_name, vpnbind[field_name]) or {}
+        if not record.get('vpncertificate_id'):
+            raise serializers.ValidationError(
+                    "VPNEndpoint with id {0} does not have an associated "
+                    "vpncertificate".format(vpnbind[field_name]))
 
 #
 # VPN BIND Field checks
 #
 
 
-def check_id(field_name, resource_name, value):
+def check_id(field_name, resource_name, value, lookup=None):
     """Check whether record with 'id' exits in relation
 
     Args:
         field_name (str): field name in relation
         resource_name (str): resource name
         value (str): id of record
+        lookup (LookupContext): Lookup context of the request, if any
 
     Raises:
         serializers.ValidationError: When 'id' is invalid
     """
-    if not storage.plugin.check_key(RESOURCE_TO_RELATION_MAP[resource_name],
-                                    str(value)):
+    if lookup is not None:
+        exists = lookup.exists(resource_name, value)
+    else:
+        exists = storage.plugin.check_key(
+                RESOURCE_TO_RELATION_MAP[resource_name], str(value))
+
+    if not exists:
         raise serializers.ValidationError(
                 "{0} {1} does not exist".format(field_name, str(value)))
 
 
-def check_ikepolicy_id(value):
-    """Check whether IKEPolicy exists
-
-    Args:
-        value (str): id of IKEPolicy
-    """
-    check_id('ikepolicy_id',
-             'IKEPolicy',
-             value)
-
+class ReferenceValidator(object):
+    """Field validator checking whether the referenced record exists
 
-def check_ipsecpolicy_id(value):
-    """Check whether IPsecPolicy exists
+    The validator uses the lookup context of the serializer context, if
+    any. DRF shares the validators between the serializer instances, the
+    lookup context is thus kept per thread between set_context() and
+    the call.
 
     Args:
-        value (str): id of IPsecPolicy
-    """
-    check_id('ipsecpolicy_id',
-             'IPsecPolicy',
-             value)
-
-
-def check_vpnendpointgroup_id(value):
-    """Check whether VPNEndpointGroup exists
-
-    Args:
-        value (str): id of VPNEndpointGroup
-    """
-    check_id('vpnendpointgroup_id',
-             'VPNEndpointGroup',
-             value)
-
-
-def check_peer_vpnendpointgroup_id(value):
-    """Check whether Peer VPNEndpointGroup exists
-
-    Args:
-        value (str): id of VPNEndpointGroup
+        field_name (str): field name in relation
+        resource_name (str): resource name of the referenced record
     """
-    check_id('peer_vpnendpointgroup_id',
-             'VPNEndpointGroup',
-             value)
 
+    def __init__(self, field_name, resource_name):
+        self.field_name = field_name
+        self.resource_name = resource_name
+        self._local = threading.local()
 
-def check_vpnendpointlocalsite_id(value):
-    """Check whether VPNEndpointLocalSite exists
+    def set_context(self, serializer_field):
+        self._local.lookup = serializer_field.context.get('lookup')
 
-    Args:
-        value (str): id of VPNEndpointLocalSite
-    """
-    check_id('vpnendpointlocalsite_id',
-             'VPNEndpointLocalSite',
-             value)
+    def __call__(self, value):
+        lookup = self._local.__dict__.pop('lookup', None)
+        check_id(self.field_name, self.resource_name, value, lookup)
 
 
-def check_peer_vpnendpointlocalsite_id(value):
-    """Check whether Peer VPNEndpointLocalSite exists
+# Check whether IKEPolicy exists
+check_ikepolicy_id = ReferenceValidator('ikepolicy_id', 'IKEPolicy')
 
-    Args:
-        value (str): id of VPNEndpointLocalSite
-    """
-    check_id('peer_vpnendpointlocalsite_id',
-             'VPNEndpointLocalSite',
-             value)
+# Check whether IPsecPolicy exists
+check_ipsecpolicy_id = ReferenceValidator('ipsecpolicy_id', 'IPsecPolicy')
 
+# Check whether VPNEndpointGroup exists
+check_vpnendpointgroup_id = ReferenceValidator('vpnendpointgroup_id',
+                                               'VPNEndpointGroup')
 
-def check_peer_vpnendpointremotesite_id(value):
-    """Check whether Peer VPNEndpointRemoteSite exists
+# Check whether Peer VPNEndpointGroup exists
+check_peer_vpnendpointgroup_id = ReferenceValidator(
+        'peer_vpnendpointgroup_id', 'VPNEndpointGroup')
 
-    Args:
-        value (str): id of VPNEndpointRemoteSite
-    """
-    check_id('peer_vpnendpointremotesite_id',
-             'VPNEndpointRemoteSite',
-             value)
-
-
-def check_vpncertificate_id(value):
-    """Check whether VPNCertificate exists
+# Check whether VPNEndpointLocalSite exists
+check_vpnendpointlocalsite_id = ReferenceValidator('vpnendpointlocalsite_id',
+                                                   'VPNEndpointLocalSite')
 
-    Args:
-        value (str): id of VPNCertificate
-    """
-    check_id('vpncertificate_id',
-             'VPNCertificate',
-             value)
+# Check whether Peer VPNEndpointLocalSite exists
+check_peer_vpnendpointlocalsite_id = ReferenceValidator(
+        'peer_vpnendpointlocalsite_id', 'VPNEndpointLocalSite')
 
+# Check whether Peer VPNEndpointRemoteSite exists
+check_peer_vpnendpointremotesite_id = ReferenceValidator(
+        'peer_vpnendpointremotesite_id', 'VPNEndpointRemoteSite')
 
-def check_vpncacertificate_id(value):
-    """Check whether VPNCACertificate exists
+# Check whether VPNCertificate exists
+check_vpncertificate_id = ReferenceValidator('vpncertificate_id',
+                                             'VPNCertificate')
 
-    Args:
-        value (str): id of  VPNCACertificate
-    """
-    check_id('vpncacertificate_id',
-             'VPNCACertificate',
-             value)
+# Check whether VPNCACertificate exists
+check_vpncacertificate_id = ReferenceValidator('vpncacertificate_id',
+                                               'VPNCACertificate')
@@ -67,23 +67,50 @@ RESOURCE_TO_RELATION_MAP = {
     'VPNEndpointIPsecEnforcerFQDNMap': 'vpnendpoint_to_ipsec_enforcer_fqdn_map',
     'IPsecEnforcerVPNEndpointMap': 'ipsec_enforcer_to_vpnendpoint_map',
     'IPsecEnforcerConfigVersion': 'ipsec_enforcer_config_version',
+    'IPsecEnforcerConfigSnapshot': 'ipsec_enforcer_config_snapshot',
 }
 
 # Relation Dependencies(Non-VPNBIND Resources)
+#
+# Resource name to the list of (VPNBind resource name, field name) of the
+# VPNBind fields referencing the resource. The fields are secondary keys of
+# the VPNBind resources, so the referencing records are found without
+# scanning the VPNBind relations.
 RESOURCE_DEPENDENCY_MAP = {
-    'IKEPolicy': [VPN_BIND,
-                  'ikepolicy_id'],
-    'IPsecPolicy': [VPN_BIND,
-                    'ipsecpolicy_id'],
-    'VPNEndpointGroup': [VPN_BIND_GROUP,
-                         'vpnendpointgroup_id',
-                         'peer_endpointgroup_id'],
-    'VPNEndpointLocalSite': [VPN_BIND_LOCALSITE,
-                             'vpnendpointlocalsite_id',
-                             'peer_endpointlocalsite_id'],
-    'VPNEndpointRemoteSite': [VPN_BIND_REMOTESITE,
-                              'vpnendpointremotesite_id',
-                              'peer_endpointremotesite_id'],
+    'IKEPolicy': [(bind, 'ikepolicy_id') for bind in VPN_BIND],
+    'IPsecPolicy': [(bind, 'ipsecpolicy_id') for bind in VPN_BIND],
+    'VPNEndpointGroup': [
+        ('VPNBindGroupToGroup', 'vpnendpointgroup_id'),
+        ('VPNBindGroupToGroup', 'peer_vpnendpointgroup_id'),
+        ('VPNBindGroupToLocalSite', 'vpnendpointgroup_id'),
+        ('VPNBindGroupToRemoteSite', 'vpnendpointgroup_id'),
+    ],
+    'VPNEndpointLocalSite': [
+        ('VPNBindLocalSiteToLocalSite', 'vpnendpointlocalsite_id'),
+        ('VPNBindLocalSiteToLocalSite', 'peer_vpnendpointlocalsite_id'),
+        ('VPNBindLocalSiteToRemoteSite', 'vpnendpointlocalsite_id'),
+        ('VPNBindGroupToLocalSite', 'peer_vpnendpointlocalsite_id'),
+    ],
+    'VPNEndpointRemoteSite': [
+        ('VPNBindGroupToRemoteSite', 'peer_vpnendpointremotesite_id'),
+        ('VPNBindLocalSiteToRemoteSite', 'peer_vpnendpointremotesite_id'),
+    ],
+}
+
+# Certificate Dependencies
+#
+# Resource name to the list of (resource name, field name) of the
+# VPNEndpoint and VPNCertificate fields referencing the certificate, which
+# are secondary keys as well.
+CERTIFICATE_DEPENDENCY_MAP = {
+    'VPNCertificate': [
+        ('VPNEndpointGroup', 'vpncertificate_id'),
+        ('VPNEndpointLocalSite', 'vpncertificate_id'),
+        ('VPNEndpointRemoteSite', 'vpncertificate_id'),
+    ],
+    'VPNCACertificate': [
+        ('VPNCertificate', 'vpncacertificate_id'),
+    ],
 }
 
 
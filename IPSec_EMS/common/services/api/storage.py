@@ -17,6 +17,8 @@ from __future__ import unicode_literals
 import logging
 import os
 
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from yapsy.PluginManager import PluginManager
 
 logging.basicConfig(level=logging.DEBUG)
@@ -34,6 +36,16 @@ relative_path_of_plugin = os.path.join(here, 'storage_plugin')
 manager.setPluginPlaces([relative_path_of_plugin])
 manager.collectPlugins()
 
-# Loop around the plugins and return the first plugin object.
-for storage_plugin in manager.getAllPlugins():
-    plugin = storage_plugin.plugin_object
+# Name of the plugin of the storage backend, e.g. 'Consul', 'SQLite' or
+# 'Memory', from the Django settings
+try:
+    STORAGE_BACKEND = getattr(settings, 'STORAGE_BACKEND', 'Consul')
+except ImproperlyConfigured:
+    STORAGE_BACKEND = 'Consul'
+
+storage_plugin = manager.getPluginByName(STORAGE_BACKEND)
+if storage_plugin is None:
+    raise RuntimeError("Storage backend plugin %s is not found" %
+                       STORAGE_BACKEND)
+
+plugin = storage_plugin.plugin_object
@@ -0,0 +1,253 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""In-process cache of the Consul records"""
+
+from __future__ import unicode_literals
+
+from collections import Counter, defaultdict, OrderedDict
+import logging
+import os
+import threading
+import time
+
+from services.api.storage_plugin.consul_io import consul_config as cfg
+from services.api.storage_plugin.consul_io.consul_io_utils import (
+    consul_key_join
+)
+
+LOG = logging.getLogger(__name__)
+
+# Returned by RecordCache.get() when the key is not cached
+MISS = object()
+
+
+class RecordCache(object):
+    """LRU cache of the Consul values, per relation
+
+    The cache is kept coherent with Consul by a background thread, which
+    waits on a blocking query for any change under CONSUL_APP. On a
+    change, the X-Consul-Index of each cached relation is compared with
+    the index seen when the relation was cached, and the relations with
+    a new index are invalidated. Writes through this process invalidate
+    the relation immediately.
+
+    A value read from Consul is stored with the generation of its
+    relation read before the Consul request, so a value read before an
+    invalidation is not cached after it.
+
+    The cache is bypassed while the watch is not established, e.g. when
+    Consul is unreachable.
+
+    Usage:
+        value = cache.get(relation_name, key)
+        if value is MISS:
+            generation = cache.generation(relation_name)
+            value = ...  # read from Consul
+            cache.put(relation_name, key, value, generation)
+    """
+
+    def __init__(self, connection, max_size=cfg.CONSUL_CACHE_SIZE,
+                 enabled=cfg.CONSUL_CACHE_ENABLED):
+        self.connection = connection
+        self.max_size = max_size
+        self.enabled = enabled
+        self.counters = Counter()
+
+        self._mutex = threading.RLock()
+        self._entries = defaultdict(OrderedDict)
+        self._generations = Counter()
+        self._indexes = {}
+        self._watching = False
+        self._watcher_pid = None
+
+    def get(self, relation_name, key):
+        """Fetch a cached value
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            key (unicode): Consul key or key prefix
+
+        Returns:
+            Cached value or MISS
+        """
+        if not self.enabled:
+            return MISS
+
+        with self._mutex:
+            self._start_watcher()
+
+            entries = self._entries[relation_name]
+            if not self._watching or key not in entries:
+                self.counters['misses'] += 1
+                return MISS
+
+            # Move the key to the most recently used end
+            value = entries.pop(key)
+            entries[key] = value
+            self.counters['hits'] += 1
+            return value
+
+    def generation(self, relation_name):
+        """Fetch the generation of the relation, to be passed to put()
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+
+        Returns:
+            int: generation of the relation
+        """
+        if not self.enabled:
+            return None
+
+        if relation_name not in self._indexes and self._watching:
+            # Later changes of the relation are detected against this index
+            index = self._get_relation_index(relation_name)
+            with self._mutex:
+                self._indexes.setdefault(relation_name, index)
+
+        with self._mutex:
+            return self._generations[relation_name]
+
+    def put(self, relation_name, key, value, generation):
+        """Cache a value read from Consul
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            key (unicode): Consul key or key prefix
+            value: Value to be cached, None for a missing key
+            generation (int): Generation of the relation, from
+                generation() before reading the value
+        """
+        if not self.enabled:
+            return
+
+        with self._mutex:
+            if (not self._watching or
+                    relation_name not in self._indexes or
+                    generation != self._generations[relation_name]):
+                return
+
+            entries = self._entries[relation_name]
+            entries.pop(key, None)
+            entries[key] = value
+
+            if len(entries) > self.max_size:
+                entries.popitem(last=False)
+                self.counters['evictions'] += 1
+
+    def invalidate(self, relation_name):
+        """Drop the cached values of the relation
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+        """
+        with self._mutex:
+            self._entries.pop(relation_name, None)
+            self._generations[relation_name] += 1
+            self.counters['invalidations'] += 1
+
+    def clear(self):
+        """Drop all the cached values"""
+        with self._mutex:
+            for relation_name in list(self._entries):
+                self.invalidate(relation_name)
+            self._indexes.clear()
+
+    def stats(self):
+        """Fetch the cache counters
+
+        Returns:
+            dict: hits, misses, evictions, invalidations and the number
+                of cached entries
+        """
+        with self._mutex:
+            stats = dict.fromkeys(
+                    ('hits', 'misses', 'evictions', 'invalidations'), 0)
+            stats.update(self.counters)
+            stats['entries'] = sum(len(entries) for entries in
+                                   self._entries.itervalues())
+            return stats
+
+    def _start_watcher(self):
+        """Start the watch thread, once per process"""
+        if self._watcher_pid == os.getpid():
+            return
+
+        # A forked process does not inherit the watch thread
+        self._watching = False
+        self.clear()
+        self._watcher_pid = os.getpid()
+
+        watcher = threading.Thread(target=self._watch,
+                                   name='ConsulRecordCacheWatcher')
+        watcher.daemon = True
+        watcher.start()
+
+    def _watch(self):
+        """Invalidate the changed relations till the process exits"""
+        prefix = consul_key_join('')
+        index = None
+
+        while True:
+            try:
+                # Only the top level keys are listed, the X-Consul-Index
+                # still covers all the keys under the prefix
+                new_index, data = self.connection.kv.get(
+                        prefix,
+                        index=index,
+                        keys=True,
+                        separator='/',
+                        wait=cfg.CONSUL_CACHE_WATCH_WAIT)
+
+                if index is not None and int(new_index) < int(index):
+                    # Consul state is reset, e.g. restored from snapshot
+                    self.clear()
+                elif new_index != index:
+                    self._invalidate_changed_relations()
+
+                index = new_index
+                self._watching = True
+            except Exception:
+                LOG.exception("Unable to watch Consul, bypassing the cache")
+                with self._mutex:
+                    self._watching = False
+                    self.clear()
+                index = None
+                time.sleep(cfg.CONSUL_CACHE_RETRY_INTERVAL)
+
+    def _invalidate_changed_relations(self):
+        """Compare the X-Consul-Index of the cached relations"""
+        with self._mutex:
+            indexes = self._indexes.items()
+
+        for relation_name, index in indexes:
+            new_index = self._get_relation_index(relation_name)
+            if new_index == index:
+                continue
+
+            with self._mutex:
+                self._indexes[relation_name] = new_index
+                self.invalidate(relation_name)
+
+            LOG.debug("Invalidated the cached relation %s", relation_name)
+
+    def _get_relation_index(self, relation_name):
+        """Fetch the X-Consul-Index of the relation keys"""
+        index, data = self.connection.kv.get(
+                consul_key_join(relation_name) + '/',
+                keys=True,
+                separator='/')
+        return index
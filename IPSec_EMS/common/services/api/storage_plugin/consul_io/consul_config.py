@@ -19,3 +19,34 @@ CONSUL_PORT = 8500
 CONSUL_CONSISTENCY = 'consistent'
 CONSUL_APP = 'ipsecems'
 
+# Consul transaction(/v1/txn) options
+# Consul limits the number of operations in a transaction
+CONSUL_TXN_MAX_OPS = 64
+# Attempts of a record write, when the record is modified concurrently
+CONSUL_TXN_RETRIES = 5
+
+# Consul lock options
+# Lock keys are stored as CONSUL_APP/CONSUL_LOCK_PREFIX/<lock path>
+CONSUL_LOCK_PREFIX = 'locks'
+# Lock path of the callers which do not name a lock
+CONSUL_LOCK_DEFAULT = 'CONSUL_LOCK'
+# Session TTL(seconds), a lock of a crashed holder is released on expiry
+CONSUL_LOCK_TTL = 15
+# Interval(seconds) between the renewals of the sessions holding a lock
+CONSUL_LOCK_RENEW_INTERVAL = CONSUL_LOCK_TTL / 3.0
+# Maximum time(seconds) to wait for a lock
+CONSUL_LOCK_TIMEOUT = 30
+# Maximum time(seconds) of a blocking query waiting for the lock release
+CONSUL_LOCK_WAIT = 5
+# Jittered backoff(seconds) between acquire attempts of a contended lock
+CONSUL_LOCK_BACKOFF_MIN = 0.005
+CONSUL_LOCK_BACKOFF_MAX = 0.1
+
+# Consul record cache options
+CONSUL_CACHE_ENABLED = True
+# Maximum number of cached entries per relation
+CONSUL_CACHE_SIZE = 10000
+# Maximum time of the blocking query watching for the changes
+CONSUL_CACHE_WATCH_WAIT = '60s'
+# Seconds between the watch attempts when Consul is unreachable
+CONSUL_CACHE_RETRY_INTERVAL = 5
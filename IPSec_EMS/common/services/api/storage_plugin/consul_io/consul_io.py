@@ -15,17 +15,26 @@
 
 from __future__ import unicode_literals
 
-import fnmatch
+from collections import OrderedDict
 import json
 import logging
+import math
+import time
 
 import consul
 import six
 from yapsy.IPlugin import IPlugin
 
 from services.api.storage_plugin.consul_io import consul_config as cfg
+from services.api.storage_plugin.consul_io.consul_cache import (
+    MISS, RecordCache
+)
 from services.api.storage_plugin.consul_io.consul_io_utils import (
-    consul_key_join, CustomEncoder, str_to_dict
+    consul_key_join, txn_operation, txn_value
+)
+from services.api.storage_plugin.consul_io.consul_lock import ConsulLock
+from services.api.storage_plugin.utils import (
+    check_list_options, record_to_str, select_page, sort_entry, str_to_dict
 )
 
 LOG = logging.getLogger(__name__)
@@ -100,6 +109,8 @@ class ConsulIO(IPlugin):
         self.connection = consul.Consul(host=cfg.CONSUL_HOST,
                                         port=cfg.CONSUL_PORT,
                                         consistency=cfg.CONSUL_CONSISTENCY)
+        self.lock_manager = ConsulLock(self.connection)
+        self.cache = RecordCache(self.connection)
         self._relations = {}
 
     @property
@@ -110,26 +121,39 @@ class ConsulIO(IPlugin):
     def relations(self, value):
         self._relations.update(value)
 
-    def create_session(self):
+    @property
+    def cache_stats(self):
+        """Hit/miss counters of the record cache, see RecordCache"""
+        return self.cache.stats()
+
+    @property
+    def lock_metrics(self):
+        """Contention metrics of the Consul locks, see LockMetrics"""
+        return self.lock_manager.metrics.snapshot()
+
+    def create_session(self, *lock_path):
         """Create a Consul session for critical section operations
 
+        The session acquires the lock of the given path, e.g.
+        create_session('ipsecenforcers', ipsecenforcer_id) locks a
+        single IPsecEnforcer. Without a lock path, the session acquires
+        the global lock.
+
+        Args:
+            lock_path (tuple): Elements of the lock key
+
         Returns:
             session_id (int): id of the Consul session
         """
-        lock_key = consul_key_join('CONSUL_LOCK')
-        lock_delay = 0  # in seconds
-        session_id = self.connection.session.create(lock_delay=lock_delay)
-        while not self.connection.kv.put(lock_key, '', acquire=session_id):
-                pass
-        return session_id
+        return self.lock_manager.acquire(*lock_path)
 
     def destroy_session(self, session_id):
-        """Destroy the Consul session
+        """Destroy the Consul session, which releases its lock
 
         Args:
             session_id: id of the Consul Session
         """
-        self.connection.session.destroy(session_id)
+        self.lock_manager.release(session_id)
 
     def put_record(self, relation_name, record):
         """Store a record in Consul
@@ -147,6 +171,61 @@ class ConsulIO(IPlugin):
 
         self._store_record_in_consul(relation_name, record)
 
+    def put_records(self, relation_name, records, new=False):
+        """Store the records in Consul, with a few transactions
+
+        The records and their secondary index(es) are packed in
+        transactions of at most CONSUL_TXN_MAX_OPS operations. New
+        records are created with a check-and-set on ModifyIndex 0, so
+        they are not read first. The records of a transaction which is
+        rolled back, e.g. by a concurrent write, are stored one by one.
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            records (list) : Relation/Table records
+            new (bool): True if the records are not stored yet
+
+        Raises:
+           RuntimeError : Fail to store data in Consul
+           TypeError : If relation_name is not a 'string' type and/or
+                a record is None
+        """
+        if (not isinstance(relation_name, six.string_types) or
+                any(record is None for record in records)):
+            raise TypeError
+
+        pi = self._get_relation_index(relation_name, 'primary')
+        si_list = self._get_relation_index(relation_name, 'secondary')
+
+        # At most a check-and-set, and a delete and a set of each
+        # secondary index, per record
+        batch_size = max(1, cfg.CONSUL_TXN_MAX_OPS // (1 + 2 * len(si_list)))
+
+        try:
+            for start in range(0, len(records), batch_size):
+                batch = records[start:start + batch_size]
+
+                stored = {} if new else self._fetch_stored(relation_name,
+                                                           batch)
+                if stored is not None:
+                    operations = []
+                    for record in batch:
+                        stored_record, modify_index = stored.get(
+                                getattr(record, pi), ({}, 0))
+                        operations.extend(self._record_operations(
+                                relation_name, record, stored_record,
+                                modify_index))
+
+                    if self._txn(operations) is not None:
+                        continue
+
+                LOG.debug("Records of %s modified concurrently, storing "
+                          "one by one", relation_name)
+                for record in batch:
+                    self._store_record_in_consul(relation_name, record)
+        finally:
+            self.cache.invalidate(relation_name)
+
     def get_record(self, relation_name, primary_index_value):
         """Retrieve a record from Consul with the required primary
         index value
@@ -174,13 +253,47 @@ class ConsulIO(IPlugin):
         key = consul_key_join(relation_name, field, primary_index_value)
 
         # Fetch the record with the prepared key
-        consul_index, data = self.connection.kv.get(key)
+        value = self._get_cached(relation_name, key, self._fetch_value)
 
-        if data is not None:
-            return str_to_dict(data['Value'])
+        if value is not None:
+            return str_to_dict(value)
         else:
             return []
 
+    def get_records_by_primary_index(self, relation_name,
+                                     primary_index_values):
+        """Retrieve the records with the required primary index values from
+        the record cache, and the records which are not cached from
+        Consul in a single request
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            primary_index_values (list) : Primary index(key) values
+
+        Returns:
+            dict: Record of each primary index value, only for the
+                existing records
+
+        Raises:
+            TypeError : If passed arguments are not of 'string' type
+        """
+        if (not isinstance(relation_name, six.string_types) or
+                not all(isinstance(value, six.string_types)
+                        for value in primary_index_values)):
+            raise TypeError
+
+        if not primary_index_values:
+            return {}
+
+        pi = self._get_relation_index(relation_name, 'primary')
+        keys = dict((consul_key_join(relation_name, pi, value), value)
+                    for value in primary_index_values)
+
+        values = self._get_cached_batch(relation_name, list(keys))
+
+        return dict((keys[key], str_to_dict(value))
+                    for key, value in values.iteritems() if value is not None)
+
     def get_records_by_secondary_index(self,
                                        relation_name,
                                        secondary_index,
@@ -212,23 +325,17 @@ class ConsulIO(IPlugin):
 
         # Find the primary index value for the given secondary index
         # value
-        consul_index, data = self.connection.kv.get(key, recurse=True)
+        primary_index_records = self._get_cached(relation_name,
+                                                 key + CONSUL_SEP,
+                                                 self._fetch_values)
 
-        if data is None:
-            return []
-
-        primary_index_records = (record['Value'] for record in data if
-                                 record['Key'].startswith(key + CONSUL_SEP))
-
-        if primary_index_records is None:
-            return []
+        values = self._get_cached_batch(relation_name, primary_index_records)
 
-        records = []
-        # Fetch the record with the primary index value
-        for primary_index in primary_index_records:
-            consul_index, data = self.connection.kv.get(primary_index)
-            # Prepare a list of all the Consul records' 'Value' field
-            records.append(str_to_dict(data['Value']))
+        # Prepare a list of all the Consul records' 'Value' field, in the
+        # order of the secondary index records
+        records = [str_to_dict(values[primary_index])
+                   for primary_index in primary_index_records
+                   if values[primary_index] is not None]
 
         return records
 
@@ -255,18 +362,108 @@ class ConsulIO(IPlugin):
         key = consul_key_join(relation_name, field) + CONSUL_SEP
 
         # Retrieve the list of all records from Consul
-        # Note : 'recurse=True' option fetches all the record with the
-        #   given key prefix
-        consul_index, data = self.connection.kv.get(key, recurse=True)
-
-        if data is None:
-            return []
+        values = self._get_cached(relation_name, key, self._fetch_values)
 
         # Prepare a list of all the Consul record 'Value' field
-        records = [str_to_dict(record['Value']) for record in data]
+        records = [str_to_dict(value) for value in values]
 
         return records
 
+    def list_records(self, relation_name, filters=None, sort_key=None,
+                     sort_dir='asc', marker=None, limit=None,
+                     marker_entry=None, keys_only=False):
+        """Retrieve a page of the records of a relation/table, filtered
+        by secondary index values and sorted by an index
+
+        Only the keys of the primary index, or of the secondary indexes
+        of the filters and of the sort key, are read to select the page,
+        then the records of the page are read in a single request.
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            filters (dict): Secondary index values of the records,
+                e.g. {'name': 'ike_1'}
+            sort_key (unicode): Primary or secondary index to sort by,
+                the primary index by default
+            sort_dir (unicode): 'asc' or 'desc'
+            marker (unicode): Primary index value of the last record of
+                the previous page, None for the first page
+            limit (int): Maximum number of records, None for all
+            marker_entry (tuple): Sort key value and primary index value
+                of the last record of the previous page, instead of
+                marker. The record may have been deleted since.
+            keys_only (bool): True for the primary index values of the
+                records instead of the records
+
+        Returns:
+            list: Records(or primary index values) of the page, in order
+
+        Raises:
+            TypeError : If relation_name is not a 'string' type
+            ValueError : If an option is invalid or the marker record
+                does not exist
+        """
+        if not isinstance(relation_name, six.string_types):
+            raise TypeError
+
+        pi = self._get_relation_index(relation_name, 'primary')
+        sort_key = sort_key or pi
+        check_list_options(pi,
+                           self._get_relation_index(relation_name,
+                                                    'secondary'),
+                           filters, sort_key, sort_dir)
+
+        if filters:
+            # e.g. ikepolicies/name/ike_1/UUID/<primary index value>
+            pi_values = None
+            for si, si_value in filters.iteritems():
+                si_pi_values = set(
+                    key.rsplit(CONSUL_SEP, 1)[-1] for key in
+                    self._fetch_keys(consul_key_join(relation_name, si,
+                                                     si_value) + CONSUL_SEP))
+                pi_values = (si_pi_values if pi_values is None else
+                             pi_values & si_pi_values)
+        else:
+            # e.g. ikepolicies/UUID/<primary index value>
+            pi_values = [key.rsplit(CONSUL_SEP, 1)[-1] for key in
+                         self._fetch_keys(consul_key_join(relation_name, pi) +
+                                          CONSUL_SEP)]
+
+        if sort_key == pi:
+            entries = [sort_entry(pi_value, pi_value)
+                       for pi_value in pi_values]
+        else:
+            # e.g. ikepolicies/name/<name>/UUID/<primary index value>
+            key_prefix = consul_key_join(relation_name, sort_key) + CONSUL_SEP
+            sort_values = {}
+            for key in self._fetch_keys(key_prefix):
+                si_value, _pi, pi_value = key[len(key_prefix):].rsplit(
+                        CONSUL_SEP, 2)
+                sort_values[pi_value] = si_value
+
+            entries = [sort_entry(sort_values.get(pi_value), pi_value)
+                       for pi_value in pi_values]
+
+        if marker is not None:
+            marker_record = self.get_record(relation_name, marker)
+            if not marker_record:
+                raise ValueError("Marker %s is not found" % marker)
+            marker_entry = sort_entry(marker_record.get(sort_key), marker)
+        elif marker_entry is not None:
+            marker_entry = sort_entry(*marker_entry)
+
+        pi_values = select_page(entries, sort_dir, marker_entry, limit)
+        if keys_only:
+            return pi_values
+
+        primary_keys = [consul_key_join(relation_name, pi, pi_value)
+                        for pi_value in pi_values]
+
+        values = self._get_cached_batch(relation_name, primary_keys)
+
+        return [str_to_dict(values[key]) for key in primary_keys
+                if values[key] is not None]
+
     def delete_record(self, relation_name, record):
         """Delete the given record.
 
@@ -285,40 +482,78 @@ class ConsulIO(IPlugin):
         # Find the primary index of the relation
         pi = self._get_relation_index(relation_name, 'primary')
 
-        # Prepare the key in the required format   
+        # Prepare the key in the required format
         key = consul_key_join(relation_name, pi, getattr(record, pi))
 
-        session_id = self.create_session()
+        # Delete the KV pair and the secondary index(es) records in a
+        # single Consul transaction
+        operations = [txn_operation('delete', key)]
+        for si in self._get_relation_index(relation_name, 'secondary'):
+            if getattr(record, si, None) is None:
+                continue
+
+            operations.append(txn_operation(
+                    'delete',
+                    self._get_secondary_index_key(relation_name,
+                                                  si,
+                                                  getattr(record, si),
+                                                  pi,
+                                                  getattr(record, pi))))
+
+        if self._txn(operations) is None:
+            LOG.error("Unable to delete record in Consul")
+            raise RuntimeError
+
+        self.cache.invalidate(relation_name)
 
-        try:
-            # Delete the KV pair in Consul
-            self.connection.kv.delete(key)
+    def delete_records(self, relation_name, records):
+        """Delete the given records, with a few Consul transactions
 
-            index, data = self.connection.kv.get(key)
-            if data is not None:
-                LOG.error("Unable to delete record in Consul")
-                raise RuntimeError
+        Args:
+            relation_name (unicode): Name of the relation/table
+            records (list) : Relation/Table records
 
-            # Also delete the secondary index(es) records from Consul
-            si = self._get_relation_index(relation_name, 'secondary')
-            if si is None:
-                return
+        Raises:
+           RuntimeError : Fail to delete data in Consul
+           TypeError : If relation_name is not a 'string' type and/or
+                a record is None
+        """
+        if (not isinstance(relation_name, six.string_types) or
+                any(record is None for record in records)):
+            raise TypeError
 
-            for index in si:
-                key = consul_key_join(relation_name,
-                                      index,
-                                      getattr(record, index),
-                                      pi,
-                                      getattr(record, pi))
+        pi = self._get_relation_index(relation_name, 'primary')
+        si_list = self._get_relation_index(relation_name, 'secondary')
 
-                self.connection.kv.delete(key)
+        batches = [[]]
+        for record in records:
+            operations = [txn_operation(
+                    'delete',
+                    consul_key_join(relation_name, pi, getattr(record, pi)))]
+            for si in si_list:
+                if getattr(record, si, None) is None:
+                    continue
+
+                operations.append(txn_operation(
+                        'delete',
+                        self._get_secondary_index_key(relation_name,
+                                                      si,
+                                                      getattr(record, si),
+                                                      pi,
+                                                      getattr(record, pi))))
+
+            if (len(batches[-1]) + len(operations) >
+                    cfg.CONSUL_TXN_MAX_OPS):
+                batches.append([])
+            batches[-1].extend(operations)
 
-                consul_index, data = self.connection.kv.get(key)
-                if data is not None:
-                    LOG.error("Unable to delete record in Consul")
+        try:
+            for operations in batches:
+                if operations and self._txn(operations) is None:
+                    LOG.error("Unable to delete records in Consul")
                     raise RuntimeError
         finally:
-            self.destroy_session(session_id)
+            self.cache.invalidate(relation_name)
 
     def check_key(self, relation_name, primary_index_value):
         """Check if a value is primary index in the relation/table.
@@ -390,6 +625,44 @@ class ConsulIO(IPlugin):
 
         return data['Value']
 
+    def wait_kv(self, key, value=None, timeout=60):
+        """Wait until the Value for the Key in Consul differs from the
+        given Value, with Consul blocking queries
+
+        Args:
+            key (str): Key
+            value (str): Value known to the caller, None if the Key
+                does not exist
+            timeout (float): Maximum time(seconds) to wait
+
+        Returns:
+            (str) : Value, None if the Key does not exist. It is the
+                given Value if the wait timed out.
+
+        Raises:
+            TypeError : If Key is not a 'string' type
+        """
+        if not isinstance(key, six.string_types):
+            raise TypeError
+
+        deadline = time.time() + timeout
+
+        index, data = self.connection.kv.get(key)
+
+        while (data['Value'] if data else None) == value:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+
+            # Consul returns when the Key is modified after the index,
+            # or after the wait time(in whole seconds)
+            index, data = self.connection.kv.get(
+                    key,
+                    index=index,
+                    wait='%ds' % math.ceil(remaining))
+
+        return data['Value'] if data else None
+
     def delete_kv(self, key, recurse=False):
         """Delete the Key/Value pair for the  Key in Consul
 
@@ -413,6 +686,27 @@ class ConsulIO(IPlugin):
             LOG.error("Unable to delete record in Consul")
             raise RuntimeError
 
+    def delete_kvs(self, keys):
+        """Delete the Key/Value pairs of the Keys in Consul, with
+        transactions of at most CONSUL_TXN_MAX_OPS operations
+
+        Args:
+            keys (list): Keys
+
+        Raises:
+            TypeError : If a Key is not a 'string' type
+            RuntimeError : Fail to delete data in Consul
+        """
+        if not all(isinstance(key, six.string_types) for key in keys):
+            raise TypeError
+
+        for start in range(0, len(keys), cfg.CONSUL_TXN_MAX_OPS):
+            operations = [txn_operation('delete', key) for key in
+                          keys[start:start + cfg.CONSUL_TXN_MAX_OPS]]
+            if self._txn(operations) is None:
+                LOG.error("Unable to delete keys in Consul")
+                raise RuntimeError
+
     def get_key_prefix(self, key_prefix, keys=False):
         """Fetch the records with the Key prefix in Consul
 
@@ -445,90 +739,357 @@ class ConsulIO(IPlugin):
 
         return records
 
+    def get_kvs(self, key_prefix):
+        """Fetch all the Key/Value pairs with the Key prefix in Consul
+        in a single request
+
+        Unlike get_key_prefix(), the key prefix is used as it is (the
+        same way as put_kv() and get_kv() use the key).
+
+        Args:
+            key_prefix (str): Key Prefix
+
+        Returns:
+            OrderedDict: Key/Value pairs with the Key prefix, in the
+                Consul key order
+
+        Raises:
+            TypeError: If Key prefix is not a 'string' type
+        """
+        if not isinstance(key_prefix, six.string_types):
+            raise TypeError
+
+        consul_index, data = self.connection.kv.get(key_prefix, recurse=True)
+
+        if data is None:
+            return OrderedDict()
+
+        return OrderedDict((record['Key'], record['Value']) for record in data)
+
     def _store_record_in_consul(self, relation_name, record):
         """Store record in the Consul with primary index(pi) as the
         'key' and the record in JSON format as the 'value'.
- 
+
+        The record and its secondary index(es) are written in a single
+        Consul transaction. The transaction is a check-and-set on the
+        stored record, so a concurrent write of the same record makes
+        the transaction fail and it is prepared again.
+
         Args:
             relation_name (unicode): Name of the relation/table
             record (Any relation record object) : Relation/Table
                                                     record
-         Raises:
+        Raises:
            RuntimeError : Fail to store data in Consul
         """
-        session_id = self.create_session()
+        # Find the primary index of the relation
+        pi = self._get_relation_index(relation_name, 'primary')
+        pi_value = getattr(record, pi)
 
-        try:
+        # Prepare the key in the required format
+        # e.g. ikepolicies/UUID/fc5221be-b9d0-11e5-8338-005056b46cff
+        key = consul_key_join(relation_name, pi, pi_value)
 
-            # Find the primary index of the relation
-            pi = self._get_relation_index(relation_name, 'primary')
+        # Convert the object into JSON(dict)
+        value = record_to_str(record)
 
-            # Prepare the key in the required format
-            # e.g. ikepolicies/UUID/fc5221be-b9d0-11e5-8338-005056b46cff
-            key = consul_key_join(relation_name, pi, getattr(record, pi))
+        # Find the list of Secondary Index
+        si_list = self._get_relation_index(relation_name, 'secondary')
 
-            # Convert the object into JSON(dict)
-            value = json.dumps(record.__dict__, cls=CustomEncoder)
+        if not si_list:
+            if self._txn([txn_operation('set', key, value)]) is None:
+                LOG.error("Unable to store record in Consul")
+                raise RuntimeError
+            self.cache.invalidate(relation_name)
+            return
 
-            # Store secondary indexes in Consul
-            self._prepare_secondary_indices(relation_name, record)
+        for _ in range(cfg.CONSUL_TXN_RETRIES):
+            # For update(PUT/PATCH) operation, the secondary index(es)
+            # of the stored record are replaced. ModifyIndex 0 makes
+            # the check-and-set fail if the record is created meanwhile.
+            consul_index, data = self.connection.kv.get(key)
+            if data is not None:
+                stored_record = str_to_dict(data['Value'])
+                modify_index = data['ModifyIndex']
+            else:
+                stored_record = {}
+                modify_index = 0
 
-            # Store KV pair in Consul
-            rvalue = self.connection.kv.put(key, value)
-        finally:
-            self.destroy_session(session_id)
+            operations = self._record_operations(relation_name, record,
+                                                 stored_record, modify_index)
 
-        if rvalue is None:
-            LOG.error("Unable to store record in Consul")
-            raise RuntimeError
+            if self._txn(operations) is not None:
+                self.cache.invalidate(relation_name)
+                return
 
-    def _prepare_secondary_indices(self, relation_name, record):
-        """Store each secondary index of the relation/table along with
-        primary index value for the record. The list of secondary
-        index is present in the consul_config.
-       
-       Args:
-           relation_name (unicode): Name of the relation/table
-           record (Any relation record object) : Relation/Table record
+            LOG.debug("Record %s modified concurrently, retrying", key)
 
-       Raises:
-           RuntimeError : Fail to store data in Consul
-       """
-        # Find the primary index of the relation
-        pi = self._get_relation_index(relation_name, 'primary')
+        LOG.error("Unable to store record in Consul")
+        raise RuntimeError
 
-        # Prepare the Consul value
-        value = consul_key_join(relation_name, pi, getattr(record, pi))
+    def _record_operations(self, relation_name, record, stored_record,
+                           modify_index):
+        """Prepare the transaction operations storing a record and its
+        secondary index(es)
 
-        # Find the list of Secondary Index
-        si_list = self._get_relation_index(relation_name, 'secondary')
-        if si_list is None:
-            return
+        Args:
+            relation_name (unicode): Name of the relation/table
+            record (object): Relation/Table record
+            stored_record (dict): Stored version of the record, empty if
+                the record is not stored
+            modify_index (int): ModifyIndex of the stored record, 0 if
+                the record is not stored
+
+        Returns:
+            list: Consul transaction operations, a check-and-set of the
+                record first
+        """
+        pi = self._get_relation_index(relation_name, 'primary')
+        pi_value = getattr(record, pi)
+        key = consul_key_join(relation_name, pi, pi_value)
+
+        operations = [txn_operation('cas', key, record_to_str(record),
+                                    modify_index)]
+        for si in self._get_relation_index(relation_name, 'secondary'):
+            si_value = getattr(record, si, None)
+            stored_si_value = stored_record.get(si)
+
+            if stored_si_value not in (None, si_value):
+                operations.append(txn_operation(
+                        'delete',
+                        self._get_secondary_index_key(relation_name,
+                                                      si,
+                                                      stored_si_value,
+                                                      pi,
+                                                      pi_value)))
+
+            # A record without the secondary index field is not indexed
+            if si_value is None:
+                continue
 
-        for si in si_list:
             # Adding primary index value to the key helps in storing
             # multiple values for same index.
+            operations.append(txn_operation(
+                    'set',
+                    self._get_secondary_index_key(relation_name,
+                                                  si,
+                                                  si_value,
+                                                  pi,
+                                                  pi_value),
+                    key))
 
-            # For update(PUT/PATCH) operation of secondary index(es),
-            # first delete the existing secondary index Consul record
-            key_prefix = consul_key_join(relation_name, si) + CONSUL_SEP
-            key_suffix = CONSUL_SEP.join((pi, getattr(record, pi)))
-            consul_index, data = self.connection.kv.get(key_prefix,
-                                                        keys=True,
-                                                        recurse=True)
-            if data is not None:
-                regex = key_prefix + CONSUL_SEP.join(('*', key_suffix))
-                match_key = fnmatch.filter(data, regex)
-                if match_key:
-                    self.connection.kv.delete(match_key[0])
-
-            # Store secondary index in Consul
-            key = key_prefix + CONSUL_SEP.join((getattr(record, si),
-                                                key_suffix))
-            rvalue = self.connection.kv.put(key, value)
-            if rvalue is None:
-                LOG.error("Unable to store secondary index in Consul")
-                raise RuntimeError
+        return operations
+
+    def _fetch_stored(self, relation_name, records):
+        """Read the stored version of the records from Consul in a
+        single transaction
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            records (list): Relation/Table records, at most
+                CONSUL_TXN_MAX_OPS
+
+        Returns:
+            dict: Stored record(dict) and its ModifyIndex, for the
+                primary index value of each record. None if a record is
+                not stored.
+        """
+        pi = self._get_relation_index(relation_name, 'primary')
+
+        # A 'get' of a missing key rolls back the transaction
+        results = self._txn(
+                [txn_operation('get', consul_key_join(relation_name, pi,
+                                                      getattr(record, pi)))
+                 for record in records])
+        if results is None:
+            return None
+
+        stored = {}
+        for result in results:
+            stored_record = str_to_dict(txn_value(result['KV']['Value']))
+            stored[stored_record[pi]] = (stored_record,
+                                         result['KV']['ModifyIndex'])
+
+        return stored
+
+    def _get_cached(self, relation_name, key, fetch):
+        """Fetch a value from the record cache, or from Consul and
+        cache it
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            key (unicode): Consul key or key prefix
+            fetch (function): Function to read the value of the key
+                from Consul
+
+        Returns:
+            Cached or fetched value
+        """
+        value = self.cache.get(relation_name, key)
+        if value is MISS:
+            generation = self.cache.generation(relation_name)
+            value = fetch(key)
+            self.cache.put(relation_name, key, value, generation)
+
+        return value
+
+    def _get_cached_batch(self, relation_name, keys):
+        """Fetch the values of the primary index keys of a relation from
+        the record cache, and the values which are not cached from
+        Consul in a single request
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            keys (list): Primary index keys of the relation
+
+        Returns:
+            dict: Value of each key, None if the key does not exist
+        """
+        values = {}
+        missed_keys = []
+        for key in keys:
+            value = self.cache.get(relation_name, key)
+            if value is MISS:
+                missed_keys.append(key)
+            else:
+                values[key] = value
+
+        if missed_keys:
+            generation = self.cache.generation(relation_name)
+            fetched_values = self._fetch_batch(relation_name, missed_keys)
+            for key, value in fetched_values.iteritems():
+                self.cache.put(relation_name, key, value, generation)
+            values.update(fetched_values)
+
+        return values
+
+    def _fetch_keys(self, key_prefix):
+        """Read the keys with a prefix from Consul, without their values
+
+        Returns:
+            list: Keys, in the Consul key order
+        """
+        consul_index, keys = self.connection.kv.get(key_prefix, keys=True)
+
+        return keys or []
+
+    def _fetch_value(self, key):
+        """Read the Value of a key from Consul
+
+        Returns:
+            unicode: Value of the key, None if the key does not exist
+        """
+        consul_index, data = self.connection.kv.get(key)
+
+        if data is None:
+            return None
+
+        return data['Value']
+
+    def _fetch_values(self, key_prefix):
+        """Read the Values of the keys with a prefix from Consul
+
+        Note : 'recurse=True' option fetches all the record with the
+          given key prefix
+
+        Returns:
+            tuple: Values of the keys, in the Consul key order
+        """
+        consul_index, data = self.connection.kv.get(key_prefix, recurse=True)
+
+        if data is None:
+            return ()
+
+        return tuple(record['Value'] for record in data)
+
+    def _fetch_batch(self, relation_name, keys):
+        """Read the Values of the primary index keys of a relation from
+        Consul in a single request
+
+        Up to CONSUL_TXN_MAX_OPS keys are read with a transaction of
+        'get' operations. More keys, or keys which are not found, are
+        read with the prefix of the relation's primary index and
+        filtered.
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            keys (list): Primary index keys of the relation
+
+        Returns:
+            dict: Value of each key, None if the key does not exist
+        """
+        if len(keys) <= cfg.CONSUL_TXN_MAX_OPS:
+            # A 'get' of a missing key rolls back the transaction
+            results = self._txn([txn_operation('get', key) for key in keys])
+            if results is not None:
+                return dict((result['KV']['Key'],
+                             txn_value(result['KV']['Value']))
+                            for result in results)
+
+        pi = self._get_relation_index(relation_name, 'primary')
+        key_prefix = consul_key_join(relation_name, pi) + CONSUL_SEP
+        consul_index, data = self.connection.kv.get(key_prefix, recurse=True)
+
+        values = dict.fromkeys(keys)
+        for record in data or []:
+            if record['Key'] in values:
+                values[record['Key']] = record['Value']
+
+        return values
+
+    @staticmethod
+    def _get_secondary_index_key(relation_name, si, si_value, pi, pi_value):
+        """Prepare the Consul key of a secondary index record
+
+        e.g. ikepolicies/name/ike_1/id/fc5221be-b9d0-11e5-8338-005056b46cff
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            si (unicode): Secondary index
+            si_value (unicode): Secondary index value
+            pi (unicode): Primary index
+            pi_value (unicode): Primary index value
+
+        Returns:
+            unicode: Consul key
+        """
+        return consul_key_join(relation_name, si, si_value, pi, pi_value)
+
+    def _txn(self, operations):
+        """Submit the KV operations to Consul as a single transaction,
+        where either all or none of the operations are applied.
+
+        Args:
+            operations (list): Consul transaction operations, prepared
+                with txn_operation()
+
+        Returns:
+            list: Results of the operations if the transaction is
+                applied, None if it is rolled back e.g. on a failed
+                check-and-set
+
+        Raises:
+            RuntimeError : Too many operations or Consul failure
+        """
+        if len(operations) > cfg.CONSUL_TXN_MAX_OPS:
+            LOG.error("Consul transaction exceeds %d operations",
+                      cfg.CONSUL_TXN_MAX_OPS)
+            raise RuntimeError
+
+        response = self.connection.http.put(consul.base.callback(),
+                                            '/v1/txn',
+                                            data=json.dumps(operations))
+
+        if response.code == 200:
+            return json.loads(response.body).get('Results') or []
+
+        if response.code == 409:
+            LOG.debug("Consul transaction rolled back: %s", response.body)
+            return None
+
+        LOG.error("Consul transaction failed: %s %s",
+                  response.code, response.body)
+        raise RuntimeError
 
     def _get_relation_index(self, relation_name, index_type):
         """Find the primary index or list of secondary index of
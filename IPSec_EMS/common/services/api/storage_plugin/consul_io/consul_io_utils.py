@@ -15,39 +15,59 @@
 
 from __future__ import unicode_literals
 
-import json
+import base64
 
 from services.api.storage_plugin.consul_io import consul_config as cfg
 
 
-class CustomEncoder(json.JSONEncoder):
-    """Extend JSONEncoder to handle set type. Convert set to list"""
-    def default(self, obj):
-        if isinstance(obj, set):
-            return list(obj)
-        return json.JSONEncoder.default(self, obj)
+def consul_key_join(*args):
+    """Prepare consul key(partial or complete) with consul
+    delimiter('/')
+
+    Args:
+        args (tuple): consul key elements
+
+    Returns:
+        unicode: consul key with consul delimiter
+    """
+    return cfg.CONSUL_APP + '/' + '/'.join(args)
 
 
-def str_to_dict(value):
-    """Converts a string expression to dict
+def txn_operation(verb, key, value=None, index=None):
+    """Prepare a KV operation of Consul transaction(/v1/txn)
 
     Args:
-        value (str) : value
+        verb (unicode): KV operation e.g. 'set', 'cas', 'delete'
+        key (unicode): Consul key
+        value (unicode): Value of the key, for 'set' and 'cas' verbs
+        index (int): ModifyIndex of the key, for 'cas' verb
 
     Returns:
-        dict
+        dict: Consul transaction operation
     """
-    return json.loads(value)
+    operation = {'Verb': verb, 'Key': key}
 
+    if value is not None:
+        # Consul expects base64 encoded values in transactions
+        operation['Value'] = base64.b64encode(
+                value.encode('utf-8')).decode('ascii')
+
+    if index is not None:
+        operation['Index'] = index
+
+    return {'KV': operation}
 
-def consul_key_join(*args):
-    """Prepare consul key(partial or complete) with consul
-    delimiter('/')
+
+def txn_value(value):
+    """Decode a Value in the results of Consul transaction(/v1/txn)
 
     Args:
-        args (tuple): consul key elements
+        value (unicode): base64 encoded Value, or None
 
     Returns:
-        unicode: consul key with consul delimiter
+        unicode: Value
     """
-    return cfg.CONSUL_APP + '/' + '/'.join(args)
+    if value is None:
+        return None
+
+    return base64.b64decode(value).decode('utf-8')
@@ -0,0 +1,244 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Distributed locks with Consul sessions"""
+
+from __future__ import unicode_literals
+
+from collections import Counter, defaultdict
+import logging
+import random
+import threading
+import time
+
+import consul
+
+from services.api.storage_plugin.consul_io import consul_config as cfg
+from services.api.storage_plugin.consul_io.consul_io_utils import (
+    consul_key_join
+)
+
+LOG = logging.getLogger(__name__)
+
+
+class LockMetrics(object):
+    """Contention metrics of the Consul locks, per lock name
+
+    The lock name is the first element of the lock path, e.g. the
+    relation name for the per-record locks.
+    """
+
+    def __init__(self):
+        self._mutex = threading.Lock()
+        self._counters = defaultdict(Counter)
+        self._max_wait_time = defaultdict(float)
+
+    def record(self, name, attempts, wait_time, acquired):
+        """Record an acquire of a lock
+
+        Args:
+            name (unicode): Lock name
+            attempts (int): Number of acquire attempts
+            wait_time (float): Seconds taken to acquire the lock
+            acquired (bool): False if the acquire timed out
+        """
+        with self._mutex:
+            counters = self._counters[name]
+            counters['acquired' if acquired else 'timeouts'] += 1
+            counters['attempts'] += attempts
+            if attempts > 1:
+                counters['contended'] += 1
+            counters['wait_time'] += wait_time
+            self._max_wait_time[name] = max(self._max_wait_time[name],
+                                            wait_time)
+
+    def snapshot(self):
+        """Fetch the metrics
+
+        Returns:
+            dict: metrics per lock name e.g.
+                {'ipsecenforcers': {'acquired': 10, 'contended': 2,
+                                    'timeouts': 0, 'attempts': 13,
+                                    'wait_time': 0.2,
+                                    'max_wait_time': 0.05}}
+        """
+        with self._mutex:
+            metrics = {}
+            for name, counters in self._counters.items():
+                metrics[name] = dict.fromkeys(
+                        ('acquired', 'contended', 'timeouts', 'attempts',
+                         'wait_time'), 0)
+                metrics[name].update(counters)
+                metrics[name]['max_wait_time'] = self._max_wait_time[name]
+            return metrics
+
+    def reset(self):
+        """Clear the metrics"""
+        with self._mutex:
+            self._counters.clear()
+            self._max_wait_time.clear()
+
+
+class ConsulLock(object):
+    """Lock manager with a Consul session per lock holder
+
+    A lock is a Consul key(CONSUL_APP/CONSUL_LOCK_PREFIX/<lock path>)
+    acquired by a session. So a relation or a single record can be
+    locked instead of serializing all the writes with one key, e.g.
+
+        session_id = lock.acquire('ipsecenforcers', ipsecenforcer_id)
+        try:
+            ...
+        finally:
+            lock.release(session_id)
+
+    A waiter does not spin on the acquire. It waits on a Consul blocking
+    query until the lock key changes, and then retries after a jittered
+    backoff. The sessions have a TTL and the 'delete' behavior, so the
+    lock key of a crashed holder is removed when the TTL expires, and the
+    lock key is removed on release.
+
+    A thread renews the sessions holding a lock at every
+    CONSUL_LOCK_RENEW_INTERVAL, so a lock held longer than the TTL is not
+    released under its holder.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.metrics = LockMetrics()
+
+        # ids of the sessions holding a lock, renewed by the renewal
+        # thread, started on the first acquire
+        self._held = set()
+        self._mutex = threading.Lock()
+        self._renewal = None
+
+    def acquire(self, *lock_path):
+        """Create a Consul session and acquire the lock with it
+
+        Args:
+            lock_path (tuple): Elements of the lock key, e.g. relation
+                name and primary index value. Defaults to the global
+                lock(CONSUL_LOCK_DEFAULT).
+
+        Returns:
+            session_id (unicode): id of the Consul session holding the lock
+
+        Raises:
+            RuntimeError: If the lock is not acquired in
+                CONSUL_LOCK_TIMEOUT seconds
+        """
+        if not lock_path:
+            lock_path = (cfg.CONSUL_LOCK_DEFAULT,)
+
+        key = consul_key_join(cfg.CONSUL_LOCK_PREFIX, *lock_path)
+        session_id = self.connection.session.create(lock_delay=0,
+                                                    behavior='delete',
+                                                    ttl=cfg.CONSUL_LOCK_TTL)
+
+        start = time.time()
+        deadline = start + cfg.CONSUL_LOCK_TIMEOUT
+        backoff = cfg.CONSUL_LOCK_BACKOFF_MIN
+        attempts = 0
+
+        try:
+            while True:
+                attempts += 1
+                if self.connection.kv.put(key, '', acquire=session_id):
+                    break
+
+                if time.time() >= deadline:
+                    LOG.error("Timed out waiting for the lock %s", key)
+                    raise RuntimeError("Timed out waiting for the lock %s" %
+                                       key)
+
+                self._wait_for_release(key, deadline)
+
+                # Jitter the retries, so that the waiters woken up by the
+                # same release do not retry in lockstep
+                time.sleep(random.uniform(0, backoff))
+                backoff = min(backoff * 2, cfg.CONSUL_LOCK_BACKOFF_MAX)
+        except Exception:
+            self.metrics.record(lock_path[0], attempts, time.time() - start,
+                                acquired=False)
+            self.connection.session.destroy(session_id)
+            raise
+
+        self.metrics.record(lock_path[0], attempts, time.time() - start,
+                            acquired=True)
+
+        with self._mutex:
+            self._held.add(session_id)
+            if self._renewal is None:
+                self._renewal = threading.Thread(target=self._renew,
+                                                 name='consul-lock-renewal')
+                self._renewal.daemon = True
+                self._renewal.start()
+
+        return session_id
+
+    def release(self, session_id):
+        """Release the lock and destroy the Consul session
+
+        Args:
+            session_id (unicode): id of the Consul session holding the lock
+        """
+        with self._mutex:
+            self._held.discard(session_id)
+
+        # The session 'delete' behavior removes the lock key
+        self.connection.session.destroy(session_id)
+
+    def _renew(self):
+        """Renew the sessions holding a lock at every
+        CONSUL_LOCK_RENEW_INTERVAL"""
+        while True:
+            time.sleep(cfg.CONSUL_LOCK_RENEW_INTERVAL)
+
+            with self._mutex:
+                held = list(self._held)
+
+            for session_id in held:
+                try:
+                    self.connection.session.renew(session_id)
+                except consul.NotFound:
+                    # Released meanwhile, or expired
+                    with self._mutex:
+                        if session_id not in self._held:
+                            continue
+                        self._held.discard(session_id)
+                    LOG.error("The Consul session %s expired while holding "
+                              "a lock", session_id)
+                except Exception:
+                    LOG.exception("Failed to renew the Consul session %s",
+                                  session_id)
+
+    def _wait_for_release(self, key, deadline):
+        """Wait with a Consul blocking query till the lock key changes
+
+        Args:
+            key (unicode): Lock key
+            deadline (float): Time till when the lock is waited for
+        """
+        index, data = self.connection.kv.get(key)
+        if data is None or not data.get('Session'):
+            # Released meanwhile
+            return
+
+        wait = min(cfg.CONSUL_LOCK_WAIT, deadline - time.time())
+        if wait <= 0:
+            return
+
+        self.connection.kv.get(key, index=index, wait='%dms' % (wait * 1000))
@@ -0,0 +1,588 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import unicode_literals
+
+from collections import defaultdict, OrderedDict
+import logging
+import threading
+import time
+import uuid
+
+import six
+from yapsy.IPlugin import IPlugin
+
+from services.api.storage_plugin.utils import (
+    check_list_options, key_join, record_to_str, select_page, sort_entry,
+    str_to_dict
+)
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_LOCK = 'global'
+
+
+class MemoryIO(IPlugin):
+    """This a plugin to store VPN configuration or other data in the
+    memory of the process, with the same interface as the Consul plugin.
+
+       The records of a relation are kept in a dict with the primary
+       index value as the key and the record in JSON format as the
+       value. Each secondary index of a relation is a dict of secondary
+       index value to the set of primary index values.
+
+       The data is not shared with the other processes and is lost on
+       exit, so the plugin is meant for the unit tests and the
+       benchmarks, which then run without a Consul agent.
+    """
+
+    def __init__(self):
+        super(MemoryIO, self).__init__()
+        self._relations = {}
+        self._mutex = threading.RLock()
+        self._records = defaultdict(dict)
+        self._indexes = defaultdict(lambda: defaultdict(set))
+        self._kv = {}
+        # Conditions of the Keys waited for with wait_kv()
+        self._kv_conditions = {}
+        self._locks = defaultdict(threading.Lock)
+        self._sessions = {}
+
+    @property
+    def relations(self):
+        return self._relations
+
+    @relations.setter
+    def relations(self, value):
+        self._relations.update(value)
+
+    def create_session(self, *lock_path):
+        """Create a session for critical section operations, which
+        acquires the lock of the given path(the global lock by default)
+
+        Args:
+            lock_path (tuple): Elements of the lock name
+
+        Returns:
+            session_id (unicode): id of the session
+        """
+        with self._mutex:
+            lock = self._locks[lock_path or (DEFAULT_LOCK,)]
+
+        lock.acquire()
+
+        session_id = six.text_type(uuid.uuid4())
+        self._sessions[session_id] = lock
+        return session_id
+
+    def destroy_session(self, session_id):
+        """Destroy the session, which releases its lock
+
+        Args:
+            session_id: id of the session
+        """
+        self._sessions.pop(session_id).release()
+
+    def put_record(self, relation_name, record):
+        """Store a record
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            record (object) : Relation/Table record
+
+        Raises:
+            TypeError : If relation_name is not a 'string' type and/or
+                record is None or has no primary index value
+        """
+        if not isinstance(relation_name, six.string_types) or (record is None):
+            raise TypeError
+
+        pi = self._get_relation_index(relation_name, 'primary')
+        pi_value = getattr(record, pi)
+
+        if not isinstance(pi_value, six.string_types):
+            raise TypeError
+
+        with self._mutex:
+            # For update(PUT/PATCH) operation, replace the secondary
+            # index(es) of the stored record
+            self._delete_secondary_indices(relation_name, pi_value)
+
+            self._records[relation_name][pi_value] = record_to_str(record)
+
+            # A record without the secondary index field is not indexed
+            for si in self._get_relation_index(relation_name, 'secondary'):
+                si_value = getattr(record, si, None)
+                if si_value is not None:
+                    self._indexes[(relation_name, si)][si_value].add(pi_value)
+
+    def put_records(self, relation_name, records, new=False):
+        """Store the records, all at once for the other threads
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            records (list) : Relation/Table records
+            new (bool): True if the records are not stored yet, unused
+
+        Raises:
+            TypeError : If relation_name is not a 'string' type and/or
+                a record is None or has no primary index value
+        """
+        with self._mutex:
+            for record in records:
+                self.put_record(relation_name, record)
+
+    def get_record(self, relation_name, primary_index_value):
+        """Retrieve a record with the required primary index value
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            primary_index_value (unicode) : Primary index(key) value
+
+        Returns:
+            Empty List ([]) OR A record with matching primary index
+            value
+
+        Raises:
+            TypeError : If passed arguments are not of 'string' type
+        """
+        if (not isinstance(relation_name, six.string_types) or
+                not isinstance(primary_index_value, six.string_types)):
+            raise TypeError
+
+        with self._mutex:
+            value = self._records[relation_name].get(primary_index_value)
+
+        if value is not None:
+            return str_to_dict(value)
+        else:
+            return []
+
+    def get_records_by_primary_index(self, relation_name,
+                                     primary_index_values):
+        """Retrieve the records with the required primary index values
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            primary_index_values (list) : Primary index(key) values
+
+        Returns:
+            dict: Record of each primary index value, only for the
+                existing records
+
+        Raises:
+            TypeError : If passed arguments are not of 'string' type
+        """
+        if (not isinstance(relation_name, six.string_types) or
+                not all(isinstance(value, six.string_types)
+                        for value in primary_index_values)):
+            raise TypeError
+
+        with self._mutex:
+            relation = self._records[relation_name]
+            values = dict((value, relation[value])
+                          for value in primary_index_values
+                          if value in relation)
+
+        return dict((value, str_to_dict(record))
+                    for value, record in values.iteritems())
+
+    def get_records_by_secondary_index(self,
+                                       relation_name,
+                                       secondary_index,
+                                       field_value):
+        """Retrieve a list of record for a secondary index from a
+        relation
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            secondary_index (unicode) : Required secondary index
+            field_value (unicode) : Secondary index value
+
+        Returns:
+            Empty list ([]) OR list of records with the given secondary
+            index value in the relation, in the primary index order.
+
+        Raises:
+            TypeError : If passed arguments are not of 'string' type
+        """
+        if (not isinstance(relation_name, six.string_types) or
+                not isinstance(secondary_index, six.string_types) or
+                not isinstance(field_value, six.string_types)):
+            raise TypeError
+
+        with self._mutex:
+            index = self._indexes[(relation_name, secondary_index)]
+            records = self._records[relation_name]
+            values = [records[pi_value]
+                      for pi_value in sorted(index.get(field_value, ()))]
+
+        return [str_to_dict(value) for value in values]
+
+    def get_records(self, relation_name):
+        """Retrieve list of all records of a relation/table.
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+
+        Returns:
+            list: All records in the relation, in the primary index order.
+
+        Raises:
+            TypeError : If passed argument is not of 'string' type
+        """
+        if not isinstance(relation_name, six.string_types):
+            raise TypeError
+
+        with self._mutex:
+            values = [value for pi_value, value in
+                      sorted(self._records[relation_name].items())]
+
+        return [str_to_dict(value) for value in values]
+
+    def list_records(self, relation_name, filters=None, sort_key=None,
+                     sort_dir='asc', marker=None, limit=None,
+                     marker_entry=None, keys_only=False):
+        """Retrieve a page of the records of a relation/table, filtered
+        by secondary index values and sorted by an index
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            filters (dict): Secondary index values of the records,
+                e.g. {'name': 'ike_1'}
+            sort_key (unicode): Primary or secondary index to sort by,
+                the primary index by default
+            sort_dir (unicode): 'asc' or 'desc'
+            marker (unicode): Primary index value of the last record of
+                the previous page, None for the first page
+            limit (int): Maximum number of records, None for all
+            marker_entry (tuple): Sort key value and primary index value
+                of the last record of the previous page, instead of
+                marker. The record may have been deleted since.
+            keys_only (bool): True for the primary index values of the
+                records instead of the records
+
+        Returns:
+            list: Records(or primary index values) of the page, in order
+
+        Raises:
+            TypeError : If relation_name is not a 'string' type
+            ValueError : If an option is invalid or the marker record
+                does not exist
+        """
+        if not isinstance(relation_name, six.string_types):
+            raise TypeError
+
+        pi = self._get_relation_index(relation_name, 'primary')
+        sort_key = sort_key or pi
+        check_list_options(pi,
+                           self._get_relation_index(relation_name,
+                                                    'secondary'),
+                           filters, sort_key, sort_dir)
+
+        with self._mutex:
+            records = self._records[relation_name]
+
+            pi_values = records.viewkeys()
+            for si, si_value in (filters or {}).iteritems():
+                pi_values = pi_values & self._indexes[(relation_name, si)].get(
+                        si_value, set())
+
+            if sort_key == pi:
+                entries = [sort_entry(pi_value, pi_value)
+                           for pi_value in pi_values]
+            else:
+                sort_values = {}
+                index = self._indexes[(relation_name, sort_key)]
+                for si_value, si_pi_values in index.iteritems():
+                    sort_values.update(dict.fromkeys(si_pi_values, si_value))
+
+                entries = [sort_entry(sort_values.get(pi_value), pi_value)
+                           for pi_value in pi_values]
+
+            if marker is not None:
+                if marker not in records:
+                    raise ValueError("Marker %s is not found" % marker)
+                marker_entry = sort_entry(
+                        str_to_dict(records[marker]).get(sort_key), marker)
+            elif marker_entry is not None:
+                marker_entry = sort_entry(*marker_entry)
+
+            pi_values = select_page(entries, sort_dir, marker_entry, limit)
+            if keys_only:
+                return pi_values
+
+            values = [records[pi_value] for pi_value in pi_values]
+
+        return [str_to_dict(value) for value in values]
+
+    def delete_record(self, relation_name, record):
+        """Delete the given record.
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            record (object) : Relation/Table record
+
+        Raises:
+           TypeError : If relation_name is not a 'string' type and/or
+                record is None
+        """
+        if not isinstance(relation_name, six.string_types) or (record is None):
+            raise TypeError
+
+        pi = self._get_relation_index(relation_name, 'primary')
+        pi_value = getattr(record, pi)
+
+        with self._mutex:
+            self._delete_secondary_indices(relation_name, pi_value)
+            self._records[relation_name].pop(pi_value, None)
+
+    def delete_records(self, relation_name, records):
+        """Delete the given records, all at once for the other threads
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            records (list) : Relation/Table records
+
+        Raises:
+           TypeError : If relation_name is not a 'string' type and/or
+                a record is None
+        """
+        with self._mutex:
+            for record in records:
+                self.delete_record(relation_name, record)
+
+    def check_key(self, relation_name, primary_index_value):
+        """Check if a value is primary index in the relation/table.
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            primary_index_value (unicode): Value of primary key(index)
+
+        Returns:
+            (bool) : True if a value in primary index, else False
+
+        Raises:
+            TypeError : If passed argument is not of 'string' type
+        """
+        if (not isinstance(relation_name, six.string_types) or
+                not isinstance(primary_index_value, six.string_types)):
+            raise TypeError
+
+        with self._mutex:
+            return primary_index_value in self._records[relation_name]
+
+    def put_kv(self, key, value=' '):
+        """Store a Key/Value pair
+
+        Args:
+            key (str): Key
+            value (str) : Value , Defaults to ' '.
+
+        Raises:
+            TypeError : If Key is not a 'string' type
+        """
+        if not isinstance(key, six.string_types):
+            raise TypeError
+
+        with self._mutex:
+            self._kv[key] = value
+            self._notify_kv(key)
+
+    def get_kv(self, key):
+        """Fetch the Value for the Key
+
+        Args:
+            key (str): Key
+
+        Returns:
+            (str) : Value, None if the Key does not exist
+
+        Raises:
+            TypeError : If Key is not a 'string' type
+        """
+        if not isinstance(key, six.string_types):
+            raise TypeError
+
+        with self._mutex:
+            return self._kv.get(key)
+
+    def wait_kv(self, key, value=None, timeout=60):
+        """Wait until the Value for the Key differs from the given Value
+
+        Args:
+            key (str): Key
+            value (str): Value known to the caller, None if the Key
+                does not exist
+            timeout (float): Maximum time(seconds) to wait
+
+        Returns:
+            (str) : Value, None if the Key does not exist. It is the
+                given Value if the wait timed out.
+
+        Raises:
+            TypeError : If Key is not a 'string' type
+        """
+        if not isinstance(key, six.string_types):
+            raise TypeError
+
+        deadline = time.time() + timeout
+
+        with self._mutex:
+            condition = self._kv_conditions.setdefault(
+                    key, threading.Condition(self._mutex))
+
+            while self._kv.get(key) == value:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                condition.wait(remaining)
+
+            return self._kv.get(key)
+
+    def delete_kv(self, key, recurse=False):
+        """Delete the Key/Value pair for the Key
+
+        Args:
+            key (str): Key
+            recurse(bool): whether delete recursively for with the key prefix
+
+        Raises:
+            TypeError : If Key is not a 'string' type
+        """
+        if not isinstance(key, six.string_types):
+            raise TypeError
+
+        with self._mutex:
+            if not recurse:
+                self._kv.pop(key, None)
+                self._notify_kv(key)
+                return
+
+            for stored_key in list(self._kv):
+                if stored_key.startswith(key):
+                    del self._kv[stored_key]
+                    self._notify_kv(stored_key)
+
+    def delete_kvs(self, keys):
+        """Delete the Key/Value pairs of the Keys
+
+        Args:
+            keys (list): Keys
+
+        Raises:
+            TypeError : If a Key is not a 'string' type
+        """
+        if not all(isinstance(key, six.string_types) for key in keys):
+            raise TypeError
+
+        with self._mutex:
+            for key in keys:
+                self._kv.pop(key, None)
+                self._notify_kv(key)
+
+    def get_key_prefix(self, key_prefix, keys=False):
+        """Fetch the records with the Key prefix
+
+        Args:
+            key_prefix (str): Key Prefix, under the IPsec EMS keys
+            keys (bool): If True, only get records' key
+
+        Returns:
+            list: List of records
+
+        Raises:
+            TypeError: If Key is not a 'string' type
+        """
+        if not isinstance(key_prefix, six.string_types):
+            raise TypeError
+
+        data = self.get_kvs(key_join(key_prefix))
+
+        if keys:
+            return list(data.keys())
+
+        return list(data.values())
+
+    def get_kvs(self, key_prefix):
+        """Fetch all the Key/Value pairs with the Key prefix
+
+        Args:
+            key_prefix (str): Key Prefix
+
+        Returns:
+            OrderedDict: Key/Value pairs with the Key prefix, in the key
+                order
+
+        Raises:
+            TypeError: If Key prefix is not a 'string' type
+        """
+        if not isinstance(key_prefix, six.string_types):
+            raise TypeError
+
+        with self._mutex:
+            return OrderedDict(sorted(
+                    (key, value) for key, value in self._kv.items()
+                    if key.startswith(key_prefix)))
+
+    def _notify_kv(self, key):
+        """Wake up the wait_kv() callers of the modified Key"""
+        condition = self._kv_conditions.get(key)
+        if condition is not None:
+            condition.notify_all()
+
+    def _delete_secondary_indices(self, relation_name, pi_value):
+        """Delete the secondary index(es) of the stored record
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            pi_value (unicode): Primary index value of the record
+        """
+        value = self._records[relation_name].get(pi_value)
+        if value is None:
+            return
+
+        stored_record = str_to_dict(value)
+        for si in self._get_relation_index(relation_name, 'secondary'):
+            si_value = stored_record.get(si)
+            if si_value is None:
+                continue
+
+            index = self._indexes[(relation_name, si)]
+            index[si_value].discard(pi_value)
+            if not index[si_value]:
+                del index[si_value]
+
+    def _get_relation_index(self, relation_name, index_type):
+        """Find the primary index or list of secondary index of
+        relation
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            index_type (unicode): Type of index = 'primary' or 'secondary'
+
+        Returns:
+            Primary index or list of secondary index
+        """
+        index_type = index_type.lower()
+
+        if index_type == 'primary':
+            return self.relations[relation_name].get('primary_key')
+        elif index_type == 'secondary':
+            return self.relations[relation_name].get('secondary_keys', [])
+        elif index_type == 'foreign':
+            return self.relations[relation_name].get('foreign_keys', [])
+        else:
+            raise ValueError("Invalid index type")
@@ -0,0 +1,40 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+
+# IPsec EMS project directory(with manage.py)
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                           '..', '..', '..', '..'))
+
+# SQLite database file, in the project directory by default.
+# Note: a ':memory:' database is private to a connection(thread)
+SQLITE_DATABASE = os.environ.get(
+        'IPSECEMS_SQLITE_DATABASE',
+        os.path.join(PROJECT_DIR, 'ipsecems_storage.sqlite3'))
+# Seconds to wait for the database lock of another connection
+SQLITE_TIMEOUT = 30
+
+# Lock options, see create_session()
+# Lock TTL(seconds), a lock of a crashed holder is released on expiry
+SQLITE_LOCK_TTL = 15
+# Maximum time(seconds) to wait for a lock
+SQLITE_LOCK_TIMEOUT = 30
+# Jittered backoff(seconds) between acquire attempts of a contended lock
+SQLITE_LOCK_BACKOFF_MIN = 0.005
+SQLITE_LOCK_BACKOFF_MAX = 0.1
+
+# Seconds between the reads of a Key waited for, see wait_kv()
+SQLITE_WAIT_INTERVAL = 0.5
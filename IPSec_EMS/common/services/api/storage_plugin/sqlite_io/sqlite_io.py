@@ -0,0 +1,740 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+from contextlib import contextmanager
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+import six
+from yapsy.IPlugin import IPlugin
+
+from services.api.storage_plugin.sqlite_io import sqlite_config as cfg
+from services.api.storage_plugin.utils import (
+    check_list_options, key_join, prefix_upper_bound, record_to_str,
+    sort_entry, str_to_dict
+)
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_LOCK = 'global'
+
+# Values per query of a batch read, SQLite allows 999 parameters
+SQLITE_MAX_PARAMETERS = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    relation TEXT NOT NULL,
+    pi_value TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (relation, pi_value)
+);
+CREATE TABLE IF NOT EXISTS secondary_indexes (
+    relation TEXT NOT NULL,
+    si TEXT NOT NULL,
+    si_value TEXT NOT NULL,
+    pi_value TEXT NOT NULL,
+    PRIMARY KEY (relation, si, si_value, pi_value)
+);
+CREATE INDEX IF NOT EXISTS secondary_indexes_pi_value
+    ON secondary_indexes (relation, pi_value);
+CREATE TABLE IF NOT EXISTS kv (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS locks (
+    path TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+"""
+
+
+class SQLiteIO(IPlugin):
+    """This a plugin to store VPN configuration or other data in a
+    SQLite database, with the same interface as the Consul plugin.
+
+       The records are stored in the 'records' table with the relation
+       name and the primary index value as the primary key, and the
+       record in JSON format as the value. The secondary index(es) are
+       stored in the 'secondary_indexes' table, with an index on the
+       relation name, secondary index name and value.
+
+       The Key/Value pairs are stored in the 'kv' table and a key
+       prefix is queried as a range of its primary key.
+
+       The database is shared by the IPsec EMS processes on the host,
+       so the plugin runs the whole IPsec EMS without a Consul agent.
+       The database file is in the sqlite_config.
+    """
+
+    def __init__(self):
+        super(SQLiteIO, self).__init__()
+        self._relations = {}
+        self._local = threading.local()
+
+    @property
+    def relations(self):
+        return self._relations
+
+    @relations.setter
+    def relations(self, value):
+        self._relations.update(value)
+
+    def create_session(self, *lock_path):
+        """Create a session for critical section operations, which
+        acquires the lock of the given path(the global lock by default)
+
+        The lock is a row of the 'locks' table, which expires after
+        SQLITE_LOCK_TTL seconds if the holder does not release it.
+
+        Args:
+            lock_path (tuple): Elements of the lock name
+
+        Returns:
+            session_id (unicode): id of the session
+
+        Raises:
+            RuntimeError: If the lock is not acquired in
+                SQLITE_LOCK_TIMEOUT seconds
+        """
+        path = '/'.join(lock_path or (DEFAULT_LOCK,))
+        session_id = six.text_type(uuid.uuid4())
+        deadline = time.time() + cfg.SQLITE_LOCK_TIMEOUT
+        backoff = cfg.SQLITE_LOCK_BACKOFF_MIN
+
+        while True:
+            with self._transaction() as db:
+                now = time.time()
+                db.execute("DELETE FROM locks WHERE path = ? AND expires < ?",
+                           (path, now))
+                cursor = db.execute(
+                        "INSERT OR IGNORE INTO locks VALUES (?, ?, ?)",
+                        (path, session_id, now + cfg.SQLITE_LOCK_TTL))
+                if cursor.rowcount == 1:
+                    return session_id
+
+            if time.time() >= deadline:
+                LOG.error("Timed out waiting for the lock %s", path)
+                raise RuntimeError("Timed out waiting for the lock %s" % path)
+
+            time.sleep(random.uniform(0, backoff))
+            backoff = min(backoff * 2, cfg.SQLITE_LOCK_BACKOFF_MAX)
+
+    def destroy_session(self, session_id):
+        """Destroy the session, which releases its lock
+
+        Args:
+            session_id: id of the session
+        """
+        with self._transaction() as db:
+            db.execute("DELETE FROM locks WHERE session_id = ?",
+                       (session_id,))
+
+    def put_record(self, relation_name, record):
+        """Store a record in the database
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            record (object) : Relation/Table record
+
+        Raises:
+            TypeError : If relation_name is not a 'string' type and/or
+                record is None or has no primary index value
+        """
+        if not isinstance(relation_name, six.string_types) or (record is None):
+            raise TypeError
+
+        with self._transaction() as db:
+            self._insert_record(db, relation_name, record)
+
+    def put_records(self, relation_name, records, new=False):
+        """Store the records in the database, in a single transaction
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            records (list) : Relation/Table records
+            new (bool): True if the records are not stored yet, unused
+
+        Raises:
+            TypeError : If relation_name is not a 'string' type and/or
+                a record has no primary index value
+        """
+        if not isinstance(relation_name, six.string_types):
+            raise TypeError
+
+        with self._transaction() as db:
+            for record in records:
+                self._insert_record(db, relation_name, record)
+
+    def get_record(self, relation_name, primary_index_value):
+        """Retrieve a record from the database with the required primary
+        index value
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            primary_index_value (unicode) : Primary index(key) value
+
+        Returns:
+            Empty List ([]) OR A record with matching primary index
+            value
+
+        Raises:
+            TypeError : If passed arguments are not of 'string' type
+        """
+        if (not isinstance(relation_name, six.string_types) or
+                not isinstance(primary_index_value, six.string_types)):
+            raise TypeError
+
+        row = self._db().execute(
+                "SELECT value FROM records WHERE relation = ? AND pi_value = ?",
+                (relation_name, primary_index_value)).fetchone()
+
+        if row is not None:
+            return str_to_dict(row[0])
+        else:
+            return []
+
+    def get_records_by_primary_index(self, relation_name,
+                                     primary_index_values):
+        """Retrieve the records with the required primary index values from
+        the database, with a few queries
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            primary_index_values (list) : Primary index(key) values
+
+        Returns:
+            dict: Record of each primary index value, only for the
+                existing records
+
+        Raises:
+            TypeError : If passed arguments are not of 'string' type
+        """
+        if (not isinstance(relation_name, six.string_types) or
+                not all(isinstance(value, six.string_types)
+                        for value in primary_index_values)):
+            raise TypeError
+
+        values = list(set(primary_index_values))
+
+        records = {}
+        for start in range(0, len(values), SQLITE_MAX_PARAMETERS):
+            batch = values[start:start + SQLITE_MAX_PARAMETERS]
+            rows = self._db().execute(
+                    "SELECT pi_value, value FROM records "
+                    "WHERE relation = ? AND pi_value IN (%s)" %
+                    ', '.join('?' * len(batch)),
+                    [relation_name] + batch)
+            records.update((pi_value, str_to_dict(value))
+                           for pi_value, value in rows)
+
+        return records
+
+    def get_records_by_secondary_index(self,
+                                       relation_name,
+                                       secondary_index,
+                                       field_value):
+        """Retrieve a list of record for a secondary index from a
+        relation
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            secondary_index (unicode) : Required secondary index
+            field_value (unicode) : Secondary index value
+
+        Returns:
+            Empty list ([]) OR list of records with the given secondary
+            index value in the relation, in the primary index order.
+
+        Raises:
+            TypeError : If passed arguments are not of 'string' type
+        """
+        if (not isinstance(relation_name, six.string_types) or
+                not isinstance(secondary_index, six.string_types) or
+                not isinstance(field_value, six.string_types)):
+            raise TypeError
+
+        rows = self._db().execute(
+                "SELECT records.value FROM secondary_indexes "
+                "JOIN records ON records.relation = secondary_indexes.relation "
+                "AND records.pi_value = secondary_indexes.pi_value "
+                "WHERE secondary_indexes.relation = ? "
+                "AND secondary_indexes.si = ? "
+                "AND secondary_indexes.si_value = ? "
+                "ORDER BY secondary_indexes.pi_value",
+                (relation_name, secondary_index, field_value))
+
+        return [str_to_dict(row[0]) for row in rows]
+
+    def get_records(self, relation_name):
+        """Retrieve list of all records of a relation/table.
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+
+        Returns:
+            list: All records in the relation, in the primary index order.
+
+        Raises:
+            TypeError : If passed argument is not of 'string' type
+        """
+        if not isinstance(relation_name, six.string_types):
+            raise TypeError
+
+        rows = self._db().execute(
+                "SELECT value FROM records WHERE relation = ? "
+                "ORDER BY pi_value",
+                (relation_name,))
+
+        return [str_to_dict(row[0]) for row in rows]
+
+    def list_records(self, relation_name, filters=None, sort_key=None,
+                     sort_dir='asc', marker=None, limit=None,
+                     marker_entry=None, keys_only=False):
+        """Retrieve a page of the records of a relation/table, filtered
+        by secondary index values and sorted by an index
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            filters (dict): Secondary index values of the records,
+                e.g. {'name': 'ike_1'}
+            sort_key (unicode): Primary or secondary index to sort by,
+                the primary index by default
+            sort_dir (unicode): 'asc' or 'desc'
+            marker (unicode): Primary index value of the last record of
+                the previous page, None for the first page
+            limit (int): Maximum number of records, None for all
+            marker_entry (tuple): Sort key value and primary index value
+                of the last record of the previous page, instead of
+                marker. The record may have been deleted since.
+            keys_only (bool): True for the primary index values of the
+                records instead of the records
+
+        Returns:
+            list: Records(or primary index values) of the page, in order
+
+        Raises:
+            TypeError : If relation_name is not a 'string' type
+            ValueError : If an option is invalid or the marker record
+                does not exist
+        """
+        if not isinstance(relation_name, six.string_types):
+            raise TypeError
+
+        pi = self._get_relation_index(relation_name, 'primary')
+        sort_key = sort_key or pi
+        check_list_options(pi,
+                           self._get_relation_index(relation_name,
+                                                    'secondary'),
+                           filters, sort_key, sort_dir)
+
+        # The records are ordered in the same way as sort_entry(), and
+        # the page after the marker is selected with a range of the
+        # (sort key value, primary index value) order
+        column = 'records.pi_value' if keys_only else 'records.value'
+        if sort_key == pi:
+            query = ("SELECT {0}, records.pi_value AS sort_value "
+                     "FROM records ".format(column))
+            params = []
+        else:
+            query = ("SELECT {0}, "
+                     "COALESCE(sort.si_value, '') AS sort_value "
+                     "FROM records LEFT JOIN secondary_indexes AS sort "
+                     "ON sort.relation = records.relation "
+                     "AND sort.pi_value = records.pi_value "
+                     "AND sort.si = ? ".format(column))
+            params = [sort_key]
+
+        query += "WHERE records.relation = ? "
+        params.append(relation_name)
+
+        for si, si_value in (filters or {}).iteritems():
+            query += ("AND records.pi_value IN (SELECT pi_value "
+                      "FROM secondary_indexes WHERE relation = ? "
+                      "AND si = ? AND si_value = ?) ")
+            params.extend([relation_name, si, si_value])
+
+        db = self._db()
+        operator, order = ('>', 'ASC') if sort_dir == 'asc' else ('<', 'DESC')
+
+        if marker is not None:
+            row = db.execute(
+                    "SELECT value FROM records "
+                    "WHERE relation = ? AND pi_value = ?",
+                    (relation_name, marker)).fetchone()
+            if row is None:
+                raise ValueError("Marker %s is not found" % marker)
+
+            marker_entry = sort_entry(str_to_dict(row[0]).get(sort_key),
+                                      marker)
+        elif marker_entry is not None:
+            marker_entry = sort_entry(*marker_entry)
+
+        if marker_entry is not None:
+            query += ("AND (sort_value {0} ? OR (sort_value = ? "
+                      "AND records.pi_value {0} ?)) ".format(operator))
+            params.extend([marker_entry[0], marker_entry[0],
+                           marker_entry[1]])
+
+        query += ("ORDER BY sort_value {0}, records.pi_value {0} "
+                  "LIMIT ?".format(order))
+        params.append(-1 if limit is None else limit)
+
+        rows = db.execute(query, params)
+        if keys_only:
+            return [row[0] for row in rows]
+
+        return [str_to_dict(row[0]) for row in rows]
+
+    def delete_record(self, relation_name, record):
+        """Delete the given record.
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            record (object) : Relation/Table record
+
+        Raises:
+           TypeError : If relation_name is not a 'string' type and/or
+                record is None
+        """
+        if not isinstance(relation_name, six.string_types) or (record is None):
+            raise TypeError
+
+        with self._transaction() as db:
+            self._delete_record(db, relation_name, record)
+
+    def delete_records(self, relation_name, records):
+        """Delete the given records, in a single transaction
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            records (list) : Relation/Table records
+
+        Raises:
+           TypeError : If relation_name is not a 'string' type
+        """
+        if not isinstance(relation_name, six.string_types):
+            raise TypeError
+
+        with self._transaction() as db:
+            for record in records:
+                self._delete_record(db, relation_name, record)
+
+    def check_key(self, relation_name, primary_index_value):
+        """Check if a value is primary index in the relation/table.
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            primary_index_value (unicode): Value of primary key(index)
+
+        Returns:
+            (bool) : True if a value in primary index, else False
+
+        Raises:
+            TypeError : If passed argument is not of 'string' type
+        """
+        if (not isinstance(relation_name, six.string_types) or
+                not isinstance(primary_index_value, six.string_types)):
+            raise TypeError
+
+        row = self._db().execute(
+                "SELECT 1 FROM records WHERE relation = ? AND pi_value = ?",
+                (relation_name, primary_index_value)).fetchone()
+
+        return row is not None
+
+    def put_kv(self, key, value=' '):
+        """Store a Key/Value pair in the database
+
+        Args:
+            key (str): Key
+            value (str) : Value , Defaults to ' '.
+
+        Raises:
+            TypeError : If Key is not a 'string' type
+        """
+        if not isinstance(key, six.string_types):
+            raise TypeError
+
+        with self._transaction() as db:
+            db.execute("INSERT OR REPLACE INTO kv VALUES (?, ?)",
+                       (key, value))
+
+    def get_kv(self, key):
+        """Fetch the Value for the Key in the database
+
+        Args:
+            key (str): Key
+
+        Returns:
+            (str) : Value, None if the Key does not exist
+
+        Raises:
+            TypeError : If Key is not a 'string' type
+        """
+        if not isinstance(key, six.string_types):
+            raise TypeError
+
+        row = self._db().execute("SELECT value FROM kv WHERE key = ?",
+                                 (key,)).fetchone()
+
+        if row is None:
+            return None
+
+        return row[0]
+
+    def wait_kv(self, key, value=None, timeout=60):
+        """Wait until the Value for the Key in the database differs from
+        the given Value
+
+        The database has no change notification, so the Key is read at
+        every SQLITE_WAIT_INTERVAL.
+
+        Args:
+            key (str): Key
+            value (str): Value known to the caller, None if the Key
+                does not exist
+            timeout (float): Maximum time(seconds) to wait
+
+        Returns:
+            (str) : Value, None if the Key does not exist. It is the
+                given Value if the wait timed out.
+
+        Raises:
+            TypeError : If Key is not a 'string' type
+        """
+        deadline = time.time() + timeout
+
+        current_value = self.get_kv(key)
+        while current_value == value:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+
+            time.sleep(min(cfg.SQLITE_WAIT_INTERVAL, remaining))
+            current_value = self.get_kv(key)
+
+        return current_value
+
+    def delete_kv(self, key, recurse=False):
+        """Delete the Key/Value pair for the Key in the database
+
+        Args:
+            key (str): Key
+            recurse(bool): whether delete recursively for with the key prefix
+
+        Raises:
+            TypeError : If Key is not a 'string' type
+        """
+        if not isinstance(key, six.string_types):
+            raise TypeError
+
+        with self._transaction() as db:
+            if recurse and key:
+                db.execute("DELETE FROM kv WHERE key >= ? AND key < ?",
+                           (key, prefix_upper_bound(key)))
+            elif recurse:
+                db.execute("DELETE FROM kv")
+            else:
+                db.execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def delete_kvs(self, keys):
+        """Delete the Key/Value pairs of the Keys in the database, in a
+        single transaction
+
+        Args:
+            keys (list): Keys
+
+        Raises:
+            TypeError : If a Key is not a 'string' type
+        """
+        if not all(isinstance(key, six.string_types) for key in keys):
+            raise TypeError
+
+        with self._transaction() as db:
+            db.executemany("DELETE FROM kv WHERE key = ?",
+                           [(key,) for key in keys])
+
+    def get_key_prefix(self, key_prefix, keys=False):
+        """Fetch the records with the Key prefix in the database
+
+        Args:
+            key_prefix (str): Key Prefix, under the IPsec EMS keys
+            keys (bool): If True, only get records' key
+
+        Returns:
+            list: List of records
+
+        Raises:
+            TypeError: If Key is not a 'string' type
+        """
+        if not isinstance(key_prefix, six.string_types):
+            raise TypeError
+
+        data = self.get_kvs(key_join(key_prefix))
+
+        if keys:
+            return list(data.keys())
+
+        return list(data.values())
+
+    def get_kvs(self, key_prefix):
+        """Fetch all the Key/Value pairs with the Key prefix in the
+        database in a single query
+
+        Args:
+            key_prefix (str): Key Prefix
+
+        Returns:
+            OrderedDict: Key/Value pairs with the Key prefix, in the key
+                order
+
+        Raises:
+            TypeError: If Key prefix is not a 'string' type
+        """
+        if not isinstance(key_prefix, six.string_types):
+            raise TypeError
+
+        if key_prefix:
+            rows = self._db().execute(
+                    "SELECT key, value FROM kv WHERE key >= ? AND key < ? "
+                    "ORDER BY key",
+                    (key_prefix, prefix_upper_bound(key_prefix)))
+        else:
+            rows = self._db().execute(
+                    "SELECT key, value FROM kv ORDER BY key")
+
+        return OrderedDict((key, value) for key, value in rows)
+
+    def _db(self):
+        """Connect to the database, once per thread
+
+        Returns:
+            sqlite3.Connection: connection in the autocommit mode
+        """
+        db = getattr(self._local, 'db', None)
+
+        # A connection is not used across the fork of a process
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(cfg.SQLITE_DATABASE,
+                                 timeout=cfg.SQLITE_TIMEOUT,
+                                 isolation_level=None)
+            # Readers do not block the writer of another process
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+            self._local.db = db
+            self._local.pid = os.getpid()
+
+        return db
+
+    @contextmanager
+    def _transaction(self):
+        """Run the statements in a transaction, which takes the database
+        write lock at the start"""
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+
+        try:
+            yield db
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+
+        db.execute("COMMIT")
+
+    def _insert_record(self, db, relation_name, record):
+        """Insert or replace a record and its secondary index(es)
+
+        Args:
+            db (sqlite3.Connection): connection in a transaction
+            relation_name (unicode): Name of the relation/table
+            record (object) : Relation/Table record
+
+        Raises:
+            TypeError : If the record is None or has no primary index
+                value
+        """
+        if record is None:
+            raise TypeError
+
+        pi = self._get_relation_index(relation_name, 'primary')
+        pi_value = getattr(record, pi)
+
+        if not isinstance(pi_value, six.string_types):
+            raise TypeError
+
+        db.execute("INSERT OR REPLACE INTO records VALUES (?, ?, ?)",
+                   (relation_name, pi_value, record_to_str(record)))
+
+        # For update(PUT/PATCH) operation, replace the secondary
+        # index(es) of the stored record
+        db.execute("DELETE FROM secondary_indexes "
+                   "WHERE relation = ? AND pi_value = ?",
+                   (relation_name, pi_value))
+        # A record without the secondary index field is not indexed
+        db.executemany(
+                "INSERT INTO secondary_indexes VALUES (?, ?, ?, ?)",
+                [(relation_name, si, getattr(record, si), pi_value)
+                 for si in self._get_relation_index(relation_name,
+                                                    'secondary')
+                 if getattr(record, si, None) is not None])
+
+    def _delete_record(self, db, relation_name, record):
+        """Delete a record and its secondary index(es)
+
+        Args:
+            db (sqlite3.Connection): connection in a transaction
+            relation_name (unicode): Name of the relation/table
+            record (object) : Relation/Table record
+        """
+        pi = self._get_relation_index(relation_name, 'primary')
+        pi_value = getattr(record, pi)
+
+        db.execute("DELETE FROM records "
+                   "WHERE relation = ? AND pi_value = ?",
+                   (relation_name, pi_value))
+        db.execute("DELETE FROM secondary_indexes "
+                   "WHERE relation = ? AND pi_value = ?",
+                   (relation_name, pi_value))
+
+    def _get_relation_index(self, relation_name, index_type):
+        """Find the primary index or list of secondary index of
+        relation
+
+        Args:
+            relation_name (unicode): Name of the relation/table
+            index_type (unicode): Type of index = 'primary' or 'secondary'
+
+        Returns:
+            Primary index or list of secondary index
+        """
+        index_type = index_type.lower()
+
+        if index_type == 'primary':
+            return self.relations[relation_name].get('primary_key')
+        elif index_type == 'secondary':
+            return self.relations[relation_name].get('secondary_keys', [])
+        elif index_type == 'foreign':
+            return self.relations[relation_name].get('foreign_keys', [])
+        else:
+            raise ValueError("Invalid index type")
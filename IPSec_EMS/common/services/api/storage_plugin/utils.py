@@ -0,0 +1,159 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Util functions and classes shared by the storage plugins"""
+
+from __future__ import unicode_literals
+
+import heapq
+import json
+
+import six
+
+# Application prefix of the keys, same as the Consul plugin(CONSUL_APP)
+STORAGE_APP = 'ipsecems'
+
+
+class CustomEncoder(json.JSONEncoder):
+    """Extend JSONEncoder to handle set type. Convert set to list"""
+    def default(self, obj):
+        if isinstance(obj, set):
+            return list(obj)
+        return json.JSONEncoder.default(self, obj)
+
+
+def str_to_dict(value):
+    """Converts a string expression to dict
+
+    Args:
+        value (str) : value
+
+    Returns:
+        dict
+    """
+    return json.loads(value)
+
+
+def record_to_str(record):
+    """Converts a relation record object to JSON string
+
+    Args:
+        record (object) : Relation/Table record
+
+    Returns:
+        unicode: JSON string of the record attributes
+    """
+    return json.dumps(record.__dict__, cls=CustomEncoder)
+
+
+def key_join(*args):
+    """Prepare key(partial or complete) of the IPsec EMS data in a
+    Key/Value store, with the '/' delimiter
+
+    Args:
+        args (tuple): key elements
+
+    Returns:
+        unicode: key with the delimiter
+    """
+    return STORAGE_APP + '/' + '/'.join(args)
+
+
+def prefix_upper_bound(key_prefix):
+    """Find the smallest key greater than all the keys with the prefix,
+    to query a key prefix as a range of an ordered index
+
+    Args:
+        key_prefix (unicode): Key prefix, not empty
+
+    Returns:
+        unicode: Upper bound(exclusive) of the keys with the prefix
+    """
+    return key_prefix[:-1] + six.unichr(ord(key_prefix[-1]) + 1)
+
+
+def check_list_options(primary_index, secondary_indexes, filters, sort_key,
+                       sort_dir):
+    """Check the options of a list of records(list_records())
+
+    Args:
+        primary_index (unicode): Primary index of the relation
+        secondary_indexes (list): Secondary indexes of the relation
+        filters (dict): Secondary index values of the listed records
+        sort_key (unicode): Primary or secondary index to sort by
+        sort_dir (unicode): 'asc' or 'desc'
+
+    Raises:
+        ValueError: If a filter or the sort key is not an index of the
+            relation, or the sort direction is invalid
+    """
+    for secondary_index in filters or ():
+        if secondary_index not in secondary_indexes:
+            raise ValueError("%s is not a secondary index" % secondary_index)
+
+    if sort_key != primary_index and sort_key not in secondary_indexes:
+        raise ValueError("%s is not an index" % sort_key)
+
+    if sort_dir not in ('asc', 'desc'):
+        raise ValueError("Invalid sort direction %s" % sort_dir)
+
+
+def sort_entry(sort_value, pi_value):
+    """Position of a record in a list of records
+
+    The records are ordered by the sort key value, then by the primary
+    index value. A record without the sort key field is ordered as an
+    empty value.
+
+    Args:
+        sort_value: Sort key value of the record, or None
+        pi_value (unicode): Primary index value of the record
+
+    Returns:
+        tuple: comparable position of the record
+    """
+    return ('' if sort_value is None else sort_value), pi_value
+
+
+def select_page(entries, sort_dir, marker_entry=None, limit=None):
+    """Select the primary index values of a page of records
+
+    Only the page is sorted, so a page of a large relation takes
+    O(n log limit) time.
+
+    Args:
+        entries (iterable): sort_entry() of the records
+        sort_dir (unicode): 'asc' or 'desc'
+        marker_entry (tuple): sort_entry() of the last record of the
+            previous page, None for the first page
+        limit (int): Maximum number of records, None for all
+
+    Returns:
+        list: Primary index values of the records of the page, in order
+    """
+    if marker_entry is not None:
+        if sort_dir == 'asc':
+            entries = [entry for entry in entries if entry > marker_entry]
+        else:
+            entries = [entry for entry in entries if entry < marker_entry]
+
+    if limit is None:
+        page = sorted(entries, reverse=(sort_dir == 'desc'))
+    elif sort_dir == 'asc':
+        page = heapq.nsmallest(limit, entries)
+    else:
+        page = heapq.nlargest(limit, entries)
+
+    return [pi_value for sort_value, pi_value in page]
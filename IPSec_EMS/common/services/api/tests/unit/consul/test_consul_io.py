@@ -20,6 +20,9 @@ import consul
 
 import services.api.storage_plugin.consul_io.consul_config as cfg
 from services.api.storage_plugin.consul_io.consul_io import ConsulIO
+from services.api.storage_plugin.consul_io.consul_io_utils import (
+    consul_key_join
+)
 
 
 class TestRecord(object):
@@ -85,6 +88,29 @@ class ConsulTestCase(TestCase):
         index, secondary_data_email = self.c.kv.get(self.secondary_index_email)
         self.assertEqual(secondary_data_email['Value'], self.primary_index)
 
+    def test_put_record_update_secondary_index(self):
+        """Test case to update the secondary index of a consul record"""
+        self.consul.put_record(self.relation, self.test_record)
+        updated_record = TestRecord('732',
+                                    'rec2',
+                                    'rec1@consul.com',
+                                    'Rec 2')
+        self.consul.put_record(self.relation, updated_record)
+
+        index, old_data_name = self.c.kv.get(
+                consul_key_join(self.relation, 'name', 'rec1', 'id', '732'))
+        self.assertIsNone(old_data_name)
+
+        index, new_data_name = self.c.kv.get(
+                consul_key_join(self.relation, 'name', 'rec2', 'id', '732'))
+        self.assertEqual(new_data_name['Value'],
+                         consul_key_join(self.relation, 'id', '732'))
+
+        record = self.consul.get_record(self.relation, updated_record.id)
+        self.assertEqual(TestRecord(**record), updated_record)
+
+        self.consul.delete_record(self.relation, updated_record)
+
     def test_put_record_with_invalid_arguments(self):
         """Test case to store a consul record with invalid arguments"""
         with self.assertRaises(TypeError):
@@ -211,6 +237,31 @@ class ConsulTestCase(TestCase):
             self.consul.check_key(self.relation, None)
 
 
+    def test_create_session_per_record_lock(self):
+        """Test case to hold the locks of two records at the same time"""
+        session_id = self.consul.create_session(self.relation, '732')
+        try:
+            index, data = self.c.kv.get(
+                    consul_key_join(cfg.CONSUL_LOCK_PREFIX, self.relation,
+                                    '732'))
+            self.assertEqual(data['Session'], session_id)
+
+            other_session_id = self.consul.create_session(self.relation,
+                                                          '733')
+            self.consul.destroy_session(other_session_id)
+        finally:
+            self.consul.destroy_session(session_id)
+
+        # The lock key is deleted with the session
+        index, data = self.c.kv.get(
+                consul_key_join(cfg.CONSUL_LOCK_PREFIX, self.relation, '732'))
+        self.assertIsNone(data)
+
+        metrics = self.consul.lock_metrics[self.relation]
+        self.assertEqual(metrics['acquired'], 2)
+        self.assertEqual(metrics['contended'], 0)
+
+
 class ConsulTestCaseNoRecord(TestCase):
     """Test case for get & delete operations on consul record(s) with no
     record present in the relation"""
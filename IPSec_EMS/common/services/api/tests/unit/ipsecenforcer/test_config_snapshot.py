@@ -0,0 +1,103 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import copy
+from unittest import TestCase
+
+from services.ipsecenforcer.config_snapshot import (
+    CONFIG_SNAPSHOT_HISTORY, config_delta, config_digests, config_hash,
+    IPsecEnforcerConfigSnapshot
+)
+
+CONFIG = {
+    'version': 1,
+    'ikepolicy': {'ike1': {'ike_version': 'v2', 'dh_group': ['modp1536']}},
+    'fqdn_list': {'group1': ['10.0.0.1', '10.0.0.2']},
+    'fqdn_pair_psk': {'bind1_10.0.0.1_10.0.0.2': 'secret'},
+    'vpncertificate': {},
+}
+
+
+class ConfigSnapshotTestCase(TestCase):
+    """Test cases for the IPsecEnforcer configuration changes"""
+
+    def test_config_delta_unchanged(self):
+        """Test case for no changes since the snapshot"""
+        delta = config_delta(config_digests(CONFIG), CONFIG)
+        self.assertEqual(delta, {'added': {}, 'changed': {}, 'removed': {}})
+
+    def test_config_delta(self):
+        """Test case for added, changed and removed entries"""
+        config = copy.deepcopy(CONFIG)
+        config['version'] = 2
+        config['ikepolicy']['ike1']['dh_group'] = ['modp2048']
+        config['fqdn_list']['group2'] = ['10.0.1.1']
+        config['fqdn_pair_psk'].clear()
+
+        delta = config_delta(config_digests(CONFIG), config)
+
+        self.assertEqual(delta['added'],
+                         {'fqdn_list': {'group2': ['10.0.1.1']}})
+        self.assertEqual(delta['changed'],
+                         {'ikepolicy': {'ike1': config['ikepolicy']['ike1']}})
+        self.assertEqual(delta['removed'],
+                         {'fqdn_pair_psk': ['bind1_10.0.0.1_10.0.0.2']})
+
+    def test_config_delta_digests(self):
+        """Test case for the changes with the digests of the current
+        configuration"""
+        config = copy.deepcopy(CONFIG)
+        config['ikepolicy']['ike1']['dh_group'] = ['modp2048']
+        digests = config_digests(config)
+
+        delta = config_delta(config_digests(CONFIG), config, digests)
+        self.assertEqual(delta['changed'],
+                         {'ikepolicy': {'ike1': config['ikepolicy']['ike1']}})
+
+        # The given digests are used instead of the entries
+        delta = config_delta(config_digests(CONFIG), config,
+                             config_digests(CONFIG))
+        self.assertEqual(delta['changed'], {})
+
+    def test_config_hash(self):
+        """Test case for the hash of the configuration"""
+        config = copy.deepcopy(CONFIG)
+        config['version'] = 2
+        self.assertEqual(config_hash(config_digests(config)),
+                         config_hash(config_digests(CONFIG)))
+
+        config['fqdn_list']['group1'].reverse()
+        self.assertNotEqual(config_hash(config_digests(config)),
+                            config_hash(config_digests(CONFIG)))
+
+    def test_snapshot_history(self):
+        """Test case for the bounded history of snapshots"""
+        last_version = CONFIG_SNAPSHOT_HISTORY + 2
+        for version in range(1, last_version + 1):
+            IPsecEnforcerConfigSnapshot.put_snapshot('enforcer1', version,
+                                                     config_digests(CONFIG))
+
+        try:
+            self.assertIsNone(
+                    IPsecEnforcerConfigSnapshot.get_snapshot('enforcer1', 2))
+            self.assertEqual(
+                    IPsecEnforcerConfigSnapshot.get_snapshot('enforcer1',
+                                                             last_version),
+                    config_digests(CONFIG))
+        finally:
+            IPsecEnforcerConfigSnapshot.delete_snapshots('enforcer1')
+
+        self.assertIsNone(IPsecEnforcerConfigSnapshot.get_snapshot(
+                'enforcer1', last_version))
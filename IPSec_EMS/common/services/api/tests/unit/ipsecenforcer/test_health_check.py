@@ -0,0 +1,119 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import time
+from unittest import TestCase
+
+from services.api import storage
+from services.ipsecenforcer.health_check_process import (
+    HEARTBEAT_TTL, IPsecEnforcerHealthCheck
+)
+from services.ipsecenforcer.register_deregister import (
+    HeartbeatMissOfIPsecEnforcer
+)
+
+
+class FakeHealthCheck(IPsecEnforcerHealthCheck):
+    """Health check where only the IPsecEnforcers in 'reachable'
+    answer the heartbeat message"""
+
+    reachable = set()
+
+    def send_heartbeat(self, fqdn_enforcer):
+        return fqdn_enforcer[1] in self.reachable
+
+
+class HealthCheckTestCase(TestCase):
+    """Test cases for the health check of IPsecEnforcers"""
+
+    def setUp(self):
+        self.health_check = FakeHealthCheck(concurrency=2)
+        self.fqdn_enforcer_list = [('10.0.0.1', 'enforcer1'),
+                                   ('10.0.0.2', 'enforcer2')]
+
+    def tearDown(self):
+        storage.plugin.delete_kv(HeartbeatMissOfIPsecEnforcer.key)
+
+    def test_heartbeat_miss_counts(self):
+        """Test case to count the heartbeat misses until the
+        IPsecEnforcer is reachable"""
+        check = self.health_check.check_ipsecenforcers_health
+        get_stored_counts = (
+            HeartbeatMissOfIPsecEnforcer.get_heartbeat_miss_counts
+        )
+
+        self.health_check.reachable = {'enforcer1'}
+        self.assertEqual(check(self.fqdn_enforcer_list), {'enforcer2': 1})
+        self.assertEqual(check(self.fqdn_enforcer_list), {'enforcer2': 2})
+
+        # Only the transitions are stored before the next checkpoint
+        self.assertEqual(get_stored_counts(), {'enforcer2': 1})
+
+        self.health_check.reachable = {'enforcer2'}
+        self.assertEqual(check(self.fqdn_enforcer_list), {'enforcer1': 1})
+        self.assertEqual(get_stored_counts(), {'enforcer1': 1})
+
+    def test_heartbeat_miss_counts_restored(self):
+        """Test case to resume the counts stored by a previous health
+        check process"""
+        HeartbeatMissOfIPsecEnforcer.put_heartbeat_miss_counts(
+                {'enforcer2': 3})
+
+        self.health_check.reachable = {'enforcer1'}
+        self.assertEqual(
+                self.health_check.check_ipsecenforcers_health(
+                        self.fqdn_enforcer_list),
+                {'enforcer2': 4})
+
+    def test_heartbeat_expiry_restored(self):
+        """Test case to checkpoint the heartbeat expiry times, and resume
+        them in the next health check process"""
+        self.health_check.load()
+        self.health_check.expiry.heartbeat('enforcer3')
+        expiry_time = self.health_check.expiry.expiry_times()['enforcer3']
+        self.health_check.checkpoint()
+
+        checkpoint = HeartbeatMissOfIPsecEnforcer.get_heartbeat_checkpoint()
+        self.assertEqual(checkpoint['counts'], {})
+        self.assertEqual(checkpoint['expiry_times'],
+                         {'enforcer3': expiry_time})
+
+        health_check = FakeHealthCheck(concurrency=2)
+        health_check.load()
+        self.assertIn('enforcer3', health_check.expiry)
+
+        # The expiry is moved ahead by the time since the checkpoint
+        restored_time = health_check.expiry.expiry_times()['enforcer3']
+        self.assertGreaterEqual(restored_time, expiry_time)
+        self.assertLessEqual(restored_time, time.time() + HEARTBEAT_TTL)
+
+    def test_heartbeat_miss_counts_only_restored(self):
+        """Test case to load the counts stored without the heartbeat
+        expiry times"""
+        storage.plugin.put_kv(HeartbeatMissOfIPsecEnforcer.key,
+                              str({'enforcer2': 3}))
+
+        self.health_check.load()
+        self.assertEqual(self.health_check.counts, {'enforcer2': 3})
+        self.assertEqual(len(self.health_check.expiry), 0)
+
+    def test_deregister_discards_heartbeat(self):
+        """Test case to stop the expiry of the heartbeats of a
+        de-registered IPsecEnforcer"""
+        self.health_check.expiry.heartbeat('enforcer3')
+        self.assertIn('enforcer3', self.health_check.expiry)
+
+        self.health_check.deregister_ipsecenforcer('enforcer3')
+        self.assertNotIn('enforcer3', self.health_check.expiry)
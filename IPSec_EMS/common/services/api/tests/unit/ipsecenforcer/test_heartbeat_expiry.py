@@ -0,0 +1,57 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import TestCase
+
+from services.ipsecenforcer.heartbeat_expiry import HeartbeatExpiry
+
+
+class HeartbeatExpiryTestCase(TestCase):
+    """Test cases for the expiry of the IPsecEnforcer heartbeats"""
+
+    def setUp(self):
+        self.expiry = HeartbeatExpiry(10, callback=None)
+
+    def test_pop_expired(self):
+        """Test case to expire the IPsecEnforcers TTL after their last
+        heartbeat"""
+        self.expiry.heartbeat('enforcer1', now=100)
+        self.expiry.heartbeat('enforcer2', now=105)
+        self.expiry.heartbeat('enforcer1', now=108)
+
+        self.assertEqual(self.expiry.pop_expired(now=110), [])
+        self.assertEqual(self.expiry.pop_expired(now=115), ['enforcer2'])
+        self.assertIn('enforcer1', self.expiry)
+        self.assertEqual(self.expiry.pop_expired(now=118), ['enforcer1'])
+        self.assertEqual(len(self.expiry), 0)
+
+    def test_discard(self):
+        """Test case to stop tracking a de-registered IPsecEnforcer"""
+        self.expiry.heartbeat('enforcer1', now=100)
+        self.expiry.discard('enforcer1')
+
+        self.assertNotIn('enforcer1', self.expiry)
+        self.assertEqual(self.expiry.pop_expired(now=120), [])
+
+    def test_restore(self):
+        """Test case to resume the expiry times of a previous scheduler,
+        keeping the heartbeats already received"""
+        self.expiry.heartbeat('enforcer1', now=100)
+        self.expiry.restore({'enforcer1': 105, 'enforcer2': 115})
+
+        self.assertEqual(self.expiry.expiry_times(),
+                         {'enforcer1': 110, 'enforcer2': 115})
+        self.assertEqual(self.expiry.pop_expired(now=110), ['enforcer1'])
+        self.assertEqual(self.expiry.pop_expired(now=115), ['enforcer2'])
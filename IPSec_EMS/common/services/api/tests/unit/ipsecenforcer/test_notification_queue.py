@@ -0,0 +1,206 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from copy import deepcopy
+from unittest import TestCase
+
+from rest_framework import status
+
+from services.api import storage
+from services.api.serializers.serializers_vpnbind_group_to_group import (
+    VPNBindGroupToGroup
+)
+from services.api.serializers.utils_serializers import generate_uuid
+from services.api.serializers.vpn_choices import RESOURCE_TO_RELATION_MAP
+from services.api.tests.unit.ipsecenforcer.test_send_notification import (
+    FakeFanOut
+)
+from services.api.tests.unit.views.common import (
+    COMMON_URL_PREFIX, EMSAPITestCase
+)
+from services.api.tests.unit.views.test_views_vpnbind_group_to_group import (
+    VPNBINDGROUPGROUP_RECORD
+)
+from services.api.tests.unit.views.utils import (
+    TempIKEPolicy, TempIPsecPolicy, TempVPNEndpointGroup
+)
+from services.ipsecenforcer.notification_ipc_client_listener import (
+    IPsecEnforcerNotification, NotificationMetrics
+)
+from services.ipsecenforcer.notification_outbox import NotificationOutbox
+from services.ipsecenforcer.register_deregister import IPsecEnforcerInfo
+from services.ipsecenforcer.send_notification import IPsecEnforcerNotify
+
+
+class NotificationQueueTestCase(TestCase):
+    """Test cases for the coalesced dispatch of the notifications"""
+
+    def setUp(self):
+        # Two IPsecEnforcers per VPNEndpointGroup, 'enforcer1' in both
+        for vpnendpoint_id, ipsecenforcer_ids in (
+                ('group1', ('enforcer1', 'enforcer2')),
+                ('group2', ('enforcer1', 'enforcer3'))):
+            for ipsecenforcer_id in ipsecenforcer_ids:
+                IPsecEnforcerInfo.put_vpnendpoint_to_ipsecenforcer_fqdn_map(
+                        vpnendpoint_id, ipsecenforcer_id,
+                        ipsecenforcer_id + '.example.com', None)
+
+        # The messages queued by the API tests
+        storage.plugin.delete_kv(NotificationOutbox.key_prefix, recurse=True)
+        IPsecEnforcerNotify.fanout = FakeFanOut(concurrency=2)
+
+    def tearDown(self):
+        IPsecEnforcerNotify.fanout = None
+        storage.plugin.delete_kv(
+                RESOURCE_TO_RELATION_MAP['VPNEndpointIPsecEnforcerFQDNMap'],
+                recurse=True)
+        storage.plugin.delete_kv(NotificationOutbox.key_prefix, recurse=True)
+        storage.plugin.delete_kv(NotificationOutbox.index_key)
+        storage.plugin.delete_kv(IPsecEnforcerNotification.metrics_key)
+
+    @staticmethod
+    def vpnbind_delete_messages(count):
+        return [
+            {'notification_type': 'CONFIG_DELETE',
+             'resource': 'VPNBindGroupToGroup',
+             'record': {'id': 'bind%d' % i,
+                        'vpnendpointgroup_id': 'group1',
+                        'peer_vpnendpointgroup_id': 'group2'}}
+            for i in range(count)
+        ]
+
+    def test_dispatch(self):
+        """Test case to notify each IPsecEnforcer once for a burst of
+        VPNBind deletions"""
+        stats = IPsecEnforcerNotification.dispatch(
+                self.vpnbind_delete_messages(10))
+
+        self.assertEqual((stats.requested, stats.total, stats.notified),
+                         (40, 3, 3))
+        self.assertEqual(IPsecEnforcerNotify.fanout.attempts,
+                         {'enforcer1': 1, 'enforcer2': 1, 'enforcer3': 1})
+        self.assertIsNone(IPsecEnforcerNotify.pending)
+
+    def test_dispatch_outbox(self):
+        """Test case to dispatch the messages appended while the
+        IPsecEnforcer Notification process is down"""
+        for message in self.vpnbind_delete_messages(3):
+            IPsecEnforcerNotification.send(message)
+
+        entries = NotificationOutbox.entries()
+        self.assertEqual(len(entries), 3)
+        self.assertEqual(NotificationOutbox.wait(None, 0), entries[-1][0])
+
+        IPsecEnforcerNotification.dispatch_outbox(NotificationMetrics(),
+                                                  window=0)
+
+        self.assertEqual(NotificationOutbox.entries(), [])
+        self.assertEqual(IPsecEnforcerNotify.fanout.attempts,
+                         {'enforcer1': 1, 'enforcer2': 1, 'enforcer3': 1})
+
+        metrics = IPsecEnforcerNotification.get_metrics()
+        self.assertEqual((metrics['messages'], metrics['coalesce_ratio']),
+                         (3, 4.0))
+
+
+class NotificationViewsTestCase(EMSAPITestCase):
+    """Test cases for the notifications of the record updates and
+    deletions requested to the API"""
+
+    def setUp(self):
+        self.ikepolicy = TempIKEPolicy()
+        self.ipsecpolicy = TempIPsecPolicy()
+        self.groups = [TempVPNEndpointGroup(), TempVPNEndpointGroup()]
+        for temp in [self.ikepolicy, self.ipsecpolicy] + self.groups:
+            temp.create()
+
+        self.vpnbind = VPNBindGroupToGroup(**dict(
+                deepcopy(VPNBINDGROUPGROUP_RECORD),
+                id=generate_uuid(),
+                ikepolicy_id=self.ikepolicy.id,
+                ipsecpolicy_id=self.ipsecpolicy.id,
+                vpnendpointgroup_id=self.groups[0].id,
+                peer_vpnendpointgroup_id=self.groups[1].id)).save()
+
+        for group, ipsecenforcer_id in zip(self.groups,
+                                           ('enforcer1', 'enforcer2')):
+            IPsecEnforcerInfo.put_vpnendpoint_to_ipsecenforcer_fqdn_map(
+                    group.id, ipsecenforcer_id,
+                    ipsecenforcer_id + '.example.com', None)
+
+        storage.plugin.delete_kv(NotificationOutbox.key_prefix, recurse=True)
+        IPsecEnforcerNotify.fanout = FakeFanOut(concurrency=2)
+
+    def tearDown(self):
+        IPsecEnforcerNotify.fanout = None
+        storage.plugin.delete_kv(
+                RESOURCE_TO_RELATION_MAP['VPNEndpointIPsecEnforcerFQDNMap'],
+                recurse=True)
+        storage.plugin.delete_kv(NotificationOutbox.key_prefix, recurse=True)
+        storage.plugin.delete_kv(NotificationOutbox.index_key)
+        storage.plugin.delete_kv(IPsecEnforcerNotification.metrics_key)
+
+        if VPNBindGroupToGroup.get(id=self.vpnbind.id) is not None:
+            self.vpnbind.delete()
+        for temp in [self.ikepolicy, self.ipsecpolicy] + self.groups:
+            temp.delete()
+
+    def test_patch_burst(self):
+        """Test case to notify each IPsecEnforcer once for a burst of
+        updates of the IKEPolicy of a VPNBind"""
+        url = COMMON_URL_PREFIX + 'ikepolicies/%s/' % self.ikepolicy.id
+        for lifetime_value in range(3600, 3620):
+            response = self.client.patch(
+                    url, {'lifetime_value': lifetime_value}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.patch(
+                COMMON_URL_PREFIX + 'vpnbindgrouptogroup/bulk/',
+                [{'id': self.vpnbind.id, 'dpd_interval': 5}],
+                format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # The name and description are not in the configuration
+        response = self.client.patch(url, {'name': 'ike_1'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(len(NotificationOutbox.entries()), 22)
+
+        IPsecEnforcerNotification.dispatch_outbox(NotificationMetrics(),
+                                                  window=0)
+
+        self.assertEqual(IPsecEnforcerNotify.fanout.attempts,
+                         {'enforcer1': 1, 'enforcer2': 1})
+        metrics = IPsecEnforcerNotification.get_metrics()
+        self.assertEqual((metrics['dispatches'], metrics['messages']),
+                         (1, 22))
+
+    def test_delete(self):
+        """Test case to queue the notification of a deleted VPNBind, not
+        in use by an IPsecEnforcer"""
+        storage.plugin.delete_kv(
+                RESOURCE_TO_RELATION_MAP['VPNEndpointIPsecEnforcerFQDNMap'],
+                recurse=True)
+
+        response = self.client.delete(
+                COMMON_URL_PREFIX + 'vpnbindgrouptogroup/%s/' %
+                self.vpnbind.id)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        messages = [message for _key, _time, message in
+                    NotificationOutbox.entries()]
+        self.assertEqual([(message['notification_type'],
+                           message['record']['id']) for message in messages],
+                         [('CONFIG_DELETE', self.vpnbind.id)])
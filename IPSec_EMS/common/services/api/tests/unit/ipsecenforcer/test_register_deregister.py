@@ -0,0 +1,40 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import TestCase
+
+from services.ipsecenforcer.register_deregister import IPsecEnforcerInfo
+
+
+class ConfigVersionTestCase(TestCase):
+    """Test cases for the config version of IPsecEnforcer"""
+
+    def setUp(self):
+        self.ipsecenforcer_info = IPsecEnforcerInfo()
+
+    def tearDown(self):
+        IPsecEnforcerInfo.delete_ipsecenforcer_config_version('enforcer1')
+
+    def test_update_config_version(self):
+        """Test case to increment the version only on config change"""
+        update = self.ipsecenforcer_info.update_ipsecenforcer_config_version
+
+        self.assertEqual(update('enforcer1', 'hash1'), (1, True))
+        self.assertEqual(update('enforcer1', 'hash1'), (1, False))
+        self.assertEqual(update('enforcer1', 'hash2'), (2, True))
+        self.assertEqual(
+                IPsecEnforcerInfo.get_ipsecenforcer_config_version(
+                        'enforcer1'),
+                {'version': 2, 'hash': 'hash2'})
@@ -0,0 +1,60 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from collections import Counter
+from unittest import TestCase
+
+from services.ipsecenforcer.send_notification import IPsecEnforcerFanOut
+
+
+class FakeFanOut(IPsecEnforcerFanOut):
+    """Fan-out where the configuration of the IPsecEnforcers in
+    'unchanged' is unchanged, and the configuration of the
+    IPsecEnforcers in 'failures' fails to be prepared"""
+
+    unchanged = set()
+    failures = set()
+
+    def __init__(self, *args, **kwargs):
+        super(FakeFanOut, self).__init__(*args, **kwargs)
+        self.attempts = Counter()
+
+    def publish_config(self, ipsecenforcer_id):
+        self.attempts[ipsecenforcer_id] += 1
+        if ipsecenforcer_id in self.failures:
+            raise RuntimeError
+        return ipsecenforcer_id not in self.unchanged
+
+
+class FanOutTestCase(TestCase):
+    """Test cases for the parallel notification of IPsecEnforcers"""
+
+    def test_notify(self):
+        """Test case to publish the configurations once and count the
+        outcomes"""
+        fanout = FakeFanOut(concurrency=2)
+        fanout.unchanged = {'enforcer1'}
+        fanout.failures = {'enforcer3'}
+
+        stats = fanout.notify([
+            {'fqdn': '10.0.0.%d' % i, 'ipsecenforcer_id': 'enforcer%d' % i}
+            for i in range(1, 5)
+        ])
+
+        self.assertEqual((stats.total, stats.notified, stats.unchanged,
+                          stats.failed), (4, 2, 1, 1))
+        self.assertEqual(fanout.attempts,
+                         {'enforcer1': 1, 'enforcer2': 1, 'enforcer3': 1,
+                          'enforcer4': 1})
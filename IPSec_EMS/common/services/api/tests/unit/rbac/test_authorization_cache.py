@@ -0,0 +1,88 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import TestCase
+
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.test import APIRequestFactory
+
+from services.api.rbac_authentication import (
+    AuthorizationCache, MISS, RBACAuthorization, authorization_cache
+)
+
+ADMIN = ('token1', '', '/v1/main/ipsecvpn/ikepolicies/')
+GUEST = ('token2', '', '/v1/main/ipsecvpn/ikepolicies/')
+
+
+class AuthorizationCacheTestCase(TestCase):
+    """Test cases for the cache of the RBAC authorization decisions"""
+
+    def setUp(self):
+        self.cache = AuthorizationCache(max_size=2, ttl=30, denial_ttl=5,
+                                        enabled=True)
+
+    def test_expiry(self):
+        """Test case to expire the granted and the denied decisions"""
+        generation = self.cache.generation()
+        self.cache.put(ADMIN, ['VIEW', 'ADD'], generation, now=100)
+        self.cache.put(GUEST, None, generation, now=100)
+
+        self.assertEqual(self.cache.get(ADMIN, now=104), ['VIEW', 'ADD'])
+        self.assertIsNone(self.cache.get(GUEST, now=104))
+        self.assertIs(self.cache.get(GUEST, now=105), MISS)
+        self.assertIs(self.cache.get(ADMIN, now=130), MISS)
+
+    def test_max_size(self):
+        """Test case to evict the least recently used decision"""
+        generation = self.cache.generation()
+        self.cache.put(ADMIN, ['VIEW'], generation, now=100)
+        self.cache.put(GUEST, ['VIEW'], generation, now=100)
+        self.cache.get(ADMIN, now=101)
+        self.cache.put(('token3', '', '/'), ['VIEW'], generation, now=102)
+
+        self.assertIs(self.cache.get(GUEST, now=103), MISS)
+        self.assertEqual(self.cache.get(ADMIN, now=103), ['VIEW'])
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+    def test_invalidate(self):
+        """Test case to drop the decisions of a revoked token, and the
+        decisions requested before an invalidation"""
+        generation = self.cache.generation()
+        self.cache.put(ADMIN, ['VIEW'], generation, now=100)
+        self.cache.put(GUEST, ['VIEW'], generation, now=100)
+
+        self.cache.invalidate('token1')
+        self.assertIs(self.cache.get(ADMIN, now=101), MISS)
+        self.assertEqual(self.cache.get(GUEST, now=101), ['VIEW'])
+
+        self.cache.put(ADMIN, ['VIEW'], generation, now=102)
+        self.assertIs(self.cache.get(ADMIN, now=103), MISS)
+
+        self.cache.invalidate()
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+
+class RBACUnavailableTestCase(TestCase):
+    """Test case for the authorization without the RBAC Webservice"""
+
+    def test_fail_closed(self):
+        """Test case to deny the access when the RBAC Webservice is not
+        reachable, without caching the decision"""
+        request = APIRequestFactory().get(ADMIN[2],
+                                          HTTP_X_AUTH_TOKEN=ADMIN[0])
+        with self.assertRaises(PermissionDenied):
+            RBACAuthorization.authorize(request, ADMIN[2], 'GET')
+
+        self.assertIs(authorization_cache.get(ADMIN), MISS)
@@ -0,0 +1,69 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+from unittest import TestCase
+
+from benchmarks.utils import StorageCallCounter
+from services.api import storage
+from services.api.serializers.utils_serializers import (
+    check_ikepolicy_id, LookupContext
+)
+from services.api.tests.unit.views.utils import TempIKEPolicy
+
+
+class Field(object):
+    """Serializer field with the context of a request"""
+
+    def __init__(self, lookup):
+        self.context = {'lookup': lookup}
+
+
+class LookupContextTestCase(TestCase):
+    """Test cases for the lookup of the referenced records shared by the
+    validators of a request"""
+
+    def setUp(self):
+        self.ikepolicy = TempIKEPolicy()
+        self.ikepolicy.create()
+
+    def tearDown(self):
+        self.ikepolicy.delete()
+
+    def test_prefetch(self):
+        """Test case to read each record once"""
+        lookup = LookupContext()
+        with StorageCallCounter(storage.plugin) as counter:
+            lookup.prefetch('IKEPolicy', [self.ikepolicy.id, 'missing'])
+            lookup.prefetch('IKEPolicy', [self.ikepolicy.id])
+            self.assertTrue(lookup.exists('IKEPolicy', self.ikepolicy.id))
+            self.assertFalse(lookup.exists('IKEPolicy', 'missing'))
+
+        self.assertEqual(counter.calls, {'get_records_by_primary_index': 1})
+
+    def test_validator_lookup(self):
+        """Test case to use the lookup context of the field once per
+        call of the validator"""
+        lookup = LookupContext()
+        lookup.prefetch('IKEPolicy', [self.ikepolicy.id])
+
+        with StorageCallCounter(storage.plugin) as counter:
+            check_ikepolicy_id.set_context(Field(lookup))
+            check_ikepolicy_id(self.ikepolicy.id)
+        self.assertEqual(counter.total, 0)
+
+        # The lookup context is consumed by the call, a validator called
+        # without a context reads the storage backend
+        with StorageCallCounter(storage.plugin) as counter:
+            check_ikepolicy_id(self.ikepolicy.id)
+        self.assertEqual(counter.calls, {'check_key': 1})
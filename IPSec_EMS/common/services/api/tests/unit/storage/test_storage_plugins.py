@@ -0,0 +1,298 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import shutil
+import tempfile
+import threading
+from unittest import TestCase
+
+from services.api.storage_plugin.memory_io.memory_io import MemoryIO
+from services.api.storage_plugin.sqlite_io import sqlite_config
+from services.api.storage_plugin.sqlite_io.sqlite_io import SQLiteIO
+
+
+class TestRecord(object):
+    """Storage test record object"""
+
+    def __init__(self, id, name, email, description):
+        self.id = id
+        self.name = name
+        self.email = email
+        self.description = description
+
+    def __eq__(self, other):
+        return self.__dict__ == other.__dict__
+
+
+class StoragePluginTestMixin(object):
+    """Test cases for store, get, delete operations of the storage
+    plugins without Consul"""
+
+    def create_plugin(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.storage = self.create_plugin()
+        self.storage.relations = {
+                'test': {
+                    'primary_key': 'id',
+                    'secondary_keys': ['name', 'email'],
+                }
+        }
+        self.relation = 'test'
+        self.test_record = TestRecord('732',
+                                      'rec1',
+                                      'rec1@consul.com',
+                                      'Rec 1')
+        self.storage.put_record(self.relation, self.test_record)
+
+    def test_get_record(self):
+        """Test case to get a record by primary index"""
+        record = self.storage.get_record(self.relation, '732')
+        self.assertEqual(TestRecord(**record), self.test_record)
+        self.assertEqual(self.storage.get_record(self.relation, '123'), [])
+        self.assertTrue(self.storage.check_key(self.relation, '732'))
+        self.assertFalse(self.storage.check_key(self.relation, '123'))
+
+    def test_get_records(self):
+        """Test case to get all the records in the primary index order"""
+        self.storage.put_record(self.relation,
+                                TestRecord('100', 'rec0', 'rec0@consul.com',
+                                           'Rec 0'))
+        records = self.storage.get_records(self.relation)
+        self.assertEqual([record['id'] for record in records], ['100', '732'])
+
+    def test_get_records_by_secondary_index(self):
+        """Test case to get the records by secondary index"""
+        self.storage.put_record(self.relation,
+                                TestRecord('100', 'rec1', 'rec0@consul.com',
+                                           'Rec 0'))
+        records = self.storage.get_records_by_secondary_index(self.relation,
+                                                              'name',
+                                                              'rec1')
+        self.assertEqual([record['id'] for record in records], ['100', '732'])
+
+        records = self.storage.get_records_by_secondary_index(
+                self.relation,
+                'email',
+                'rec1@consul.com')
+        self.assertEqual([TestRecord(**record) for record in records],
+                         [self.test_record])
+
+    def test_put_record_update_secondary_index(self):
+        """Test case to update the secondary index of a record"""
+        self.test_record.name = 'rec2'
+        self.storage.put_record(self.relation, self.test_record)
+
+        self.assertFalse(self.storage.get_records_by_secondary_index(
+                self.relation, 'name', 'rec1'))
+        records = self.storage.get_records_by_secondary_index(self.relation,
+                                                              'name',
+                                                              'rec2')
+        self.assertEqual([TestRecord(**record) for record in records],
+                         [self.test_record])
+
+    def test_put_record_without_secondary_index_field(self):
+        """Test case to store a record without a secondary index field"""
+        record = TestRecord('100', 'rec0', 'rec0@consul.com', 'Rec 0')
+        del record.email
+        self.storage.put_record(self.relation, record)
+
+        records = self.storage.get_records_by_secondary_index(self.relation,
+                                                              'name',
+                                                              'rec0')
+        self.assertEqual([stored['id'] for stored in records], ['100'])
+
+        record.email = 'rec0@consul.com'
+        self.storage.put_record(self.relation, record)
+        records = self.storage.get_records_by_secondary_index(
+                self.relation,
+                'email',
+                'rec0@consul.com')
+        self.assertEqual([stored['id'] for stored in records], ['100'])
+
+        self.storage.delete_record(self.relation, record)
+        self.assertFalse(self.storage.get_records_by_secondary_index(
+                self.relation, 'email', 'rec0@consul.com'))
+
+    def test_list_records(self):
+        """Test case to list a page of the records, filtered and sorted
+        by an index"""
+        for id, name in (('100', 'rec2'), ('200', 'rec1'), ('300', 'rec0')):
+            self.storage.put_record(self.relation,
+                                    TestRecord(id, name, id + '@consul.com',
+                                               'Rec ' + id))
+
+        def list_ids(**options):
+            return [record['id'] for record in
+                    self.storage.list_records(self.relation, **options)]
+
+        self.assertEqual(list_ids(), ['100', '200', '300', '732'])
+        self.assertEqual(list_ids(limit=2), ['100', '200'])
+        self.assertEqual(list_ids(limit=2, marker='200'), ['300', '732'])
+        self.assertEqual(list_ids(sort_key='name'),
+                         ['300', '200', '732', '100'])
+        self.assertEqual(list_ids(sort_key='name', sort_dir='desc',
+                                  marker='732'), ['200', '300'])
+        self.assertEqual(list_ids(filters={'name': 'rec1'}), ['200', '732'])
+        self.assertEqual(self.storage.list_records(self.relation,
+                                                   sort_key='name',
+                                                   keys_only=True),
+                         ['300', '200', '732', '100'])
+        self.assertEqual(list_ids(filters={'name': 'rec1',
+                                           'email': '200@consul.com'}),
+                         ['200'])
+
+        with self.assertRaises(ValueError):
+            list_ids(marker='123')
+
+        with self.assertRaises(ValueError):
+            list_ids(sort_key='description')
+
+        # The position of a deleted record is still a valid marker
+        self.storage.delete_record(self.relation,
+                                   TestRecord('200', 'rec1', '', ''))
+        self.assertEqual(list_ids(sort_key='name',
+                                  marker_entry=('rec1', '200')),
+                         ['732', '100'])
+
+    def test_put_and_delete_records(self):
+        """Test case to store and delete many records at once"""
+        records = [TestRecord(id, 'rec' + id, id + '@consul.com', 'Rec ' + id)
+                   for id in ('100', '200', '300')]
+        self.storage.put_records(self.relation, records, new=True)
+
+        records[0].name = 'rec1'
+        self.storage.put_records(self.relation, records[:1])
+        self.assertEqual(
+                sorted(record['id'] for record in
+                       self.storage.get_records_by_secondary_index(
+                               self.relation, 'name', 'rec1')),
+                ['100', '732'])
+
+        self.storage.delete_records(self.relation, records)
+        self.assertEqual([record['id'] for record in
+                          self.storage.get_records(self.relation)], ['732'])
+        self.assertFalse(self.storage.get_records_by_secondary_index(
+                self.relation, 'name', 'rec200'))
+
+    def test_get_records_by_primary_index(self):
+        """Test case to read many records at once"""
+        records = self.storage.get_records_by_primary_index(self.relation,
+                                                            ['732', '999'])
+        self.assertEqual(records.keys(), ['732'])
+        self.assertEqual(records['732']['name'], 'rec1')
+
+        self.assertEqual(
+                self.storage.get_records_by_primary_index(self.relation, []),
+                {})
+
+    def test_delete_record(self):
+        """Test case to delete a record and its secondary indexes"""
+        self.storage.delete_record(self.relation, self.test_record)
+
+        self.assertEqual(self.storage.get_record(self.relation, '732'), [])
+        self.assertFalse(self.storage.get_records(self.relation))
+        self.assertFalse(self.storage.get_records_by_secondary_index(
+                self.relation, 'name', 'rec1'))
+
+    def test_invalid_arguments(self):
+        """Test case to call the plugin with invalid arguments"""
+        with self.assertRaises(TypeError):
+            self.storage.put_record(self.relation, None)
+
+        with self.assertRaises(TypeError):
+            self.storage.get_record(None, '732')
+
+        with self.assertRaises(TypeError):
+            self.storage.get_records_by_secondary_index(self.relation, None,
+                                                        'rec1')
+
+        with self.assertRaises(TypeError):
+            self.storage.get_kv(None)
+
+    def test_kv(self):
+        """Test case to store, get and delete Key/Value pairs"""
+        self.storage.put_kv('map/1/a', 'x')
+        self.storage.put_kv('map/1/b', 'y')
+        self.storage.put_kv('map/2/a', 'z')
+
+        self.assertEqual(self.storage.get_kv('map/1/a'), 'x')
+        self.assertIsNone(self.storage.get_kv('map/3'))
+        self.assertEqual(list(self.storage.get_kvs('map/1/').items()),
+                         [('map/1/a', 'x'), ('map/1/b', 'y')])
+
+        self.storage.delete_kv('map/1/', recurse=True)
+        self.assertEqual(list(self.storage.get_kvs('map/').keys()),
+                         ['map/2/a'])
+
+        self.storage.delete_kv('map/2/a')
+        self.assertFalse(self.storage.get_kvs('map/'))
+
+        self.storage.put_kv('map/4/a', 'x')
+        self.storage.put_kv('map/4/b', 'y')
+        self.storage.delete_kvs(['map/4/a', 'map/4/b', 'map/5'])
+        self.assertFalse(self.storage.get_kvs('map/'))
+
+    def test_wait_kv(self):
+        """Test case to wait for the change of a Key/Value pair"""
+        self.storage.put_kv('version/1', '1')
+
+        # The Value already differs
+        self.assertEqual(self.storage.wait_kv('version/1', None, 1), '1')
+
+        # The wait times out
+        self.assertEqual(self.storage.wait_kv('version/1', '1', 0.1), '1')
+
+        timer = threading.Timer(0.1, self.storage.put_kv, ('version/1', '2'))
+        timer.start()
+        try:
+            self.assertEqual(self.storage.wait_kv('version/1', '1', 5), '2')
+        finally:
+            timer.cancel()
+
+    def test_create_session(self):
+        """Test case to hold the locks of two records at the same time"""
+        session_id = self.storage.create_session(self.relation, '732')
+        other_session_id = self.storage.create_session(self.relation, '733')
+        self.storage.destroy_session(other_session_id)
+        self.storage.destroy_session(session_id)
+
+        # The lock is released with the session
+        session_id = self.storage.create_session(self.relation, '732')
+        self.storage.destroy_session(session_id)
+
+
+class MemoryIOTestCase(StoragePluginTestMixin, TestCase):
+    """Test case for the in-memory storage plugin"""
+
+    def create_plugin(self):
+        return MemoryIO()
+
+
+class SQLiteIOTestCase(StoragePluginTestMixin, TestCase):
+    """Test case for the SQLite storage plugin"""
+
+    def create_plugin(self):
+        self.directory = tempfile.mkdtemp()
+        self.database = sqlite_config.SQLITE_DATABASE
+        sqlite_config.SQLITE_DATABASE = os.path.join(self.directory,
+                                                     'test.sqlite3')
+        return SQLiteIO()
+
+    def tearDown(self):
+        sqlite_config.SQLITE_DATABASE = self.database
+        shutil.rmtree(self.directory)
@@ -13,4 +13,35 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-COMMON_URL_PREFIX = '/v1/main/ipsecvpn/'
\ No newline at end of file
+import json
+
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.test import APIClient, APITestCase
+
+COMMON_URL_PREFIX = '/v1/main/ipsecvpn/'
+
+
+def get_list_data(response):
+    """Records of a list response, streamed or not
+
+    A streamed response is read once, its records are kept as its data.
+    """
+    if not hasattr(response, 'data'):
+        response.data = json.loads(b''.join(response.streaming_content))
+
+    return response.data
+
+
+class RBACBypassClient(APIClient):
+    """API client whose requests skip the RBAC authorization, the RBAC
+    Webservice doesn't run with the unit tests
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(RBACBypassClient, self).__init__(*args, **kwargs)
+        self.force_authenticate(user=AnonymousUser())
+
+
+class EMSAPITestCase(APITestCase):
+    """APITestCase with the RBAC authorization skipped"""
+    client_class = RBACBypassClient
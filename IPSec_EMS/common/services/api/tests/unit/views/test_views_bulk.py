@@ -0,0 +1,159 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from copy import deepcopy
+
+from rest_framework import status
+
+from services.api.serializers.serializers_ikepolicy import IKEPolicy
+from services.api.serializers.serializers_ipsecpolicy import IPsecPolicy
+from services.api.serializers.utils_serializers import generate_uuid
+from services.api.tests.unit.views.common import (
+    COMMON_URL_PREFIX, EMSAPITestCase
+)
+from services.api.tests.unit.views.test_views_ikepolicy import (
+    IKEPOLICY_RECORD
+)
+from services.api.tests.unit.views.test_views_ipsecpolicy import (
+    IPSECPOLICY_RECORD
+)
+from services.api.views_bulk import HTTP_207_MULTI_STATUS
+
+
+class FailingConnection(object):
+    """Storage connection which fails to write several records together
+    after writing the first one, and fails to write the records with the
+    given names
+    """
+
+    def __init__(self, conn, names):
+        self.conn = conn
+        self.names = names
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+    def put_records(self, relation_name, records, new=False):
+        if len(records) > 1:
+            self.conn.put_records(relation_name, records[:1], new=new)
+            raise RuntimeError
+        if records[0].name in self.names:
+            raise RuntimeError
+        self.conn.put_records(relation_name, records, new=new)
+
+
+class TestBulk(EMSAPITestCase):
+    """Test case for the bulk and batch operations"""
+
+    def setUp(self):
+        self.url = COMMON_URL_PREFIX + 'ikepolicies/bulk/'
+
+    def test_bulk(self):
+        """Test case to create, update and delete IKEPolicies in bulk"""
+        records = [dict(IKEPOLICY_RECORD, name='ikepolicy%d' % index)
+                   for index in range(3)]
+        records[2]['ike_version'] = 'v3'
+
+        response = self.client.post(self.url, records, format='json')
+        self.assertEqual(response.status_code, HTTP_207_MULTI_STATUS)
+        self.assertEqual([result['status'] for result in response.data],
+                         [status.HTTP_201_CREATED, status.HTTP_201_CREATED,
+                          status.HTTP_400_BAD_REQUEST])
+        self.assertIn('ike_version', response.data[2]['errors'])
+
+        ids = [result['data']['id'] for result in response.data[:2]]
+        self.assertEqual([IKEPolicy.get(id=id).name for id in ids],
+                         ['ikepolicy0', 'ikepolicy1'])
+
+        response = self.client.patch(
+                self.url, [{'id': ids[0], 'name': 'ike_1'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['data']['name'], 'ike_1')
+        self.assertEqual([ikepolicy.id for ikepolicy in
+                          IKEPolicy.get(name='ike_1')], ids[:1])
+
+        response = self.client.delete(self.url, ids + ['missing'],
+                                      format='json')
+        self.assertEqual([result['status'] for result in response.data],
+                         [status.HTTP_204_NO_CONTENT,
+                          status.HTTP_204_NO_CONTENT,
+                          status.HTTP_404_NOT_FOUND])
+        self.assertIsNone(IKEPolicy.get(id=ids[0]))
+
+    def test_duplicate(self):
+        """Test case to update the same IKEPolicy twice in bulk"""
+        ikepolicy = IKEPolicy(**dict(IKEPOLICY_RECORD,
+                                     id=generate_uuid())).save()
+        try:
+            response = self.client.patch(
+                    self.url, [{'id': ikepolicy.id, 'name': 'ike_1'},
+                               {'id': ikepolicy.id, 'description': 'ike'}],
+                    format='json')
+            self.assertEqual(response.status_code, HTTP_207_MULTI_STATUS)
+            self.assertEqual([result['status'] for result in response.data],
+                             [status.HTTP_200_OK,
+                              status.HTTP_400_BAD_REQUEST])
+            self.assertIn('id', response.data[1]['errors'])
+            self.assertEqual(IKEPolicy.get(id=ikepolicy.id).name, 'ike_1')
+        finally:
+            ikepolicy.delete()
+
+    def test_storage_error(self):
+        """Test case for the records not written by the storage backend"""
+        records = [dict(IKEPOLICY_RECORD, name='ikepolicy%d' % index)
+                   for index in range(3)]
+
+        conn = IKEPolicy.conn
+        IKEPolicy.conn = FailingConnection(conn, ['ikepolicy1'])
+        try:
+            response = self.client.post(self.url, records, format='json')
+        finally:
+            IKEPolicy.conn = conn
+
+        self.assertEqual(response.status_code, HTTP_207_MULTI_STATUS)
+        self.assertEqual([result['status'] for result in response.data],
+                         [status.HTTP_201_CREATED,
+                          status.HTTP_500_INTERNAL_SERVER_ERROR,
+                          status.HTTP_201_CREATED])
+        self.assertIn('detail', response.data[1]['errors'])
+        self.assertEqual(IKEPolicy.get(name='ikepolicy1'), [])
+
+        for result in response.data[0::2]:
+            IKEPolicy.get(id=result['data']['id']).delete()
+
+    def test_batch(self):
+        """Test case to create resources of several types in a batch"""
+        response = self.client.post(
+                COMMON_URL_PREFIX + 'batch/',
+                [{'resource': 'ikepolicies', 'method': 'POST',
+                  'data': deepcopy(IKEPOLICY_RECORD)},
+                 {'resource': 'ipsecpolicies', 'method': 'POST',
+                  'data': deepcopy(IPSECPOLICY_RECORD)},
+                 {'resource': 'vpncertificates', 'method': 'POST',
+                  'data': {}}],
+                format='json')
+        self.assertEqual(response.status_code, HTTP_207_MULTI_STATUS)
+        self.assertEqual([result['status'] for result in response.data],
+                         [status.HTTP_201_CREATED, status.HTTP_201_CREATED,
+                          status.HTTP_400_BAD_REQUEST])
+
+        IKEPolicy.get(id=response.data[0]['data']['id']).delete()
+        IPsecPolicy.get(id=response.data[1]['data']['id']).delete()
+
+    def test_not_a_list(self):
+        """Test case to send a bulk request without an array"""
+        response = self.client.post(self.url, IKEPOLICY_RECORD,
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,291 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import threading
+from copy import deepcopy
+
+from rest_framework import status
+
+from services.api import storage
+from services.api import views_enforcer_registration
+from services.api.serializers.serializers_enforcer_registration import (
+    IPsecEnforcerRegistration
+)
+from services.api.serializers.serializers_vpnbind_group_to_group import (
+    VPNBindGroupToGroup
+)
+from services.api.serializers.utils_serializers import generate_uuid
+from services.api.tests.unit.views.common import (
+    COMMON_URL_PREFIX, EMSAPITestCase
+)
+from services.api.tests.unit.views.test_views_vpnbind_group_to_group import (
+    VPNBINDGROUPGROUP_RECORD
+)
+from services.api.tests.unit.views.utils import (
+    TempIKEPolicy, TempIPsecPolicy, TempVPNEndpointGroup
+)
+from services.api.views_enforcer_registration import (
+    LONG_POLL_MAX_WAIT, LONG_POLL_WAIT, parse_wait
+)
+from services.ipsecenforcer.config_snapshot import IPsecEnforcerConfigSnapshot
+from services.ipsecenforcer.notification_outbox import NotificationOutbox
+from services.ipsecenforcer.prepare_vpn_configuration import (
+    IPsecEnforcerConfig
+)
+from services.ipsecenforcer.register_deregister import (
+    IPsecEnforcerInfo, RELATION_IPSECENFORCER
+)
+
+
+class TestParseWait(EMSAPITestCase):
+    """Test cases for the wait time of the blocking GET"""
+
+    def test_parse_wait(self):
+        self.assertEqual(parse_wait(None),
+                         min(LONG_POLL_WAIT, LONG_POLL_MAX_WAIT))
+        self.assertEqual(parse_wait('0'), 0)
+        self.assertEqual(parse_wait('30s'), min(30, LONG_POLL_MAX_WAIT))
+        self.assertEqual(parse_wait('2m'), min(120, LONG_POLL_MAX_WAIT))
+        self.assertEqual(parse_wait(str(LONG_POLL_MAX_WAIT + 1)),
+                         LONG_POLL_MAX_WAIT)
+
+    def test_parse_wait_invalid(self):
+        for value in ('', 's', '-1', '1h', '1.5s'):
+            self.assertIsNone(parse_wait(value))
+
+
+class TestIPsecEnforcerConfigGet(EMSAPITestCase):
+    """Test cases for the GET of the IPsecEnforcer configuration"""
+
+    def setUp(self):
+        self.ikepolicy = TempIKEPolicy()
+        self.ipsecpolicy = TempIPsecPolicy()
+        self.groups = [TempVPNEndpointGroup(), TempVPNEndpointGroup()]
+        for temp in [self.ikepolicy, self.ipsecpolicy] + self.groups:
+            temp.create()
+
+        self.vpnbind = VPNBindGroupToGroup(**dict(
+                deepcopy(VPNBINDGROUPGROUP_RECORD),
+                id=generate_uuid(),
+                ikepolicy_id=self.ikepolicy.id,
+                ipsecpolicy_id=self.ipsecpolicy.id,
+                vpnendpointgroup_id=self.groups[0].id,
+                peer_vpnendpointgroup_id=self.groups[1].id)).save()
+
+        # An IPsecEnforcer in each VPNEndpointGroup
+        self.enforcers = []
+        for i, group in enumerate(self.groups):
+            enforcer = IPsecEnforcerRegistration(
+                    id=generate_uuid(),
+                    description='',
+                    endpoint_name=['temp_vpnendpointgroup1'],
+                    endpoint_type=['group'],
+                    instance_id='',
+                    fqdn='10.0.%d.1' % i,
+                    fqdn_tunnel='10.0.%d.2' % i,
+                    macaddress='')
+            IPsecEnforcerInfo.put_ipsecenforcer_to_vpnendpoint_map(
+                    enforcer.id,
+                    {'endpoint_id': group.id, 'endpoint_type': 'group'})
+            IPsecEnforcerInfo.put_vpnendpoint_to_ipsecenforcer_fqdn_map(
+                    group.id, enforcer.id, enforcer.fqdn,
+                    enforcer.fqdn_tunnel)
+            storage.plugin.put_record(RELATION_IPSECENFORCER, enforcer)
+            self.enforcers.append((group, enforcer))
+
+        self.url = (COMMON_URL_PREFIX + 'ipsecenforcerregistrations/%s/' %
+                    self.enforcers[0][1].id)
+
+        # The messages queued by the other API tests
+        storage.plugin.delete_kv(NotificationOutbox.key_prefix, recurse=True)
+
+    def tearDown(self):
+        for group, enforcer in self.enforcers:
+            IPsecEnforcerInfo.delete_ipsecenforcer_to_vpnendpoint_map(
+                    enforcer.id)
+            IPsecEnforcerInfo.delete_vpnendpoint_to_ipsecenforcer_fqdn_map(
+                    group.id, enforcer.fqdn)
+            IPsecEnforcerInfo.delete_ipsecenforcer_config_version(enforcer.id)
+            IPsecEnforcerConfigSnapshot.delete_snapshots(enforcer.id)
+            storage.plugin.delete_record(RELATION_IPSECENFORCER, enforcer)
+
+        storage.plugin.delete_kv('fqdn_pair_psk/' + self.vpnbind.id,
+                                 recurse=True)
+        storage.plugin.delete_kv(NotificationOutbox.key_prefix, recurse=True)
+        storage.plugin.delete_kv(NotificationOutbox.index_key)
+
+        self.vpnbind.delete()
+        for temp in [self.ikepolicy, self.ipsecpolicy] + self.groups:
+            temp.delete()
+
+    def publish_config(self):
+        """Prepare the configuration and publish its version, as the
+        IPsecEnforcer Notification process does"""
+        IPsecEnforcerConfig().prepare_ipsec_enforcer_config(
+                self.enforcers[0][1].id)
+
+    def update_ikepolicy(self, lifetime_value):
+        response = self.client.patch(
+                COMMON_URL_PREFIX + 'ikepolicies/%s/' % self.ikepolicy.id,
+                {'lifetime_value': lifetime_value}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_get(self):
+        """Test case to get the configuration, and the same version
+        while it is unchanged"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['version'], 1)
+        self.assertEqual(response.data['vpnbind_group_to_group'].keys(),
+                         [self.vpnbind.id])
+        self.assertEqual(response.data['fqdn_list'],
+                         {self.groups[1].id: ['10.0.1.2']})
+        etag = response['ETag']
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['version'], 1)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(
+                IPsecEnforcerInfo.get_ipsecenforcer_config_version(
+                        self.enforcers[0][1].id)['version'],
+                1)
+
+    def test_get_not_modified(self):
+        """Test case to get no body for the configuration of the ETag"""
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertFalse(response.content)
+
+        self.update_ikepolicy(7200)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['version'], 2)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_get_delta(self):
+        """Test case to get the configuration changes since a version"""
+        self.client.get(self.url)
+
+        response = self.client.get(self.url, {'version': 1})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'version': 1, 'base_version': 1,
+                                         'added': {}, 'changed': {},
+                                         'removed': {}})
+
+        # The change is pending in the outbox
+        self.update_ikepolicy(7200)
+        response = self.client.get(self.url, {'version': 1})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['version'],
+                          response.data['base_version']), (2, 1))
+        self.assertEqual(response.data['changed'].keys(), ['ikepolicy'])
+        self.assertEqual(
+                response.data['changed']['ikepolicy'][self.ikepolicy.id][
+                    'lifetime_value'],
+                7200)
+        self.assertEqual((response.data['added'], response.data['removed']),
+                         ({}, {}))
+
+        # The change is published
+        storage.plugin.delete_kv(NotificationOutbox.key_prefix, recurse=True)
+        response = self.client.get(self.url, {'version': 1})
+
+        self.assertEqual(response.data['changed'].keys(), ['ikepolicy'])
+        self.assertEqual(self.client.get(self.url, {'version': 2}).data,
+                         {'version': 2, 'base_version': 2, 'added': {},
+                          'changed': {}, 'removed': {}})
+
+    def test_get_delta_unknown_version(self):
+        """Test case to get the complete configuration for a version
+        out of the snapshot history"""
+        response = self.client.get(self.url, {'version': 99})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['version'], 1)
+        self.assertIn('vpnbind_group_to_group', response.data)
+
+    def test_get_invalid_params(self):
+        for params in ({'version': 'a'}, {'index': '-1'},
+                       {'index': 1, 'wait': '1h'}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code,
+                             status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.data.keys(), params.keys()[-1:])
+
+    def test_get_index(self):
+        """Test case for the blocking GET, which returns the changes
+        since the index"""
+        self.publish_config()
+
+        # The config version is newer than the index
+        response = self.client.get(self.url, {'index': 0, 'wait': '5s'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['version'], 1)
+        self.assertIn('vpnbind_group_to_group', response.data)
+
+        # The wait time elapses
+        response = self.client.get(self.url, {'index': 1, 'wait': '0s'})
+        self.assertEqual(response.data, {'version': 1, 'base_version': 1,
+                                         'added': {}, 'changed': {},
+                                         'removed': {}})
+
+    def test_get_index_wakeup(self):
+        """Test case for the blocking GET, which returns once the config
+        version is published"""
+        self.publish_config()
+        self.update_ikepolicy(7200)
+
+        timer = threading.Timer(0.2, self.publish_config)
+        timer.start()
+        try:
+            response = self.client.get(self.url, {'index': 1, 'wait': '10s'})
+        finally:
+            timer.join()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['version'],
+                          response.data['base_version']), (2, 1))
+        self.assertEqual(response.data['changed'].keys(), ['ikepolicy'])
+
+    def test_get_index_too_many_waiters(self):
+        """Test case to reject the blocking GET above the maximum number
+        of waiting requests"""
+        waiters = views_enforcer_registration.LONG_POLL_WAITERS
+        views_enforcer_registration.LONG_POLL_WAITERS = (
+            threading.BoundedSemaphore(1))
+        try:
+            views_enforcer_registration.LONG_POLL_WAITERS.acquire()
+            response = self.client.get(self.url, {'index': 1, 'wait': '5s'})
+        finally:
+            views_enforcer_registration.LONG_POLL_WAITERS = waiters
+
+        self.assertEqual(response.status_code,
+                         status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(
+                response['Retry-After'],
+                str(views_enforcer_registration.LONG_POLL_RETRY_AFTER))
+
+        # Non blocking GETs are not limited
+        self.assertEqual(self.client.get(self.url).status_code,
+                         status.HTTP_200_OK)
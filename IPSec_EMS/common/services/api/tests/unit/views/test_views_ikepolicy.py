@@ -18,13 +18,14 @@ from copy import deepcopy
 
 from django.core.urlresolvers import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase
 
 from services.api.serializers.serializers_ikepolicy import IKEPolicy
 from services.api.serializers.utils_serializers import generate_uuid
 from services.api.serializers.utils_serializers import is_valid_uuid
 from services.api.serializers.utils_serializers import unicode_to_ascii_dict
-from services.api.tests.unit.views.common import COMMON_URL_PREFIX
+from services.api.tests.unit.views.common import (
+    COMMON_URL_PREFIX, EMSAPITestCase, get_list_data
+)
 
 LOG = logging.getLogger(__name__)
 
@@ -45,7 +46,7 @@ IKEPOLICY_RECORD = {
 }
 
 
-class TestIKEPolicyCRUD(APITestCase):
+class TestIKEPolicyCRUD(EMSAPITestCase):
     """Test case for CRUD operations on IKEPolicy"""
 
     def setUp(self):
@@ -103,7 +104,59 @@ class TestIKEPolicyCRUD(APITestCase):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(unicode_to_ascii_dict(self.data) in
-                        unicode_to_ascii_dict(response.data))
+                        unicode_to_ascii_dict(get_list_data(response)))
+
+    def test_list_page(self):
+        """Test case to list a page of IKEPolicies, filtered, sorted and
+        with the selected fields"""
+        other = IKEPolicy(**dict(self.data, id=generate_uuid(),
+                                 name='ikepolicy0')).save()
+        try:
+            response = self.client.get(self.url, {'sort_key': 'name',
+                                                  'limit': 1,
+                                                  'fields': 'id,name'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(unicode_to_ascii_dict(response.data),
+                             [{'id': other.id, 'name': 'ikepolicy0'}])
+            self.assertIn('marker=' + other.id, response['Link'])
+
+            response = self.client.get(self.url, {'name': 'ikepolicy1'})
+            self.assertEqual([record['id'] for record in
+                              get_list_data(response)],
+                             [self.uuid])
+
+            response = self.client.get(self.url, {'sort_key': 'rekey'})
+            self.assertEqual(response.status_code,
+                             status.HTTP_400_BAD_REQUEST)
+
+            pages = IKEPolicy.select_pages(page_size=1, sort_key='name')
+            self.assertEqual([[ikepolicy.id for ikepolicy in page]
+                              for page in pages],
+                             [[other.id], [self.uuid]])
+
+            # Deleting the last record of a page doesn't end the pages
+            last = IKEPolicy(**dict(self.data, id=generate_uuid(),
+                                    name='ikepolicy2')).save()
+            pages = IKEPolicy.select_pages(page_size=1, sort_key='name')
+            next(pages)
+            next(pages)
+            IKEPolicy.get(id=self.uuid).delete()
+            try:
+                self.assertEqual([[ikepolicy.id for ikepolicy in page]
+                                  for page in pages],
+                                 [[last.id]])
+            finally:
+                self.ikepolicy.save()
+                last.delete()
+
+            response = self.client.get(self.url, {'sort_key': 'name',
+                                                  'fields': 'name'})
+            self.assertTrue(response.streaming)
+            self.assertEqual(get_list_data(response),
+                             [{'name': 'ikepolicy0'},
+                              {'name': 'ikepolicy1'}])
+        finally:
+            other.delete()
 
     def test_get(self):
         """Test case to get or show an IKEPolicy"""
@@ -150,7 +203,7 @@ class TestIKEPolicyCRUD(APITestCase):
                              unicode_to_ascii_dict(self.data))
 
 
-class TestIKEPolicyNotFound(APITestCase):
+class TestIKEPolicyNotFound(EMSAPITestCase):
     """Test case for GET, PATCH & DELETE operations on IKEPolicy with no
      record"""
 
@@ -165,7 +218,7 @@ class TestIKEPolicyNotFound(APITestCase):
     def test_list_with_no_records(self):
         """Test case to list all IKEpolicies with no records present"""
         response = self.client.get(self._url)
-        print(response.data)
+        print(get_list_data(response))
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_get_with_invalid_id(self):
@@ -189,7 +242,7 @@ class TestIKEPolicyNotFound(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 
-class TestIKEPolicyBadRequest(APITestCase):
+class TestIKEPolicyBadRequest(EMSAPITestCase):
     """Test case for POST & PATCH operations on IKEPolicy with invalid record"""
 
     def setUp(self):
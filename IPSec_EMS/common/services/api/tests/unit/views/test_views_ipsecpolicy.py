@@ -18,13 +18,14 @@ from copy import deepcopy
 
 from django.core.urlresolvers import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase
 
 from services.api.serializers.serializers_ipsecpolicy import IPsecPolicy
 from services.api.serializers.utils_serializers import generate_uuid
 from services.api.serializers.utils_serializers import is_valid_uuid
 from services.api.serializers.utils_serializers import unicode_to_ascii_dict
-from services.api.tests.unit.views.common import COMMON_URL_PREFIX
+from services.api.tests.unit.views.common import (
+    COMMON_URL_PREFIX, EMSAPITestCase, get_list_data
+)
 
 LOG = logging.getLogger(__name__)
 
@@ -44,7 +45,7 @@ IPSECPOLICY_RECORD = {
 }
 
 
-class TestIPsecPolicyCRUD(APITestCase):
+class TestIPsecPolicyCRUD(EMSAPITestCase):
     """Test case for CRUD operations on IPsecPolicy"""
 
     def setUp(self):
@@ -101,9 +102,9 @@ class TestIPsecPolicyCRUD(APITestCase):
         """Test case to list all IPsecPolicies"""
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        print unicode_to_ascii_dict(response.data)
+        print unicode_to_ascii_dict(get_list_data(response))
         self.assertTrue(unicode_to_ascii_dict(self.data) in
-                        unicode_to_ascii_dict(response.data))
+                        unicode_to_ascii_dict(get_list_data(response)))
 
     def test_get(self):
         """Test case to get or show an IPsecPolicy"""
@@ -152,7 +153,7 @@ class TestIPsecPolicyCRUD(APITestCase):
                              unicode_to_ascii_dict(self.data))
 
 
-class TestIPsecPolicyNotFound(APITestCase):
+class TestIPsecPolicyNotFound(EMSAPITestCase):
     """Test case for GET, PUT & DELETE operations on IPsecPolicy with
     no record"""
 
@@ -167,7 +168,7 @@ class TestIPsecPolicyNotFound(APITestCase):
     def test_list_with_no_records(self):
         """Test case to list all IPsecPolicies with no records present"""
         response = self.client.get(self._url)
-        print(response.data)
+        print(get_list_data(response))
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_get_with_invalid_id(self):
@@ -191,7 +192,7 @@ class TestIPsecPolicyNotFound(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 
-class TestIPsecPolicyBadRequest(APITestCase):
+class TestIPsecPolicyBadRequest(EMSAPITestCase):
     """Test case for POST & PUT operations on IPsecPolicy with invalid
     record"""
 
@@ -18,16 +18,22 @@ from copy import deepcopy
 
 from django.core.urlresolvers import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase
 
+from benchmarks.utils import StorageCallCounter
+from services.api import storage
 
 from services.api.serializers.serializers_vpnbind_group_to_group import (
     VPNBindGroupToGroup
 )
+from services.api.serializers.serializers_vpnendpointgroup import (
+    VPNEndpointGroup
+)
 from services.api.serializers.utils_serializers import generate_uuid
 from services.api.serializers.utils_serializers import is_valid_uuid
 from services.api.serializers.utils_serializers import unicode_to_ascii_dict
-from services.api.tests.unit.views.common import COMMON_URL_PREFIX
+from services.api.tests.unit.views.common import (
+    COMMON_URL_PREFIX, EMSAPITestCase, get_list_data
+)
 from services.api.tests.unit.views.utils import (
     TempIKEPolicy, TempIPsecPolicy, TempVPNEndpointGroup
 )
@@ -53,7 +59,7 @@ VPNBINDGROUPGROUP_RECORD = {
 }
 
 
-class TestVPNBindGroupGroupCRUD(APITestCase):
+class TestVPNBindGroupGroupCRUD(EMSAPITestCase):
     """Test case for CRUD operations on VPNBindGroupToGroup"""
 
     def setUp(self):
@@ -132,6 +138,20 @@ class TestVPNBindGroupGroupCRUD(APITestCase):
         self.assertEqual(unicode_to_ascii_dict(response.data),
                          unicode_to_ascii_dict(self.data))
 
+    def test_post_storage_calls(self):
+        """Test case to read the records referenced by a VPNBind once,
+        with a single storage request per resource"""
+        with StorageCallCounter(storage.plugin) as counter:
+            response = self.client.post(self.url, self.data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.uuid = response.data['id']
+        # IKEPolicy, IPsecPolicy and both VPNEndpointGroups, no
+        # check_key or get_record per validator
+        self.assertEqual(counter.calls,
+                         {'get_records_by_primary_index': 3,
+                          'put_record': 1})
+
     def test_post_id(self):
         # 'id' provided
         self.uuid = generate_uuid()
@@ -146,7 +166,22 @@ class TestVPNBindGroupGroupCRUD(APITestCase):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(unicode_to_ascii_dict(self.data) in
-                        unicode_to_ascii_dict(response.data))
+                        unicode_to_ascii_dict(get_list_data(response)))
+
+    def test_cert_without_vpncertificate(self):
+        """Test case to create a VPNBindGroupToGroup in cert mode between
+        VPNEndpointGroups without a VPNCertificate"""
+        for vpnendpointgroup in (self.vpnendpointgroup,
+                                 self.peer_vpnendpointgroup):
+            record = VPNEndpointGroup.get(id=vpnendpointgroup.id)
+            record.vpncertificate_id = ''
+            record.update()
+
+        data = dict(self.data, auth_mode='cert')
+        data.pop('id')
+        response = self.client.post(self.url_prefix, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('vpncertificate', str(response.data))
 
     def test_get(self):
         """Test case to get or show an VPNBindGroupToGroup"""
@@ -193,7 +228,7 @@ class TestVPNBindGroupGroupCRUD(APITestCase):
                              unicode_to_ascii_dict(self.data))
 
 
-class TestVPNBindGroupGroupNotFound(APITestCase):
+class TestVPNBindGroupGroupNotFound(EMSAPITestCase):
     """Test case for GET, PUT & DELETE operations on VPNBindGroupToGroup
      with no record"""
 
@@ -209,7 +244,7 @@ class TestVPNBindGroupGroupNotFound(APITestCase):
         """Test case to list all VPNBindGroupToGroup(s) with no records
          present"""
         response = self.client.get(self._url)
-        print(response.data)
+        print(get_list_data(response))
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_get_with_invalid_id(self):
@@ -234,7 +269,7 @@ class TestVPNBindGroupGroupNotFound(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 
-# class TestIKEPolicyBadRequest(APITestCase):
+# class TestIKEPolicyBadRequest(EMSAPITestCase):
 #     """Test case for POST & PUT operations on IKEPolicy with invalid record"""
 #
 #     def setUp(self):
@@ -18,13 +18,14 @@ from copy import deepcopy
 
 from rest_framework import status
 from rest_framework.reverse import reverse
-from rest_framework.test import APITestCase
 
 from services.api.serializers.serializers_vpncacertificate import \
     VPNCACertificate
 from services.api.serializers.utils_serializers import generate_uuid, \
     is_valid_uuid, unicode_to_ascii_dict
-from services.api.tests.unit.views.common import COMMON_URL_PREFIX
+from services.api.tests.unit.views.common import (
+    COMMON_URL_PREFIX, EMSAPITestCase
+)
 from services.api.tests.unit.views.utils import Certificates
 
 LOG = logging.getLogger(__name__)
@@ -36,7 +37,7 @@ VPNCACERTIFICATE_RECORD = {
 }
 
 
-class TestIKEPolicyCRUD(APITestCase):
+class TestIKEPolicyCRUD(EMSAPITestCase):
     """Test case for CRUD operations on IKEPolicy"""
 
     def setUp(self):
@@ -150,7 +151,7 @@ class TestIKEPolicyCRUD(APITestCase):
 #                              unicode_to_ascii_dict(self.data))
 #
 #
-# class TestIKEPolicyNotFound(APITestCase):
+# class TestIKEPolicyNotFound(EMSAPITestCase):
 #     """Test case for GET, PUT & DELETE operations on IKEPolicy with no
 #      record"""
 #
@@ -189,7 +190,7 @@ class TestIKEPolicyCRUD(APITestCase):
 #         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 #
 #
-# class TestIKEPolicyBadRequest(APITestCase):
+# class TestIKEPolicyBadRequest(EMSAPITestCase):
 #     """Test case for POST & PUT operations on IKEPolicy with invalid record"""
 #
 #     def setUp(self):
@@ -18,7 +18,6 @@ from copy import deepcopy
 
 from django.core.urlresolvers import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase
 
 from services.api.serializers.serializers_vpnendpointgroup import (
     VPNEndpointGroup
@@ -26,7 +25,9 @@ from services.api.serializers.serializers_vpnendpointgroup import (
 from services.api.serializers.utils_serializers import generate_uuid
 from services.api.serializers.utils_serializers import is_valid_uuid
 from services.api.serializers.utils_serializers import unicode_to_ascii_dict
-from services.api.tests.unit.views.common import COMMON_URL_PREFIX
+from services.api.tests.unit.views.common import (
+    COMMON_URL_PREFIX, EMSAPITestCase, get_list_data
+)
 from services.api.tests.unit.views.utils import Certificates
 
 LOG = logging.getLogger(__name__)
@@ -40,7 +41,7 @@ VPNENDPOINTGROUP_RECORD = {
 }
 
 
-class TestVPNEndpointGroupCRUD(APITestCase):
+class TestVPNEndpointGroupCRUD(EMSAPITestCase):
     """Test case for CRUD operations on VPNEndpointGroup"""
 
     def setUp(self):
@@ -104,7 +105,7 @@ class TestVPNEndpointGroupCRUD(APITestCase):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(unicode_to_ascii_dict(self.data) in
-                        unicode_to_ascii_dict(response.data))
+                        unicode_to_ascii_dict(get_list_data(response)))
 
     def test_get(self):
         """Test case to get or show an VPNEndpointGroup."""
@@ -142,7 +143,7 @@ class TestVPNEndpointGroupCRUD(APITestCase):
                              unicode_to_ascii_dict(self.data))
 
 
-class TestVPNEndpointGroupNotFound(APITestCase):
+class TestVPNEndpointGroupNotFound(EMSAPITestCase):
     """Test case for GET, PUT & DELETE operations on VPNEndpointGroup with no
      record"""
 
@@ -157,7 +158,7 @@ class TestVPNEndpointGroupNotFound(APITestCase):
     def test_list_with_no_records(self):
         """Test case to list all VPNEndpointGroups with no records present."""
         response = self.client.get(self._url)
-        print(response.data)
+        print(get_list_data(response))
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_get_with_invalid_id(self):
@@ -181,7 +182,7 @@ class TestVPNEndpointGroupNotFound(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 
-class TestVPNEndpointGroupBadRequest(APITestCase):
+class TestVPNEndpointGroupBadRequest(EMSAPITestCase):
     """Test case for POST & PUT operations on VPNEndpointGroup with invalid
      record"""
 
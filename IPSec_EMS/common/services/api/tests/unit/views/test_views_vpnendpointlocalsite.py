@@ -18,7 +18,6 @@ from copy import deepcopy
 
 from django.core.urlresolvers import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase
 
 from services.api.serializers.serializers_vpnendpointlocalsite import (
     VPNEndpointLocalSite
@@ -26,7 +25,9 @@ from services.api.serializers.serializers_vpnendpointlocalsite import (
 from services.api.serializers.utils_serializers import generate_uuid
 from services.api.serializers.utils_serializers import is_valid_uuid
 from services.api.serializers.utils_serializers import unicode_to_ascii_dict
-from services.api.tests.unit.views.common import COMMON_URL_PREFIX
+from services.api.tests.unit.views.common import (
+    COMMON_URL_PREFIX, EMSAPITestCase, get_list_data
+)
 from services.api.tests.unit.views.utils import Certificates
 
 LOG = logging.getLogger(__name__)
@@ -41,7 +42,7 @@ VPNENDPOINTLOCALSITE_RECORD = {
 }
 
 
-class TestVPNEndpointLocalSiteCRUD(APITestCase):
+class TestVPNEndpointLocalSiteCRUD(EMSAPITestCase):
     """Test case for CRUD operations on VPNEndpointLocalSite"""
 
     def setUp(self):
@@ -107,7 +108,7 @@ class TestVPNEndpointLocalSiteCRUD(APITestCase):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(unicode_to_ascii_dict(self.data) in
-                        unicode_to_ascii_dict(response.data))
+                        unicode_to_ascii_dict(get_list_data(response)))
 
     def test_get(self):
         """Test case to get or show an VPNEndpointLocalSite"""
@@ -145,7 +146,7 @@ class TestVPNEndpointLocalSiteCRUD(APITestCase):
                              unicode_to_ascii_dict(self.data))
 
 
-class TestVPNEndpointLocalSiteNotFound(APITestCase):
+class TestVPNEndpointLocalSiteNotFound(EMSAPITestCase):
     """Test case for GET, PUT & DELETE operations on
      VPNEndpointLocalSite with no record"""
 
@@ -161,7 +162,7 @@ class TestVPNEndpointLocalSiteNotFound(APITestCase):
         """Test case to list all VPNEndpointLocalSite with no records
          present."""
         response = self.client.get(self._url)
-        print(response.data)
+        print(get_list_data(response))
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_get_with_invalid_id(self):
@@ -185,7 +186,7 @@ class TestVPNEndpointLocalSiteNotFound(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 
-class TestVPNEndpointLocalSiteBadRequest(APITestCase):
+class TestVPNEndpointLocalSiteBadRequest(EMSAPITestCase):
     """Test case for POST & PUT operations on VPNEndpointLocalSite with invalid
      record"""
 
@@ -18,7 +18,6 @@ from copy import deepcopy
 
 from django.core.urlresolvers import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase
 
 
 from services.api.serializers.serializers_vpnendpointremotesite import (
@@ -27,7 +26,9 @@ from services.api.serializers.serializers_vpnendpointremotesite import (
 from services.api.serializers.utils_serializers import generate_uuid
 from services.api.serializers.utils_serializers import is_valid_uuid
 from services.api.serializers.utils_serializers import unicode_to_ascii_dict
-from services.api.tests.unit.views.common import COMMON_URL_PREFIX
+from services.api.tests.unit.views.common import (
+    COMMON_URL_PREFIX, EMSAPITestCase, get_list_data
+)
 from services.api.tests.unit.views.utils import Certificates
 
 LOG = logging.getLogger(__name__)
@@ -43,7 +44,7 @@ VPNENDPOINTREMOTESITE_RECORD = {
 }
 
 
-class TestVPNEndpointRemoteSiteCRUD(APITestCase):
+class TestVPNEndpointRemoteSiteCRUD(EMSAPITestCase):
     """Test case for CRUD operations on VPNEndpointRemoteSite"""
 
     def setUp(self):
@@ -110,7 +111,7 @@ class TestVPNEndpointRemoteSiteCRUD(APITestCase):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(unicode_to_ascii_dict(self.data) in
-                        unicode_to_ascii_dict(response.data))
+                        unicode_to_ascii_dict(get_list_data(response)))
 
     def test_get(self):
         """Test case to get or show an VPNEndpointRemoteSite"""
@@ -150,7 +151,7 @@ class TestVPNEndpointRemoteSiteCRUD(APITestCase):
                              unicode_to_ascii_dict(self.data))
 
 
-class TestVPNEndpointRemoteSiteNotFound(APITestCase):
+class TestVPNEndpointRemoteSiteNotFound(EMSAPITestCase):
     """Test case for GET, PUT & DELETE operations on
      VPNEndpointRemoteSite with no record"""
 
@@ -166,7 +167,7 @@ class TestVPNEndpointRemoteSiteNotFound(APITestCase):
         """Test case to list all VPNEndpointRemoteSite with no records
          present."""
         response = self.client.get(self._url)
-        print(response.data)
+        print(get_list_data(response))
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_get_with_invalid_id(self):
@@ -190,7 +191,7 @@ class TestVPNEndpointRemoteSiteNotFound(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 
-class TestVPNEndpointRemoteSiteBadRequest(APITestCase):
+class TestVPNEndpointRemoteSiteBadRequest(EMSAPITestCase):
     """Test case for POST & PUT operations on VPNEndpointRemoteSite with invalid
      record"""
 
@@ -15,8 +15,6 @@
 
 import tempfile
 
-from rest_framework.test import APITestCase, APIClient
-
 from services.api.serializers.serializers_ikepolicy import IKEPolicy
 from services.api.serializers.serializers_ipsecpolicy import IPsecPolicy
 from services.api.serializers.serializers_vpncacertificate import (
@@ -30,7 +28,9 @@ from services.api.serializers.serializers_vpnendpointlocalsite import \
 from services.api.serializers.serializers_vpnendpointremotesite import \
     VPNEndpointRemoteSite
 from services.api.serializers.utils_serializers import generate_uuid
-from services.api.tests.unit.views.common import COMMON_URL_PREFIX
+from services.api.tests.unit.views.common import (
+    COMMON_URL_PREFIX, EMSAPITestCase, RBACBypassClient
+)
 
 
 class TempIKEPolicy(object):
@@ -99,10 +99,10 @@ class TempVPNEndpointGroup(object):
         VPNEndpointGroup.get(id=self.id).delete()
 
 
-class TempVPNEndpointLocalSite(APITestCase):
+class TempVPNEndpointLocalSite(EMSAPITestCase):
 
     def __init__(self):
-        self.client = APIClient()
+        self.client = RBACBypassClient()
         self._url = COMMON_URL_PREFIX + "vpnendpointlocalsites/"
 
     def create(self):
@@ -115,10 +115,10 @@ class TempVPNEndpointLocalSite(APITestCase):
         IKEPolicy.get(id=self._id).delete()
 
 
-class TempVPNEndpointRemoteSite(APITestCase):
+class TempVPNEndpointRemoteSite(EMSAPITestCase):
 
     def __init__(self):
-        self.client = APIClient()
+        self.client = RBACBypassClient()
         self._url = COMMON_URL_PREFIX + "vpnendpointremotesites/"
 
     def create(self):
@@ -14,19 +14,27 @@
 #    under the License.
 
 from __future__ import unicode_literals
+from itertools import chain
 import logging
 
 from django.utils.translation import ugettext as _
 from rest_framework.generics import (
     ListCreateAPIView, RetrieveUpdateDestroyAPIView
 )
-from rest_framework.exceptions import MethodNotAllowed, NotFound
+from rest_framework.exceptions import (
+    MethodNotAllowed, NotFound, ValidationError
+)
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.status import (
     HTTP_200_OK, HTTP_204_NO_CONTENT, HTTP_401_UNAUTHORIZED
 )
+from rest_framework.utils.urls import replace_query_param
 from services.api.rbac_authentication import RBACAuthorization
-from services.api.views_utils import get_resource_info
+from services.api.serializers.utils_serializers import LookupContext
+from services.api.views_utils import (
+    get_list_options, get_resource_info, streaming_list_response
+)
 from services.ipsecenforcer.notification_ipc_client_listener import \
     IPsecEnforcerNotification
 
@@ -57,10 +65,31 @@ class GenericCommonResourceMixin(object):
         return self.kwargs['resource_serializer']
 
     def get_serializer_context(self):
-        return {
+        context = {
             self.kwargs['resource_class'].primary_key: self.kwargs['pk_value'],
         }
 
+        if self.request.method in ('POST', 'PUT', 'PATCH'):
+            context['lookup'] = self.get_lookup()
+
+        return context
+
+    def get_lookup(self):
+        """Lookup context of the request, built once per request
+
+        The records referenced by the request are read once, for all the
+        validators and all the serializers of the request.
+
+        Returns:
+            LookupContext: Lookup context of the request
+        """
+        if getattr(self, '_lookup', None) is None:
+            self._lookup = LookupContext()
+            self._lookup.prefetch_references(self.get_serializer_class(),
+                                             [self.request.data])
+
+        return self._lookup
+
     def get_resource_class_and_search_info(self):
         rbac_resource = self.kwargs['resource_class']
 
@@ -92,13 +121,77 @@ class GenericCommonResourceMixin(object):
 
 class GenericListCreateResourceView(GenericCommonResourceMixin,
                                     ListCreateAPIView):
-    """Create(POST)/List(GET) for IPsec EMS HTTP resources"""
+    """Create(POST)/List(GET) for IPsec EMS HTTP resources
+
+    A list is paginated(limit, marker), sorted(sort_key, sort_dir) and
+    filtered(by secondary key values) in the storage backend, and the
+    fields of the resources may be projected(fields). When the list is
+    limited, the URL of the next page is in the 'Link' header. A list
+    which is not limited is read from the storage backend and streamed
+    in JSON a page at a time.
+    """
 
     def get_queryset(self):
         rbac_resource, search_info = self.get_resource_class_and_search_info()
 
         return rbac_resource.all(**search_info)
 
+    def list(self, request, *args, **kwargs):
+        resource_class = self.kwargs['resource_class']
+        serializer_class = self.get_serializer_class()
+
+        options, fields = get_list_options(request.query_params,
+                                           resource_class,
+                                           serializer_class().fields.keys())
+        # A whole list is streamed in JSON, a page at a time
+        stream = ('limit' not in options and
+                  isinstance(request.accepted_renderer, JSONRenderer))
+        try:
+            if stream:
+                pages = resource_class.select_pages(**options)
+                # Read the first page now, to report an invalid marker
+                pages = chain([next(pages)], pages)
+            else:
+                records = resource_class.select(**options)
+        except ValueError:
+            raise ValidationError(
+                    {'marker': [_("Resource %s with %s %s not found.") %
+                                (resource_class.resource_name,
+                                 resource_class.primary_key,
+                                 options['marker'])]})
+
+        if stream:
+            serializer = serializer_class(
+                    context=self.get_serializer_context())
+            self.project_fields(serializer.fields, fields)
+            return streaming_list_response(pages,
+                                           serializer.to_representation)
+
+        serializer = serializer_class(
+                records, many=True, context=self.get_serializer_context())
+        self.project_fields(serializer.child.fields, fields)
+
+        headers = {}
+        if options.get('limit') and len(records) == options['limit']:
+            next_url = replace_query_param(
+                    request.build_absolute_uri(), 'marker',
+                    getattr(records[-1], resource_class.primary_key))
+            headers['Link'] = '<%s>; rel="next"' % next_url
+
+        return Response(serializer.data, status=HTTP_200_OK, headers=headers)
+
+    @staticmethod
+    def project_fields(serializer_fields, fields):
+        """Serialize only the projected fields
+
+        Args:
+            serializer_fields (BindingDict): Fields of the serializer
+            fields (list): Projected field names, None for all the fields
+        """
+        if fields is not None:
+            for field_name in set(serializer_fields) - set(fields):
+                serializer_fields.pop(field_name)
+
 
 class GenericRetrieveUpdateDestroyResourceView(GenericCommonResourceMixin,
                                                RetrieveUpdateDestroyAPIView):
@@ -126,19 +219,30 @@ class GenericRetrieveUpdateDestroyResourceView(GenericCommonResourceMixin,
                                self).patch(request,
                                            *args,
                                            **kwargs)
-        # IPsecEnforcerNotification.client(
-        #          self.get_serializer_class().resource_name,
-        #          self.get_object().__dict__,
-        #          request.data)
 
         return Response(updated_record.data, status=HTTP_200_OK)
 
+    def perform_update(self, serializer):
+        # The record is updated in place, keep the stored one for the
+        # notification
+        record = dict(serializer.instance.__dict__)
+        serializer.save()
+
+        IPsecEnforcerNotification.client(
+                self.kwargs['resource_class'].resource_name,
+                record,
+                dict(self.request.data))
+
     def delete(self, request, *args, **kwargs):
         super(GenericRetrieveUpdateDestroyResourceView, self).delete(request,
                                                                      *args,
                                                                      **kwargs)
-        # IPsecEnforcerNotification.client(
-        #           self.get_serializer_class().resource_name,
-        #           self.get_object().__dict__)
 
         return Response(status=HTTP_204_NO_CONTENT)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+
+        IPsecEnforcerNotification.client(
+                self.kwargs['resource_class'].resource_name,
+                dict(instance.__dict__))
@@ -21,26 +21,87 @@ import requests
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
-from services.api.rbac_settings import RBAC_URI
+from services.api.rbac_authentication import (
+    authorization_cache, get_rbac_session
+)
+from services.api.rbac_settings import RBAC_TIMEOUT, RBAC_URI
 
 LOG = logging.getLogger(__name__)
 
+# RBAC resources whose changes may change the authorization decisions
+RBAC_AUTHORIZATION_RESOURCES = ('tokens', 'roles', 'groups', 'users')
+
+
+def get_rbac_resource(path):
+    """Name of the RBAC resource of a request path
+
+    Args:
+        path (unicode): request path, e.g. /v1/main/auth/tokens/<id>/
+
+    Returns:
+        unicode: resource name e.g. 'tokens', or None
+    """
+    parts = [part for part in path.split('?')[0].split('/') if part]
+    for resource_name in RBAC_AUTHORIZATION_RESOURCES:
+        if resource_name in parts:
+            return resource_name
+    return None
+
+
+def get_revoked_token(url, headers):
+    """Fetch the auth token of a token record before it is revoked
+
+    Args:
+        url (unicode): URL of the token record
+        headers (dict): headers of the revoke request
+
+    Returns:
+        unicode: auth token, or None if it could not be fetched
+    """
+    try:
+        response = get_rbac_session().get(url, headers=headers,
+                                          timeout=RBAC_TIMEOUT)
+        if response.ok:
+            return response.json().get('auth_token')
+    except (requests.exceptions.RequestException, ValueError) as e:
+        LOG.warning('Failed to fetch the revoked token: %s' % e)
+    return None
+
 
 @api_view(['GET', 'POST', 'PATCH', 'PUT', 'DELETE'])
 def resource(request, version, namespace, pk='None'):
     try:
         url = RBAC_URI + request.get_full_path()
-        response = requests.request(
+        headers = {
+            'X-Auth-Token': request.META.get('HTTP_X_AUTH_TOKEN', ''),
+            'X-SSL-Client-S-DN': request.META.get(
+                    'HTTP_SSL_CLIENT_S_DN', ''),
+            'X-Authorization-Endpoint': urlparse.urlparse(
+                    request.build_absolute_uri()).path,
+            'Content-Type': request.META.get('CONTENT_TYPE', '')}
+
+        # A change of the RBAC tokens, roles, groups or users invalidates
+        # the cached authorization decisions. Only the decisions of a
+        # revoked token are dropped, the other changes may affect any
+        # principal. A new token has no cached decisions.
+        rbac_resource = None
+        revoked_token = None
+        if request.method != 'GET':
+            rbac_resource = get_rbac_resource(request.path)
+            if rbac_resource == 'tokens' and request.method == 'POST':
+                rbac_resource = None
+            elif rbac_resource == 'tokens' and request.method == 'DELETE':
+                revoked_token = get_revoked_token(url, headers)
+
+        response = get_rbac_session().request(
                 method=request.method,
                 url=url,
                 data=json.dumps(request.data),
-                headers={
-                    'X-Auth-Token': request.META.get('HTTP_X_AUTH_TOKEN', ''),
-                    'X-SSL-Client-S-DN': request.META.get(
-                            'HTTP_SSL_CLIENT_S_DN', ''),
-                    'X-Authorization-Endpoint': urlparse.urlparse(
-                            request.build_absolute_uri()).path,
-                    'Content-Type': request.META.get('CONTENT_TYPE', '')})
+                headers=headers,
+                timeout=RBAC_TIMEOUT)
+
+        if rbac_resource is not None and response.ok:
+            authorization_cache.invalidate(revoked_token)
 
         response_content_type = response.headers.get('Content-Type', None)
         response_data = response.content
@@ -56,6 +117,3 @@ def resource(request, version, namespace, pk='None'):
 
     except requests.exceptions.RequestException as e:
         LOG.error('%s %s' % (e.__doc__, e.message))
-
-
-
@@ -0,0 +1,446 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Views to create, update or delete many IPsec EMS HTTP resources in a
+single request
+
+A bulk request(POST/PATCH/DELETE <resource>/bulk/) carries an array of
+items of one resource, e.g. records to create, records with their id to
+update, or ids to delete. A batch request(POST batch/) carries an array
+of operations on any resources, e.g.
+
+    [{"resource": "ikepolicies", "method": "POST", "data": {...}},
+     {"resource": "vpnbindgrouptogroup", "method": "DELETE",
+      "data": "<id>"}]
+
+The items are validated one by one, and the valid items of a resource
+are written together with a few storage writes. The consecutive
+operations of a batch with the same resource and method are handled as
+a bulk request, in the order of the batch, so an operation may refer to
+a record created by a previous one. A record appears once in a bulk
+request(or in consecutive operations of a batch), a later item of the
+same record fails. The IPsecEnforcers are notified of the updated and
+deleted records, as for the requests on a single record. If the
+storage backend fails to write the records together, some of them may
+be written already: the records are then written one by one, and the
+items which still fail get a 500 result.
+
+The response is an array with the result of each item or operation, in
+the same order, e.g. {"status": 201, "data": {...}} or
+{"status": 400, "errors": {...}}. The status of the response is 200 if
+all the items succeed, else 207.
+"""
+
+from __future__ import unicode_literals
+from itertools import groupby
+import logging
+
+from django.utils.translation import ugettext as _
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.generics import GenericAPIView
+from rest_framework.response import Response
+from rest_framework.serializers import ValidationError as \
+    SerializerValidationError
+from rest_framework.status import (
+    HTTP_200_OK, HTTP_201_CREATED, HTTP_204_NO_CONTENT, HTTP_400_BAD_REQUEST,
+    HTTP_403_FORBIDDEN, HTTP_404_NOT_FOUND, HTTP_500_INTERNAL_SERVER_ERROR
+)
+
+from services.api.exceptions import PKUpdateNotPermitted
+from services.api.rbac_authentication import BATCH_SUFFIX, RBACAuthorization
+from services.api.serializers.utils_serializers import (
+    LookupContext, check_reference
+)
+from services.api.views_api_resource import GenericCommonResourceMixin
+from services.api.views_resource import RESOURCES
+from services.ipsecenforcer.notification_ipc_client_listener import (
+    IPsecEnforcerNotification
+)
+
+LOG = logging.getLogger(__name__)
+
+# Not in rest_framework.status yet
+HTTP_207_MULTI_STATUS = 207
+
+# Maximum number of items of a bulk or batch request
+BULK_MAX_ITEMS = 1000
+
+# Status of a succeeded item, per HTTP method
+BULK_METHODS = {
+    'POST': HTTP_201_CREATED,
+    'PATCH': HTTP_200_OK,
+    'DELETE': HTTP_204_NO_CONTENT,
+}
+
+# The certificates are uploaded as files, not in bulk
+BULK_RESOURCES = tuple(resource for resource in RESOURCES
+                       if resource not in ('vpncacertificates',
+                                           'vpncertificates'))
+
+
+def error_result(status, errors):
+    return {'status': status, 'errors': errors}
+
+
+class BulkOperation(object):
+    """Create, update or delete an array of items of a resource
+
+    Args:
+        resource_class (Resource): Class of the resource
+        serializer_class (ConsulSerializer): Serializer of the resource
+        method (str): 'POST', 'PATCH' or 'DELETE'
+    """
+
+    def __init__(self, resource_class, serializer_class, method):
+        self.resource_class = resource_class
+        self.serializer_class = serializer_class
+        self.method = method
+
+    def run(self, items):
+        """Validate the items, and write the valid ones together
+
+        Args:
+            items (list): Records to create, records with their primary
+                key to update, or primary keys to delete
+
+        Returns:
+            list: Result(dict) of each item
+        """
+        results = []
+        pending = []
+
+        # The records referenced by the items, and the records to update
+        # or delete, are read together once
+        self.lookup = LookupContext()
+        if self.method == 'DELETE':
+            self.lookup.prefetch(self.resource_class.resource_name,
+                                 [item for item in items
+                                  if isinstance(item, basestring)])
+        else:
+            self.lookup.prefetch_references(self.serializer_class, items)
+        if self.method == 'PATCH':
+            self.lookup.prefetch(
+                    self.resource_class.resource_name,
+                    [item.get(self.resource_class.primary_key)
+                     for item in items if isinstance(item, dict)])
+
+        primary_key = self.resource_class.primary_key
+        pk_values = set()
+
+        for item in items:
+            try:
+                result, prepared = self._prepare(item)
+            except (SerializerValidationError, PKUpdateNotPermitted) as e:
+                errors = (e.detail if isinstance(e.detail, dict) else
+                          {'non_field_errors': e.detail})
+                results.append(error_result(HTTP_400_BAD_REQUEST, errors))
+                continue
+
+            if prepared is not None:
+                # A record is written once, the items of a record would
+                # be built from the same stored record
+                pk_value = str(getattr(prepared[0], primary_key))
+                if pk_value in pk_values:
+                    results.append(error_result(
+                            HTTP_400_BAD_REQUEST,
+                            {primary_key: [_("Duplicate %s %s in the "
+                                             "request.") %
+                                           (primary_key, pk_value)]}))
+                    continue
+                pk_values.add(pk_value)
+                pending.append((result, prepared, item))
+
+            results.append(result)
+
+        if not pending:
+            return results
+
+        try:
+            self._write([resource for result, (resource, serializer), item
+                         in pending])
+        except RuntimeError:
+            LOG.exception(_("Failed to write %d %s records together, "
+                            "writing them one by one") %
+                          (len(pending), self.resource_class.resource_name))
+            pending = self._write_each(pending)
+
+        for result, (resource, serializer), item in pending:
+            result['status'] = BULK_METHODS[self.method]
+            if serializer is None:
+                result['id'] = getattr(resource,
+                                       self.resource_class.primary_key)
+            else:
+                serializer.instance = resource
+                result['data'] = serializer.data
+
+        if self.method != 'POST':
+            self.notify([item for result, prepared, item in pending])
+
+        return results
+
+    def _write(self, resources):
+        """Write the Resource objects together
+
+        Args:
+            resources (list): Resource objects to create, update or
+                delete
+
+        Raises:
+            RuntimeError: If the storage backend fails, some of the
+                records may be written
+        """
+        if self.method == 'DELETE':
+            self.resource_class.delete_all(resources)
+        else:
+            self.resource_class.save_all(resources,
+                                         new=self.method == 'POST')
+
+    def _write_each(self, pending):
+        """Write the Resource objects of the items one by one, the
+        result of an item which fails is set to a 500
+
+        Args:
+            pending (list): (result, (resource, serializer), item) of
+                the valid items
+
+        Returns:
+            list: The written items of pending
+        """
+        written = []
+        for result, prepared, item in pending:
+            try:
+                self._write([prepared[0]])
+            except RuntimeError:
+                result.update(error_result(
+                        HTTP_500_INTERNAL_SERVER_ERROR,
+                        {'detail': _("A server error occurred")}))
+                continue
+            written.append((result, prepared, item))
+
+        return written
+
+    def notify(self, items):
+        """Notify the IPsecEnforcers of the updated or deleted records,
+        as for a request on a single record. The IPsecEnforcer
+        Notification process coalesces the notifications of the items.
+
+        Args:
+            items (list): Written records updates, or primary keys of
+                the deleted records
+        """
+        resource_name = self.resource_class.resource_name
+        primary_key = self.resource_class.primary_key
+
+        for item in items:
+            if self.method == 'DELETE':
+                # The stored record, from before the request
+                record = self.lookup.get_record(resource_name, item)
+                IPsecEnforcerNotification.client(resource_name, record)
+                continue
+
+            record = self.lookup.get_record(resource_name,
+                                            item[primary_key])
+            IPsecEnforcerNotification.client(
+                    resource_name, record,
+                    dict((field, value) for field, value in item.items()
+                         if field != primary_key))
+
+    def _prepare(self, item):
+        """Validate an item and prepare its Resource object
+
+        Args:
+            item: Record, or primary key for a DELETE
+
+        Returns:
+            tuple: Result(dict) of the item, and the Resource object
+                with its serializer(None for a DELETE) to write, or None
+                if the item failed
+
+        Raises:
+            ValidationError: If the item is invalid
+            PKUpdateNotPermitted: When updating the primary key
+        """
+        primary_key = self.resource_class.primary_key
+
+        if self.method == 'POST':
+            if not isinstance(item, dict):
+                raise SerializerValidationError(
+                        {'non_field_errors': [_("Invalid data. Expected a "
+                                                "dictionary.")]})
+            serializer = self.serializer_class(data=item,
+                                               context={primary_key: None,
+                                                        'lookup': self.lookup})
+            if not serializer.is_valid():
+                return error_result(HTTP_400_BAD_REQUEST,
+                                    serializer.errors), None
+
+            resource = serializer.build_resource(serializer.validated_data)
+            return {}, (resource, serializer)
+
+        pk_value = item.get(primary_key) if isinstance(item, dict) else item
+        if not pk_value:
+            raise SerializerValidationError(
+                    {primary_key: [_("This field is required.")]})
+
+        record = self.lookup.get_record(self.resource_class.resource_name,
+                                        pk_value)
+        if record is None:
+            return error_result(
+                    HTTP_404_NOT_FOUND,
+                    {'detail': _("%s with %s %s not found") %
+                     (self.resource_class.resource_name, primary_key,
+                      pk_value)}), None
+
+        resource = self.resource_class(**record)
+        if self.method == 'DELETE':
+            check_reference(self.resource_class.resource_name,
+                            resource.__dict__)
+            return {}, (resource, None)
+
+        serializer = self.serializer_class(resource, data=item, partial=True,
+                                           context={primary_key: pk_value,
+                                                    'lookup': self.lookup})
+        if not serializer.is_valid():
+            return error_result(HTTP_400_BAD_REQUEST,
+                                serializer.errors), None
+
+        resource = serializer.build_updated_resource(
+                resource, dict(serializer.validated_data))
+        return {}, (resource, serializer)
+
+
+def bulk_response(results):
+    """Response of a bulk or batch request
+
+    Args:
+        results (list): Result(dict) of each item
+
+    Returns:
+        Response: 200 if all the items succeed, else 207
+    """
+    succeeded = all(result['status'] in BULK_METHODS.values()
+                    for result in results)
+
+    return Response(results,
+                    status=HTTP_200_OK if succeeded else
+                    HTTP_207_MULTI_STATUS)
+
+
+def get_bulk_items(data):
+    """Check the array of a bulk or batch request
+
+    Args:
+        data: Parsed body of the request
+
+    Returns:
+        list: Items of the request
+
+    Raises:
+        ValidationError: If the body is not an array or too large
+    """
+    if not isinstance(data, list):
+        raise ValidationError(
+                {'non_field_errors': [_("Expected a list of items.")]})
+
+    if len(data) > BULK_MAX_ITEMS:
+        raise ValidationError(
+                {'non_field_errors': [_("At most %d items are allowed.") %
+                                      BULK_MAX_ITEMS]})
+
+    return data
+
+
+class GenericBulkResourceView(GenericCommonResourceMixin, GenericAPIView):
+    """Bulk Create(POST)/Update(PATCH)/Delete(DELETE) for IPsec EMS HTTP
+    resources
+
+    The request is authorized as the same method on the list of the
+    resource.
+    """
+
+    def bulk(self, request, *args, **kwargs):
+        items = get_bulk_items(request.data)
+
+        operation = BulkOperation(self.kwargs['resource_class'],
+                                  self.get_serializer_class(),
+                                  request.method)
+
+        return bulk_response(operation.run(items))
+
+    post = patch = delete = bulk
+
+
+class BatchResourceView(GenericCommonResourceMixin, GenericAPIView):
+    """Create/Update/Delete a batch of IPsec EMS HTTP resources of any
+    type(POST)
+
+    Each operation is authorized as its method on the list of its
+    resource.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        # Not a single resource, see GenericCommonResourceMixin
+        super(GenericCommonResourceMixin, self).initial(request,
+                                                        *args,
+                                                        **kwargs)
+
+    def post(self, request, *args, **kwargs):
+        operations = get_bulk_items(request.data)
+        base_path = request.path[:-len(BATCH_SUFFIX)]
+
+        results = []
+        for (resource, method), group in groupby(operations,
+                                                 self._operation_key):
+            group = list(group)
+
+            if resource not in BULK_RESOURCES or method not in BULK_METHODS:
+                results.extend(
+                        error_result(HTTP_400_BAD_REQUEST,
+                                     {'non_field_errors': [
+                                         _("Invalid resource or method.")]})
+                        for operation in group)
+                continue
+
+            try:
+                self.authorize(request, '%s/%s/' % (base_path, resource),
+                               method)
+            except PermissionDenied as e:
+                results.extend(error_result(HTTP_403_FORBIDDEN,
+                                            {'detail': e.detail})
+                               for operation in group)
+                continue
+
+            resource_class, serializer_class = RESOURCES[resource][1:]
+            operation = BulkOperation(resource_class, serializer_class,
+                                      method)
+            results.extend(operation.run([operation_item.get('data')
+                                          for operation_item in group]))
+
+        return bulk_response(results)
+
+    @staticmethod
+    def authorize(request, endpoint, method):
+        # Authorize with the RBAC authenticator of the request, unless
+        # the request is authenticated otherwise(e.g. forced in tests)
+        for authenticator in request.authenticators:
+            if isinstance(authenticator, RBACAuthorization):
+                authenticator.authorize(request, endpoint, method)
+
+    @staticmethod
+    def _operation_key(operation):
+        if not isinstance(operation, dict):
+            return None, None
+
+        return operation.get('resource'), operation.get('method')
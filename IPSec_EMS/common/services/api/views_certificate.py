@@ -23,8 +23,10 @@ from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
 from services.api.exceptions import ResourceNotFound, PKUpdateNotPermitted
-from services.api.serializers.utils_serializers import pop_key, pop_keys
-from services.api.views_utils import get_resource_from_path
+from services.api.serializers.utils_serializers import pop_key
+from services.api.views_utils import (
+    get_resource_from_path, streaming_list_response
+)
 from services.api.views_resource import RESOURCES
 
 
@@ -52,6 +54,18 @@ def resource(request, version, namespace, pk='None'):
     resource_class = RESOURCES[uri_resource_name][1]
     resource_serializer = RESOURCES[uri_resource_name][2]
 
+    # List all records, streamed a page at a time
+    if request.method == 'GET' and pk == 'None':
+        serializer = resource_serializer()
+
+        def serialize(resource):
+            record = serializer.to_representation(resource)
+            pop_key(record)
+            return record
+
+        return streaming_list_response(resource_class.select_pages(),
+                                       serialize)
+
     # Retrieve record(s) to be used by later operations(except POST)
     # pk = 'None' means retrieve all records
     if request.method != 'POST':
@@ -62,13 +76,6 @@ def resource(request, version, namespace, pk='None'):
             raise NotFound(detail=("Resource {0} with id {1} not "
                                    "found").format(resource_name, pk))
 
-    # List all records
-    if request.method == 'GET' and pk == 'None':
-        serializer = resource_serializer(record, many=True)
-        pop_keys(serializer.data)
-        return Response(serializer.data,
-                        status=status.HTTP_200_OK)
-
     # List the record with id 'pk'
     if request.method == 'GET':
         serializer = resource_serializer(record)
@@ -13,7 +13,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import threading
+
+from django.conf import settings
 from django.http import HttpResponse
+from django.utils.http import parse_etags, quote_etag
 from rest_framework.decorators import api_view
 from rest_framework.decorators import renderer_classes
 from rest_framework.exceptions import NotFound, status
@@ -25,6 +29,9 @@ from services.api.exceptions import ResourceNotFound
 from services.api.serializers.serializers_enforcer_registration import (
     IPsecEnforcerRegistration, IPsecEnforcerRegistrationSerializer
 )
+from services.ipsecenforcer.health_check_process import (
+    IPsecEnforcerHealthCheck
+)
 from services.ipsecenforcer.notification_ipc_client_listener import (
     IPsecEnforcerNotification
 )
@@ -34,6 +41,45 @@ from services.ipsecenforcer.prepare_vpn_configuration import (
 from services.ipsecenforcer.register_deregister import IPsecEnforcerInfo
 
 
+# Wait time(seconds) of the blocking GET of the configuration, by default
+# and at most. Each waiting request holds a web server thread, see
+# LONG_POLL_MAX_WAITERS in the settings.
+LONG_POLL_WAIT = 60
+LONG_POLL_MAX_WAIT = settings.LONG_POLL_MAX_WAIT
+
+# Waiting requests of this process, at most LONG_POLL_MAX_WAITERS. The
+# requests above are told to retry after LONG_POLL_RETRY_AFTER seconds.
+LONG_POLL_WAITERS = threading.BoundedSemaphore(
+        settings.LONG_POLL_MAX_WAITERS)
+LONG_POLL_RETRY_AFTER = 10
+
+
+def parse_wait(value):
+    """Parse the wait time of a blocking request, in the Consul format
+
+    Args:
+        value (str): wait time in seconds('60s' or '60') or
+            minutes('5m'), or None for the default wait time
+
+    Returns:
+        int: wait time(seconds), at most LONG_POLL_MAX_WAIT
+        None: if the wait time is invalid
+    """
+    if value is None:
+        return min(LONG_POLL_WAIT, LONG_POLL_MAX_WAIT)
+
+    multiplier = 1
+    if value.endswith('m'):
+        value, multiplier = value[:-1], 60
+    elif value.endswith('s'):
+        value = value[:-1]
+
+    if not value.isdigit():
+        return None
+
+    return min(int(value) * multiplier, LONG_POLL_MAX_WAIT)
+
+
 @api_view(['GET', 'POST', 'DELETE'])
 @renderer_classes((JSONRenderer,))
 def ipsec_enforcer_registration(request, version, namespace, pk='None'):
@@ -64,8 +110,67 @@ def ipsec_enforcer_registration(request, version, namespace, pk='None'):
 
     # Get the record with id 'pk'
     if request.method == 'GET':
-        policy = IPsecEnforcerConfig().prepare_ipsec_enforcer_config(pk)
-        return Response(policy, status=status.HTTP_200_OK)
+        # The IPsecEnforcer passes its installed config version to get
+        # only the changes since that version
+        base_version = request.query_params.get('version')
+
+        if base_version is not None and not base_version.isdigit():
+            return Response({'version': ["A valid integer is required."]},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # Blocking mode: the response is delayed until the config
+        # version is newer than the index, or the wait time elapses
+        index = request.query_params.get('index')
+
+        if index is not None:
+            if not index.isdigit():
+                return Response({'index': ["A valid integer is required."]},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            wait = parse_wait(request.query_params.get('wait'))
+            if wait is None:
+                return Response({'wait': ["A valid duration is required, "
+                                          "e.g. 60s or 5m."]},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            if not LONG_POLL_WAITERS.acquire(False):
+                return Response(
+                        {'detail': "Too many blocking requests, retry "
+                                   "later."},
+                        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        headers={'Retry-After': str(LONG_POLL_RETRY_AFTER)})
+            try:
+                IPsecEnforcerInfo.wait_ipsecenforcer_config_version(
+                        pk, int(index), wait)
+            finally:
+                LONG_POLL_WAITERS.release()
+
+            if base_version is None:
+                base_version = index
+
+        ipsecenforcer_config = IPsecEnforcerConfig()
+
+        if base_version is None:
+            policy = ipsecenforcer_config.prepare_ipsec_enforcer_config(pk)
+        else:
+            policy = ipsecenforcer_config.prepare_ipsec_enforcer_config_delta(
+                    pk, int(base_version))
+
+        if ipsecenforcer_config.config_hash is None:
+            return Response(policy, status=status.HTTP_200_OK)
+
+        # The configuration is identified by its hash, an IPsecEnforcer
+        # with the same configuration gets no body
+        etag = quote_etag(ipsecenforcer_config.config_hash)
+        if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+
+        if (ipsecenforcer_config.config_hash in if_none_match or
+                '*' in if_none_match):
+            return Response(status=status.HTTP_304_NOT_MODIFIED,
+                            headers={'ETag': etag})
+
+        return Response(policy, status=status.HTTP_200_OK,
+                        headers={'ETag': etag})
 
     # Create and store a record
     if request.method == 'POST':
@@ -98,9 +203,48 @@ def ipsec_enforcer_registration(request, version, namespace, pk='None'):
 
         # Delete the record
         record.delete()
+        IPsecEnforcerHealthCheck.client_deregister(record.id)
 
         # Notify the peer IPsecEnforcer(s)
         IPsecEnforcerNotification.client_ipsecenforcer_deregister(
                     record.id,
                     mapping_records)
         return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+
+
+@api_view(['POST'])
+@renderer_classes((JSONRenderer,))
+def ipsec_enforcer_heartbeat(request, version, namespace, pk):
+    """Receive a heartbeat of the IPsecEnforcer.
+
+    The IPsecEnforcer may send its installed config version in the body,
+    e.g. {"config_version": 3}.
+
+    Args:
+        version (str): API version
+        namespace (str): Tenant name
+        request (HttpRequest): Complete HTTP request with header and
+            body
+        pk (str): Primary Key of IPsecEnforcer record
+
+    Returns:
+        HTTPResponse with no content if the installed config version is
+        the current config version, otherwise with the current config
+        version e.g. {"config_version": 4}.
+    """
+    if IPsecEnforcerRegistration.get(id=pk) is None:
+        raise NotFound(detail=("Resource {0} with id {1} not "
+                               "found").format(IPsecEnforcerRegistration,
+                                               pk))
+
+    IPsecEnforcerHealthCheck.client_heartbeat(pk)
+
+    installed_version = request.data.get('config_version')
+    config_version = IPsecEnforcerInfo.get_ipsecenforcer_config_version(pk)
+    current_version = config_version['version'] if config_version else 0
+
+    if installed_version == current_version:
+        return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+
+    return Response({'config_version': current_version},
+                    status=status.HTTP_200_OK)
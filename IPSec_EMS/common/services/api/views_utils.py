@@ -15,10 +15,19 @@
 
 from __future__ import unicode_literals
 
+from django.http import StreamingHttpResponse
+from django.utils.translation import ugettext as _
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.status import HTTP_200_OK
+
 from services.api.views_resource import RESOURCES
 
 DELIMITER = '_'
 
+# Query parameters of a list, other than the filters
+LIST_PARAMETERS = ('limit', 'marker', 'sort_key', 'sort_dir', 'fields')
+
 
 def get_resource_info(url_name, **path_kwargs):
     """Get the RBAC Resource and Project information from URI and path
@@ -85,3 +94,102 @@ def get_resource_from_path(request):
     return request.get_full_path().decode('unicode-escape').encode(
             'utf8').rsplit('/')[4]
 
+
+def get_list_options(query_params, resource_class, field_names):
+    """Get the options of a list of resources from the query parameters
+
+    e.g. ?limit=100&marker=<id>&sort_key=name&sort_dir=desc&fields=id
+    &fields=name&name=ike_1
+
+    A query parameter named after a secondary key of the resource is an
+    equality filter.
+
+    Args:
+        query_params (QueryDict): Query parameters of the request
+        resource_class (Resource): Class of the resource
+        field_names (list): Field names of the resource serializer
+
+    Returns:
+        tuple: keyword arguments of Resource.select(), and the projected
+            field names(None for all the fields)
+
+    Raises:
+        ValidationError: If a query parameter is invalid
+    """
+    options = {}
+
+    limit = query_params.get('limit')
+    if limit is not None:
+        if not limit.isdigit() or int(limit) == 0:
+            raise ValidationError(
+                    {'limit': [_("A valid positive integer is required.")]})
+        options['limit'] = int(limit)
+
+    options['marker'] = query_params.get('marker')
+
+    sort_key = query_params.get('sort_key')
+    if sort_key is not None:
+        if (sort_key != resource_class.primary_key and
+                sort_key not in resource_class.secondary_keys):
+            raise ValidationError(
+                    {'sort_key': [_("Sorting by %s is not supported.") %
+                                  sort_key]})
+        options['sort_key'] = sort_key
+
+    sort_dir = query_params.get('sort_dir', 'asc')
+    if sort_dir not in ('asc', 'desc'):
+        raise ValidationError(
+                {'sort_dir': [_("A valid choice is required, asc or "
+                                "desc.")]})
+    options['sort_dir'] = sort_dir
+
+    filters = {}
+    for name, value in query_params.iteritems():
+        if name in LIST_PARAMETERS:
+            continue
+        if name in resource_class.secondary_keys:
+            filters[name] = value
+        elif name in field_names:
+            raise ValidationError(
+                    {name: [_("Filtering by %s is not supported.") % name]})
+    options['filters'] = filters
+
+    fields = None
+    if 'fields' in query_params:
+        fields = [field for value in query_params.getlist('fields')
+                  for field in value.split(',') if field]
+        unknown_fields = set(fields) - set(field_names)
+        if unknown_fields:
+            raise ValidationError(
+                    {'fields': [_("Unknown field(s) %s.") %
+                                ', '.join(sorted(unknown_fields))]})
+
+    return options, fields
+
+
+def streaming_list_response(pages, serialize):
+    """Response streaming a list of resources as a JSON array, one
+    record at a time
+
+    Args:
+        pages (iterable): Pages(list) of Resource objects, e.g. from
+            Resource.select_pages()
+        serialize (callable): Record(dict) to render of a Resource
+            object
+
+    Returns:
+        StreamingHttpResponse: JSON array of the records
+    """
+    def render():
+        renderer = JSONRenderer()
+        separator = b'['
+        for page in pages:
+            for resource in page:
+                yield separator + renderer.render(serialize(resource))
+                separator = b','
+
+        yield b'[]' if separator == b'[' else b']'
+
+    return StreamingHttpResponse(render(),
+                                 status=HTTP_200_OK,
+                                 content_type='application/json')
@@ -0,0 +1,195 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Snapshots of the IPsecEnforcer VPN configuration, for computing the
+configuration changes since a version known to the IPsecEnforcer"""
+
+import hashlib
+import json
+import logging
+
+from django.utils.translation import ugettext as _
+
+from services.api import storage
+from services.api.serializers.vpn_choices import RESOURCE_TO_RELATION_MAP
+from services.ipsecenforcer.utils import consul_key_join
+
+LOG = logging.getLogger(__name__)
+
+RELATION_IPSECENFORCER_CONFIG_SNAPSHOT = (
+    RESOURCE_TO_RELATION_MAP['IPsecEnforcerConfigSnapshot']
+)
+
+# Number of config versions of an IPsecEnforcer kept for computing the
+# configuration changes
+CONFIG_SNAPSHOT_HISTORY = 5
+
+
+def entry_digest(entry):
+    """Compute the digest of a configuration entry
+
+    Args:
+        entry: entry of a configuration section(dict, list or str)
+
+    Returns:
+        str: SHA-1 of the entry in canonical JSON format
+    """
+    return hashlib.sha1(json.dumps(entry, sort_keys=True)).hexdigest()
+
+
+def config_digests(config):
+    """Compute the digests of all entries of the configuration
+
+    Args:
+        config (dict): IPsecEnforcer VPN configuration
+
+    Returns:
+        dict: section name as key and dict of entry id to entry digest
+            as value
+    """
+    return dict((section, dict((_id, entry_digest(entry))
+                               for _id, entry in entries.iteritems()))
+                for section, entries in config.iteritems()
+                if section != 'version')
+
+
+def config_hash(digests):
+    """Compute the hash of the configuration, which is independent of
+    the order of the sections and entries
+
+    Args:
+        digests (dict): digests of the configuration, as returned by
+            config_digests()
+
+    Returns:
+        str: SHA-1 of the configuration
+    """
+    return entry_digest(digests)
+
+
+def config_delta(base_digests, config, digests=None):
+    """Compute the configuration changes since a snapshot
+
+    Only the sections with changes are included in the result.
+
+    Args:
+        base_digests (dict): digests of the snapshot, as returned by
+            config_digests()
+        config (dict): current IPsecEnforcer VPN configuration
+        digests (dict): digests of the current configuration, to not
+            compute them again(optional)
+
+    Returns:
+        dict: 'added' and 'changed' entries(section to dict of entry id
+            to entry) and 'removed' entry ids(section to list of entry
+            id)
+    """
+    added = {}
+    changed = {}
+    removed = {}
+
+    for section, entries in config.iteritems():
+        if section == 'version':
+            continue
+
+        base_entries = base_digests.get(section, {})
+        section_digests = digests.get(section, {}) if digests else {}
+
+        for _id, entry in entries.iteritems():
+            base_digest = base_entries.get(_id)
+            if base_digest is None:
+                added.setdefault(section, {})[_id] = entry
+            elif base_digest != (section_digests.get(_id) or
+                                 entry_digest(entry)):
+                changed.setdefault(section, {})[_id] = entry
+
+        removed_ids = [_id for _id in base_entries if _id not in entries]
+        if removed_ids:
+            removed[section] = sorted(removed_ids)
+
+    return dict(added=added, changed=changed, removed=removed)
+
+
+class IPsecEnforcerConfigSnapshot(object):
+    """Store the entry digests of the configuration versions of an
+    IPsecEnforcer
+
+    Only the digests are stored, the added and changed entries of a
+    delta are taken from the current configuration. The last
+    CONFIG_SNAPSHOT_HISTORY versions are kept.
+    """
+
+    @staticmethod
+    def _get_key(ipsecenforcer_id, config_version):
+        return consul_key_join(RELATION_IPSECENFORCER_CONFIG_SNAPSHOT,
+                               ipsecenforcer_id,
+                               str(config_version))
+
+    @classmethod
+    def put_snapshot(cls, ipsecenforcer_id, config_version, digests):
+        """Store the snapshot of a config version and drop the snapshot
+        out of the history
+
+        Args:
+            ipsecenforcer_id (str): id of IPsecEnforcer
+            config_version (int): version of the configuration
+            digests (dict): digests of the configuration, as returned
+                by config_digests()
+        """
+        storage.plugin.put_kv(cls._get_key(ipsecenforcer_id, config_version),
+                              json.dumps(digests))
+
+        # Config versions are incremented by 1
+        expired_version = int(config_version) - CONFIG_SNAPSHOT_HISTORY
+        if expired_version > 0:
+            storage.plugin.delete_kv(cls._get_key(ipsecenforcer_id,
+                                                  expired_version))
+
+        LOG.debug(_("Stored config snapshot of IPsecEnforcer id %s and "
+                    "config version %s" % (ipsecenforcer_id, config_version)))
+
+    @classmethod
+    def get_snapshot(cls, ipsecenforcer_id, config_version):
+        """Fetch the snapshot of a config version
+
+        Args:
+            ipsecenforcer_id (str): id of IPsecEnforcer
+            config_version (int): version of the configuration
+
+        Returns:
+            dict: entry digests, as returned by config_digests()
+            None: if the snapshot is not in the history
+        """
+        value = storage.plugin.get_kv(cls._get_key(ipsecenforcer_id,
+                                                   config_version))
+        if value is None:
+            return None
+
+        return json.loads(value)
+
+    @staticmethod
+    def delete_snapshots(ipsecenforcer_id):
+        """Delete all the snapshots of the IPsecEnforcer
+
+        Args:
+            ipsecenforcer_id (str): id of IPsecEnforcer
+        """
+        key_prefix = consul_key_join(RELATION_IPSECENFORCER_CONFIG_SNAPSHOT,
+                                     ipsecenforcer_id) + '/'
+
+        storage.plugin.delete_kv(key_prefix, recurse=True)
+
+        LOG.info(_("Deleted config snapshots of IPsecEnforcer id %s" %
+                   ipsecenforcer_id))
@@ -34,10 +34,13 @@ This process is started in the IPsec EMS startup script.
 
 import httplib as http_status_code
 import logging
-from multiprocessing import Pool
-from time import sleep
+from multiprocessing.pool import ThreadPool
+import socket
+import threading
+import time
 
 import requests
+from requests.adapters import HTTPAdapter
 from django.utils.translation import ugettext as _
 
 from services.api import storage
@@ -45,6 +48,7 @@ from services.api.serializers.serializers_enforcer_registration import (
     IPsecEnforcerRegistration
 )
 from services.api.serializers.vpn_choices import RESOURCE_TO_RELATION_MAP
+from services.ipsecenforcer.heartbeat_expiry import HeartbeatExpiry
 from services.ipsecenforcer.notification_ipc_client_listener import (
     IPsecEnforcerNotification
 )
@@ -59,10 +63,31 @@ LOG = logging.getLogger(__name__)
 # message to all the IPsec Enforcers.
 HEALTH_CHECK_DURATION = 60  # in seconds
 
+# Maximum number of heartbeat messages in flight
+HEALTH_CHECK_CONCURRENCY = 100
+
+# Connect and read timeouts(in seconds) of a heartbeat message. An
+# IPsec Enforcer not responding within the timeouts misses the heartbeat.
+HEALTH_CHECK_TIMEOUT = (2, 5)
+
+# Interval(in seconds) between the checkpoints of the heartbeat miss
+# counts and the heartbeat expiry times. The counts are also stored when an
+# IPsecEnforcer starts or stops missing the heartbeat, or is de-registered.
+HEALTH_CHECK_CHECKPOINT_INTERVAL = 600
+
 # Number of count before de-registering(deleting) the IPsecEnforcer
 # record(and related info.)
 BACKOFF_COUNT = 10
 
+# Seconds from the last heartbeat sent by an IPsecEnforcer to its
+# de-registration, the same as for the heartbeat messages sent to it
+HEARTBEAT_TTL = BACKOFF_COUNT * HEALTH_CHECK_DURATION
+
+# Timeout(in seconds) of the web service connecting and sending a message
+# to the heartbeat listener. The heartbeat is dropped rather than holding
+# the HTTP request when the Health check process is down.
+HEARTBEAT_LISTENER_TIMEOUT = 0.5
+
 # REST endpoint provided by IPsec Enforcer just for health checking
 healthcheck_rest_endpoint = 'heartbeat'
 
@@ -77,118 +102,336 @@ class IPsecEnforcerHealthCheck(object):
     The IPsecEnforcer could become unreachable if the IPsecEnforcer
     service on workload(VM) crashes. Or the workload(VM) shuts down,
     reboots or becomes unreachable.
+
+    The heartbeat messages are sent by a pool of threads sharing a HTTP
+    session, which keeps the connections to the IPsecEnforcers alive
+    between the health checks.
+
+    The IPsecEnforcers sending heartbeats to IPsec EMS(e.g. behind a
+    NAT) are not sent heartbeat messages. The web service forwards their
+    heartbeats to the Health check process, which de-registers an
+    IPsecEnforcer HEARTBEAT_TTL seconds after its last heartbeat. The
+    messages to the heartbeat listener are lines of an action and an
+    IPsecEnforcer id, e.g. 'heartbeat <id>' or 'deregister <id>'.
+
+    The heartbeat miss counts and the heartbeat expiry times are kept in
+    memory. They are stored on the transitions of an
+    IPsecEnforcer(reachable, missing the heartbeat, de-registered) and at
+    every HEALTH_CHECK_CHECKPOINT_INTERVAL, and loaded at start e.g. after
+    a restart. So, the count of an IPsecEnforcer missing the heartbeat
+    may restart from the last checkpoint. The heartbeats sent while the
+    Health check process is down are dropped, so the expiry times are
+    moved ahead by the time since the checkpoint.
     """
 
-    @staticmethod
-    def start():
+    #
+    # Heartbeat listener socket information
+    #
+    process_fqdn = 'localhost'
+    process_port = 8083
+
+    def __init__(self, concurrency=HEALTH_CHECK_CONCURRENCY,
+                 timeout=HEALTH_CHECK_TIMEOUT):
+        """
+        Args:
+            concurrency (int): maximum number of heartbeat messages in
+                flight
+            timeout (tuple): connect and read timeouts(in seconds) of a
+                heartbeat message
+        """
+        self.timeout = timeout
+        self.expiry = HeartbeatExpiry(HEARTBEAT_TTL,
+                                      self.deregister_ipsecenforcer)
+
+        # Heartbeat miss counts and heartbeat expiry times, loaded at
+        # start or on the first health check, and the last stored ones
+        self.counts = None
+        self.stored_counts = None
+        self.stored_expiry_times = None
+        self.checkpoint_time = 0
+        self.pool = ThreadPool(concurrency)
+
+        # One connection per IPsecEnforcer is enough, as each
+        # IPsecEnforcer receives one heartbeat message at a time
+        adapter = HTTPAdapter(pool_connections=concurrency,
+                              pool_maxsize=concurrency)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+
+    def start(self):
         """Start the IPsecEnforcer Health check
 
         The Health check process periodically awakes and checks the
         health of IPsecEnforcer(s)
         """
         LOG.info(_("Starting Health Check Process"))
-        p = Pool(2)
+
+        self.load()
+        self.expiry.start()
+        listener = threading.Thread(target=self.listener,
+                                    name='heartbeat-listener')
+        listener.daemon = True
+        listener.start()
+
+        try:
+            self._run()
+        finally:
+            # Keep the counts for the next Health check process
+            self.checkpoint()
+
+    def _run(self):
         while True:
+            start_time = time.time()
+
             relation = RESOURCE_TO_RELATION_MAP['IPsecEnforcerRegistration']
             ipsecenforcers = storage.plugin.get_records(relation)
 
-            # Prepare a list of IPsecEnforcer 'fqdn' & 'id' tuple
+            # Prepare a list of IPsecEnforcer 'fqdn' & 'id' tuple, of the
+            # IPsecEnforcers not sending heartbeats
             fqdn_enforcer_list = [(ipsecenforcer['fqdn'], ipsecenforcer['id'])
-                                  for ipsecenforcer in ipsecenforcers]
+                                  for ipsecenforcer in ipsecenforcers
+                                  if ipsecenforcer['id'] not in self.expiry]
 
             # If the list is not empty
             if fqdn_enforcer_list:
                 # Check the health all the IPsecEnforcer
-                p.map(check_ipsecenforcer_health, fqdn_enforcer_list)
+                self.check_ipsecenforcers_health(fqdn_enforcer_list)
+
+            # The heartbeat expiry times change without a health check
+            if (time.time() - self.checkpoint_time >=
+                    HEALTH_CHECK_CHECKPOINT_INTERVAL):
+                self.checkpoint()
+
+            elapsed = time.time() - start_time
+            if elapsed > HEALTH_CHECK_DURATION:
+                LOG.warning(_("Health Check of %d IPsecEnforcer(s) took "
+                              "%.1f seconds" %
+                              (len(fqdn_enforcer_list), elapsed)))
 
             # Wait before again checking the IPsecEnforcer(s) health
             LOG.debug(_("Health Check Process sleeping"))
-            sleep(HEALTH_CHECK_DURATION)
+            time.sleep(max(HEALTH_CHECK_DURATION - elapsed, 0))
             LOG.debug(_("Health Check Process awakened"))
 
+    def check_ipsecenforcers_health(self, fqdn_enforcer_list):
+        """Check health of the IPsecEnforcers, and de-register the
+        IPsecEnforcers which missed BACKOFF_COUNT heartbeats in a row
 
-def check_ipsecenforcer_health(fqdn_enforcer):
-    """Check health of IPsecEnforcer by sending a HTTP request.
+        Args:
+            fqdn_enforcer_list (list): IPsecEnforcers' FQDN and id tuples
 
-    Args:
-        fqdn_enforcer (tuple): IPsecEnforcer's FQDN and id
-    """
+        Returns:
+            dict: Heartbeat Miss count per IPsecEnforcer id, of the
+                unreachable IPsecEnforcers which are not de-registered
+        """
+        reachable = self.pool.map(self.send_heartbeat, fqdn_enforcer_list,
+                                  chunksize=1)
+
+        if self.counts is None:
+            self.load()
+        counts = self.counts
+
+        # The count of a reachable IPsecEnforcer is reset by leaving it
+        # out of the updated counts
+        updated_counts = {}
+        backoff_list = []
+        for (fqdn, ipsecenforcer_id), success in zip(fqdn_enforcer_list,
+                                                     reachable):
+            if success:
+                continue
+
+            count = counts.get(ipsecenforcer_id, 0)
+
+            # Delete the IPsecEnforcer (and related info.) if the count
+            # becomes equal to BACKOFF_COUNT
+            if count >= BACKOFF_COUNT:
+                LOG.debug(_("Heartbeat Miss count equals to backoff count "
+                            "%s for IPsecEnforcer id %s with FQDN %s" %
+                            (count, ipsecenforcer_id, fqdn)))
+                backoff_list.append(ipsecenforcer_id)
+            else:
+                LOG.debug(_("Heartbeat Miss count %s for IPsecEnforcer id "
+                            "%s with FQDN %s" %
+                            (count + 1, ipsecenforcer_id, fqdn)))
+                updated_counts[ipsecenforcer_id] = count + 1
+
+        self.counts = updated_counts
+
+        # Store the counts when the set of IPsecEnforcers missing the
+        # heartbeat changes, otherwise when the checkpoint is due
+        if (set(updated_counts) != set(counts) or
+                time.time() - self.checkpoint_time >=
+                HEALTH_CHECK_CHECKPOINT_INTERVAL):
+            self.checkpoint()
+
+        for ipsecenforcer_id in backoff_list:
+            self.deregister_ipsecenforcer(ipsecenforcer_id)
+
+        LOG.debug(_("Health Check of %d IPsecEnforcer(s): %d unreachable, "
+                    "%d de-registered" %
+                    (len(fqdn_enforcer_list), len(updated_counts),
+                     len(backoff_list))))
+
+        return updated_counts
+
+    def load(self):
+        """Load the heartbeat miss counts and resume the expiry of the
+        heartbeats, from the last checkpoint"""
+        checkpoint = HeartbeatMissOfIPsecEnforcer.get_heartbeat_checkpoint()
+        self.counts = self.stored_counts = checkpoint['counts']
+        self.stored_expiry_times = checkpoint['expiry_times']
+
+        # Give back the time the heartbeats could not be received
+        downtime = 0
+        if checkpoint['time'] is not None:
+            downtime = max(time.time() - checkpoint['time'], 0)
+
+        self.expiry.restore(
+                dict((ipsecenforcer_id, expiry_time + downtime)
+                     for ipsecenforcer_id, expiry_time
+                     in self.stored_expiry_times.items()))
+
+    def checkpoint(self):
+        """Store the heartbeat miss counts and the heartbeat expiry times,
+        if they changed since they were last stored"""
+        if self.counts is not None:
+            expiry_times = self.expiry.expiry_times()
+            if (self.counts != self.stored_counts or
+                    expiry_times != self.stored_expiry_times):
+                HeartbeatMissOfIPsecEnforcer.put_heartbeat_miss_counts(
+                        self.counts, expiry_times)
+                self.stored_counts = self.counts
+                self.stored_expiry_times = expiry_times
+
+        self.checkpoint_time = time.time()
+
+    def send_heartbeat(self, fqdn_enforcer):
+        """Check health of IPsecEnforcer by sending a HTTP request.
+
+        Args:
+            fqdn_enforcer (tuple): IPsecEnforcer's FQDN and id
+
+        Returns:
+            bool: True if the IPsecEnforcer is reachable
+        """
+        fqdn, ipsecenforcer_id = fqdn_enforcer
+        try:
+            response = self.session.get(
+                    IPsecEnforcerNotify.prepare_url(
+                            fqdn,
+                            ipsecenforcer_id,
+                            url_endpoint=healthcheck_rest_endpoint),
+                    timeout=self.timeout)
+        except requests.exceptions.RequestException:
+            return False
+
+        if response.status_code != http_status_code.OK:
+            return False
 
-    fqdn = fqdn_enforcer[0]
-    ipsecenforcer_id = fqdn_enforcer[1]
-    response = None
-    try:
-        response = requests.get(IPsecEnforcerNotify.prepare_url(
-                fqdn,
-                ipsecenforcer_id,
-                url_endpoint=healthcheck_rest_endpoint))
         LOG.debug(_("Healthcheck success for IPsecEnforcer id %s "
                     "with FQDN %s" % (ipsecenforcer_id, fqdn)))
-    except requests.exceptions.ConnectionError:
-            pass
+        return True
 
-    #
-    # Health Check Failure
-    #
-    if (response is None) or (response.status_code != http_status_code.OK):
-        count = HeartbeatMissOfIPsecEnforcer().get_heartbeat_miss_count(
-                        ipsecenforcer_id,
-                        fqdn)
-
-        # Health Check failure for the first time
-        if count == 0:
-            LOG.debug(_("First Heartbeat Miss for IPsecEnforcer id %s "
-                        "with FQDN %s" % (ipsecenforcer_id, fqdn)))
-            # Initialize with count 1
-            HeartbeatMissOfIPsecEnforcer().put_heartbeat_miss_count(
-                    ipsecenforcer_id,
-                    fqdn,
-                    1)
-
-        # Increment the count every time the health check fails
-        elif count < BACKOFF_COUNT:
-            LOG.debug(_("Heartbeat Miss count %s for IPsecEnforcer id "
-                        "%s with FQDN %s" %
-                        (count, ipsecenforcer_id, fqdn)))
-            HeartbeatMissOfIPsecEnforcer().put_heartbeat_miss_count(
-                    ipsecenforcer_id,
-                    fqdn,
-                    count + 1)
-
-        # Delete the IPsecEnforcer (and related info.) if the count
-        # becomes equal to BACKOFF_COUNT
-        elif count == BACKOFF_COUNT:
-            LOG.debug(_("Heartbeat Miss count equals to backoff count "
-                        "%s for IPsecEnforcer id %s with FQDN %s" %
-                        (count, ipsecenforcer_id, fqdn)))
-
-            # Before De-Registration(deletion), fetch all the
-            # VPNEndpoint(s) associated with IPsecEnforcer.
-            mapping_records = (
-                IPsecEnforcerInfo.get_ipsecenforcer_to_vpnendpoint_map(
-                    ipsecenforcer_id)
-            )
-
-            # De-Register the IPsecEnforcer
-            ipsecenforcer_record = IPsecEnforcerRegistration.get(
-                    id=ipsecenforcer_id)
-            IPsecEnforcerInfo().deregister_ipsecenforcer(
-                    ipsecenforcer_record)
-
-            # Notify the peer IPsecEnforcer(s)
-            IPsecEnforcerNotification.client_ipsecenforcer_deregister(
-                ipsecenforcer_id,
-                mapping_records)
+    def listener(self):
+        """Listener for the heartbeats sent by the IPsecEnforcers, and
+        their de-registrations, forwarded by the web service"""
+        heartbeat_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        heartbeat_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        heartbeat_socket.bind((self.process_fqdn, self.process_port))
+        heartbeat_socket.listen(socket.SOMAXCONN)
 
-    #
-    # Health Check Success
-    #
-    # Initialize or Reset the heartbeat count to 0 if the
-    # IPsecEnforcer is reachable
-    if (response is not None) and (response.status_code == http_status_code.OK):
-        HeartbeatMissOfIPsecEnforcer().put_heartbeat_miss_count(
-                ipsecenforcer_id,
-                fqdn,
-                0)
-        LOG.debug(_("Heartbeat miss count reset for IPsecEnforcer id "
-                    "%s with FQDN %s" % (ipsecenforcer_id, fqdn)))
\ No newline at end of file
+        while True:
+            conn, _address = heartbeat_socket.accept()
+            conn.settimeout(HEARTBEAT_LISTENER_TIMEOUT)
+            try:
+                message = conn.makefile('rb').readline()
+            except socket.error:
+                continue
+            finally:
+                conn.close()
+
+            try:
+                action, ipsecenforcer_id = message.split()
+            except ValueError:
+                LOG.warning(_("Invalid heartbeat listener message %r" %
+                              message))
+                continue
+
+            if action == 'heartbeat':
+                self.expiry.heartbeat(ipsecenforcer_id)
+            elif action == 'deregister':
+                self.expiry.discard(ipsecenforcer_id)
+
+    @classmethod
+    def _client_send(cls, action, ipsecenforcer_id):
+        """Send a message to the heartbeat listener, without waiting
+        more than HEARTBEAT_LISTENER_TIMEOUT seconds
+
+        Args:
+            action (str): 'heartbeat' or 'deregister'
+            ipsecenforcer_id (str): id of IPsecEnforcer
+        """
+        try:
+            client = socket.create_connection(
+                    (cls.process_fqdn, cls.process_port),
+                    timeout=HEARTBEAT_LISTENER_TIMEOUT)
+        except socket.error:
+            LOG.error(_("Health Check Process is unreachable"))
+            return
+
+        try:
+            client.sendall(('%s %s\n' % (action, ipsecenforcer_id))
+                           .encode('utf-8'))
+        except socket.error:
+            return
+        finally:
+            client.close()
+
+    @classmethod
+    def client_heartbeat(cls, ipsecenforcer_id):
+        """Client for the heartbeat sent by an IPsecEnforcer
+
+        Args:
+            ipsecenforcer_id (str): id of IPsecEnforcer
+        """
+        cls._client_send('heartbeat', ipsecenforcer_id)
+
+    @classmethod
+    def client_deregister(cls, ipsecenforcer_id):
+        """Client for the de-registration of an IPsecEnforcer, which
+        stops the expiry of its heartbeats
+
+        Args:
+            ipsecenforcer_id (str): id of IPsecEnforcer
+        """
+        cls._client_send('deregister', ipsecenforcer_id)
+
+    def deregister_ipsecenforcer(self, ipsecenforcer_id):
+        """De-Register the IPsecEnforcer and notify its peers
+
+        Args:
+            ipsecenforcer_id (str): id of IPsecEnforcer
+        """
+        self.expiry.discard(ipsecenforcer_id)
+
+        # Before De-Registration(deletion), fetch all the
+        # VPNEndpoint(s) associated with IPsecEnforcer.
+        mapping_records = (
+            IPsecEnforcerInfo.get_ipsecenforcer_to_vpnendpoint_map(
+                ipsecenforcer_id)
+        )
+
+        # De-Register the IPsecEnforcer, unless it is already
+        # de-registered
+        ipsecenforcer_record = IPsecEnforcerRegistration.get(
+                id=ipsecenforcer_id)
+        if ipsecenforcer_record is None:
+            return
+
+        IPsecEnforcerInfo().deregister_ipsecenforcer(
+                ipsecenforcer_record)
+
+        # Notify the peer IPsecEnforcer(s)
+        IPsecEnforcerNotification.client_ipsecenforcer_deregister(
+            ipsecenforcer_id,
+            mapping_records)
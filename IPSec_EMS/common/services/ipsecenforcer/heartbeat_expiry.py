@@ -0,0 +1,169 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Expiry of the heartbeats sent by the IPsecEnforcers"""
+
+import heapq
+import logging
+import threading
+import time
+
+from django.utils.translation import ugettext as _
+
+LOG = logging.getLogger(__name__)
+
+
+class HeartbeatExpiry(object):
+    """TTL scheduler of the IPsecEnforcer heartbeats
+
+    Every heartbeat moves the expiry time of the IPsecEnforcer TTL
+    seconds ahead. The expiry times are kept in a heap, where the entry
+    of a previous heartbeat is left in place and skipped when it is
+    popped, so a heartbeat costs O(log n).
+
+    Usage:
+        expiry = HeartbeatExpiry(600, deregister)
+        expiry.start()
+        expiry.heartbeat(ipsecenforcer_id)
+    """
+
+    def __init__(self, ttl, callback):
+        """
+        Args:
+            ttl (int): seconds from the last heartbeat to the expiry
+            callback (function): called with the id of the expired
+                IPsecEnforcer
+        """
+        self.ttl = ttl
+        self.callback = callback
+
+        # Expiry time per IPsecEnforcer id, and heap of the
+        # (expiry time, IPsecEnforcer id) tuples
+        self._expiry_times = {}
+        self._heap = []
+        self._condition = threading.Condition()
+
+    def __contains__(self, ipsecenforcer_id):
+        with self._condition:
+            return ipsecenforcer_id in self._expiry_times
+
+    def __len__(self):
+        with self._condition:
+            return len(self._expiry_times)
+
+    def heartbeat(self, ipsecenforcer_id, now=None):
+        """Record a heartbeat of the IPsecEnforcer
+
+        Args:
+            ipsecenforcer_id (str): id of IPsecEnforcer
+            now (float): time of the heartbeat, defaults to current time
+        """
+        expiry_time = (now or time.time()) + self.ttl
+
+        with self._condition:
+            self._expiry_times[ipsecenforcer_id] = expiry_time
+            heapq.heappush(self._heap, (expiry_time, ipsecenforcer_id))
+
+            # The waiting thread is only woken for the first heartbeat of
+            # an empty heap, the later heartbeats expire after the head
+            if len(self._heap) == 1:
+                self._condition.notify()
+
+    def expiry_times(self):
+        """Expiry times of the heartbeats, e.g. to store them
+
+        Returns:
+            dict: expiry time per IPsecEnforcer id
+        """
+        with self._condition:
+            return dict(self._expiry_times)
+
+    def restore(self, expiry_times):
+        """Resume the expiry of the heartbeats, e.g. after a restart. The
+        IPsecEnforcers already sending heartbeats keep their expiry time.
+
+        Args:
+            expiry_times (dict): expiry time per IPsecEnforcer id
+        """
+        with self._condition:
+            for ipsecenforcer_id, expiry_time in expiry_times.items():
+                if ipsecenforcer_id in self._expiry_times:
+                    continue
+
+                self._expiry_times[ipsecenforcer_id] = expiry_time
+                heapq.heappush(self._heap, (expiry_time, ipsecenforcer_id))
+
+            self._condition.notify()
+
+    def discard(self, ipsecenforcer_id):
+        """Stop tracking the heartbeats of the IPsecEnforcer, e.g. when
+        it is de-registered
+
+        Args:
+            ipsecenforcer_id (str): id of IPsecEnforcer
+        """
+        with self._condition:
+            self._expiry_times.pop(ipsecenforcer_id, None)
+
+    def pop_expired(self, now=None):
+        """Remove the IPsecEnforcers whose heartbeat expired
+
+        Args:
+            now (float): current time, defaults to current time
+
+        Returns:
+            list: ids of the expired IPsecEnforcers
+        """
+        now = now or time.time()
+        expired = []
+
+        with self._condition:
+            while self._heap and self._heap[0][0] <= now:
+                expiry_time, ipsecenforcer_id = heapq.heappop(self._heap)
+
+                # Skip the entries of the previous heartbeats
+                if self._expiry_times.get(ipsecenforcer_id) == expiry_time:
+                    del self._expiry_times[ipsecenforcer_id]
+                    expired.append(ipsecenforcer_id)
+
+        return expired
+
+    def run(self):
+        """Call back for the expired IPsecEnforcers, as they expire"""
+        while True:
+            with self._condition:
+                if self._heap:
+                    timeout = self._heap[0][0] - time.time()
+                else:
+                    timeout = None
+
+                if timeout is None or timeout > 0:
+                    self._condition.wait(timeout)
+
+            for ipsecenforcer_id in self.pop_expired():
+                LOG.info(_("Heartbeat of IPsecEnforcer id %s expired" %
+                           ipsecenforcer_id))
+                try:
+                    self.callback(ipsecenforcer_id)
+                except Exception:
+                    LOG.exception(_("Failed to handle the heartbeat expiry "
+                                    "of IPsecEnforcer id %s" %
+                                    ipsecenforcer_id))
+
+    def start(self):
+        """Run the scheduler in a daemon thread"""
+        thread = threading.Thread(target=self.run, name='heartbeat-expiry')
+        thread.daemon = True
+        thread.start()
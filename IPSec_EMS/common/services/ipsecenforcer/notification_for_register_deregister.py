@@ -13,77 +13,50 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-from services.api import storage
-from services.api.serializers.utils_serializers import get_vpnendpoints_field
+from services.api.serializers.utils_serializers import (
+    find_references, get_vpnendpoints_field
+)
 from services.api.serializers.vpn_choices import (
-    RESOURCE_TO_RELATION_MAP, VPN_BIND_GROUP, VPN_BIND_LOCALSITE
+    RESOURCE_DEPENDENCY_MAP, RESOURCE_TO_RELATION_MAP
 )
 from services.ipsecenforcer.send_notification import IPsecEnforcerNotify
 
+# IPsecEnforcer to VPNEndpoint map endpoint type to VPNEndpoint resource
+ENDPOINT_TYPE_TO_RESOURCE_MAP = {
+    'group': 'VPNEndpointGroup',
+    'localsite': 'VPNEndpointLocalSite',
+    'remotesite': 'VPNEndpointRemoteSite',
+}
+
 
 class IPsecEnforcerRegistrationNotification(object):
 
     @classmethod
     def start(cls, **kwargs):
-        """
+        """Notify the peer IPsecEnforcer(s) of the VPNBind(s) of the
+        VPNEndpoint(s) of a registered or de-registered IPsecEnforcer
+
+        The VPNBind(s) of a VPNEndpoint are found with the secondary
+        indexes of the VPNBind VPNEndpoint fields.
 
         Args:
-            **kwargs:
+            **kwargs: mapping records of IPsecEnforcer to VPNEndpoint(s)
         """
 
         mapping_records = kwargs.get('mapping_records')
 
         for record in mapping_records:
-            #
-            # VPNEndpointGroup
-            #
-            group_record = storage.plugin.get_record(
-                    RESOURCE_TO_RELATION_MAP['VPNEndpointGroup'],
-                    record['endpoint_id'])
-
-            if group_record and (record['endpoint_type'] == 'group'):
-                for resource in VPN_BIND_GROUP:
-                    relation = RESOURCE_TO_RELATION_MAP[resource]
-                    vpn_bind_records = storage.plugin.get_records(relation)
-
-                    for vpn_bind_record in vpn_bind_records:
-                        cls.vpnbind_search(relation,
-                                           vpn_bind_record,
-                                           record['endpoint_id'])
-
-            #
-            # VPNEndpointLocalSite
-            #
-            group_record = storage.plugin.get_record(
-                    RESOURCE_TO_RELATION_MAP['VPNEndpointLocalSite'],
-                    record['endpoint_id'])
-
-            if group_record and (record['endpoint_type'] == 'localsite'):
-                for resource in VPN_BIND_LOCALSITE:
-                    relation = RESOURCE_TO_RELATION_MAP[resource]
-                    vpn_bind_records = storage.plugin.get_records(relation)
-
-                    for vpn_bind_record in vpn_bind_records:
-                        cls.vpnbind_search(relation,
-                                           vpn_bind_record,
-                                           record['endpoint_id'])
-
-            #
-            # VPNEndpointRemoteSite
-            #
-            group_record = storage.plugin.get_record(
-                    RESOURCE_TO_RELATION_MAP['VPNEndpointRemoteSite'],
-                    record['endpoint_id'])
-
-            if group_record and (record['endpoint_type'] == 'remotesite'):
-                for resource in VPN_BIND_LOCALSITE:
-                    relation = RESOURCE_TO_RELATION_MAP[resource]
-                    vpn_bind_records = storage.plugin.get_records(relation)
-
-                    for vpn_bind_record in vpn_bind_records:
-                        cls.vpnbind_search(relation,
-                                           vpn_bind_record,
-                                           record['endpoint_id'])
+            resource = ENDPOINT_TYPE_TO_RESOURCE_MAP.get(
+                    record['endpoint_type'])
+            if resource is None:
+                continue
+
+            for vpnbind_resource, vpn_bind_record in find_references(
+                    RESOURCE_DEPENDENCY_MAP[resource],
+                    record['endpoint_id']):
+                cls.vpnbind_search(RESOURCE_TO_RELATION_MAP[vpnbind_resource],
+                                   vpn_bind_record,
+                                   record['endpoint_id'])
 
     @staticmethod
     def vpnbind_search(relation, vpnbind_record, vpnendpoint_id):
@@ -14,19 +14,97 @@
 #    under the License.
 
 import logging
-from multiprocessing.connection import Client, Listener
-from socket import error as socket_error
+import time
 
+from django.utils.translation import ugettext as _
+
+from services.api import storage
 from services.api.serializers.vpn_choices import VPN_BIND
 from services.ipsecenforcer.notification_for_register_deregister import \
     IPsecEnforcerRegistrationNotification
+from services.ipsecenforcer.notification_outbox import NotificationOutbox
 from services.ipsecenforcer.notification_vpn_configuration_update import (
     IPsecConfigUpdateNotification
 )
 from services.ipsecenforcer.register_deregister import IPsecEnforcerInfo
+from services.ipsecenforcer.send_notification import IPsecEnforcerNotify
+from services.ipsecenforcer.utils import str_to_dict
 
 LOG = logging.getLogger(__name__)
 
+# Seconds from the append of a notification message to the dispatch of
+# the messages appended meanwhile
+NOTIFICATION_COALESCE_WINDOW = 0.5
+
+# Maximum time(seconds) of a wait for the next notification message
+NOTIFICATION_OUTBOX_WAIT = 60
+
+# Maximum number of notification messages per dispatch
+NOTIFICATION_MAX_BATCH = 1000
+
+
+class NotificationMetrics(object):
+    """Metrics of the notification queue
+
+    - queue_depth: messages left in the outbox at the last dispatch, and
+      max_queue_depth
+    - coalesce_ratio: notifications requested per IPsecEnforcer notified
+    - dispatch latency: seconds from the append of the first message of
+      a dispatch to the end of its notifications
+    """
+
+    def __init__(self):
+        self.dispatches = 0
+        self.messages = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.requested = 0
+        self.notified = 0
+        self.latency = 0
+        self.max_latency = 0
+        self.total_latency = 0
+
+    def record(self, messages, queue_depth, stats, latency):
+        """Record a dispatch
+
+        Args:
+            messages (int): number of messages of the dispatch
+            queue_depth (int): messages left in the outbox
+            stats (NotificationStats): completion stats of the dispatch
+            latency (float): dispatch latency(seconds)
+        """
+        self.dispatches += 1
+        self.messages += messages
+        self.queue_depth = queue_depth
+        self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+        self.requested += stats.requested
+        self.notified += stats.total
+        self.latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self.total_latency += latency
+
+    def snapshot(self):
+        """Fetch the metrics
+
+        Returns:
+            dict: metrics e.g.
+                {'dispatches': 2, 'messages': 200, 'queue_depth': 0,
+                 'max_queue_depth': 150, 'coalesce_ratio': 100.0,
+                 'latency': 0.6, 'max_latency': 0.7, 'avg_latency': 0.65}
+        """
+        return {
+            'dispatches': self.dispatches,
+            'messages': self.messages,
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'coalesce_ratio': (float(self.requested) / self.notified
+                               if self.notified else 1.0),
+            'latency': self.latency,
+            'max_latency': self.max_latency,
+            'avg_latency': (self.total_latency / self.dispatches
+                            if self.dispatches else 0),
+        }
+
 
 class IPsecEnforcerNotification(object):
     """This notification module notifies the IPSec enforcer about
@@ -36,53 +114,132 @@ runs as a independent background process.
 This process is started by a custom command. The command name is
 'ipsecenforcernotify'. This custom command is defined in 'management'
 module.
+
+The clients append the notification messages to the NotificationOutbox,
+instead of sending them to the process. The listener waits for the
+messages, takes the messages appended within NOTIFICATION_COALESCE_WINDOW
+of the first one, notifies each IPsecEnforcer concerned by these
+messages once, and then removes the messages from the outbox. So the
+messages appended while the process is down are handled when it starts.
+The metrics of the queue are stored after every dispatch.
 """
-    #
-    # IPsecEnforcer Notification process socket information
-    #
-    process_fqdn = 'localhost'
-    process_port = 8082
+    # Key of the notification queue metrics
+    metrics_key = 'ipsecenforcer_notification_metrics'
 
     @classmethod
-    def listener(cls):
-        """IPC Listener for IPsecEnforcer Notification"""
+    def listener(cls, window=NOTIFICATION_COALESCE_WINDOW):
+        """Listener of the IPsecEnforcer Notification outbox
+
+        Args:
+            window (float): coalescing window(seconds)
+        """
         LOG.info("IPsec Enforcer Notification agent started")
 
-        # Listen for IPsec Enforcer Notification
-        ipsec_enforcer_socket = Listener((cls.process_fqdn, cls.process_port))
+        metrics = NotificationMetrics()
+        last_key = None
 
         while True:
-            conn = ipsec_enforcer_socket.accept()
+            # Returns at once if a message was appended since the last
+            # wait, including the messages appended during the dispatch
+            last_key = NotificationOutbox.wait(last_key,
+                                               NOTIFICATION_OUTBOX_WAIT)
+
+            try:
+                cls.dispatch_outbox(metrics, window)
+            except Exception:
+                LOG.exception(_("Failed to dispatch the notification "
+                                "outbox"))
+
+    @classmethod
+    def dispatch_outbox(cls, metrics, window):
+        """Dispatch the notification messages of the outbox, after the
+        coalescing window of the first one
+
+        Args:
+            metrics (NotificationMetrics): metrics of the queue
+            window (float): coalescing window(seconds)
+        """
+        entries = NotificationOutbox.entries()
+        if not entries:
+            return
+
+        delay = entries[0][1] + window - time.time()
+        if delay > 0:
+            time.sleep(delay)
+            entries = NotificationOutbox.entries()
+
+        batch = entries[:NOTIFICATION_MAX_BATCH]
+        stats = cls.dispatch([message for _key, _time, message in batch])
+
+        # At least once: a message is removed only after its dispatch
+        NotificationOutbox.remove([key for key, _time, _message in batch])
 
-            # Read data from socket
-            data = conn.recv()
+        metrics.record(len(batch), len(entries) - len(batch), stats,
+                       time.time() - batch[0][1])
 
-            notification_type = data.pop('notification_type')
+        snapshot = metrics.snapshot()
+        LOG.debug(_("Notification queue metrics %s" % snapshot))
+        storage.plugin.put_kv(cls.metrics_key, str(snapshot))
 
-            if notification_type == 'REGISTRATION':
-                IPsecEnforcerRegistrationNotification.start(**data)
-            elif notification_type == 'DEREGISTRATION':
-                IPsecEnforcerRegistrationNotification.start(**data)
-            elif notification_type == 'CONFIG_UPDATE':
-                IPsecConfigUpdateNotification.record_update(**data)
-            elif notification_type == 'CONFIG_DELETE':
-                # Delete Notification only for VPNBind record
-                IPsecConfigUpdateNotification.vpnbind_record_delete(**data)
+    @staticmethod
+    def dispatch(messages):
+        """Notify the IPsecEnforcers of the notification messages, once
+        per IPsecEnforcer
+
+        Args:
+            messages (list): notification messages
+
+        Returns:
+            NotificationStats: completion stats of the notification
+        """
+        IPsecEnforcerNotify.start_coalescing()
+        try:
+            for data in messages:
+                notification_type = data.pop('notification_type')
+
+                try:
+                    if notification_type == 'REGISTRATION':
+                        IPsecEnforcerRegistrationNotification.start(**data)
+                    elif notification_type == 'DEREGISTRATION':
+                        IPsecEnforcerRegistrationNotification.start(**data)
+                    elif notification_type == 'CONFIG_UPDATE':
+                        IPsecConfigUpdateNotification.record_update(**data)
+                    elif notification_type == 'CONFIG_DELETE':
+                        # Delete Notification only for VPNBind record
+                        IPsecConfigUpdateNotification.vpnbind_record_delete(
+                                **data)
+                except Exception:
+                    LOG.exception(_("Failed to handle the %s notification" %
+                                    notification_type))
+        finally:
+            vpnendpoint_counts = IPsecEnforcerNotify.stop_coalescing()
+
+        return IPsecEnforcerNotify.notify_vpnendpoints(vpnendpoint_counts)
+
+    @classmethod
+    def get_metrics(cls):
+        """Fetch the metrics of the notification queue, stored by the
+        IPsecEnforcer Notification process
+
+        Returns:
+            dict: metrics, see NotificationMetrics.snapshot()
+        """
+        value = storage.plugin.get_kv(cls.metrics_key)
+
+        if value is None:
+            return {}
+
+        return str_to_dict(value)
 
     @classmethod
     def client(cls, resource, record=None, record_update=None):
-        """IPC Client for Record Update or Delete
+        """Notification client for Record Update or Delete
 
         Args:
             resource (str): name of the resource
             record (str): original record before updation
             record_update: record updates(only valid in case of PUT)
         """
-        try:
-            client = Client((cls.process_fqdn, cls.process_port))
-        except socket_error:
-            return
-
         if record_update is not None:
             notification_type = 'CONFIG_UPDATE'
         else:
@@ -107,25 +264,15 @@ module.
         if record_update is not None:
             notification_message.update({'record_update': record_update})
 
-        # Send the notification_message to the IPsecEnforcer Notification
-        # listener
-        try:
-            client.send(notification_message)
-        except socket_error:
-            return
+        cls.send(notification_message)
 
     @classmethod
     def client_ipsecenforcer_register(cls, ipsecenforcer_id):
-        """IPC Client for IPsecEnforcer Registration
+        """Notification client for IPsecEnforcer Registration
 
         Args:
             ipsecenforcer_id: id of IPsecEnforcer
         """
-        try:
-            client = Client((cls.process_fqdn, cls.process_port))
-        except socket_error:
-            return
-
         mapping_records = (
             IPsecEnforcerInfo.get_ipsecenforcer_to_vpnendpoint_map(
                     ipsecenforcer_id)
@@ -137,36 +284,29 @@ module.
             'mapping_records': mapping_records
         }
 
-        # Send the notification_message to the IPsecEnforcer Notification
-        # listener
-        try:
-            client.send(notification_message)
-        except socket_error:
-            return
+        cls.send(notification_message)
 
     @classmethod
     def client_ipsecenforcer_deregister(cls, ipsecenforcer_id, mapping_records):
-        """IPC Client for IPsecEnforcer De-Registration
+        """Notification client for IPsecEnforcer De-Registration
 
         Args:
             ipsecenforcer_id: id of IPsecEnforcer
         """
-        try:
-            client = Client((cls.process_fqdn, cls.process_port))
-        except socket_error:
-            return
-
         notification_message = {
             'notification_type': 'DEREGISTRATION',
             'ipsecenforcer_id': ipsecenforcer_id,
             'mapping_records': mapping_records
         }
 
-        # Send the notification_message to the IPsecEnforcer Notification
-        # listener
-        try:
-            client.send(notification_message)
-        except socket_error:
-            return
+        cls.send(notification_message)
 
+    @staticmethod
+    def send(notification_message):
+        """Append the notification message to the outbox of the
+        IPsecEnforcer Notification process
 
+        Args:
+            notification_message (dict): notification message
+        """
+        NotificationOutbox.append(notification_message)
@@ -0,0 +1,122 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Durable outbox of the IPsecEnforcer notification messages"""
+
+import logging
+import time
+import uuid
+
+from django.utils.translation import ugettext as _
+
+from services.api import storage
+from services.ipsecenforcer.utils import consul_key_join, str_to_dict
+
+LOG = logging.getLogger(__name__)
+
+
+class NotificationOutbox(object):
+    """Notification messages stored until the IPsecEnforcer Notification
+    process handled them
+
+    A message is stored under a key made of its append time and a
+    random suffix, e.g.
+    ipsecenforcer_notification_outbox/0000001476700000.123456-<uuid>,
+    so the keys are in the append order. The messages are removed after
+    they are handled, so a message is handled at least once, even if the
+    IPsecEnforcer Notification process is down when it is appended.
+
+    The key of the last appended message is also stored under index_key,
+    for the IPsecEnforcer Notification process to wait for the next
+    message with a blocking query.
+    """
+
+    key_prefix = 'ipsecenforcer_notification_outbox'
+    index_key = 'ipsecenforcer_notification_outbox_index'
+
+    @classmethod
+    def append(cls, message):
+        """Store a notification message
+
+        Args:
+            message (dict): notification message
+
+        Returns:
+            str: key of the message
+        """
+        key = consul_key_join(cls.key_prefix, '%023.6f-%s' %
+                              (time.time(), uuid.uuid4().hex))
+        storage.plugin.put_kv(key, str(message))
+        storage.plugin.put_kv(cls.index_key, key)
+        return key
+
+    @classmethod
+    def wait(cls, last_key, timeout):
+        """Wait for a notification message appended after the given one
+
+        Args:
+            last_key (str): key of the last message known to the caller,
+                None for any message
+            timeout (float): maximum time(seconds) to wait
+
+        Returns:
+            str: key of the last appended message
+        """
+        return storage.plugin.wait_kv(cls.index_key, last_key, timeout)
+
+    @classmethod
+    def entries(cls):
+        """Fetch the stored notification messages
+
+        Returns:
+            list: (key, append time, message) tuples, in the append order
+        """
+        data = storage.plugin.get_kvs(consul_key_join(cls.key_prefix, ''))
+
+        return [(key, cls.append_time(key), str_to_dict(value))
+                for key, value in data.iteritems()]
+
+    @classmethod
+    def is_empty(cls):
+        """Whether all the notification messages are handled
+
+        Returns:
+            bool: True if no notification message is stored
+        """
+        return not storage.plugin.get_kvs(consul_key_join(cls.key_prefix, ''))
+
+    @staticmethod
+    def append_time(key):
+        """Append time of a notification message
+
+        Args:
+            key (str): key of the message
+
+        Returns:
+            float: append time(seconds since the epoch)
+        """
+        return float(key.rsplit('/', 1)[-1].split('-', 1)[0])
+
+    @staticmethod
+    def remove(keys):
+        """Remove the handled notification messages
+
+        Args:
+            keys (list): keys of the messages
+        """
+        storage.plugin.delete_kvs(keys)
+
+        LOG.debug(_("Removed %d notification message(s) from the outbox" %
+                    len(keys)))
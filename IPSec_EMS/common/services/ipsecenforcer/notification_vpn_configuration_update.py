@@ -13,12 +13,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import itertools
-
-from services.api import storage
-from services.api.serializers.utils_serializers import get_vpnendpoints_field
+from services.api.serializers.utils_serializers import (
+    find_references, get_vpnendpoints_field
+)
 from services.api.serializers.vpn_choices import (
-    VPN_BIND, RESOURCE_DEPENDENCY_MAP,
+    VPN_BIND, CERTIFICATE_DEPENDENCY_MAP, RESOURCE_DEPENDENCY_MAP,
     RESOURCE_TO_RELATION_MAP)
 from services.ipsecenforcer.send_notification import IPsecEnforcerNotify
 
@@ -103,40 +102,41 @@ class IPsecConfigUpdateNotification(object):
             IPsecEnforcerNotify.notify_ipsecenforcers_of_vpnendpoint(
                     endpoint_id)
 
-    @staticmethod
-    def _non_vpnbind_record_update(resource, record_id):
+    @classmethod
+    def _non_vpnbind_record_update(cls, resource, record_id):
         """Updation of a Non-VPNBind record
 
-        Check all the VPNBind records to find if any record has
-        reference to this Non-VPNBind Record. If a reference exists,
-        then notify all the IPsecEnforcer(s) using the VPNBind record
-        configurations.
+        Find the VPNBind records having reference to this Non-VPNBind
+        Record, with the secondary indexes of the VPNBind reference
+        fields. If a reference exists, then notify all the
+        IPsecEnforcer(s) using the VPNBind record configurations.
+
+        A certificate is referenced by VPNEndpoint(s)(VPNCACertificate
+        by VPNCertificate(s)), so the VPNBind records of the referencing
+        records are searched.
 
         Args:
             resource (str): name of the resource
             record_id (str): id of the updated record(resource)
         """
-        # Find the dependent VPNBind relations and their corresponding field
-        # names in the relation
-        relations = RESOURCE_DEPENDENCY_MAP[resource][0]
-        fields = RESOURCE_DEPENDENCY_MAP[resource][1:]
-
-        for resource, field in itertools.product(relations, fields):
-
-            relation = RESOURCE_TO_RELATION_MAP[resource]
-            # Fetch all records of the VPNBind relation
-            records = storage.plugin.get_records(relation)
-            for record in records:
-                if record[field] == record_id:
-
-                    endpoint, peer_endpoint = get_vpnendpoints_field(relation)
-                    endpoint_id = record[endpoint]
-                    peer_endpoint_id = record[peer_endpoint]
-
-                    # Notify IPsecEnforcer(s) of both vpnendpoint and the peer
-                    # vpnendpoint
-                    IPsecEnforcerNotify.vpnbind_endpoints_update(
-                            endpoint_id,
-                            peer_endpoint_id)
+        if resource in CERTIFICATE_DEPENDENCY_MAP:
+            for reference, record in find_references(
+                    CERTIFICATE_DEPENDENCY_MAP[resource], record_id):
+                cls._non_vpnbind_record_update(reference, record['id'])
+            return
 
+        dependencies = RESOURCE_DEPENDENCY_MAP.get(resource)
+        if dependencies is None:
+            return
 
+        for vpnbind_resource, record in find_references(dependencies,
+                                                        record_id):
+            relation = RESOURCE_TO_RELATION_MAP[vpnbind_resource]
+            endpoint, peer_endpoint = get_vpnendpoints_field(relation)
+            endpoint_id = record[endpoint]
+            peer_endpoint_id = record[peer_endpoint]
+
+            # Notify IPsecEnforcer(s) of both vpnendpoint and the peer
+            # vpnendpoint
+            IPsecEnforcerNotify.vpnbind_endpoints_update(endpoint_id,
+                                                         peer_endpoint_id)
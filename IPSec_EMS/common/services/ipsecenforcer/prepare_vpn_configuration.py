@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from collections import OrderedDict
 import copy
 import itertools
 import logging
@@ -28,16 +29,42 @@ from services.api.serializers.vpn_choices import (
     RESOURCE_TO_RELATION_MAP,
     VPN_BIND_GROUP, VPN_BIND_LOCALSITE, VPN_BIND_REMOTESITE
 )
+from services.ipsecenforcer.config_snapshot import (
+    config_delta, config_digests, config_hash, IPsecEnforcerConfigSnapshot
+)
+from services.ipsecenforcer.notification_outbox import NotificationOutbox
 from services.ipsecenforcer.register_deregister import IPsecEnforcerInfo
 from services.ipsecenforcer.utils import (
     generate_psk_string)
 
 LOG = logging.getLogger(__name__)
 
+# Last configuration of each IPsecEnforcer prepared by this process:
+# IPsecEnforcer id as key and (config version, config hash,
+# configuration, digests) as value
+_CONFIG_CACHE = {}
 
-class IPsecEnforcerConfig(object):
 
-    def __init__(self):
+class IPsecEnforcerConfig(object):
+    """Prepare the VPN configuration policy of an IPsecEnforcer
+
+    In bulk mode(default), the records referenced by the VPNBind
+    records of a VPNEndpoint are fetched by id in batches(the
+    IKEPolicies, IPsecPolicies and VPNEndpoints, then their
+    VPNCertificates, then the VPNCACertificates), and every record is
+    fetched only once per configuration. The IPsecEnforcer(s) FQDN list
+    of a peer VPNEndpoint and the stored PSKs of a VPNBind record are
+    also fetched only once per configuration. Otherwise, every
+    referenced record, FQDN list and PSK is fetched with a separate
+    request to the storage backend each time it is used.
+
+    In both modes, only the VPNBind records of the VPNEndpoint(s) of
+    the IPsecEnforcer are fetched, with the secondary indexes of the
+    VPNBind VPNEndpoint fields, and only the records referenced by them
+    are fetched.
+    """
+
+    def __init__(self, bulk=True):
         # Format of configuration policy for IPsecEnforcer
         self.ipsecenforcer_config = dict(ikepolicy={},
                                          ipsecpolicy={},
@@ -55,6 +82,20 @@ class IPsecEnforcerConfig(object):
                                          vpncacertificate={},
                                         )
 
+        self.bulk = bulk
+
+        # Hash and digests of the configuration(only if a config version
+        # is added)
+        self.config_hash = None
+        self.config_digests = None
+        # Whether the config version is incremented
+        self.config_changed = False
+
+        # Fetched records, FQDN lists and PSKs(only used in bulk mode)
+        self._relation_records = {}
+        self._fqdn_lists = {}
+        self._stored_psks = {}
+
     @staticmethod
     def _pop_unrequired_fields(record):
         """Remove unrequired fields from record
@@ -72,18 +113,228 @@ class IPsecEnforcerConfig(object):
         for field in unrequired_fields:
             record.pop(field, None)
 
+    @staticmethod
+    def _copy_config(config):
+        """Copy the sections of the configuration, the entries are not
+        modified once added
+
+        Args:
+            config (dict): IPsecEnforcer VPN configuration
+
+        Returns:
+            dict: copy of the configuration
+        """
+        return dict((section, dict(entries) if isinstance(entries, dict)
+                     else entries)
+                    for section, entries in config.iteritems())
+
     def _add_config_version(self, ipsecenforcer_id):
         """Add config version
 
+        The config version is incremented only if the configuration
+        changed since the last version.
+
         Args:
             ipsecenforcer_id (str): id of IPsecEnforcer
         """
-        config_version = (
-            IPsecEnforcerInfo().increment_ipsecenforcer_config_version(
-                ipsecenforcer_id)
+        digests = config_digests(self.ipsecenforcer_config)
+        self.config_hash = config_hash(digests)
+        self.config_digests = digests
+
+        config_version, incremented = (
+            IPsecEnforcerInfo().update_ipsecenforcer_config_version(
+                ipsecenforcer_id, self.config_hash)
         )
 
         self.ipsecenforcer_config.update({'version': config_version})
+        self.config_changed = incremented
+
+        if incremented:
+            IPsecEnforcerConfigSnapshot.put_snapshot(ipsecenforcer_id,
+                                                     config_version,
+                                                     digests)
+
+        _CONFIG_CACHE[ipsecenforcer_id] = (
+            config_version, self.config_hash,
+            self._copy_config(self.ipsecenforcer_config), digests)
+
+    def _reset(self):
+        """Reset the configuration policy and the fetched records"""
+        self.ipsecenforcer_config.pop('version', None)
+        self.config_hash = None
+        self.config_digests = None
+        self.config_changed = False
+        for key in self.ipsecenforcer_config.iterkeys():
+            self.ipsecenforcer_config[key].clear()
+
+        self._relation_records.clear()
+        self._fqdn_lists.clear()
+        self._stored_psks.clear()
+
+    def _prefetch_records(self, relation, record_ids):
+        """Fetch the records of a relation which are not fetched yet
+        with a single request(only in bulk mode)
+
+        Args:
+            relation (str): name of the relation
+            record_ids (iterable): ids of the records
+        """
+        if not self.bulk:
+            return
+
+        records = self._relation_records.setdefault(relation, {})
+
+        missing = list(set(record_id for record_id in record_ids
+                           if record_id not in records))
+        if not missing:
+            return
+
+        fetched = storage.plugin.get_records_by_primary_index(relation,
+                                                              missing)
+
+        # Remember the missing records too, to not fetch them again
+        for record_id in missing:
+            records[record_id] = fetched.get(record_id)
+
+    def _prefetch_vpnbind_references(self, relation, vpnbind_records):
+        """Fetch the records referenced by the VPNBind records(only in
+        bulk mode)
+
+        Args:
+            relation (str): name of the VPNBind relation
+            vpnbind_records (list): VPNBind records
+        """
+        if not self.bulk or not vpnbind_records:
+            return
+
+        self._prefetch_records(
+                'ikepolicies',
+                [record['ikepolicy_id'] for record in vpnbind_records])
+        self._prefetch_records(
+                'ipsecpolicies',
+                [record['ipsecpolicy_id'] for record in vpnbind_records])
+
+        endpoint_relations = [
+            (RESOURCE_TO_RELATION_MAP[resource], field) for resource, field
+            in zip(get_vpnendpoints_resource(relation),
+                   get_vpnendpoints_field(relation))
+        ]
+
+        for endpoint_relation, field in endpoint_relations:
+            self._prefetch_records(
+                    endpoint_relation,
+                    [record[field] for record in vpnbind_records])
+
+        cert_records = [record for record in vpnbind_records
+                        if record['auth_mode'] == 'cert']
+        if not cert_records:
+            return
+
+        certificate_ids = []
+        for endpoint_relation, field in endpoint_relations:
+            endpoints = self._relation_records[endpoint_relation]
+            for record in cert_records:
+                endpoint = endpoints.get(record[field])
+                if endpoint:
+                    certificate_ids.append(endpoint['vpncertificate_id'])
+
+        certificate_relation = RESOURCE_TO_RELATION_MAP['VPNCertificate']
+        self._prefetch_records(certificate_relation, certificate_ids)
+
+        certificates = self._relation_records[certificate_relation]
+        self._prefetch_records(
+                RESOURCE_TO_RELATION_MAP['VPNCACertificate'],
+                [certificates[certificate_id]['vpncacertificate_id']
+                 for certificate_id in certificate_ids
+                 if certificates.get(certificate_id)])
+
+    def _get_record(self, relation, record_id):
+        """Fetch a record of a relation
+
+        Args:
+            relation (str): name of the relation
+            record_id (str): id of the record
+
+        Returns:
+            Empty List ([]) OR record with the id
+        """
+        if not self.bulk:
+            return storage.plugin.get_record(relation, record_id)
+
+        self._prefetch_records(relation, [record_id])
+
+        record = self._relation_records[relation][record_id]
+        if record is None:
+            return []
+
+        # The caller modifies the record, so keep the map intact
+        return copy.deepcopy(record)
+
+    def _get_vpnbind_records(self, relation, vpnendpoint_id):
+        """Fetch the records of a VPNBind relation with the VPNEndpoint
+        as the VPNEndpoint or the peer VPNEndpoint
+
+        The records are found with the secondary indexes of the
+        VPNEndpoint fields, the same in both modes.
+
+        Args:
+            relation (str): name of the VPNBind relation
+            vpnendpoint_id (str): id of VPNEndpoint
+
+        Returns:
+            list: VPNBind records
+        """
+        vpnbind_records = OrderedDict()
+        for field in get_vpnendpoints_field(relation):
+            for record in storage.plugin.get_records_by_secondary_index(
+                    relation, field, vpnendpoint_id):
+                vpnbind_records.setdefault(record['id'], record)
+
+        return vpnbind_records.values()
+
+    def _get_fqdn_list_records(self, vpnendpoint_id):
+        """Fetch the IPsecEnforcer(s) id & FQDN of a VPNEndpoint
+
+        Args:
+            vpnendpoint_id (str): id of VPNEndpoint
+
+        Returns:
+            list: IPsecEnforcer(s) id & FQDN records
+        """
+        if self.bulk and vpnendpoint_id in self._fqdn_lists:
+            return self._fqdn_lists[vpnendpoint_id]
+
+        records = (
+            IPsecEnforcerInfo().get_vpnendpoint_to_ipsecenforcer_and_fqdn_list(
+                vpnendpoint_id)
+        )
+
+        if self.bulk:
+            self._fqdn_lists[vpnendpoint_id] = records
+
+        return records
+
+    def _get_stored_psk(self, vpnbind_id, key):
+        """Fetch the stored PSK of a FQDN pair of the VPNBind record
+
+        Args:
+            vpnbind_id (str): id of VPNBind record
+            key (str): key of the FQDN pair PSK
+
+        Returns:
+            str: PSK or None if no PSK is stored
+        """
+        if not self.bulk:
+            return storage.plugin.get_kv(key)
+
+        stored_psks = self._stored_psks.get(vpnbind_id)
+
+        if stored_psks is None:
+            stored_psks = storage.plugin.get_kvs(
+                    'fqdn_pair_psk' + '/' + vpnbind_id + '/')
+            self._stored_psks[vpnbind_id] = stored_psks
+
+        return stored_psks.get(key)
 
     def _add_ikepolicy(self, ikepolicy_id):
         """Add IKEPolicy to the configuration policy
@@ -91,7 +342,7 @@ class IPsecEnforcerConfig(object):
         Args:
             ikepolicy_id (str): id of IKEPolicy
         """
-        ikepolicy = storage.plugin.get_record('ikepolicies', ikepolicy_id)
+        ikepolicy = self._get_record('ikepolicies', ikepolicy_id)
         assert (ikepolicy is not None)
 
         _id = ikepolicy.pop('id')
@@ -104,7 +355,7 @@ class IPsecEnforcerConfig(object):
         Args:
            ipsecpolicy_id (str): id of IPsecPolicy
         """
-        ipsecpolicy = storage.plugin.get_record('ipsecpolicies', ipsecpolicy_id)
+        ipsecpolicy = self._get_record('ipsecpolicies', ipsecpolicy_id)
         assert (ipsecpolicy is not None)
 
         _id = ipsecpolicy.pop('id')
@@ -135,7 +386,7 @@ class IPsecEnforcerConfig(object):
             vpnendpoint_field (str): VPNEndpoint field name in VPNBind
                 record
         """
-        vpnendpoint_record = storage.plugin.get_record(
+        vpnendpoint_record = self._get_record(
                 RESOURCE_TO_RELATION_MAP[vpnendpoint_resource],
                 vpnbind_record[vpnendpoint_field])
 
@@ -154,7 +405,7 @@ class IPsecEnforcerConfig(object):
         Args:
             vpncertificate_id (str): id of VPNCertificate
         """
-        vpncertificate = storage.plugin.get_record(
+        vpncertificate = self._get_record(
                 RESOURCE_TO_RELATION_MAP['VPNCertificate'],
                 vpncertificate_id)
 
@@ -171,7 +422,7 @@ class IPsecEnforcerConfig(object):
         Args:
             vpncacertificate_id (str): id of VPNCACertificate
         """
-        vpncacertificate = storage.plugin.get_record(
+        vpncacertificate = self._get_record(
                 RESOURCE_TO_RELATION_MAP['VPNCACertificate'],
                 vpncacertificate_id)
 
@@ -189,10 +440,7 @@ class IPsecEnforcerConfig(object):
         Returns:
             list : List of FQDN for VPNEndpoint
         """
-        records = (
-            IPsecEnforcerInfo().get_vpnendpoint_to_ipsecenforcer_and_fqdn_list(
-                    vpnendpoint_id)
-        )
+        records = self._get_fqdn_list_records(vpnendpoint_id)
 
         fqdn_list = [record['fqdn_tunnel'] for record in records]
 
@@ -213,10 +461,7 @@ class IPsecEnforcerConfig(object):
             peer (bool): True, If IPsecEnforcer belongs to peer
                 VPNEndpoint or Else False.
         """
-        records = (
-            IPsecEnforcerInfo().get_vpnendpoint_to_ipsecenforcer_and_fqdn_list(
-                peer_vpnendpoint_id)
-        )
+        records = self._get_fqdn_list_records(peer_vpnendpoint_id)
 
         fqdn_list = [record['fqdn_tunnel'] for record in records]
 
@@ -231,8 +476,7 @@ class IPsecEnforcerConfig(object):
 
         self.ipsecenforcer_config['fqdn_pair_psk'].update(fqdn_pair_with_psk)
 
-    @staticmethod
-    def _generate_psk(vpnbind_id, fqdn_pairs, psk):
+    def _generate_psk(self, vpnbind_id, fqdn_pairs, psk):
         """Generate the PSKs
 
         Args:
@@ -253,7 +497,7 @@ class IPsecEnforcerConfig(object):
                 key = ('fqdn_pair_psk' + '/' + vpnbind_id + '/' + pair[0] +
                        '/' + pair[1])
 
-                stored_psk = storage.plugin.get_kv(key)
+                stored_psk = self._get_stored_psk(vpnbind_id, key)
 
                 # If PSK is provided, use the provided the PSK. Else generate
                 # the PSK for each FQDN PSK.
@@ -304,7 +548,9 @@ class IPsecEnforcerConfig(object):
         for resource in vpnbind_type_resources:
 
             relation = RESOURCE_TO_RELATION_MAP[resource]
-            vpnbind_records = storage.plugin.get_records(relation)
+            vpnbind_records = self._get_vpnbind_records(relation,
+                                                        vpnendpoint_id)
+            self._prefetch_vpnbind_references(relation, vpnbind_records)
 
             for vpnbind_record in vpnbind_records:
 
@@ -318,8 +564,10 @@ class IPsecEnforcerConfig(object):
                             vpnbind_record[peer_vpnendpoint_field])
 
                     # Don't proceed and add configurations if there are no peer
-                    # IPsecEnforcers
-                    if not fqdn_list:
+                    # IPsecEnforcers, except for a VPNEndpointRemoteSite: its
+                    # gateway(peer_address) is the peer
+                    if (not fqdn_list and peer_vpnendpoint_field !=
+                            'peer_vpnendpointremotesite_id'):
                         continue
 
                     vpnbind_record.update({"peer": False})
@@ -369,14 +617,19 @@ class IPsecEnforcerConfig(object):
             dict : IPsecEnforcer VPN Configuration
         """
         # Reset the ipsecenforcer_config
-        for key in self.ipsecenforcer_config.iterkeys():
-            self.ipsecenforcer_config[key].clear()
+        self._reset()
 
         # Fetch the IPsecEnforcer record
         ipsec_enforcer_record = storage.plugin.get_record(
                 'ipsec_enforcer_registrations',
                 ipsecenforcer_id)
 
+        # The IPsecEnforcer could be de-registered, e.g. before it is
+        # notified
+        if ipsec_enforcer_record is None:
+            _CONFIG_CACHE.pop(ipsecenforcer_id, None)
+            return self.ipsecenforcer_config
+
         # Fetch the VPNEndpoint(s) corresponding to the IPsecEnforcer
         mapping_records = (
             IPsecEnforcerInfo.get_ipsecenforcer_to_vpnendpoint_map(
@@ -396,7 +649,7 @@ class IPsecEnforcerConfig(object):
                           }
                           )
 
-                endpoint_record = storage.plugin.get_record(
+                endpoint_record = self._get_record(
                         RESOURCE_TO_RELATION_MAP['VPNEndpointGroup'],
                         mapping_record['endpoint_id'])
 
@@ -415,7 +668,7 @@ class IPsecEnforcerConfig(object):
                           }
                           )
 
-                endpoint_record = storage.plugin.get_record(
+                endpoint_record = self._get_record(
                         RESOURCE_TO_RELATION_MAP['VPNEndpointLocalSite'],
                         mapping_record['endpoint_id'])
 
@@ -434,7 +687,7 @@ class IPsecEnforcerConfig(object):
                           }
                           )
 
-                endpoint_record = storage.plugin.get_record(
+                endpoint_record = self._get_record(
                         RESOURCE_TO_RELATION_MAP['VPNEndpointRemoteSite'],
                         mapping_record['endpoint_id'])
 
@@ -446,3 +699,87 @@ class IPsecEnforcerConfig(object):
             self._add_config_version(ipsecenforcer_id)
 
         return self.ipsecenforcer_config
+
+    @staticmethod
+    def _get_current_config_version(ipsecenforcer_id):
+        """Fetch the config version of IPsecEnforcer, if it is current
+
+        The IPsecEnforcer Notification process prepares the
+        configuration of the IPsecEnforcer(s) concerned by a change and
+        publishes a new config version if it changed, so the stored
+        config version is current once the outbox is empty.
+
+        Args:
+            ipsecenforcer_id (str) : id of IPsecEnforcer
+
+        Returns:
+            dict : version number(int) and hash(str) of IPsecEnforcer
+                config
+            None : if no config version exists or a notification
+                message is not handled yet
+        """
+        if not NotificationOutbox.is_empty():
+            return None
+
+        return IPsecEnforcerInfo.get_ipsecenforcer_config_version(
+                ipsecenforcer_id)
+
+    def prepare_ipsec_enforcer_config_delta(self, ipsecenforcer_id,
+                                            base_version):
+        """Prepare the VPN configuration changes of IPsecEnforcer since
+        a config version
+
+        If the config version is current(see
+        _get_current_config_version()), the configuration is not
+        prepared: no changes are returned for the current version, and
+        the configuration last prepared by this process for the current
+        version is used if any. Otherwise the configuration is prepared,
+        e.g. while the notification of a change is pending. A config
+        version is not published if the preparation by the IPsecEnforcer
+        Notification process fails, so the change is then returned only
+        with the next change or the complete VPN configuration.
+
+        Args:
+            ipsecenforcer_id (str) : id of IPsecEnforcer
+            base_version (int): config version installed at the
+                IPsecEnforcer
+
+        Returns:
+            dict : 'version', 'base_version' and the 'added', 'changed'
+                and 'removed' entries of each section(see
+                config_delta()) OR the complete VPN configuration if the
+                base version is not in the snapshot history
+        """
+        self._reset()
+
+        config_version = self._get_current_config_version(ipsecenforcer_id)
+
+        if config_version and config_version['version'] == base_version:
+            self.config_hash = config_version['hash']
+            return dict(version=base_version, base_version=base_version,
+                        added={}, changed={}, removed={})
+
+        base_digests = IPsecEnforcerConfigSnapshot.get_snapshot(
+                ipsecenforcer_id, base_version)
+
+        cached = _CONFIG_CACHE.get(ipsecenforcer_id)
+
+        if (config_version and cached and cached[:2] ==
+                (config_version['version'], config_version['hash'])):
+            _version, self.config_hash, config, self.config_digests = cached
+            self.ipsecenforcer_config.update(self._copy_config(config))
+            config = self.ipsecenforcer_config
+        else:
+            config = self.prepare_ipsec_enforcer_config(ipsecenforcer_id)
+
+        if base_digests is None or 'version' not in config:
+            LOG.debug(_("No config snapshot of IPsecEnforcer id %s and "
+                        "config version %s, preparing complete VPN "
+                        "configurations") % (ipsecenforcer_id, base_version))
+            return config
+
+        delta = config_delta(base_digests, config, self.config_digests)
+        delta.update({'version': config['version'],
+                      'base_version': base_version})
+
+        return delta
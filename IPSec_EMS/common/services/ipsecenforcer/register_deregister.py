@@ -16,10 +16,14 @@
 """Registration and De-Registration of IPsecEnforcer with IPsec EMS"""
 
 import logging
+import time
 
 from django.utils.translation import ugettext as _
 
 from services.api import storage
+from services.ipsecenforcer.config_snapshot import (
+    IPsecEnforcerConfigSnapshot
+)
 from services.ipsecenforcer.utils import str_to_dict, consul_key_join
 from services.api.serializers.vpn_choices import RESOURCE_TO_RELATION_MAP
 
@@ -47,7 +51,10 @@ class IPsecEnforcerInfo(object):
             record (IPsecEnforcerRegistration): IPsecEnforcer
                 Registration record
         """
-        session_id = storage.plugin.create_session()
+        # Lock only the IPsecEnforcer, as its map records are keyed by
+        # its id and FQDN
+        session_id = storage.plugin.create_session(RELATION_IPSECENFORCER,
+                                                   record.id)
 
         try:
             ipsecenforcer_endpoint_list = (
@@ -94,7 +101,8 @@ class IPsecEnforcerInfo(object):
             record (IPsecEnforcerRegistration): IPsecEnforcer
                 Registration record
         """
-        session_id = storage.plugin.create_session()
+        session_id = storage.plugin.create_session(RELATION_IPSECENFORCER,
+                                                   record.id)
 
         try:
             ipsecenforcer_endpoint_list = (
@@ -115,10 +123,8 @@ class IPsecEnforcerInfo(object):
                 # Delete the config version of IPSecEnforcer
                 self.delete_ipsecenforcer_config_version(record.id)
 
-                # Delete the HeartbeatMiss count of IPsecEnforcer record
-                HeartbeatMissOfIPsecEnforcer().delete_heartbeat_miss_count(
-                        record.id,
-                        record.fqdn)
+                # Delete the config snapshots of IPSecEnforcer
+                IPsecEnforcerConfigSnapshot.delete_snapshots(record.id)
 
         finally:
             storage.plugin.destroy_session(session_id)
@@ -177,17 +183,11 @@ class IPsecEnforcerInfo(object):
 
         key_prefix = consul_key_join(relation_name, ipsecenforcer_id)
 
-        # Retrieve the list of all records from Consul
-        # Note : 'recurse=True' option fetches all the record with the
-        # given key prefix
-        consul_index, data = storage.plugin.connection.kv.get(key_prefix,
-                                                              recurse=True)
-
-        if data is None:
-            return []
+        # Retrieve the list of all records with the given key prefix
+        data = storage.plugin.get_kvs(key_prefix)
 
         # Prepare a list of all the records 'Value' field
-        records = [str_to_dict(record['Value']) for record in data]
+        records = [str_to_dict(value) for value in data.itervalues()]
 
         return records
 
@@ -208,7 +208,7 @@ class IPsecEnforcerInfo(object):
 
         key_prefix = consul_key_join(relation_name, ipsecenforcer_id)
 
-        storage.plugin.connection.kv.delete(key_prefix, recurse=True)
+        storage.plugin.delete_kv(key_prefix, recurse=True)
 
     @staticmethod
     def put_vpnendpoint_to_ipsecenforcer_fqdn_map(vpnendpoint_id,
@@ -256,17 +256,11 @@ class IPsecEnforcerInfo(object):
                 RELATION_VPNENDPOINT_IPSECENFORCER_FQDN_MAP,
                 vpnendpoint_id)
 
-        # Retrieve the list of all records from Consul
-        # Note : 'recurse=True' option fetches all the record with the
-        # given key prefix
-        consul_index, data = storage.plugin.connection.kv.get(key_prefix,
-                                                              recurse=True)
-
-        if data is None:
-            return []
+        # Retrieve the list of all records with the given key prefix
+        data = storage.plugin.get_kvs(key_prefix)
 
         # Prepare a list of all the records 'Value' field
-        records = [str_to_dict(record['Value']) for record in data]
+        records = [str_to_dict(value) for value in data.itervalues()]
 
         LOG.debug(_("Fetched map of VPNEndpoint %s with IPsecEnforcer id & "
                     "FQDN" % vpnendpoint_id))
@@ -290,65 +284,120 @@ class IPsecEnforcerInfo(object):
         LOG.info(_("Deleted map of VPNEndpoint %s with IPsecEnforcer FQDN %s" %
                    (vpnendpoint_id, fqdn)))
 
-    def increment_ipsecenforcer_config_version(self, ipsecenforcer_id):
-        """Store the IPsecEnforcer FQDN and the corresponding
-         VPNEndpoint mapping
+    def update_ipsecenforcer_config_version(self, ipsecenforcer_id,
+                                            config_hash):
+        """Increment the IPsecEnforcer config version if the hash of the
+        configuration changed
+
+        The hash is stored with the config version. The lock is taken
+        only when the configuration changed.
 
         Args:
             ipsecenforcer_id (str) : id of IPsecEnforcer
+            config_hash (str): hash of the IPsecEnforcer configuration
 
         Returns:
-            str : version number of IPsecEnforcer config
+            tuple : version number of IPsecEnforcer config and True if
+                the version is incremented
         """
+        config_version = self.get_ipsecenforcer_config_version(
+                ipsecenforcer_id)
+
+        if config_version and config_version['hash'] == config_hash:
+            return config_version['version'], False
+
         key = consul_key_join(RELATION_IPSECENFORCER_CONFIG_VERSION,
                               ipsecenforcer_id)
 
-        session_id = storage.plugin.create_session()
+        session_id = storage.plugin.create_session(
+                RELATION_IPSECENFORCER_CONFIG_VERSION,
+                ipsecenforcer_id)
         try:
-            config_version = self._get_ipsecenforcer_config_version(
+            # The configuration could be updated by another request
+            # before acquiring the lock
+            config_version = self.get_ipsecenforcer_config_version(
                     ipsecenforcer_id)
 
-            # Always increment the config version by 1
+            if config_version and config_version['hash'] == config_hash:
+                return config_version['version'], False
+
             if config_version is None:
-                config_version = 1
+                version = 1
             else:
-                config_version = int(config_version) + 1
+                version = config_version['version'] + 1
+
+            value = {
+                'version': version,
+                'hash': config_hash
+            }
 
-            storage.plugin.put_kv(key, str(config_version))
+            storage.plugin.put_kv(key, str(value))
 
         finally:
             storage.plugin.destroy_session(session_id)
 
         LOG.info(_("Incremented config version of IPsecEnforcer id %s "
-                   "and config version %s" % (ipsecenforcer_id, config_version)
-                   ))
+                   "and config version %s" % (ipsecenforcer_id, version)))
 
-        return config_version
+        return version, True
 
     @staticmethod
-    def _get_ipsecenforcer_config_version(ipsecenforcer_id):
-        """Fetch IPsecEnforcer FQDN list for a given VPNEndpoint
+    def get_ipsecenforcer_config_version(ipsecenforcer_id):
+        """Fetch the config version of IPsecEnforcer
 
         Args:
             ipsecenforcer_id (str): id of IPsecEnforcer
 
         Returns:
-            str : version number of IPsecEnforcer config
+            dict : version number(int) and hash(str) of IPsecEnforcer
+                config
             None : if no config version exists
         """
         key = consul_key_join(RELATION_IPSECENFORCER_CONFIG_VERSION,
                               ipsecenforcer_id)
 
-        config_version = storage.plugin.get_kv(key)
+        value = storage.plugin.get_kv(key)
 
-        if config_version is None:
+        if value is None:
             LOG.debug(_("Fetched config version of IPsecEnforcer id %s with "
                         "value 'None'" % ipsecenforcer_id))
-        else:
-            LOG.debug(_("Fetched config version of IPsecEnforcer id %s with "
-                        "value %s" % (ipsecenforcer_id, config_version)))
+            return None
+
+        LOG.debug(_("Fetched config version of IPsecEnforcer id %s with "
+                    "value %s" % (ipsecenforcer_id, value)))
+
+        return _parse_config_version(value)
+
+    @staticmethod
+    def wait_ipsecenforcer_config_version(ipsecenforcer_id, config_version,
+                                          timeout):
+        """Wait until the config version of IPsecEnforcer is newer than
+        the given config version
+
+        Args:
+            ipsecenforcer_id (str): id of IPsecEnforcer
+            config_version (int): config version known to the caller
+            timeout (float): Maximum time(seconds) to wait
+
+        Returns:
+            int : config version of IPsecEnforcer(0 if no config version
+                exists), which is the given config version or older if
+                the wait timed out
+        """
+        key = consul_key_join(RELATION_IPSECENFORCER_CONFIG_VERSION,
+                              ipsecenforcer_id)
+        deadline = time.time() + timeout
+
+        value = storage.plugin.get_kv(key)
+        while True:
+            current = _parse_config_version(value)
+            version = current['version'] if current else 0
 
-        return config_version
+            remaining = deadline - time.time()
+            if version > config_version or remaining <= 0:
+                return version
+
+            value = storage.plugin.wait_kv(key, value, remaining)
 
     @staticmethod
     def delete_ipsecenforcer_config_version(ipsecenforcer_id):
@@ -367,64 +416,85 @@ class IPsecEnforcerInfo(object):
         storage.plugin.delete_kv(key)
 
 
-class HeartbeatMissOfIPsecEnforcer(object):
-    """Store the Heartbeat miss count for an IPsecEnforcer"""
+def _parse_config_version(value):
+    """Parse the stored config version of IPsecEnforcer
 
-    relation = 'heartbeat_miss_ipsecenforcer'
+    Args:
+        value (str): stored config version, or None
 
-    @classmethod
-    def put_heartbeat_miss_count(cls, ipsecenforcer_id, fqdn, count):
-        """Store the Heartbeat Miss record for IPsecEnforcer
+    Returns:
+        dict : version number(int) and hash(str) of IPsecEnforcer config
+        None : if no config version exists
+    """
+    if value is None:
+        return None
 
-        Args:
-            ipsecenforcer_id (str): id of IPsecEnforcer
-            fqdn (str): FQDN of IPsecEnforcer
-            count (int): Heartbeat Miss count
-        """
-        key = consul_key_join(cls.relation, ipsecenforcer_id, fqdn)
+    config_version = str_to_dict(value)
 
-        value = str(count)
+    # Config version stored without the hash
+    if isinstance(config_version, int):
+        config_version = {'version': config_version, 'hash': None}
 
-        storage.plugin.put_kv(key, value)
+    return config_version
+
+
+class HeartbeatMissOfIPsecEnforcer(object):
+    """Store the Heartbeat miss counts of the IPsecEnforcers
 
-        LOG.info(_("Stored Heartbeat Miss count of IPsecEnforcer id %s with "
-                   "FQDN %s" % (ipsecenforcer_id, fqdn)))
+    The counts of all the IPsecEnforcers are stored as a single value, so
+    that the health check reads and stores them with one request. Only
+    the IPsecEnforcers missing the heartbeat have a count. The value also
+    holds the expiry times of the heartbeats sent by the IPsecEnforcers,
+    and the time it was stored.
+    """
+
+    key = 'heartbeat_miss_ipsecenforcer'
 
     @classmethod
-    def get_heartbeat_miss_count(cls, ipsecenforcer_id, fqdn):
-        """Fetch the Heartbeat Miss count for IPsecEnforcer
+    def put_heartbeat_miss_counts(cls, counts, expiry_times=None):
+        """Store the Heartbeat Miss counts of the IPsecEnforcers
 
         Args:
-            ipsecenforcer_id (str): id of IPsecEnforcer
-            fqdn (str): FQDN of IPsecEnforcer
+            counts (dict): Heartbeat Miss count per IPsecEnforcer id
+            expiry_times (dict): heartbeat expiry time per IPsecEnforcer
+                id
+        """
+        value = {'counts': counts,
+                 'expiry_times': expiry_times or {},
+                 'time': time.time()}
+        storage.plugin.put_kv(cls.key, str(value))
+
+        LOG.info(_("Stored Heartbeat Miss counts of %d IPsecEnforcer(s)" %
+                   len(counts)))
+
+    @classmethod
+    def get_heartbeat_checkpoint(cls):
+        """Fetch the Heartbeat Miss counts and the heartbeat expiry times
+        of the IPsecEnforcers
 
         Returns:
-            int: Heartbeat Miss count of IPsecEnforcer
+            dict: 'counts' and 'expiry_times' per IPsecEnforcer id, and
+                'time' they were stored, None if they were never stored
         """
-        key = consul_key_join(cls.relation, ipsecenforcer_id, fqdn)
+        value = storage.plugin.get_kv(cls.key)
 
-        # Fetch the Heartbeat Backoff Count
-        count = storage.plugin.get_kv(key)
+        if value is None:
+            return {'counts': {}, 'expiry_times': {}, 'time': None}
 
-        if count is None:
-            return 0
+        checkpoint = str_to_dict(value)
 
-        LOG.debug(_("Fetched Heartbeat Miss count %s of IPsecEnforcer id %s "
-                    "with FQDN %s" % (count, ipsecenforcer_id, fqdn)))
+        # Value stored before the expiry times were, with only the counts
+        if not isinstance(checkpoint.get('counts'), dict):
+            checkpoint = {'counts': checkpoint, 'expiry_times': {},
+                          'time': None}
 
-        return int(count)
+        return checkpoint
 
     @classmethod
-    def delete_heartbeat_miss_count(cls, ipsecenforcer_id, fqdn):
-        """Delete the Heartbeat Miss record for IPsecEnforcer
+    def get_heartbeat_miss_counts(cls):
+        """Fetch the Heartbeat Miss counts of the IPsecEnforcers
 
-        Args:
-            ipsecenforcer_id (str): id of IPsecEnforcer
-            fqdn (str): FQDN of IPsecEnforcer
+        Returns:
+            dict: Heartbeat Miss count per IPsecEnforcer id
         """
-        key = consul_key_join(cls.relation, ipsecenforcer_id, fqdn)
-
-        LOG.info(_("Deleted Heartbeat Miss record of IPsecEnforcer id %s with "
-                   "FQDN %s" % (ipsecenforcer_id, fqdn)))
-
-        storage.plugin.delete_kv(key)
\ No newline at end of file
+        return cls.get_heartbeat_checkpoint()['counts']
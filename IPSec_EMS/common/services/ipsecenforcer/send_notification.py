@@ -13,23 +13,40 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-"""HTTP Notification to IPsecEnforcer"""
+"""Notification of the IPsecEnforcers of their configuration changes"""
 
-import httplib as http_status_code
+from collections import Counter
 import logging
-
-import requests
+from multiprocessing.pool import ThreadPool
+import time
 
 from django.utils.translation import ugettext as _
 
+from services.ipsecenforcer.prepare_vpn_configuration import (
+    IPsecEnforcerConfig
+)
 from services.ipsecenforcer.register_deregister import IPsecEnforcerInfo
 
 LOG = logging.getLogger(__name__)
 
 IPSECENFORCER_PORT = 8001
 
+# Maximum number of IPsecEnforcers notified at a time
+NOTIFY_CONCURRENCY = 50
+
+# Outcomes of the notification of an IPsecEnforcer
+NOTIFIED = 'notified'
+UNCHANGED = 'unchanged'
+FAILED = 'failed'
+
 
 class IPsecEnforcerNotify(object):
+    # Fan-out of the notifications, created on the first notification
+    fanout = None
+
+    # VPNEndpoint ids to notify, while coalescing
+    pending = None
+
     @classmethod
     def vpnbind_endpoints_update(cls, vpnendpoint_id, peer_vpnendpoint_id):
         """Notify all the IPsecEnforcer(s) corresponding to both
@@ -39,76 +56,95 @@ class IPsecEnforcerNotify(object):
             vpnendpoint_id (str): id of VPNEndpoint record
             peer_vpnendpoint_id (str): id of Peer VPNEndpoint record
         """
-        LOG.debug(_("Notify VPNEndpoint %s of VPNBIND") % vpnendpoint_id)
-        cls.notify_ipsecenforcers_of_vpnendpoint(vpnendpoint_id)
-
-        LOG.debug(_("Notify Peer-VPNEndpoint %s of VPNBIND") %
-                  peer_vpnendpoint_id)
-        cls.notify_ipsecenforcers_of_vpnendpoint(peer_vpnendpoint_id)
+        LOG.debug(_("Notify VPNEndpoint %s and Peer-VPNEndpoint %s of "
+                    "VPNBIND") % (vpnendpoint_id, peer_vpnendpoint_id))
+        cls.notify_ipsecenforcers_of_vpnendpoint(vpnendpoint_id,
+                                                 peer_vpnendpoint_id)
 
     @classmethod
-    def notify_ipsecenforcers_of_vpnendpoint(cls, vpnendpoint_id):
-        """Notify all the IPsecEnforcer(s) of the VPNEndpoint record
+    def notify_ipsecenforcers_of_vpnendpoint(cls, *vpnendpoint_ids):
+        """Notify all the IPsecEnforcer(s) of the VPNEndpoint record(s)
+
+        While coalescing, the VPNEndpoint(s) are only added to the
+        pending VPNEndpoint(s).
 
         Args:
-            vpnendpoint_id (str): ID of VPNEndpoint record
+            *vpnendpoint_ids (str): ID(s) of VPNEndpoint record
+
+        Returns:
+            NotificationStats: completion stats of the notification, or
+                None while coalescing
+        """
+        if cls.pending is not None:
+            cls.pending.update(vpnendpoint_ids)
+            return None
+
+        return cls.notify_vpnendpoints(Counter(vpnendpoint_ids))
+
+    @classmethod
+    def start_coalescing(cls):
+        """Collect the VPNEndpoint(s) to notify, until stop_coalescing()
+        """
+        cls.pending = Counter()
+
+    @classmethod
+    def stop_coalescing(cls):
+        """Stop collecting the VPNEndpoint(s) to notify
+
+        Returns:
+            Counter: number of notifications per VPNEndpoint id,
+                collected since start_coalescing()
         """
-        # Fetch all the  IPsecEnforcers that belong to VPNEndpoint record
-        ipsecenforcers_fqdn_id = (
-            IPsecEnforcerInfo().get_vpnendpoint_to_ipsecenforcer_and_fqdn_list(
-                    vpnendpoint_id)
-        )
-
-        # Remove duplicates to make sure that each IPsecEnforcer will receive a
-        # single notification
-        ipsecenforcers_fqdn_id = {v['fqdn']: v for v in
-                                  ipsecenforcers_fqdn_id}.values()
-        map(cls.notify_ipsecenforcers, ipsecenforcers_fqdn_id)
+        pending, cls.pending = cls.pending, None
+        return pending
 
     @classmethod
-    def notify_ipsecenforcers(cls, ipsecenforcer_fqdn_id):
-        """Notify all the IPsecEnforcer(s)
+    def notify_vpnendpoints(cls, vpnendpoint_counts):
+        """Notify the IPsecEnforcer(s) of the VPNEndpoint(s), once per
+        IPsecEnforcer
 
         Args:
-            ipsecenforcer_fqdn_id (dict): IPsecEnforcer (FQDN & id)
+            vpnendpoint_counts (Counter): number of notifications per
+                VPNEndpoint id
+
+        Returns:
+            NotificationStats: completion stats of the notification
         """
-        ipsecenforcer_fqdn = ipsecenforcer_fqdn_id['fqdn']
-        ipsecenforcer_id = ipsecenforcer_fqdn_id['ipsecenforcer_id']
+        # Fetch all the IPsecEnforcers that belong to VPNEndpoint records.
+        # Each IPsecEnforcer will receive a single notification.
+        ipsecenforcers_fqdn_id = {}
+        requested = 0
+        for vpnendpoint_id, count in vpnendpoint_counts.items():
+            fqdn_id_list = (
+                IPsecEnforcerInfo()
+                .get_vpnendpoint_to_ipsecenforcer_and_fqdn_list(
+                        vpnendpoint_id)
+            )
+            requested += count * len(fqdn_id_list)
+            for fqdn_id in fqdn_id_list:
+                ipsecenforcers_fqdn_id[fqdn_id['ipsecenforcer_id']] = fqdn_id
 
-        try:
-            # Send a HTTP GET request to each IPsecEnforcer
-            response = requests.get(cls.prepare_url(
-                       ipsecenforcer_fqdn,
-                       ipsecenforcer_id
-            ))
-            if response.status_code == http_status_code.OK:
-                LOG.info(_("Successfully notified %s(FQDN: %s)" %
-                        (ipsecenforcer_id, ipsecenforcer_fqdn)))
-            else:
-                LOG.info(_("Failed to notify %s(FQDN: %s)" %
-                        (ipsecenforcer_id, ipsecenforcer_fqdn)))
+        if cls.fanout is None:
+            cls.fanout = IPsecEnforcerFanOut()
 
-        except requests.exceptions.ConnectionError:
-            LOG.info(_("Failed to notify %s(FQDN: %s)" %
-                           (ipsecenforcer_id, ipsecenforcer_fqdn)))
-            pass
+        stats = cls.fanout.notify(ipsecenforcers_fqdn_id.values())
+        stats.requested = requested
+        LOG.info(_("Notification of VPNEndpoint(s) %s: %s" %
+                   (', '.join(vpnendpoint_counts), stats)))
+        return stats
 
     @classmethod
-    def prepare_url(cls, fqdn, ipsecenforcer_id, url_endpoint='configupdate'):
+    def prepare_url(cls, fqdn, ipsecenforcer_id, url_endpoint):
         """Prepare the URL of the IPsecEnforcer for a particular
         endpoint
 
-        'configupdate' is a REST endpoint for config
-            registration/update/deletion on IPsecEnforcer webservice.
-
-        'healthcheck' is a REST endpoint for heartbeat message
+        'heartbeat' is a REST endpoint for heartbeat message
             (or healthcheck) on IPsecEnforcer webservice.
 
         Args:
             fqdn (str): FQDN of IPsecEnforcer
             ipsecenforcer_id (str): ID of IPsecEnforcer
-            url_endpoint (str): name of endpoint
-                (e.g. configupdate, healthcheck, etc.)
+            url_endpoint (str): name of endpoint(e.g. heartbeat)
 
         Returns:
             str: Complete endpoint URL for IPsecEnforcer health check
@@ -123,3 +159,114 @@ class IPsecEnforcerNotify(object):
                                                           ipsecenforcer_id)
         LOG.debug(_("Prepared URL %s" % url))
         return url
+
+
+class NotificationStats(object):
+    """Completion stats of the notification of a set of
+    IPsecEnforcers"""
+
+    def __init__(self):
+        # Notifications requested per IPsecEnforcer, before removing the
+        # duplicates, and IPsecEnforcers notified
+        self.requested = 0
+        self.total = 0
+        self.notified = 0
+        self.unchanged = 0
+        self.failed = 0
+        self.elapsed = 0
+
+    def __str__(self):
+        return ("%d IPsecEnforcer(s) in %.2f seconds: %d notified, "
+                "%d unchanged, %d failed" %
+                (self.total, self.elapsed, self.notified, self.unchanged,
+                 self.failed))
+
+
+class IPsecEnforcerFanOut(object):
+    """Notify a set of IPsecEnforcers in parallel
+
+    The configuration of every IPsecEnforcer is prepared, which
+    publishes its config version when the configuration changed. The
+    IPsecEnforcer agents long-poll IPsec EMS for their config version,
+    so publishing it is the notification, and IPsec EMS doesn't connect
+    to the IPsecEnforcers e.g. behind a NAT. The configurations are
+    prepared by a pool of threads, which overlap their storage reads.
+    """
+
+    def __init__(self, concurrency=NOTIFY_CONCURRENCY):
+        """
+        Args:
+            concurrency (int): maximum number of IPsecEnforcers notified
+                at a time
+        """
+        self.pool = ThreadPool(concurrency)
+
+    def notify(self, ipsecenforcers_fqdn_id):
+        """Notify the IPsecEnforcers, and wait for the completion of all
+        the notifications
+
+        Args:
+            ipsecenforcers_fqdn_id (list): IPsecEnforcers (FQDN & id)
+
+        Returns:
+            NotificationStats: completion stats of the notification
+        """
+        stats = NotificationStats()
+        start_time = time.time()
+
+        # One IPsecEnforcer per task, so that a large configuration does
+        # not hold up the others of its chunk
+        for outcome in self.pool.imap_unordered(self.notify_ipsecenforcer,
+                                                ipsecenforcers_fqdn_id):
+            setattr(stats, outcome, getattr(stats, outcome) + 1)
+
+        stats.total = len(ipsecenforcers_fqdn_id)
+        stats.elapsed = time.time() - start_time
+        return stats
+
+    def notify_ipsecenforcer(self, ipsecenforcer_fqdn_id):
+        """Publish the configuration of the IPsecEnforcer
+
+        Args:
+            ipsecenforcer_fqdn_id (dict): IPsecEnforcer (FQDN & id)
+
+        Returns:
+            str: outcome, NOTIFIED if the config version is published,
+                UNCHANGED or FAILED
+        """
+        ipsecenforcer_fqdn = ipsecenforcer_fqdn_id['fqdn']
+        ipsecenforcer_id = ipsecenforcer_fqdn_id['ipsecenforcer_id']
+
+        try:
+            config_changed = self.publish_config(ipsecenforcer_id)
+        except Exception:
+            LOG.exception(_("Failed to prepare the configuration of %s"
+                            "(FQDN: %s)" %
+                            (ipsecenforcer_id, ipsecenforcer_fqdn)))
+            return FAILED
+
+        if not config_changed:
+            LOG.debug(_("Configuration of %s(FQDN: %s) unchanged" %
+                        (ipsecenforcer_id, ipsecenforcer_fqdn)))
+            return UNCHANGED
+
+        LOG.info(_("Published the configuration of %s(FQDN: %s)" %
+                   (ipsecenforcer_id, ipsecenforcer_fqdn)))
+        return NOTIFIED
+
+    @staticmethod
+    def publish_config(ipsecenforcer_id):
+        """Prepare the configuration of the IPsecEnforcer
+
+        Updating the config version completes the blocking requests of
+        the IPsecEnforcer.
+
+        Args:
+            ipsecenforcer_id (str): id of IPsecEnforcer
+
+        Returns:
+            bool: True if the configuration changed
+        """
+        ipsecenforcer_config = IPsecEnforcerConfig()
+        ipsecenforcer_config.prepare_ipsec_enforcer_config(ipsecenforcer_id)
+        return ipsecenforcer_config.config_changed
@@ -0,0 +1,35 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from __future__ import unicode_literals
+from django.core.management.base import BaseCommand
+from django.utils.translation import ugettext as _
+
+from services.api.views_resource import RESOURCES
+
+
+class Command(BaseCommand):
+    help = ("Rebuild the secondary indexes of the VPN resources, e.g. for "
+            "the records stored before a secondary key is added")
+
+    def handle(self, *args, **options):
+        for resource_name, resource_class, serializer in RESOURCES.values():
+            # Storing a record writes all its secondary index records
+            records = resource_class.all()
+            for record in records:
+                record.save()
+
+            print _("Reindexed %d %s record(s)") % (len(records),
+                                                    resource_class.resource_name)
@@ -20,7 +20,7 @@ import os
 import sys
 from itertools import izip_longest
 from operator import itemgetter
-from urlparse import urljoin
+from urlparse import parse_qs, urljoin, urlparse
 
 from prettytable import PrettyTable
 from requests.auth import HTTPBasicAuth
@@ -33,6 +33,10 @@ from vpnclient.http_client import HTTPClient
 
 URL_SEP = '/'
 
+# Records per request of the bulk-create commands, at most the
+# BULK_MAX_ITEMS of the server
+BULK_SIZE = 1000
+
 
 class CommandManager:
     """Command Manager constructs the http request to be sent to EMS
@@ -98,7 +102,7 @@ class CommandManager:
         # Header Authentication token OR username:password
         if argparse.get('auth_strategy') is 'token':
 
-            self.http_request['headers'] = (
+            self.http_request['headers'].update(
                 {
                     'Authorization': 'Token ' + argparse.get('token')
                 }
@@ -143,7 +147,7 @@ class CommandManager:
                 print("Specified field(s) list {0} must be a subset"
                       "of the resource field's list {1}".format(self.fields,
                                                                 self.column))
-            sys.exit(0)
+                sys.exit(0)
 
         # List of column/field to on the basis to sort records the output
         self.sort_key = argparse.get('sort_key')
@@ -161,6 +165,21 @@ class CommandManager:
                                                          self.column))
                 sys.exit(0)
 
+        # Equality filters(FIELD=VALUE) on the secondary keys, and the
+        # page(limit and marker) of the list, applied by the server
+        self.filters = {}
+        for list_filter in argparse.get('filters') or []:
+            field, sep, value = list_filter.partition('=')
+            if not sep or field not in self.column:
+                print("Specified filter {0} must be FIELD=VALUE, FIELD "
+                      "in the resource field's list {1}".format(list_filter,
+                                                                self.column))
+                sys.exit(0)
+            self.filters[field] = value
+
+        self.limit = argparse.get('limit')
+        self.marker = argparse.get('marker')
+
         # Get the output formatter type(e.g. csv, html and table)
         self.formatter = argparse.get('formatter')
         # Except the list commands
@@ -225,11 +244,81 @@ class CommandManager:
             attributes (dict): HTTP Request attributes
         """
         self.http_request['method'] = 'GET'
+        self.http_request['params'] = self._prepare_list_params()
 
         self.response = HTTPClient.send_request(**self.http_request)
 
         self._check_status_and_print_http_response(http_status_code.OK)
 
+        # The server links the next page if the list is truncated
+        if (self.response is not None and
+                self.response.status_code == http_status_code.OK and
+                'next' in self.response.links):
+            next_query = urlparse(self.response.links['next']['url']).query
+            print("Next marker: {0}".format(
+                    parse_qs(next_query).get('marker', [''])[0]))
+
+    def _prepare_list_params(self):
+        """Prepare the query parameters of the LIST commands
+
+        The server projects the requested fields(and the sort keys,
+        sorted by the client), and filters the records. A page of
+        records is sorted by the server, per the first sort key and
+        sort direction only.
+
+        Returns:
+            dict: query parameters
+        """
+        params = dict(self.filters)
+
+        if self.fields:
+            params['fields'] = ','.join(self.fields + (self.sort_key or []))
+
+        if self.limit is not None or self.marker:
+            if self.limit is not None:
+                params['limit'] = self.limit
+            if self.marker:
+                params['marker'] = self.marker
+            if self.sort_key:
+                params['sort_key'] = self.sort_key[0]
+                if self.sort_direction:
+                    params['sort_dir'] = self.sort_direction[0]
+
+        return params
+
+    def bulk(self, records):
+        """Handles the BULK-CREATE commands
+
+        The records are sent in requests of at most BULK_SIZE records.
+
+        Args:
+            records (list of dict): records to create
+        """
+        self.http_request['method'] = 'POST'
+        self.http_request['url'] += 'bulk' + URL_SEP
+
+        table = PrettyTable(['index', 'status', 'id', 'errors'])
+        for start in range(0, len(records), BULK_SIZE):
+            self.http_request['data'] = json.dumps(
+                    records[start:start + BULK_SIZE])
+
+            self.response = HTTPClient.send_request(**self.http_request)
+
+            if self.response is None:
+                return
+            if self.response.status_code not in (
+                    http_status_code.OK, http_status_code.MULTI_STATUS):
+                self._handle_http_unsuccessful_response(self.response)
+                return
+
+            for index, result in enumerate(self.response.json(), start):
+                table.add_row([index,
+                               result['status'],
+                               result.get('data', {}).get('id', ' '),
+                               json.dumps(result.get('errors', ''))])
+
+        self._print_table_or_html(table)
+
     def update(self, attributes):
         """Handles the UPDATE commands
 
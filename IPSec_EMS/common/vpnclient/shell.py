@@ -54,6 +54,8 @@ COMMAND_V1 = {
         vpnbindlocalsitetolocalsite.ShowVPNBindLocalSiteToLocalSite,
     'vpn-bindlocalsitetolocalsite-create':
         vpnbindlocalsitetolocalsite.CreateVPNBindLocalSiteToLocalSite,
+    'vpn-bindlocalsitetolocalsite-bulk-create':
+        vpnbindlocalsitetolocalsite.BulkCreateVPNBindLocalSiteToLocalSite,
     'vpn-bindlocalsitetolocalsite-update':
         vpnbindlocalsitetolocalsite.UpdateVPNBindLocalSiteToLocalSite,
     'vpn-bindlocalsitetolocalsite-delete':
@@ -65,6 +67,8 @@ COMMAND_V1 = {
         vpnbindlocalsitetoremotesite.ShowVPNBindLocalSiteToRemoteSite,
     'vpn-bindlocalsitetoremotesite-create':
         vpnbindlocalsitetoremotesite.CreateVPNBindLocalSiteToRemoteSite,
+    'vpn-bindlocalsitetoremotesite-bulk-create':
+        vpnbindlocalsitetoremotesite.BulkCreateVPNBindLocalSiteToRemoteSite,
     'vpn-bindlocalsitetoremotesite-update':
         vpnbindlocalsitetoremotesite.UpdateVPNBindLocalSiteToRemoteSite,
     'vpn-bindlocalsitetoremotesite-delete':
@@ -76,6 +80,8 @@ COMMAND_V1 = {
         vpnbindgrouptogroup.ShowVPNBindGroupToGroup,
     'vpn-bindgrouptogroup-create':
         vpnbindgrouptogroup.CreateVPNBindGroupToGroup,
+    'vpn-bindgrouptogroup-bulk-create':
+        vpnbindgrouptogroup.BulkCreateVPNBindGroupToGroup,
     'vpn-bindgrouptogroup-update':
         vpnbindgrouptogroup.UpdateVPNBindGroupToGroup,
     'vpn-bindgrouptogroup-delete':
@@ -109,6 +115,8 @@ COMMAND_V1 = {
         vpnendpointlocalsite.ShowVPNEndpointLocalSite,
     'vpn-endpointlocalsite-create':
         vpnendpointlocalsite.CreateVPNEndpointLocalSite,
+    'vpn-endpointlocalsite-bulk-create':
+        vpnendpointlocalsite.BulkCreateVPNEndpointLocalSite,
     'vpn-endpointlocalsite-update':
         vpnendpointlocalsite.UpdateVPNEndpointLocalSite,
     'vpn-endpointlocalsite-delete':
@@ -120,6 +128,8 @@ COMMAND_V1 = {
         vpnendpointgroup.ShowVPNEndpointGroup,
     'vpn-endpointgroup-create':
         vpnendpointgroup.CreateVPNEndpointGroup,
+    'vpn-endpointgroup-bulk-create':
+        vpnendpointgroup.BulkCreateVPNEndpointGroup,
     'vpn-endpointgroup-update':
         vpnendpointgroup.UpdateVPNEndpointGroup,
     'vpn-endpointgroup-delete':
@@ -131,6 +141,8 @@ COMMAND_V1 = {
         vpnendpointremotesite.ShowVPNEndpointRemoteSite,
     'vpn-endpointremotesite-create':
         vpnendpointremotesite.CreateVPNEndpointRemoteSite,
+    'vpn-endpointremotesite-bulk-create':
+        vpnendpointremotesite.BulkCreateVPNEndpointRemoteSite,
     'vpn-endpointremotesite-update':
         vpnendpointremotesite.UpdateVPNEndpointRemoteSite,
     'vpn-endpointremotesite-delete':
@@ -153,6 +165,8 @@ COMMAND_V1 = {
         ikepolicy.ShowIKEPolicy,
     'vpn-ikepolicy-create':
         ikepolicy.CreateIKEPolicy,
+    'vpn-ikepolicy-bulk-create':
+        ikepolicy.BulkCreateIKEPolicy,
     'vpn-ikepolicy-update':
         ikepolicy.UpdateIKEPolicy,
     'vpn-ikepolicy-delete':
@@ -164,6 +178,8 @@ COMMAND_V1 = {
         ipsecpolicy.ShowIPsecPolicy,
     'vpn-ipsecpolicy-create':
         ipsecpolicy.CreateIPsecPolicy,
+    'vpn-ipsecpolicy-bulk-create':
+        ipsecpolicy.BulkCreateIPsecPolicy,
     'vpn-ipsecpolicy-update':
         ipsecpolicy.UpdateIPsecPolicy,
     'vpn-ipsecpolicy-delete':
@@ -0,0 +1,98 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import argparse
+import csv
+import json
+import sys
+
+from vpnclient.utils import FH
+
+
+class BulkCreateCommand(object):
+    """Arguments and input of the bulk-create commands
+
+    The records are read from a JSON file(an array of records) or a CSV
+    file(a header row with the field names, then a row per record). A
+    CSV value in the JSON format, e.g. ["aes128", "aes256"] or 3600, is
+    decoded, other values are strings. Empty CSV values are omitted.
+    """
+
+    @classmethod
+    def add_args(cls, parser):
+        parser.add_argument(
+            'file',
+            metavar='FILE',
+            nargs='?',
+            default='-',
+            help=FH(_("JSON or CSV file of the records to create, the \n"
+                      "standard input by default")))
+
+        parser.add_argument(
+            '--input-format',
+            choices=['json', 'csv'],
+            help=FH(_("Format of the file. Default: csv for a .csv \n"
+                      "file, else json")))
+
+        return parser
+
+    @staticmethod
+    def read_records(parsed_args):
+        """Read the records of a bulk-create command
+
+        Args:
+            parsed_args (dict): Parsed arguments of the command
+
+        Returns:
+            list of dict: records
+
+        Raises:
+            argparse.ArgumentTypeError: If the file is not valid
+        """
+        file_name = parsed_args.get('file') or '-'
+        input_format = parsed_args.get('input_format')
+        if input_format is None:
+            input_format = 'csv' if file_name.endswith('.csv') else 'json'
+
+        input_file = sys.stdin if file_name == '-' else open(file_name)
+        try:
+            if input_format == 'csv':
+                records = [
+                    dict((field, _decode_csv_value(value))
+                         for field, value in row.iteritems() if value)
+                    for row in csv.DictReader(input_file)]
+            else:
+                records = json.load(input_file)
+        except ValueError as e:
+            raise argparse.ArgumentTypeError(
+                    _("Invalid {0} file {1}: {2}").format(input_format,
+                                                          file_name, e))
+        finally:
+            if input_file is not sys.stdin:
+                input_file.close()
+
+        if (not isinstance(records, list) or
+                not all(isinstance(record, dict) for record in records)):
+            raise argparse.ArgumentTypeError(
+                    _("{0} must contain a list of records").format(file_name))
+
+        return records
+
+
+def _decode_csv_value(value):
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
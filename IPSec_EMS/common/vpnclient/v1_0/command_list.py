@@ -59,6 +59,34 @@ class ListCommand(object):
             default=[],
             choices=['asc', 'desc'])
 
+        parser.add_argument(
+            '--filter',
+            dest='filters',
+            metavar='FIELD=VALUE',
+            help=FH(_(
+                   "List only the records with the specified value of the \n"
+                   "field. The field must be a secondary key of the \n"
+                   "resource. You can repeat this option.")),
+            action='append',
+            default=[])
+
+        parser.add_argument(
+            '--limit',
+            metavar='LIMIT',
+            type=int,
+            help=FH(_(
+                   "Maximum number of records to be listed. The records \n"
+                   "are sorted by the server per the first sort_key and \n"
+                   "sort_direction.")))
+
+        parser.add_argument(
+            '--marker',
+            metavar='ID',
+            help=FH(_(
+                   "List the records after the record with the specified \n"
+                   "id, e.g. the id printed as the next marker by the \n"
+                   "previous list command.")))
+
         formatter_group = parser.add_argument_group(
             title='output formatters',
             description='output formatter options')
@@ -16,6 +16,7 @@
 import argparse
 
 from vpnclient.utils import FH
+from vpnclient.v1_0.command_bulk import BulkCreateCommand
 from vpnclient.v1_0.command_list import ListCommand
 from vpnclient.v1_0.command_resource import CommandResource
 from vpnclient.v1_0.vpn.utils_vpn import (
@@ -252,6 +253,20 @@ class ListIKEPolicy(CommandResource):
         return ListCommand.add_args(parser)
 
 
+class BulkCreateIKEPolicy(CommandResource):
+    """Create IKEPolicies from a JSON or CSV file"""
+    resource = 'ikepolicy'
+    cmd_columns = _COMMAND_COLUMNS
+    http_resource = _HTTP_RESOURCE
+
+    @staticmethod
+    def add_known_arguments(parser):
+        return BulkCreateCommand.add_args(parser)
+
+    def argparse_to_http_dict(self, parsed_args):
+        return BulkCreateCommand.read_records(parsed_args)
+
+
 class UpdateIKEPolicy(CommandResource):
     """Update a given IKEPolicy"""
     resource = 'ikepolicy'
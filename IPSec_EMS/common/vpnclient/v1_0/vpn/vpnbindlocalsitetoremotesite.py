@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 from vpnclient.utils import FH
+from vpnclient.v1_0.command_bulk import BulkCreateCommand
 from vpnclient.v1_0.command_list import ListCommand
 from vpnclient.v1_0.command_resource import CommandResource
 from vpnclient.v1_0.vpn.utils_vpn import check_name_len
@@ -160,6 +161,20 @@ class ListVPNBindLocalSiteToRemoteSite(CommandResource):
         return ListCommand.add_args(parser)
 
 
+class BulkCreateVPNBindLocalSiteToRemoteSite(CommandResource):
+    """Create VPNBindLocalSiteToRemoteSites from a JSON or CSV file"""
+    resource = 'vpnbindlocalsitetoremotesites'
+    cmd_columns = _COMMAND_COLUMNS
+    http_resource = _HTTP_RESOURCE
+
+    @staticmethod
+    def add_known_arguments(parser):
+        return BulkCreateCommand.add_args(parser)
+
+    def argparse_to_http_dict(self, parsed_args):
+        return BulkCreateCommand.read_records(parsed_args)
+
+
 class UpdateVPNBindLocalSiteToRemoteSite(CommandResource):
     """Update a given VPNBindLocalSiteToRemoteSite"""
     resource = 'vpnbindlocalsitetoremotesites'
@@ -14,6 +14,7 @@
 #    under the License.
 
 from vpnclient.utils import FH
+from vpnclient.v1_0.command_bulk import BulkCreateCommand
 from vpnclient.v1_0.command_list import ListCommand
 from vpnclient.v1_0.command_resource import CommandResource
 from vpnclient.v1_0.vpn.utils_vpn import check_name_len, check_description_len
@@ -83,6 +84,20 @@ class ListVPNEndpointGroup(CommandResource):
         return ListCommand.add_args(parser)
 
 
+class BulkCreateVPNEndpointGroup(CommandResource):
+    """Create VPNEndpointGroups from a JSON or CSV file"""
+    resource = 'vpnendpointgroups'
+    cmd_columns = _COMMAND_COLUMNS
+    http_resource = _HTTP_RESOURCE
+
+    @staticmethod
+    def add_known_arguments(parser):
+        return BulkCreateCommand.add_args(parser)
+
+    def argparse_to_http_dict(self, parsed_args):
+        return BulkCreateCommand.read_records(parsed_args)
+
+
 class UpdateVPNEndpointGroup(CommandResource):
     """Update a given VPNEndpointGroup"""
     resource = 'vpnendpointgroups'
@@ -14,6 +14,7 @@
 #    under the License.
 
 from vpnclient.utils import FH
+from vpnclient.v1_0.command_bulk import BulkCreateCommand
 from vpnclient.v1_0.command_list import ListCommand
 from vpnclient.v1_0.command_resource import CommandResource
 from vpnclient.v1_0.vpn.utils_vpn import (
@@ -103,6 +104,20 @@ class ListVPNEndpointLocalSite(CommandResource):
         return ListCommand.add_args(parser)
 
 
+class BulkCreateVPNEndpointLocalSite(CommandResource):
+    """Create VPNEndpointLocalSites from a JSON or CSV file"""
+    resource = 'vpnendpointlocalsites'
+    cmd_columns = _COMMAND_COLUMNS
+    http_resource = _HTTP_RESOURCE
+
+    @staticmethod
+    def add_known_arguments(parser):
+        return BulkCreateCommand.add_args(parser)
+
+    def argparse_to_http_dict(self, parsed_args):
+        return BulkCreateCommand.read_records(parsed_args)
+
+
 class UpdateVPNEndpointLocalSite(CommandResource):
     """Update a given VPNEndpointLocalSite"""
     resource = 'vpnendpointlocalsites'
@@ -21,9 +21,9 @@ function install_dep {
 	echo "Installing required python packages...done"
 
 	echo "Fetching consul database exectuable..."
-    	wget --no-check-certificate https://releases.hashicorp.com/consul/0.6.4/consul_0.6.4_linux_amd64.zip
-    	unzip consul_0.6.4_linux_amd64.zip
-    	rm consul_0.6.4_linux_amd64.zip
+    	wget --no-check-certificate https://releases.hashicorp.com/consul/0.7.5/consul_0.7.5_linux_amd64.zip
+    	unzip consul_0.7.5_linux_amd64.zip
+    	rm consul_0.7.5_linux_amd64.zip
 	echo "Fetching consul database exectuable...done"
 
 	echo "Creating directories for consul database..."
@@ -0,0 +1,154 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Benchmark of the installation of the VPN configuration
+
+Measures the time and the 'ipsec' commands of the installation of a
+VPNBindGroupToGroup configuration with many connections: the first
+installation, the installation of the same configuration, of a changed
+IPsecPolicy, and of a configuration which Strongswan fails to load(and
+which is rolled back), and the peak memory of the process.
+
+The Strongswan files are written to a temporary directory, and 'ipsec'
+is a fake command which records its arguments, and fails when the
+FAKE_IPSEC_FAIL environment variable is set.
+
+Usage(from the ipsec_enforcer directory):
+$ python -m benchmarks.bench_install_config --connections 5000
+"""
+
+import argparse
+import copy
+import logging
+import os
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+
+from prettytable import PrettyTable
+
+from registration import prepare_vpn_configurations
+
+FAKE_IPSEC = """#!/bin/sh
+echo "$@" >> "%s"
+test -z "$FAKE_IPSEC_FAIL"
+"""
+
+
+def make_config(connections):
+    """VPN configuration of a VPNBindGroupToGroup between two
+    VPNEndpointGroups, with 'connections' peer IPsecEnforcers"""
+    peers = ['10.1.%d.%d' % (i // 250, i % 250 + 1)
+             for i in range(connections)]
+    vpnbind = {
+        'id': 'bind1', 'dpd_action': 'hold', 'dpd_interval': 30,
+        'dpd_timeout': 120, 'auth_mode': 'psk', 'ikepolicy_id': 'ike1',
+        'ipsecpolicy_id': 'ipsec1', 'peer': False,
+        'vpnendpointgroup_id': 'group1',
+        'peer_vpnendpointgroup_id': 'group2',
+    }
+    return {
+        'version': 1,
+        'ikepolicy': {'ike1': {
+            'ike_version': 'v2', 'encryption_algorithm': ['aes128'],
+            'integrity_algorithm': ['sha1'], 'dh_group': ['modp2048'],
+            'phase1_negotiation_mode': 'main', 'lifetime_value': 3,
+            'lifetime_units': 'hours', 'rekey': 'yes', 'reauth': 'no'}},
+        'ipsecpolicy': {'ipsec1': {
+            'encryption_algorithm': ['aes128'],
+            'integrity_algorithm': ['sha1'], 'dh_group': ['modp2048'],
+            'esn_mode': 'noesn', 'transform_protocol': 'esp',
+            'encapsulation_mode': 'tunnel', 'lifetime_value': 1,
+            'lifetime_units': 'hours'}},
+        'vpncacertificate': {},
+        'vpncertificate': {},
+        'vpnendpointgroup': {'group1': {}, 'group2': {}},
+        'vpnbind_group_to_group': {'bind1': vpnbind},
+        'fqdn_list': {'group1': ['10.0.0.1'], 'group2': peers},
+        'fqdn_pair_psk': dict(('bind1_10.0.0.1_' + peer, 'secret-' + peer)
+                              for peer in peers),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--connections', type=int, default=5000,
+                        help="Number of connections")
+    parser.add_argument('--verbose', action='store_true',
+                        help="Log the time of every installation step")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+            level=logging.INFO if args.verbose else logging.CRITICAL)
+
+    directory = tempfile.mkdtemp()
+    ipsec_log = os.path.join(directory, 'ipsec.log')
+    bin_directory = os.path.join(directory, 'bin')
+    os.mkdir(bin_directory)
+    with open(os.path.join(bin_directory, 'ipsec'), 'w') as f:
+        f.write(FAKE_IPSEC % ipsec_log)
+    os.chmod(os.path.join(bin_directory, 'ipsec'), 0o755)
+    os.environ['PATH'] = bin_directory + os.pathsep + os.environ['PATH']
+
+    prepare_vpn_configurations.IPSEC_CONF = os.path.join(directory,
+                                                         'ipsec.conf')
+    prepare_vpn_configurations.IPSEC_SECRETS = os.path.join(directory,
+                                                            'ipsec.secrets')
+    prepare_vpn_configurations.IPSEC_D = directory
+
+    config = make_config(args.connections)
+    changed_config = copy.deepcopy(config)
+    changed_config['ipsecpolicy']['ipsec1']['lifetime_value'] = 2
+
+    table = PrettyTable(['Installation', 'Seconds', 'ipsec commands',
+                         'Installed lifetime'])
+    try:
+        for name, installed_config, fail in (
+                ('First', config, False),
+                ('Unchanged', config, False),
+                ('Changed IPsecPolicy', changed_config, False),
+                ('Failed reload, rolled back', config, True)):
+            open(ipsec_log, 'w').close()
+            if fail:
+                os.environ['FAKE_IPSEC_FAIL'] = '1'
+
+            start = time.time()
+            try:
+                prepare_vpn_configurations.install_configurations(
+                        installed_config, '10.0.0.1')
+            except subprocess.CalledProcessError:
+                pass
+            elapsed = time.time() - start
+
+            os.environ.pop('FAKE_IPSEC_FAIL', None)
+            with open(ipsec_log) as f:
+                commands = ', '.join(line.strip() for line in f)
+            # The IPsecPolicy lifetime follows the IKEPolicy 'ikelifetime'
+            with open(prepare_vpn_configurations.IPSEC_CONF) as f:
+                lifetime = f.read().split('lifetime=', 2)[2].split()[0]
+            table.add_row([name, '%.2f' % elapsed, commands or '-',
+                           lifetime])
+    finally:
+        shutil.rmtree(directory)
+
+    print(table)
+    print("Peak memory: %d MB" %
+          (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -17,7 +17,6 @@ from django.conf.urls import include, url
 from django.contrib import admin
 
 from registration.api.views_heartbeat import ipsecenforcer_heartbeat
-from registration.api.views_config_update import ipsecenforcer_config_update
 
 urlpatterns = [
     url(r'^admin/', admin.site.urls),
@@ -27,8 +26,5 @@ urlpatterns = [
             url(r'^heartbeat/(?P<pk>[^/]+)/$',
                 ipsecenforcer_heartbeat,
                 name='heartbeat_detail'),
-            url(r'^configupdate/(?P<pk>[^/]+)/$',
-                ipsecenforcer_config_update,
-                name='config_update_detail'),
         ])),
 ]
@@ -1,12 +1,14 @@
-from multiprocessing.connection import Listener
 import json
+import logging
 import requests
 import socket
+import subprocess
 from collections import deque
+import threading
 
 import time
 from ipsecenforcer_utils import get_ipsec_enforcer_info, mac_for_ip, \
-    get_ipsec_tunnel_and_ems_ip
+    get_ipsec_tunnel_and_ems_ip, apply_config_delta, is_config_delta_empty
 from prepare_vpn_configurations import install_configurations
 
 IPSEC_ENFORCER_ID = None
@@ -16,8 +18,26 @@ IPSEC_EMS_CONTROLLER_FQDN_DEQUE, ENDPOINT_NAME_TYPE = get_ipsec_enforcer_info()
 IPSEC_EMS_FQDN_DEQUE = deque()
 IPSEC_EMS_REGISTRATION = 'v1/main/ipsecvpn/ipsecenforcerregistrations'
 IPSEC_EMS_POLICY_CONFIG = 'v1/main/ipsecvpn/ipsecenforcerregistrations'
+IPSEC_EMS_HEARTBEAT = 'heartbeat'
+
+# Seconds between the heartbeats sent to IPsec EMS
+HEARTBEAT_INTERVAL = 60
+HEARTBEAT_TIMEOUT = 10
+
+# Wait time of the blocking request of the configuration, IPsec EMS
+# returns the configuration as soon as the config version changes
+LONG_POLL_WAIT = 60
+LONG_POLL_TIMEOUT = (10, LONG_POLL_WAIT + 30)
 
 CONFIG_VERSION = 0
+CONFIG = {}
+CONFIG_ETAG = None
+
+# Seconds before retrying the installation of a configuration which
+# failed to install
+INSTALL_RETRY_INTERVAL = 10
+
+LOG = logging.getLogger(__name__)
 
 
 class IPsecEnforcer(object):
@@ -50,11 +70,76 @@ class IPsecEnforcer(object):
 
 class IPsecEnforcerAgent(object):
 
+    @staticmethod
+    def update_configurations(response):
+        """Install the complete VPN configuration or the changes since
+        the installed config version
+
+        Args:
+            response (dict): VPN configuration or changes received from
+                IPsec EMS
+
+        Returns:
+            bool: False if the changes are not since the installed
+                config version and the complete VPN configuration is to
+                be fetched
+
+        Raises:
+            CalledProcessError: If the configuration fails to install,
+                the installed config version is left unchanged
+            OSError: If the configuration fails to install
+        """
+        global CONFIG, CONFIG_VERSION
+
+        if 'base_version' not in response:
+            config = response
+        elif response['base_version'] == CONFIG_VERSION:
+            config = apply_config_delta(CONFIG, response)
+        else:
+            CONFIG_VERSION = 0
+            return False
+
+        if 'base_version' not in response or not is_config_delta_empty(
+                response):
+            install_configurations(config, IPSEC_ENFORCER_FQDN_TUNNEL)
+
+        CONFIG = config
+        CONFIG_VERSION = config['version']
+        return True
+
+    @staticmethod
+    def send_heartbeats(ipsec_ems_fqdn_deque, ipsec_enforcer_id):
+        """Send a heartbeat with the installed config version to IPsec
+        EMS at every HEARTBEAT_INTERVAL
+
+        Args:
+            ipsec_ems_fqdn_deque (deque): FQDN of IPsec EMS(s)
+            ipsec_enforcer_id (str): id of IPsecEnforcer
+        """
+        while True:
+            heartbeat_uri = ('http://' + ipsec_ems_fqdn_deque[0] + '/' +
+                             IPSEC_EMS_REGISTRATION + '/' +
+                             ipsec_enforcer_id + '/' +
+                             IPSEC_EMS_HEARTBEAT + '/')
+            try:
+                response = requests.post(
+                        heartbeat_uri,
+                        json={'config_version': CONFIG_VERSION},
+                        timeout=HEARTBEAT_TIMEOUT)
+            except requests.exceptions.RequestException:
+                response = None
+
+            if response is None or response.status_code not in (
+                    requests.codes.ok, requests.codes.no_content):
+                ipsec_ems_fqdn_deque.rotate(-1)
+
+            time.sleep(HEARTBEAT_INTERVAL)
+
     @staticmethod
     def start():
+        global CONFIG_ETAG
         IPSEC_EMS_FQDN_DEQUE = IPSEC_EMS_CONTROLLER_FQDN_DEQUE
         ipsec_enforcer = IPsecEnforcer()
-        ipsec_enforcer_socket = Listener(('localhost', 8081))
         while True:
             registration_uri = ('http://' + IPSEC_EMS_FQDN_DEQUE[0] + '/' +
                                 IPSEC_EMS_REGISTRATION + '/')
@@ -67,19 +152,66 @@ class IPsecEnforcerAgent(object):
                 IPSEC_EMS_FQDN_DEQUE.rotate(-1)
                 time.sleep(30)
 
+        heartbeat = threading.Thread(
+                target=IPsecEnforcerAgent.send_heartbeats,
+                args=(IPSEC_EMS_FQDN_DEQUE, IPSEC_ENFORCER_ID))
+        heartbeat.daemon = True
+        heartbeat.start()
+
+        # The first request returns the configuration right away
+        long_poll = False
         while True:
             registration_uri = ('http://' + IPSEC_EMS_FQDN_DEQUE[0] + '/' +
                                 IPSEC_EMS_POLICY_CONFIG + '/' +
                                 IPSEC_ENFORCER_ID + '/')
-            response = requests.get(registration_uri)
+            # Only the changes since the installed config version are
+            # received, unless IPsec EMS has no snapshot of the version
+            # IPsec EMS returns no body if the configuration is unchanged
+            headers = {}
+            if CONFIG_ETAG is not None and CONFIG_VERSION:
+                headers['If-None-Match'] = CONFIG_ETAG
+
+            # IPsec EMS holds the request until the config version is
+            # newer than the installed one, or the wait time elapses
+            params = {'version': CONFIG_VERSION}
+            if long_poll:
+                params.update({'index': CONFIG_VERSION,
+                               'wait': '%ds' % LONG_POLL_WAIT})
+
+            try:
+                response = requests.get(registration_uri,
+                                        params=params,
+                                        headers=headers,
+                                        timeout=LONG_POLL_TIMEOUT)
+            except requests.exceptions.RequestException:
+                IPSEC_EMS_FQDN_DEQUE.rotate(-1)
+                time.sleep(10)
+                continue
+
+            long_poll = True
 
             if response.status_code == requests.codes.ok:
+                etag = response.headers.get('ETag')
                 response = response.json()
 
-                if response.get('version') > CONFIG_VERSION:
-                    install_configurations(response, IPSEC_ENFORCER_FQDN_TUNNEL)
+                # The configuration is requested again at the installed
+                # config version, to retry the installation
+                try:
+                    if (response.get('version') > CONFIG_VERSION and
+                            not IPsecEnforcerAgent.update_configurations(
+                                response)):
+                        continue
+                except (subprocess.CalledProcessError, OSError):
+                    LOG.exception("Failed to install the config version "
+                                  "%s, retrying in %d seconds" %
+                                  (response.get('version'),
+                                   INSTALL_RETRY_INTERVAL))
+                    time.sleep(INSTALL_RETRY_INTERVAL)
+                    continue
+
+                CONFIG_ETAG = etag
+            elif response.status_code == requests.codes.not_modified:
+                pass
             else:
                 IPSEC_EMS_FQDN_DEQUE.rotate(-1)
                 time.sleep(10)
-            conn = ipsec_enforcer_socket.accept()
-            response = None
@@ -15,6 +15,7 @@
 
 from collections import deque
 import configparser
+import copy
 import netifaces
 
 
@@ -58,3 +59,40 @@ def mac_for_ip(ip):
             return if_mac
     return None
 
+
+def apply_config_delta(config, delta):
+    """Apply the VPN configuration changes received from IPsec EMS
+
+    Args:
+        config (dict): installed VPN configuration
+        delta (dict): 'added', 'changed' and 'removed' entries of each
+            section since the installed config version
+
+    Returns:
+        dict: new VPN configuration, the installed one is not modified
+    """
+    new_config = copy.deepcopy(config)
+
+    for changes in (delta['added'], delta['changed']):
+        for section, entries in changes.items():
+            new_config.setdefault(section, {}).update(entries)
+
+    for section, ids in delta['removed'].items():
+        entries = new_config.get(section, {})
+        for _id in ids:
+            entries.pop(_id, None)
+
+    new_config['version'] = delta['version']
+    return new_config
+
+
+def is_config_delta_empty(delta):
+    """Check if the VPN configuration changes are empty
+
+    Args:
+        delta (dict): changes received from IPsec EMS
+
+    Returns:
+        bool: True if no entry is added, changed or removed
+    """
+    return not (delta['added'] or delta['changed'] or delta['removed'])
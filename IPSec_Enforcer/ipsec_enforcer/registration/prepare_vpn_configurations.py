@@ -13,11 +13,35 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from contextlib import contextmanager
+import hashlib
+import logging
 import os
-import itertools
 import subprocess
+import time
 
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+LOG = logging.getLogger(__name__)
+
+# Strongswan configuration files and directory
+IPSEC_CONF = '/etc/ipsec.conf'
+IPSEC_SECRETS = '/etc/ipsec.secrets'
+IPSEC_D = '/etc/ipsec.d'
+
+# Directory of the templates, and of the compiled templates cache(None
+# for no cache on disk)
+TEMPLATE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_BYTECODE_CACHE_DIR = None
+
+# Size of the blocks read to compute the digest of a file
+DIGEST_BLOCK_SIZE = 1024 * 1024
+
+# Number of template chunks(about 5 per connection) joined before they
+# are written
+TEMPLATE_STREAM_BUFFER = 1000
+
+_JINJA_ENVIRONMENT = None
 
 _IKE_POLICIES = {}
 _IPSEC_POLICIES = {}
@@ -38,6 +62,20 @@ _DIALECT_LIFETIME_UNITS_MAP = {
     'days': 'd',
 }
 
+# VPNBind policy sections, and the policy sections of their VPNEndpoint
+# and peer VPNEndpoint
+VPNBIND_VPNENDPOINT_TYPES = (
+    ('vpnbind_group_to_group', 'vpnendpointgroup', 'vpnendpointgroup'),
+    ('vpnbind_group_to_localsite', 'vpnendpointgroup',
+     'vpnendpointlocalsite'),
+    ('vpnbind_group_to_remotesite', 'vpnendpointgroup',
+     'vpnendpointremotesite'),
+    ('vpnbind_localsite_to_localsite', 'vpnendpointlocalsite',
+     'vpnendpointlocalsite'),
+    ('vpnbind_localsite_to_remotesite', 'vpnendpointlocalsite',
+     'vpnendpointremotesite'),
+)
+
 policy = None
 
 
@@ -121,126 +159,65 @@ class StrongSwanIPsecPolicy(object):
         self.lifetime = str(lifetime_value) + lifetime_units
 
 
-class Connection(object):
-    """Represents VPNBind in Strongswan format"""
+class ConnectionSettings(object):
+    """Settings shared by the connections of a VPNBind, in Strongswan
+    format"""
+
+    __slots__ = ('authby', 'dpdaction', 'dpddelay', 'dpdtimeout', 'auto',
+                 'ikepolicy', 'ipsecpolicy', 'left', 'leftcert',
+                 'leftsubnet', 'rightsubnet')
 
-    def __init__(self, vpnbind, fqdn, peer_fqdn, vpnbind_type):
-        self.connection_name = vpnbind['id'] + '__' + fqdn + '::' + peer_fqdn
+    def __init__(self, vpnbind, vpnendpoint, peer_vpnendpoint):
+        self.authby = 'psk' if vpnbind['auth_mode'] == 'psk' else None
         self.dpdaction = vpnbind['dpd_action']
         self.dpddelay = vpnbind['dpd_interval']
         self.dpdtimeout = vpnbind['dpd_timeout']
-
-        if vpnbind['auth_mode'] == 'psk':
-            self.authby = 'psk'
-
         self.auto = 'route'
         self.ikepolicy = _IKE_POLICIES[vpnbind['ikepolicy_id']]
         self.ipsecpolicy = _IPSEC_POLICIES[vpnbind['ipsecpolicy_id']]
         self.left = fqdn
-        self.right = peer_fqdn
-
-        vpnendpoint, peer_vpnendpoint = self.get_vpnendpoints(vpnbind,
-                                                              vpnbind_type)
-
-        if vpnbind['auth_mode'] == 'psk':
-            self.left_id = vpnbind['id'] + '__' + fqdn
-            self.right_id = vpnbind['id'] + '__' + peer_fqdn
-        elif vpnbind['auth_mode'] == 'cert':
-            self.leftcert = str(vpnendpoint.get('vpncertificate_id')) + '.pem'
-            self.left_id = policy.get('vpncertificate').get(
-                    vpnendpoint.get('vpncertificate_id')).get('right_id')
-            self.right_id = policy.get('vpncertificate').get(
-                    peer_vpnendpoint.get('vpncertificate_id')).get('right_id')
-
-        if vpnbind_type == 'vpnbind_localsite_to_localsite':
-            self.leftsubnet = vpnendpoint.get('cidrs')[0]
-            self.rightsubnet = peer_vpnendpoint.get('cidrs')[0]
-
-        if vpnbind['auth_mode'] == 'psk':
-            psk_pair = SecretPSK(vpnbind['id'],
-                                 self.left_id,
-                                 self.right_id,
-                                 fqdn,
-                                 peer_fqdn,
-                                 vpnbind['peer'])
-        elif vpnbind['auth_mode'] == 'cert':
-            psk_pair = SecretCert(vpnendpoint,
-                                  peer_fqdn)
-        _IPSEC_STRONGSWAN_SECRETS.append(psk_pair)
-
-    def get_vpnendpoints(self, vpnbind, vpnbind_type):
-
-        vpnendpoint_type, peer_vpnendpoint_type = (
-            self.get_vpnendpoint_type(vpnbind_type))
-
-        vpnendpoint_field, peer_vpnendpoint_field = (
-            self.get_vpnendpoints_field(vpnbind_type))
-
-        if not vpnbind['peer']:
-            vpnendpoint = policy.get(vpnendpoint_type).get(
-                    vpnbind[vpnendpoint_field])
-            peer_vpnendpoint = policy.get(peer_vpnendpoint_type).get(
-                    vpnbind[peer_vpnendpoint_field])
-        else:
-            vpnendpoint = policy.get(vpnendpoint_type).get(
-                    vpnbind[peer_vpnendpoint_field])
-            peer_vpnendpoint = policy.get(peer_vpnendpoint_type).get(
-                    vpnbind[vpnendpoint_field])
 
-        return vpnendpoint, peer_vpnendpoint
+        self.leftcert = None
+        if vpnbind['auth_mode'] == 'cert':
+            self.leftcert = certificate_file(vpnendpoint)
 
-    @staticmethod
-    def get_vpnendpoints_field(vpnbind_relation):
-        """Prepare the vpnendpoint_id and peer_vpnendpoint_id field for the
-        particular VPNBind relation
+        self.leftsubnet = vpnendpoint_subnet(vpnendpoint)
+        self.rightsubnet = vpnendpoint_subnet(peer_vpnendpoint)
 
-        Args:
-            vpnbind_relation (str): VPNBIND relation/table name
 
-        Returns:
-            vpnendpoint_id and peer_vpnendpoint_id for the VPNBIND relation
-        """
-        parts = vpnbind_relation.split("_")
-        vpnendpoint_id = 'vpnendpoint' + parts[1] + '_id'
-        peer_vpnendpoint_id = 'peer_vpnendpoint' + parts[3] + '_id'
-        return vpnendpoint_id, peer_vpnendpoint_id
-
-    @staticmethod
-    def get_vpnendpoint_type(vpnbind_relation):
-        """Prepare the vpnendpoint and peer_vpnendpoint for the
-        particular VPNBind relation
+class Connection(object):
+    """Represents a connection of a VPNBind in Strongswan format"""
 
-        Args:
-            vpnbind_relation (str): VPNBIND relation/table name
+    __slots__ = ('settings', 'connection_name', 'right', 'left_id',
+                 'right_id')
 
-        Returns:
-            vpnendpoint_id and peer_vpnendpoint_id for the VPNBIND relation
-        """
-        parts = vpnbind_relation.split("_")
-        vpnendpoint = 'vpnendpoint' + parts[1]
-        peer_vpnendpoint = 'vpnendpoint' + parts[3]
-        return vpnendpoint, peer_vpnendpoint
+    def __init__(self, settings, connection_name, right, left_id, right_id):
+        self.settings = settings
+        self.connection_name = connection_name
+        self.right = right
+        self.left_id = left_id
+        self.right_id = right_id
 
 
 class SecretPSK(object):
-    def __init__(self, vpnbind_id, left_id, right_id, fqdn, peer_fqdn,
-                 peer=False):
-        self.auth_mode = 'psk'
+    auth_mode = 'psk'
+
+    __slots__ = ('left_id', 'right_id', 'psk')
+
+    def __init__(self, left_id, right_id, psk):
         self.left_id = left_id
         self.right_id = right_id
-        if not peer:
-            self.psk = policy.get('fqdn_pair_psk').get(
-                    vpnbind_id + '_' + fqdn + '_' + peer_fqdn)
-        else:
-            self.psk = policy.get('fqdn_pair_psk').get(
-                    vpnbind_id + '_' + peer_fqdn + '_' + fqdn)
+        self.psk = psk
 
 
 class SecretCert(object):
-    def __init__(self, vpnendpoint, peer_fqdn):
-        self.auth_mode = 'cert'
+    auth_mode = 'cert'
+
+    __slots__ = ('peer_fqdn', 'key')
+
+    def __init__(self, key, peer_fqdn):
         self.peer_fqdn = peer_fqdn
-        self.key = str(vpnendpoint.get('vpncertificate_id')) + '.pem'
+        self.key = key
 
 
 def add_ikepolicy():
@@ -255,153 +232,457 @@ def add_ipsecpolicy():
         _IPSEC_POLICIES.update({_id: StrongSwanIPsecPolicy(**ipsecpolicy)})
 
 
-def process_vpncacertificate():
-    """Install CA Certificates"""
+@contextmanager
+def timed(step):
+    """Log the time taken by a step of the installation
+
+    Args:
+        step (str): description of the step
+    """
+    start = time.time()
+    yield
+    LOG.info("%s took %.3f seconds" % (step, time.time() - start))
+
+
+def file_digest(path):
+    """SHA-256 digest of the content of a file
+
+    Args:
+        path (str): path of the file
+
+    Returns:
+        str: hex digest, or None if the file does not exist
+    """
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(DIGEST_BLOCK_SIZE), b''):
+                digest.update(block)
+    except IOError:
+        return None
+    return digest.hexdigest()
+
+
+class FileTransaction(object):
+    """Atomic writes of a set of files, with rollback
+
+    A file is written to a temporary file in the same directory, which
+    is synced and renamed over the file, so the file is either the
+    previous or the new one, even after a crash. The temporary file is
+    created with the permissions of the file, e.g. 0o600 for the
+    secrets. The previous file is kept(hard linked as <file>.last) until
+    the transaction is committed, and restored on rollback.
+
+    Usage:
+        transaction = FileTransaction()
+        transaction.write('/etc/ipsec.conf', content)
+        ...
+        transaction.commit()  # or transaction.rollback()
+    """
+
+    def __init__(self):
+        # Written file paths, and their previous file(None for a new
+        # file)
+        self.written = []
+
+    def write(self, path, content, mode=0o644):
+        """Write the content to the file, unless the file on disk
+        already has the same content
+
+        The content is written to the temporary file chunk by chunk, so
+        a rendered template is not held in memory.
+
+        Args:
+            path (str): path of the file
+            content (str or iterable): content of the file, or chunks of
+                the content e.g. Template.stream()
+            mode (int): permissions of the file, e.g. 0o600
+
+        Returns:
+            bool: True if the file is written
+        """
+        if isinstance(content, basestring):
+            content = (content,)
+
+        temp_path = path + '.tmp'
+        digest = hashlib.sha256()
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+        with os.fdopen(fd, 'wb') as f:
+            os.fchmod(fd, mode)
+            for chunk in content:
+                if isinstance(chunk, unicode):
+                    chunk = chunk.encode('utf-8')
+                digest.update(chunk)
+                f.write(chunk)
+
+            if file_digest(path) == digest.hexdigest():
+                os.remove(temp_path)
+                return False
+
+            f.flush()
+            os.fsync(fd)
+
+        backup_path = None
+        if os.path.exists(path):
+            backup_path = path + '.last'
+            if os.path.exists(backup_path):
+                os.remove(backup_path)
+            os.link(path, backup_path)
+
+        os.rename(temp_path, path)
+        self.written.append((path, backup_path))
+        return True
+
+    def sync_directories(self):
+        """Sync the directories of the written files, so the renames
+        are durable"""
+        for directory in set(os.path.dirname(path)
+                             for path, _backup_path in self.written):
+            fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def commit(self):
+        """Remove the previous files"""
+        self.sync_directories()
+        for _path, backup_path in self.written:
+            if backup_path is not None:
+                os.remove(backup_path)
+        del self.written[:]
+
+    def rollback(self):
+        """Restore the previous files, and remove the new files"""
+        for path, backup_path in reversed(self.written):
+            if backup_path is not None:
+                os.rename(backup_path, path)
+            else:
+                os.remove(path)
+        self.sync_directories()
+        del self.written[:]
+
+
+def run_ipsec(*args):
+    """Run an 'ipsec' command
+
+    Args:
+        *args (str): command and its arguments, e.g. 'update'
+    """
+    with timed("ipsec " + " ".join(args)):
+        subprocess.check_call(("ipsec",) + args)
+
+
+def process_vpncacertificate(transaction):
+    """Install CA Certificates
+
+    Args:
+        transaction (FileTransaction): writes of the installation
+
+    Returns:
+        bool: True if a CA Certificate is written
+    """
+    changed = False
     for _id, vpncacertificate in policy['vpncacertificate'].iteritems():
         # Write CA Certificate
-        ca_certificate = '/etc/ipsec.d/cacerts/' + str(_id) + '.pem'
-        with open(ca_certificate, 'wb+') as f:
-            f.write(vpncacertificate['ca_certificate'])
+        ca_certificate = os.path.join(IPSEC_D, 'cacerts', str(_id) + '.pem')
+        changed |= transaction.write(ca_certificate,
+                                     vpncacertificate['ca_certificate'])
+    return changed
+
 
+def process_vpncertificate(transaction):
+    """Install Certificates and Keys
 
-def process_vpncertificate():
-    """Install Certificates and Keys"""
+    Args:
+        transaction (FileTransaction): writes of the installation
+
+    Returns:
+        tuple: True if a Certificate is written, True if a Key is written
+    """
+    certificates_changed = keys_changed = False
     for _id, vpncertificate in policy['vpncertificate'].iteritems():
         # Write Certificate
-        certificate = '/etc/ipsec.d/certs/' + str(_id) + '.pem'
-        with open(certificate, 'wb+') as f:
-            f.write(vpncertificate['certificate'])
+        certificate = os.path.join(IPSEC_D, 'certs', str(_id) + '.pem')
+        certificates_changed |= transaction.write(
+                certificate, vpncertificate['certificate'])
         # Write Key
-        key = '/etc/ipsec.d/private/' + str(_id) + '.pem'
-        with open(key, 'wb+') as f:
-            f.write(vpncertificate['key'])
-
-
-def process_vpnbind_group_group():
-    """Add VPNBindGroupToGroup to _IPSEC_STRONGSWAN_CONNECTIONS"""
-
-    # If vpnbind_group_to_group is empty, don't process further
-    vpnbind_group_to_group = policy.get('vpnbind_group_to_group', None)
-    if vpnbind_group_to_group is None:
-        return
-
-    for key, value in vpnbind_group_to_group.iteritems():
-        if not value['peer']:
-            fqdn_pairs = itertools.product(
-                    [fqdn],
-                    policy.get('fqdn_list').get(value[
-                                                'peer_vpnendpointgroup_id']
-                                                )
-            )
-        else:
-            fqdn_pairs = itertools.product(
-                    [fqdn],
-                    policy.get('fqdn_list').get(value['vpnendpointgroup_id'])
-            )
-        fqdn_pairs = list((fqdn_pair for fqdn_pair in fqdn_pairs if
-                           fqdn_pair[0] != fqdn_pair[1]
-                           )
-                          )
-        for fqdn_pair in fqdn_pairs:
-            connection = Connection(value,
-                                    fqdn_pair[0],
-                                    fqdn_pair[1],
-                                    'vpnbind_group_to_group'
-                                    )
-            _IPSEC_STRONGSWAN_CONNECTIONS.append(connection)
-
-
-def process_vpnbind_localsite_localsite():
-    """Add VPNBindLocalSiteToLocalSite to _IPSEC_STRONGSWAN_CONNECTIONS"""
-
-    # If vpnbind_localsite_to_localsite is empty, don't process further
-    vpnbind_localsite_to_localsite = policy.get(
-            'vpnbind_localsite_to_localsite', None)
-    if vpnbind_localsite_to_localsite is None:
-        return
-
-    for key, value in vpnbind_localsite_to_localsite.iteritems():
-        if not value['peer']:
-            fqdn_pairs = itertools.product(
-                    [fqdn],
-                    policy.get('fqdn_list').get(
-                            value['peer_vpnendpointlocalsite_id']
-                    )
-            )
-        else:
-            fqdn_pairs = itertools.product(
-                    [fqdn],
-                    policy.get('fqdn_list').get(
-                            value['vpnendpointlocalsite_id']
-                    )
-            )
-        fqdn_pairs = list((fqdn_pair for fqdn_pair in fqdn_pairs if
-                           fqdn_pair[0] != fqdn_pair[1]))
-        for fqdn_pair in fqdn_pairs:
-            connection = Connection(value,
-                                    fqdn_pair[0],
-                                    fqdn_pair[1],
-                                    'vpnbind_localsite_to_localsite')
-            _IPSEC_STRONGSWAN_CONNECTIONS.append(connection)
+        key = os.path.join(IPSEC_D, 'private', str(_id) + '.pem')
+        keys_changed |= transaction.write(key, vpncertificate['key'],
+                                          mode=0o600)
+    return certificates_changed, keys_changed
 
 
-def install_configurations(config, ipsec_enforcer_fqdn):
+def certificate_file(vpnendpoint):
+    """File name of the Certificate and Key of a VPNEndpoint
+
+    Args:
+        vpnendpoint (dict): VPNEndpoint record
+
+    Returns:
+        str: file name in the 'certs' and 'private' directories
     """
+    return str(vpnendpoint.get('vpncertificate_id')) + '.pem'
+
+
+def vpnendpoint_subnet(vpnendpoint):
+    """Subnet of a VPNEndpoint, in Strongswan format
+
     Args:
-        config:
-        ipsec_enforcer_fqdn:
+        vpnendpoint (dict): VPNEndpointLocalSite or VPNEndpointRemoteSite
+            record, or VPNEndpointGroup record(no subnet)
 
     Returns:
+        str: subnet, or None for a VPNEndpointGroup
+    """
+    cidrs = vpnendpoint.get('cidrs') or vpnendpoint.get('peer_cidrs')
+    if cidrs:
+        return cidrs[0]
+    return None
+
+
+def process_vpnbinds():
+    """Add the connections and secrets of every VPNBind to
+    _IPSEC_STRONGSWAN_CONNECTIONS and _IPSEC_STRONGSWAN_SECRETS"""
+    for vpnbind_type, vpnendpoint_type, peer_vpnendpoint_type in (
+            VPNBIND_VPNENDPOINT_TYPES):
+        vpnendpoint_field = vpnendpoint_type + '_id'
+        peer_vpnendpoint_field = 'peer_' + peer_vpnendpoint_type + '_id'
+
+        vpnbinds = policy.get(vpnbind_type) or {}
+        for vpnbind in vpnbinds.itervalues():
+            # The IPsecEnforcer belongs to the peer VPNEndpoint of a
+            # 'peer' VPNBind
+            if not vpnbind['peer']:
+                process_vpnbind(
+                        vpnbind,
+                        vpnendpoint_type, vpnbind[vpnendpoint_field],
+                        peer_vpnendpoint_type, vpnbind[peer_vpnendpoint_field])
+            else:
+                process_vpnbind(
+                        vpnbind,
+                        peer_vpnendpoint_type, vpnbind[peer_vpnendpoint_field],
+                        vpnendpoint_type, vpnbind[vpnendpoint_field])
+
+
+def process_vpnbind(vpnbind, vpnendpoint_type, vpnendpoint_id,
+                    peer_vpnendpoint_type, peer_vpnendpoint_id):
+    """Add the connections and secrets of a VPNBind, one per peer of the
+    IPsecEnforcer
+
+    The peers are the IPsecEnforcers of the peer VPNEndpoint(except this
+    IPsecEnforcer), or the gateway(peer_address) of a
+    VPNEndpointRemoteSite without IPsecEnforcers. The settings, IDs and
+    Key shared by the connections are resolved once per VPNBind.
 
+    Args:
+        vpnbind (dict): VPNBind record
+        vpnendpoint_type (str): policy section of the VPNEndpoint of the
+            IPsecEnforcer, e.g. 'vpnendpointgroup'
+        vpnendpoint_id (str): id of the VPNEndpoint of the IPsecEnforcer
+        peer_vpnendpoint_type (str): policy section of the peer
+            VPNEndpoint
+        peer_vpnendpoint_id (str): id of the peer VPNEndpoint
+    """
+    vpnbind_id = vpnbind['id']
+    vpnendpoint = policy[vpnendpoint_type][vpnendpoint_id]
+    peer_vpnendpoint = policy[peer_vpnendpoint_type][peer_vpnendpoint_id]
+    settings = ConnectionSettings(vpnbind, vpnendpoint, peer_vpnendpoint)
+
+    fqdn_list = policy.get('fqdn_list', {}).get(peer_vpnendpoint_id)
+    gateway = fqdn_list is None and 'peer_address' in peer_vpnendpoint
+
+    if gateway:
+        peers = [peer_vpnendpoint['peer_address']]
+    else:
+        peers = [peer_fqdn for peer_fqdn in fqdn_list or ()
+                 if peer_fqdn != fqdn]
+
+    name_prefix = vpnbind_id + '__' + fqdn + '::'
+
+    if vpnbind['auth_mode'] == 'psk':
+        if gateway:
+            # The gateway has the PSK of the VPNBind, and its address as
+            # ID
+            left_id = fqdn
+            connections = [Connection(settings, name_prefix + peer, peer,
+                                      left_id, peer)
+                           for peer in peers]
+            secrets = [SecretPSK(left_id, peer, vpnbind['psk'])
+                       for peer in peers]
+        else:
+            # The PSK of a FQDN pair is stored under
+            # <vpnbind id>_<fqdn>_<peer fqdn> by the IPsecEnforcer of the
+            # VPNEndpoint of the VPNBind
+            fqdn_pair_psk = policy.get('fqdn_pair_psk', {})
+            if not vpnbind['peer']:
+                psks = [fqdn_pair_psk.get(vpnbind_id + '_' + fqdn + '_' + peer)
+                        for peer in peers]
+            else:
+                psks = [fqdn_pair_psk.get(vpnbind_id + '_' + peer + '_' + fqdn)
+                        for peer in peers]
+
+            id_prefix = vpnbind_id + '__'
+            left_id = id_prefix + fqdn
+            connections = [Connection(settings, name_prefix + peer, peer,
+                                      left_id, id_prefix + peer)
+                           for peer in peers]
+            secrets = [SecretPSK(left_id, connection.right_id, psk)
+                       for connection, psk in zip(connections, psks)]
+
+    elif vpnbind['auth_mode'] == 'cert':
+        certificates = policy.get('vpncertificate')
+        left_id = certificates.get(
+                vpnendpoint.get('vpncertificate_id')).get('right_id')
+        right_id = certificates.get(
+                peer_vpnendpoint.get('vpncertificate_id')).get('right_id')
+        connections = [Connection(settings, name_prefix + peer, peer,
+                                  left_id, right_id)
+                       for peer in peers]
+        secrets = [SecretCert(settings.leftcert, peer) for peer in peers]
+
+    _IPSEC_STRONGSWAN_CONNECTIONS.extend(connections)
+    _IPSEC_STRONGSWAN_SECRETS.extend(secrets)
+
+
+def install_configurations(config, ipsec_enforcer_fqdn):
+    """Install the VPN configuration, and reload only the changed parts
+    of the Strongswan configuration
+
+    If Strongswan fails to load the configuration, the previous files
+    are restored and reloaded.
+
+    Args:
+        config (dict): VPN configuration received from IPsec EMS
+        ipsec_enforcer_fqdn (str): FQDN of the IPsecEnforcer tunnel
+            interface
+
+    Raises:
+        CalledProcessError: If an 'ipsec' command fails
     """
     global policy
     global fqdn
     policy = config
     fqdn = ipsec_enforcer_fqdn
 
-    process_vpncacertificate()
-    process_vpncertificate()
-    add_ikepolicy()
-    add_ipsecpolicy()
+    transaction = FileTransaction()
+    changes = {}
+    reloading = False
+
+    try:
+        with timed("Installing the certificates"):
+            changes['ca_certificates'] = process_vpncacertificate(
+                    transaction)
+            changes['certificates'], changes['keys'] = (
+                process_vpncertificate(transaction)
+            )
+        add_ikepolicy()
+        add_ipsecpolicy()
+
+        # Reset _IPSEC_STRONGSWAN_CONNECTIONS & _IPSEC_STRONGSWAN_SECRETS
+        del _IPSEC_STRONGSWAN_CONNECTIONS[:]
+        del _IPSEC_STRONGSWAN_SECRETS[:]
+
+        with timed("Preparing the connections"):
+            process_vpnbinds()
+
+        with timed("Rendering the configuration"):
+            changes['connections'], changes['secrets'] = render_template(
+                    transaction)
+
+        reloading = True
+        reload_strongswan(changes)
+    except Exception:
+        LOG.exception("Failed to install the configuration, restoring "
+                      "the previous configuration")
+        transaction.rollback()
+        if reloading:
+            try:
+                reload_strongswan(changes)
+            except subprocess.CalledProcessError:
+                LOG.exception("Failed to reload the previous "
+                              "configuration")
+        raise
+
+    transaction.commit()
 
-    # Reset _IPSEC_STRONGSWAN_CONNECTIONS & _IPSEC_STRONGSWAN_SECRETS
-    del _IPSEC_STRONGSWAN_CONNECTIONS[:]
-    del _IPSEC_STRONGSWAN_SECRETS[:]
 
-    # if FQDN list is not empty, then process VPNBind Policies
-    if policy.get('fqdn_list'):
-        process_vpnbind_group_group()
-        process_vpnbind_localsite_localsite()
-    render_template()
+def reload_strongswan(changes):
+    """Load the changed parts of the configuration into Strongswan
 
+    Args:
+        changes (dict): True for each changed part('connections',
+            'secrets', 'ca_certificates', 'certificates', 'keys')
+    """
+    # 'ipsec update' only loads the added, changed and removed conn
+    # sections. The connections are reloaded for a changed certificate,
+    # as its file name in the conn section is unchanged.
+    if changes.get('certificates'):
+        run_ipsec("reload")
+    elif changes.get('connections'):
+        run_ipsec("update")
+
+    if changes.get('ca_certificates'):
+        run_ipsec("rereadcacerts")
+    if changes.get('secrets') or changes.get('keys'):
+        run_ipsec("rereadsecrets")
+
+    if not any(changes.values()):
+        LOG.info("Strongswan configuration unchanged")
 
-def render_template():
-    """Render the
+
+def get_jinja_environment():
+    """Jinja environment of the Strongswan templates, created once
+
+    The environment keeps the compiled templates in memory, and in
+    TEMPLATE_BYTECODE_CACHE_DIR if set.
 
     Returns:
+        Environment
+    """
+    global _JINJA_ENVIRONMENT
+
+    if _JINJA_ENVIRONMENT is None:
+        bytecode_cache = None
+        if TEMPLATE_BYTECODE_CACHE_DIR is not None:
+            bytecode_cache = FileSystemBytecodeCache(
+                    TEMPLATE_BYTECODE_CACHE_DIR)
+
+        _JINJA_ENVIRONMENT = Environment(
+                loader=FileSystemLoader(TEMPLATE_DIR),
+                bytecode_cache=bytecode_cache,
+                autoescape=False,
+                trim_blocks=True,
+                lstrip_blocks=True,
+                keep_trailing_newline=True
+        )
+    return _JINJA_ENVIRONMENT
+
+
+def render_template(transaction):
+    """Render and write the Strongswan configurations and secrets
 
+    Args:
+        transaction (FileTransaction): writes of the installation
+
+    Returns:
+        tuple: True if the configurations(IPSEC_CONF) are written, True
+            if the secrets(IPSEC_SECRETS) are written
     """
-    jinja_environment = Environment(
-            loader=FileSystemLoader('registration'),
-            autoescape=False,
-            trim_blocks=True,
-            lstrip_blocks=True,
-            keep_trailing_newline=True
-    )
+    jinja_environment = get_jinja_environment()
     template = jinja_environment.get_template('ipsec.conf.template')
-    strongswan_connections = template.render(
+    strongswan_connections = template.stream(
             ipsec_strongswan_connections=_IPSEC_STRONGSWAN_CONNECTIONS)
+    strongswan_connections.enable_buffering(TEMPLATE_STREAM_BUFFER)
     template = jinja_environment.get_template('ipsec.secret.template')
-    strongswan_psk = template.render(
+    strongswan_psk = template.stream(
             ipsec_strongswan_secrets=_IPSEC_STRONGSWAN_SECRETS)
+    strongswan_psk.enable_buffering(TEMPLATE_STREAM_BUFFER)
 
-    # Write the Strongswan configurations and secrets
-    with open('/etc/ipsec.conf', 'w+') as f:
-        f.write(strongswan_connections)
-    with open('/etc/ipsec.secrets', 'w+') as f:
-        os.chmod('/etc/ipsec.secrets', 0o600)
-        f.write(strongswan_psk)
+    # Stream the Strongswan configurations and secrets to the files
+    connections_changed = transaction.write(IPSEC_CONF,
+                                            strongswan_connections)
+    secrets_changed = transaction.write(IPSEC_SECRETS, strongswan_psk,
+                                        mode=0o600)
 
-    # Reload the Strongswan configurations and reread the secrets
-    subprocess.check_call(["ipsec", "reload"])
-    subprocess.check_call(["ipsec", "rereadsecrets"])
+    return connections_changed, secrets_changed
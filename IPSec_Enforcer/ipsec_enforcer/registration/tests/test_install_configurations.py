@@ -0,0 +1,180 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import copy
+import os
+import stat
+import subprocess
+
+from registration.prepare_vpn_configurations import FileTransaction
+from registration.tests.utils import make_config, PEERS, StrongswanTestCase
+
+
+def file_mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+class FileTransactionTestCase(StrongswanTestCase):
+    """Test cases for the atomic writes of the Strongswan files"""
+
+    def test_write_new(self):
+        """Test case to write and commit a new file"""
+        path = self.path_of('ipsec.secrets')
+        transaction = FileTransaction()
+
+        self.assertTrue(transaction.write(path, ['a', u'b'], mode=0o600))
+        self.assertEqual(self.read('ipsec.secrets'), 'ab')
+        self.assertEqual(file_mode(path), 0o600)
+        self.assertFalse(os.path.exists(path + '.tmp'))
+
+        transaction.commit()
+        self.assertEqual(transaction.written, [])
+        self.assertFalse(os.path.exists(path + '.last'))
+
+    def test_write_unchanged(self):
+        """Test case to skip the write of the same content"""
+        path = self.path_of('ipsec.conf')
+        with open(path, 'w') as f:
+            f.write('conn')
+        inode = os.stat(path).st_ino
+
+        transaction = FileTransaction()
+        self.assertFalse(transaction.write(path, 'conn'))
+
+        self.assertEqual(transaction.written, [])
+        self.assertEqual(os.stat(path).st_ino, inode)
+        self.assertFalse(os.path.exists(path + '.tmp'))
+        self.assertFalse(os.path.exists(path + '.last'))
+
+    def test_backup_and_commit(self):
+        """Test case to keep the previous file until the commit"""
+        path = self.path_of('ipsec.conf')
+        with open(path, 'w') as f:
+            f.write('old')
+
+        transaction = FileTransaction()
+        self.assertTrue(transaction.write(path, 'new'))
+        self.assertEqual(self.read('ipsec.conf'), 'new')
+        self.assertEqual(self.read('ipsec.conf.last'), 'old')
+
+        transaction.commit()
+        self.assertEqual(self.read('ipsec.conf'), 'new')
+        self.assertFalse(os.path.exists(path + '.last'))
+
+    def test_rollback(self):
+        """Test case to restore the previous files and remove the new
+        files"""
+        path = self.path_of('ipsec.conf')
+        new_path = self.path_of('ipsec.secrets')
+        with open(path, 'w') as f:
+            f.write('old')
+
+        transaction = FileTransaction()
+        transaction.write(path, 'new')
+        transaction.write(new_path, 'secret', mode=0o600)
+        transaction.rollback()
+
+        self.assertEqual(transaction.written, [])
+        self.assertEqual(self.read('ipsec.conf'), 'old')
+        self.assertFalse(os.path.exists(path + '.last'))
+        self.assertFalse(os.path.exists(new_path))
+
+
+class InstallConfigurationsTestCase(StrongswanTestCase):
+    """Test cases for the installation of the VPN configuration"""
+
+    def assertNoTransactionFiles(self):
+        self.assertEqual([name for name in os.listdir(self.directory)
+                          if name.endswith(('.tmp', '.last'))], [])
+
+    def test_install(self):
+        """Test case to install a configuration and reload only the
+        changed parts"""
+        config = make_config()
+        self.install(config)
+
+        self.assertEqual(self.ipsec_commands(), ['update', 'rereadsecrets'])
+        conf = self.read('ipsec.conf')
+        self.assertEqual(conf.count('\nconn '), len(PEERS))
+        self.assertIn('lifetime=1h', conf)
+        self.assertEqual(self.read('ipsec.secrets').count(' : PSK '),
+                         len(PEERS))
+        self.assertEqual(file_mode(self.path_of('ipsec.secrets')), 0o600)
+        self.assertNoTransactionFiles()
+
+        # Unchanged configuration
+        self.install(copy.deepcopy(config))
+
+        self.assertEqual(self.ipsec_commands(), [])
+        self.assertEqual(self.read('ipsec.conf'), conf)
+        self.assertNoTransactionFiles()
+
+        # Changed IPsecPolicy, the secrets are unchanged
+        config['ipsecpolicy']['ipsec1']['lifetime_value'] = 2
+        self.install(config)
+
+        self.assertEqual(self.ipsec_commands(), ['update'])
+        self.assertIn('lifetime=2h', self.read('ipsec.conf'))
+        self.assertNoTransactionFiles()
+
+    def test_install_certificates(self):
+        """Test case to install the certificates, with a private key
+        file readable by the owner only"""
+        config = make_config()
+        config['vpncacertificate'] = {'ca1': {'ca_certificate': 'CA'}}
+        config['vpncertificate'] = {
+            'cert1': {'certificate': 'CERT', 'key': 'KEY',
+                      'vpncacertificate_id': 'ca1'}}
+        self.install(config)
+
+        self.assertEqual(self.ipsec_commands(),
+                         ['reload', 'rereadcacerts', 'rereadsecrets'])
+        self.assertEqual(self.read('cacerts', 'ca1.pem'), 'CA')
+        self.assertEqual(self.read('certs', 'cert1.pem'), 'CERT')
+        self.assertEqual(self.read('private', 'cert1.pem'), 'KEY')
+        self.assertEqual(file_mode(self.path_of('private', 'cert1.pem')),
+                         0o600)
+
+    def test_install_failed_reload(self):
+        """Test case to restore and reload the previous configuration if
+        Strongswan fails to load the configuration"""
+        self.install(make_config())
+        self.ipsec_commands()
+        conf = self.read('ipsec.conf')
+        secrets = self.read('ipsec.secrets')
+
+        config = make_config(version=2)
+        config['ipsecpolicy']['ipsec1']['lifetime_value'] = 2
+        config['fqdn_pair_psk'] = dict(
+                (key, 'new-' + psk)
+                for key, psk in config['fqdn_pair_psk'].iteritems())
+
+        os.environ['FAKE_IPSEC_FAIL'] = '1'
+        self.assertRaises(subprocess.CalledProcessError, self.install,
+                          config)
+
+        # The first 'ipsec update' fails, and so does the reload of the
+        # previous configuration
+        self.assertEqual(self.ipsec_commands(), ['update', 'update'])
+        self.assertEqual(self.read('ipsec.conf'), conf)
+        self.assertEqual(self.read('ipsec.secrets'), secrets)
+        self.assertEqual(file_mode(self.path_of('ipsec.secrets')), 0o600)
+        self.assertNoTransactionFiles()
+
+        # The configuration is installed once Strongswan loads it
+        del os.environ['FAKE_IPSEC_FAIL']
+        self.install(config)
+
+        self.assertEqual(self.ipsec_commands(), ['update', 'rereadsecrets'])
+        self.assertIn('lifetime=2h', self.read('ipsec.conf'))
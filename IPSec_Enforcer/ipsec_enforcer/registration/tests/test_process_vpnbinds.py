@@ -0,0 +1,210 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import copy
+
+from registration.prepare_vpn_configurations import VPNBIND_VPNENDPOINT_TYPES
+from registration.tests.utils import (
+    FQDN, IKEPOLICY, IPSECPOLICY, PEERS, StrongswanTestCase, VPNBIND
+)
+
+GATEWAY = '192.0.2.1'
+
+
+def vpnendpoint(vpnendpoint_type, index):
+    """VPNEndpoint record of a policy section, with the subnet
+    10.<index>.0.0/24 for a site"""
+    subnet = '10.%d.0.0/24' % index
+    if vpnendpoint_type == 'vpnendpointlocalsite':
+        return {'cidrs': [subnet]}
+    if vpnendpoint_type == 'vpnendpointremotesite':
+        return {'peer_cidrs': [subnet], 'peer_address': GATEWAY}
+    return {}
+
+
+def make_vpnbind_config(vpnbind_type, vpnendpoint_type,
+                        peer_vpnendpoint_type, peer, psk=''):
+    """VPN configuration of a VPNBind between the VPNEndpoint 'ep1' and
+    the peer VPNEndpoint 'ep2'
+
+    The IPsecEnforcer(FQDN) belongs to 'ep2' for a 'peer' VPNBind, else
+    to 'ep1', and the PEERS IPsecEnforcers to the other VPNEndpoint.
+    """
+    vpnbind = dict(VPNBIND, peer=peer, psk=psk)
+    vpnbind[vpnendpoint_type + '_id'] = 'ep1'
+    vpnbind['peer_' + peer_vpnendpoint_type + '_id'] = 'ep2'
+
+    config = {
+        'version': 1,
+        'ikepolicy': {'ike1': copy.deepcopy(IKEPOLICY)},
+        'ipsecpolicy': {'ipsec1': copy.deepcopy(IPSECPOLICY)},
+        'vpncacertificate': {},
+        'vpncertificate': {},
+        'vpnendpointgroup': {},
+        'vpnendpointlocalsite': {},
+        'vpnendpointremotesite': {},
+        vpnbind_type: {'bind1': vpnbind},
+    }
+    config[vpnendpoint_type]['ep1'] = vpnendpoint(vpnendpoint_type, 1)
+    config[peer_vpnendpoint_type]['ep2'] = vpnendpoint(
+            peer_vpnendpoint_type, 2)
+
+    if peer:
+        config['fqdn_list'] = {'ep1': list(PEERS), 'ep2': [FQDN]}
+        config['fqdn_pair_psk'] = dict(
+                ('bind1_%s_%s' % (peer_fqdn, FQDN), 'psk-' + peer_fqdn)
+                for peer_fqdn in PEERS)
+    else:
+        config['fqdn_list'] = {'ep1': [FQDN], 'ep2': list(PEERS)}
+        config['fqdn_pair_psk'] = dict(
+                ('bind1_%s_%s' % (FQDN, peer_fqdn), 'psk-' + peer_fqdn)
+                for peer_fqdn in PEERS)
+
+    return config
+
+
+def parse_conns(conf):
+    """Settings of each conn section of ipsec.conf
+
+    Returns:
+        dict: conn name as key and dict of the settings as value
+    """
+    conns = {}
+    for section in conf.split('\nconn ')[1:]:
+        lines = section.strip().splitlines()
+        conns[lines[0]] = dict(line.strip().split('=', 1)
+                               for line in lines[1:] if '=' in line)
+    return conns
+
+
+class ProcessVPNBindsTestCase(StrongswanTestCase):
+    """Test cases for the Strongswan connections and secrets of the
+    VPNBinds"""
+
+    def render(self, config):
+        self.install(config)
+        return (parse_conns(self.read('ipsec.conf')),
+                self.read('ipsec.secrets').splitlines())
+
+    def test_vpnbind_types(self):
+        """Test case for the connections with the peer IPsecEnforcers of
+        every VPNBind type, from both VPNEndpoints"""
+        for vpnbind_type, vpnendpoint_type, peer_vpnendpoint_type in (
+                VPNBIND_VPNENDPOINT_TYPES):
+            for peer in (False, True):
+                msg = '%s peer=%s' % (vpnbind_type, peer)
+                conns, secrets = self.render(make_vpnbind_config(
+                        vpnbind_type, vpnendpoint_type,
+                        peer_vpnendpoint_type, peer))
+
+                # The subnets of the VPNEndpoint of the IPsecEnforcer
+                # are on the left
+                subnets = [vpnendpoint(vpnendpoint_type, 1),
+                           vpnendpoint(peer_vpnendpoint_type, 2)]
+                if peer:
+                    subnets.reverse()
+                subnets = [(subnet.get('cidrs') or
+                            subnet.get('peer_cidrs') or [None])[0]
+                           for subnet in subnets]
+
+                self.assertEqual(sorted(conns),
+                                 ['bind1__%s::%s' % (FQDN, peer_fqdn)
+                                  for peer_fqdn in PEERS], msg)
+                for peer_fqdn in PEERS:
+                    conn = conns['bind1__%s::%s' % (FQDN, peer_fqdn)]
+                    self.assertEqual(
+                            (conn['left'], conn['leftid'], conn['right'],
+                             conn['rightid'], conn['authby']),
+                            (FQDN, 'bind1__' + FQDN, peer_fqdn,
+                             'bind1__' + peer_fqdn, 'psk'), msg)
+                    self.assertEqual((conn.get('leftsubnet'),
+                                      conn.get('rightsubnet')),
+                                     tuple(subnets), msg)
+
+                self.assertEqual(
+                        secrets,
+                        ['bind1__%s bind1__%s : PSK "psk-%s"' %
+                         (FQDN, peer_fqdn, peer_fqdn)
+                         for peer_fqdn in PEERS], msg)
+
+    def test_group_to_localsite(self):
+        """Test case for the connections of a VPNEndpointGroup with a
+        VPNEndpointLocalSite, from the VPNEndpointLocalSite"""
+        conns, secrets = self.render(make_vpnbind_config(
+                'vpnbind_group_to_localsite', 'vpnendpointgroup',
+                'vpnendpointlocalsite', peer=True))
+
+        conn = conns['bind1__%s::%s' % (FQDN, PEERS[0])]
+        self.assertEqual(conn['leftsubnet'], '10.2.0.0/24')
+        self.assertNotIn('rightsubnet', conn)
+        self.assertEqual(conn['keyexchange'], 'ikev2')
+        self.assertEqual(conn['esp'], 'aes128-sha1-modp2048-noesn')
+        self.assertIn('bind1__%s bind1__%s : PSK "psk-%s"' %
+                      (FQDN, PEERS[0], PEERS[0]), secrets)
+
+    def test_group_to_remotesite(self):
+        """Test case for the connections of a VPNEndpointGroup with a
+        VPNEndpointRemoteSite with IPsecEnforcers"""
+        conns, secrets = self.render(make_vpnbind_config(
+                'vpnbind_group_to_remotesite', 'vpnendpointgroup',
+                'vpnendpointremotesite', peer=False))
+
+        # The IPsecEnforcers are the peers, not the gateway
+        self.assertEqual(sorted(conn['right'] for conn in conns.values()),
+                         PEERS)
+        conn = conns['bind1__%s::%s' % (FQDN, PEERS[0])]
+        self.assertNotIn('leftsubnet', conn)
+        self.assertEqual(conn['rightsubnet'], '10.2.0.0/24')
+        self.assertEqual(len(secrets), len(PEERS))
+
+    def test_remotesite_gateway(self):
+        """Test case for the connection with the gateway of a
+        VPNEndpointRemoteSite without IPsecEnforcers, with the PSK of
+        the VPNBind"""
+        for vpnbind_type, vpnendpoint_type in (
+                ('vpnbind_group_to_remotesite', 'vpnendpointgroup'),
+                ('vpnbind_localsite_to_remotesite', 'vpnendpointlocalsite')):
+            config = make_vpnbind_config(vpnbind_type, vpnendpoint_type,
+                                         'vpnendpointremotesite',
+                                         peer=False, psk='gateway-psk')
+            del config['fqdn_list']['ep2']
+            config['fqdn_pair_psk'] = {}
+
+            conns, secrets = self.render(config)
+
+            self.assertEqual(conns.keys(),
+                             ['bind1__%s::%s' % (FQDN, GATEWAY)],
+                             vpnbind_type)
+            conn = conns['bind1__%s::%s' % (FQDN, GATEWAY)]
+            self.assertEqual(
+                    (conn['left'], conn['leftid'], conn['right'],
+                     conn['rightid'], conn['rightsubnet']),
+                    (FQDN, FQDN, GATEWAY, GATEWAY, '10.2.0.0/24'),
+                    vpnbind_type)
+            self.assertEqual(secrets,
+                             ['%s %s : PSK "gateway-psk"' % (FQDN, GATEWAY)],
+                             vpnbind_type)
+
+    def test_own_fqdn(self):
+        """Test case to skip the IPsecEnforcer in the peer IPsecEnforcers"""
+        config = make_vpnbind_config('vpnbind_group_to_group',
+                                     'vpnendpointgroup', 'vpnendpointgroup',
+                                     peer=False)
+        config['fqdn_list']['ep2'].append(FQDN)
+
+        conns, secrets = self.render(config)
+
+        self.assertEqual(sorted(conn['right'] for conn in conns.values()),
+                         PEERS)
+        self.assertEqual(len(secrets), len(PEERS))
@@ -0,0 +1,129 @@
+#    Copyright (c) 2016 Intel Corporation.
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""Strongswan files in a temporary directory, and VPN configurations of
+the tests"""
+
+import copy
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from registration import prepare_vpn_configurations
+
+# Fake 'ipsec' command, which records its arguments and fails when the
+# FAKE_IPSEC_FAIL environment variable is set
+FAKE_IPSEC = """#!/bin/sh
+echo "$@" >> "%s"
+test -z "$FAKE_IPSEC_FAIL"
+"""
+
+FQDN = '10.0.0.1'
+PEERS = ['10.0.1.1', '10.0.1.2']
+
+IKEPOLICY = {
+    'ike_version': 'v2', 'encryption_algorithm': ['aes128'],
+    'integrity_algorithm': ['sha1'], 'dh_group': ['modp2048'],
+    'phase1_negotiation_mode': 'main', 'lifetime_value': 3,
+    'lifetime_units': 'hours', 'rekey': 'yes', 'reauth': 'no',
+}
+
+IPSECPOLICY = {
+    'encryption_algorithm': ['aes128'], 'integrity_algorithm': ['sha1'],
+    'dh_group': ['modp2048'], 'esn_mode': 'noesn',
+    'transform_protocol': 'esp', 'encapsulation_mode': 'tunnel',
+    'lifetime_value': 1, 'lifetime_units': 'hours',
+}
+
+VPNBIND = {
+    'id': 'bind1', 'dpd_action': 'hold', 'dpd_interval': 30,
+    'dpd_timeout': 120, 'auth_mode': 'psk', 'psk': '',
+    'ikepolicy_id': 'ike1', 'ipsecpolicy_id': 'ipsec1', 'peer': False,
+}
+
+
+def make_config(version=1):
+    """VPN configuration of a VPNBindGroupToGroup between the
+    VPNEndpointGroup of the IPsecEnforcer(FQDN) and a VPNEndpointGroup
+    with the PEERS IPsecEnforcers"""
+    vpnbind = dict(VPNBIND, vpnendpointgroup_id='group1',
+                   peer_vpnendpointgroup_id='group2')
+    return {
+        'version': version,
+        'ikepolicy': {'ike1': copy.deepcopy(IKEPOLICY)},
+        'ipsecpolicy': {'ipsec1': copy.deepcopy(IPSECPOLICY)},
+        'vpncacertificate': {},
+        'vpncertificate': {},
+        'vpnendpointgroup': {'group1': {}, 'group2': {}},
+        'vpnbind_group_to_group': {'bind1': vpnbind},
+        'fqdn_list': {'group1': [FQDN], 'group2': list(PEERS)},
+        'fqdn_pair_psk': dict(('bind1_%s_%s' % (FQDN, peer), 'psk-' + peer)
+                              for peer in PEERS),
+    }
+
+
+class StrongswanTestCase(TestCase):
+    """TestCase with the Strongswan files(IPSEC_CONF, IPSEC_SECRETS and
+    IPSEC_D) in a temporary directory, and the fake 'ipsec' command"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for name in ('bin', 'cacerts', 'certs', 'private'):
+            os.mkdir(os.path.join(self.directory, name))
+
+        self.ipsec_log = os.path.join(self.directory, 'ipsec.log')
+        ipsec = os.path.join(self.directory, 'bin', 'ipsec')
+        with open(ipsec, 'w') as f:
+            f.write(FAKE_IPSEC % self.ipsec_log)
+        os.chmod(ipsec, 0o755)
+
+        self.path = os.environ['PATH']
+        os.environ['PATH'] = (os.path.dirname(ipsec) + os.pathsep +
+                              self.path)
+
+        self.files = dict((name, getattr(prepare_vpn_configurations, name))
+                          for name in ('IPSEC_CONF', 'IPSEC_SECRETS',
+                                       'IPSEC_D'))
+        prepare_vpn_configurations.IPSEC_CONF = self.path_of('ipsec.conf')
+        prepare_vpn_configurations.IPSEC_SECRETS = self.path_of(
+                'ipsec.secrets')
+        prepare_vpn_configurations.IPSEC_D = self.directory
+
+    def tearDown(self):
+        for name, value in self.files.iteritems():
+            setattr(prepare_vpn_configurations, name, value)
+        os.environ['PATH'] = self.path
+        os.environ.pop('FAKE_IPSEC_FAIL', None)
+        shutil.rmtree(self.directory)
+
+    def path_of(self, *names):
+        return os.path.join(self.directory, *names)
+
+    def read(self, *names):
+        with open(self.path_of(*names)) as f:
+            return f.read()
+
+    def ipsec_commands(self):
+        """The 'ipsec' commands run since the last call"""
+        if not os.path.exists(self.ipsec_log):
+            return []
+
+        with open(self.ipsec_log) as f:
+            commands = [line.strip() for line in f]
+        os.remove(self.ipsec_log)
+        return commands
+
+    def install(self, config):
+        prepare_vpn_configurations.install_configurations(config, FQDN)